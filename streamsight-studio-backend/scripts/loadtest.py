@@ -0,0 +1,370 @@
+"""
+HTTP load-testing harness for the Streamsight Studio API.
+
+Drives scripted user scenarios concurrently with async httpx, either in-process
+against the ASGI app or against a running server, and reports latency
+percentiles and throughput per endpoint.
+
+Usage:
+    uv run python scripts/loadtest.py --users 20 --iterations 5
+    uv run python scripts/loadtest.py --base-url http://localhost:9000 --scenario full
+    uv run python scripts/loadtest.py --baseline scripts/baselines/loadtest.json --save-baseline
+
+Scenarios:
+    browse  login, catalog fetch and job listing
+    full    browse + create stream, add algorithms, run, poll and fetch results
+
+Notes:
+    In-process mode (no --base-url) starts the embedded evaluation workers with
+    the app, so evaluations compete with the API for CPU in this process. Use
+    --base-url against uvicorn with standalone workers to measure the API on
+    its own.
+
+The exit code is non-zero if an endpoint breaches the p95 SLO or regresses
+against the stored baseline.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import uuid
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import httpx
+
+from streamsight_studio_backend.services.job_status import FINISHED_STATUSES
+
+
+API_PREFIX = "/api/v1"
+
+
+@dataclass
+class EndpointStats:
+    """Latency samples and error count collected for one endpoint."""
+
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+
+    @property
+    def count(self) -> int:
+        return len(self.latencies) + self.errors
+
+
+@dataclass
+class LoadTestConfig:
+    scenario: str
+    users: int
+    iterations: int
+    credentials: list[tuple[str, str]]
+    dataset: str
+    algorithm: str
+    timestamp_split_start: str
+    window_size: int
+    top_k: int
+    metrics: list[str]
+    poll_interval: float
+    poll_timeout: float
+    keep_jobs: bool
+
+
+class Recorder:
+    """Collect per-endpoint timings keyed by method and route template."""
+
+    def __init__(self) -> None:
+        self.stats: dict[str, EndpointStats] = defaultdict(EndpointStats)
+
+    async def request(
+        self,
+        client: httpx.AsyncClient,
+        method: str,
+        template: str,
+        url: str | None = None,
+        **kwargs,
+    ) -> httpx.Response | None:
+        """Issue a request and record its latency under `method template`."""
+        key = f"{method} {template}"
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, f"{API_PREFIX}{url or template}", **kwargs)
+        except httpx.HTTPError:
+            self.stats[key].errors += 1
+            return None
+        elapsed = time.perf_counter() - start
+        if response.status_code >= 400:
+            self.stats[key].errors += 1
+            return response
+        self.stats[key].latencies.append(elapsed)
+        return response
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    pos = (len(sorted_values) - 1) * q
+    lower = int(pos)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (pos - lower)
+
+
+def summarize(stats: dict[str, EndpointStats], duration: float) -> dict[str, dict[str, float]]:
+    """Reduce raw samples to p50/p95/p99 (ms), mean, throughput and error counts."""
+    summary = {}
+    for key, endpoint in sorted(stats.items()):
+        values = sorted(endpoint.latencies)
+        summary[key] = {
+            "count": endpoint.count,
+            "errors": endpoint.errors,
+            "throughput_rps": endpoint.count / duration if duration > 0 else 0.0,
+            "mean_ms": (sum(values) / len(values) * 1000) if values else 0.0,
+            "p50_ms": percentile(values, 0.50) * 1000,
+            "p95_ms": percentile(values, 0.95) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+        }
+    return summary
+
+
+async def _login(client: httpx.AsyncClient, rec: Recorder, username: str, password: str) -> bool:
+    response = await rec.request(
+        client, "POST", "/auth/token", data={"username": username, "password": password}
+    )
+    if response is None or response.status_code != 200:
+        return False
+    client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+    return True
+
+
+async def _browse(client: httpx.AsyncClient, rec: Recorder, config: LoadTestConfig) -> None:
+    await rec.request(client, "GET", "/dataset/get_dataset")
+    await rec.request(client, "GET", "/algorithm/list")
+    await rec.request(client, "GET", "/metric/get_metric")
+    await rec.request(client, "GET", "/stream/list_all")
+
+
+async def _poll_until_done(
+    client: httpx.AsyncClient, rec: Recorder, config: LoadTestConfig, stream_job_id: int
+) -> str | None:
+    deadline = time.monotonic() + config.poll_timeout
+    while time.monotonic() < deadline:
+        response = await rec.request(client, "GET", "/stream/list_all")
+        if response is not None and response.status_code == 200:
+            job = next((j for j in response.json() if j["id"] == stream_job_id), None)
+            if job is None:
+                return None
+            if job["status"] in FINISHED_STATUSES:
+                return job["status"]
+        await asyncio.sleep(config.poll_interval)
+    return None
+
+
+async def _full(client: httpx.AsyncClient, rec: Recorder, config: LoadTestConfig) -> None:
+    await _browse(client, rec, config)
+
+    response = await rec.request(
+        client,
+        "POST",
+        "/stream/create_stream",
+        json={
+            "name": f"loadtest-{uuid.uuid4().hex[:12]}",
+            "description": "Created by scripts/loadtest.py",
+            "dataset": config.dataset,
+            "top_k": config.top_k,
+            "metrics": config.metrics,
+            "timestamp_split_start": config.timestamp_split_start,
+            "window_size": config.window_size,
+        },
+    )
+    if response is None or response.status_code != 200:
+        return
+    stream_job_id = response.json()["stream_job_id"]
+
+    try:
+        await rec.request(
+            client,
+            "POST",
+            "/stream/{id}/add_algorithms",
+            url=f"/stream/{stream_job_id}/add_algorithms",
+            json={"algorithms": [{"name": config.algorithm, "params": {}}]},
+        )
+        await rec.request(
+            client, "POST", "/evaluator/{id}/run", url=f"/evaluator/{stream_job_id}/run"
+        )
+        if await _poll_until_done(client, rec, config, stream_job_id) is not None:
+            await rec.request(
+                client, "GET", "/evaluator/{id}/results", url=f"/evaluator/{stream_job_id}/results"
+            )
+    finally:
+        if not config.keep_jobs:
+            await rec.request(client, "DELETE", "/stream/{id}", url=f"/stream/{stream_job_id}")
+
+
+Scenario = Callable[[httpx.AsyncClient, Recorder, LoadTestConfig], Awaitable[None]]
+
+SCENARIOS: dict[str, Scenario] = {
+    "browse": _browse,
+    "full": _full,
+}
+
+
+async def _virtual_user(
+    index: int,
+    make_client: Callable[[], httpx.AsyncClient],
+    rec: Recorder,
+    config: LoadTestConfig,
+) -> None:
+    username, password = config.credentials[index % len(config.credentials)]
+    scenario = SCENARIOS[config.scenario]
+    async with make_client() as client:
+        if not await _login(client, rec, username, password):
+            return
+        for _ in range(config.iterations):
+            await scenario(client, rec, config)
+
+
+async def run_load_test(config: LoadTestConfig, base_url: str | None) -> tuple[dict, float]:
+    """Run all virtual users to completion and return (summary, duration)."""
+    rec = Recorder()
+    async with AsyncExitStack() as stack:
+        if base_url:
+            def make_client() -> httpx.AsyncClient:
+                return httpx.AsyncClient(base_url=base_url, timeout=config.poll_timeout)
+        else:
+            from streamsight_studio_backend.api.app import create_app
+
+            app = create_app()
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            transport = httpx.ASGITransport(app=app)
+
+            def make_client() -> httpx.AsyncClient:
+                return httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(_virtual_user(i, make_client, rec, config) for i in range(config.users)))
+        duration = time.perf_counter() - start
+    return summarize(rec.stats, duration), duration
+
+
+def find_violations(
+    summary: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]] | None,
+    tolerance: float,
+    slo_p95_ms: float | None,
+) -> list[str]:
+    """Return human readable SLO breaches and regressions against `baseline`."""
+    violations = []
+    for key, current in summary.items():
+        if slo_p95_ms is not None and current["p95_ms"] > slo_p95_ms:
+            violations.append(f"{key}: p95 {current['p95_ms']:.1f}ms exceeds SLO {slo_p95_ms:.1f}ms")
+        if not baseline or key not in baseline:
+            continue
+        previous = baseline[key]
+        for stat in ("p50_ms", "p95_ms", "p99_ms"):
+            if previous.get(stat) and current[stat] > previous[stat] * (1 + tolerance):
+                violations.append(f"{key}: {stat} {current[stat]:.1f}ms vs baseline {previous[stat]:.1f}ms")
+        if previous.get("throughput_rps") and current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            violations.append(
+                f"{key}: throughput {current['throughput_rps']:.2f}rps vs baseline {previous['throughput_rps']:.2f}rps"
+            )
+    return violations
+
+
+def print_report(summary: dict[str, dict[str, float]], duration: float) -> None:
+    header = f"{'endpoint':<40} {'count':>7} {'err':>5} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9}"
+    print(header)
+    print("-" * len(header))
+    for key, s in summary.items():
+        print(
+            f"{key:<40} {s['count']:>7} {s['errors']:>5} {s['throughput_rps']:>8.2f} "
+            f"{s['p50_ms']:>7.1f}ms {s['p95_ms']:>7.1f}ms {s['p99_ms']:>7.1f}ms"
+        )
+    print(f"\nTotal duration: {duration:.2f}s")
+
+
+def _parse_credentials(value: str) -> list[tuple[str, str]]:
+    pairs = []
+    for item in value.split(","):
+        username, _, password = item.partition(":")
+        pairs.append((username, password or username))
+    return pairs
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load test the Streamsight Studio API.")
+    parser.add_argument("--base-url", help="Target a running server instead of the in-process ASGI app.")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="browse")
+    parser.add_argument("--users", type=int, default=10, help="Number of concurrent virtual users.")
+    parser.add_argument("--iterations", type=int, default=3, help="Scenario iterations per user.")
+    parser.add_argument(
+        "--credentials",
+        default="admin,alice,bob,carol",
+        help="Comma separated username[:password] list; password defaults to the username.",
+    )
+    parser.add_argument("--dataset", default="MovieLens100K")
+    parser.add_argument("--algorithm", default="ItemKNNIncremental")
+    parser.add_argument("--timestamp-split-start", default="1998-02-05T00:00:00Z")
+    parser.add_argument("--window-size", type=int, default=2592000)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--metrics", default="PrecisionK,RecallK")
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--poll-timeout", type=float, default=600.0)
+    parser.add_argument("--keep-jobs", action="store_true", help="Do not delete jobs created by the run.")
+    parser.add_argument("--baseline", type=Path, help="JSON file with baseline results to compare against.")
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run's results to --baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression (0.2 = 20%%).")
+    parser.add_argument("--slo-p95-ms", type=float, help="Flag endpoints whose p95 exceeds this latency.")
+    parser.add_argument("--output", type=Path, help="Write the summary as JSON to this path.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    config = LoadTestConfig(
+        scenario=args.scenario,
+        users=args.users,
+        iterations=args.iterations,
+        credentials=_parse_credentials(args.credentials),
+        dataset=args.dataset,
+        algorithm=args.algorithm,
+        timestamp_split_start=args.timestamp_split_start,
+        window_size=args.window_size,
+        top_k=args.top_k,
+        metrics=args.metrics.split(","),
+        poll_interval=args.poll_interval,
+        poll_timeout=args.poll_timeout,
+        keep_jobs=args.keep_jobs,
+    )
+
+    summary, duration = asyncio.run(run_load_test(config, args.base_url))
+    print_report(summary, duration)
+
+    if args.output:
+        args.output.write_text(json.dumps(summary, indent=2))
+
+    baseline = None
+    if args.baseline and args.baseline.exists() and not args.save_baseline:
+        baseline = json.loads(args.baseline.read_text()).get(config.scenario)
+
+    violations = find_violations(summary, baseline, args.tolerance, args.slo_p95_ms)
+    if violations:
+        print("\nRegressions / SLO violations:")
+        for violation in violations:
+            print(f"  - {violation}")
+
+    if args.save_baseline and args.baseline:
+        stored = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        stored[config.scenario] = summary
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(stored, indent=2))
+        print(f"\nBaseline for scenario '{config.scenario}' written to {args.baseline}")
+
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""
+Peak memory of in-memory and low-memory evaluation as the number of windows grows.
+
+Evaluates a synthetic stream with a fixed number of interactions per window
+for an increasing number of windows, once with the regular sliding window
+setting and once in low-memory mode (services/spill.py). Every run happens in
+a fresh process so that RSS high-water marks do not carry over, and reports
+the peak RSS of the split stage and of the evaluate and collect-results
+stages. The dataset itself is in memory during the split in both modes, so
+the split peak grows with the stream either way; from the evaluation on, the
+low-memory peak should stay roughly flat.
+
+Usage:
+    uv run python scripts/spill_benchmark.py
+    uv run python scripts/spill_benchmark.py --windows 10 20 40 80 --interactions-per-window 20000
+
+The exit code is non-zero if the low-memory evaluation peak grows by more than
+--max-slope-ratio of the in-memory growth per window.
+"""
+
+import argparse
+import multiprocessing as mp
+import sys
+
+import numpy as np
+import pandas as pd
+
+from streamsight_studio_backend.services.profiling import StageProfiler
+
+
+WINDOW_SIZE = 86400
+BACKGROUND_T = 10 * WINDOW_SIZE
+JOB_ID_BASE = 2**30  # scratch directories of the benchmark, clear of real job ids
+
+
+def _synthetic_data(num_windows: int, interactions_per_window: int, num_users: int, num_items: int, seed: int = 0):
+    from streamsight.matrix import InteractionMatrix
+
+    rng = np.random.default_rng(seed)
+    # Background of ten windows' worth of interactions, then `num_windows` windows
+    num_interactions = (10 + num_windows) * interactions_per_window
+    df = pd.DataFrame(
+        {
+            "user": rng.integers(0, num_users, num_interactions),
+            # Skewed item popularity, as in real interaction data
+            "item": np.minimum(rng.zipf(1.3, num_interactions) - 1, num_items - 1),
+            "ts": np.sort(rng.integers(0, BACKGROUND_T + num_windows * WINDOW_SIZE, num_interactions)),
+        }
+    )
+    return InteractionMatrix(df, item_ix="item", user_ix="user", timestamp_ix="ts")
+
+
+def _run(low_memory: bool, num_windows: int, args: argparse.Namespace, results) -> None:
+    import streamsight.evaluators
+    import streamsight.settings
+    from streamsight.registries import ALGORITHM_REGISTRY
+
+    from streamsight_studio_backend.services.pipeline import iter_windows
+    from streamsight_studio_backend.services.spill import MetricSpill, clear_scratch, create_spilling_setting
+
+    job_id = JOB_ID_BASE + num_windows * 2 + int(low_memory)
+    profiler = StageProfiler()
+    data = _synthetic_data(num_windows, args.interactions_per_window, args.users, args.items)
+    try:
+        with profiler.stage("split"):
+            if low_memory:
+                setting = create_spilling_setting(job_id, BACKGROUND_T, WINDOW_SIZE, args.top_k)
+            else:
+                setting = streamsight.settings.SlidingWindowSetting(
+                    background_t=BACKGROUND_T, window_size=WINDOW_SIZE, top_K=args.top_k
+                )
+            setting.split(data)
+            data = None
+
+        builder = streamsight.evaluators.EvaluatorPipelineBuilder()
+        builder.add_setting(setting)
+        builder.set_metric_K(args.top_k)
+        for metric in args.metrics:
+            builder.add_metric(metric)
+        for algorithm in args.algorithms:
+            builder.add_algorithm(ALGORITHM_REGISTRY.get(algorithm))
+        evaluator = builder.build()
+
+        with profiler.stage("evaluate"):
+            spill = MetricSpill(job_id) if low_memory else None
+            if spill is not None:
+                spill.truncate(0)
+            for step in iter_windows(evaluator):
+                if spill is not None:
+                    spill.spill(evaluator, step - 1)
+
+        # What the save stage holds before writing to the database
+        with profiler.stage("collect_results"):
+            if spill is not None:
+                frames = [spill.macro_results(), spill.micro_results(), spill.window_results()]
+                num_user_rows = sum(len(user_df) for user_df in spill.iter_user_results())
+            else:
+                frames = [evaluator.metric_results(level) for level in ("macro", "micro", "window")]
+                num_user_rows = len(evaluator.metric_results("user"))
+    finally:
+        clear_scratch(job_id)
+
+    peaks = {timing.stage: timing.peak_rss for timing in profiler.stages}
+    results.append(
+        {
+            "low_memory": low_memory,
+            "windows": setting.num_split,
+            "split": peaks["split"],
+            "evaluate": max(peaks["evaluate"], peaks["collect_results"]),
+            "user_rows": num_user_rows,
+            "macro_rows": len(frames[0]),
+        }
+    )
+
+
+def _slope(rows: list[dict], key: str) -> float:
+    """Least squares growth of `key` in bytes per window."""
+    windows = np.array([row["windows"] for row in rows], dtype=float)
+    values = np.array([row[key] for row in rows], dtype=float)
+    if len(rows) < 2 or np.ptp(windows) == 0:
+        return 0.0
+    return float(np.polyfit(windows, values, 1)[0])
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark peak memory of low-memory evaluation.")
+    parser.add_argument("--windows", type=int, nargs="+", default=[10, 20, 40, 80])
+    parser.add_argument("--interactions-per-window", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--metrics", nargs="+", default=["PrecisionK", "RecallK", "NDCGK"])
+    parser.add_argument("--algorithms", nargs="+", default=["MostPop", "RecentPopularity"])
+    parser.add_argument("--max-slope-ratio", type=float, default=0.2)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    ctx = mp.get_context("spawn")
+    with ctx.Manager() as manager:
+        results = manager.list()
+        for num_windows in args.windows:
+            for low_memory in (False, True):
+                process = ctx.Process(target=_run, args=(low_memory, num_windows, args, results))
+                process.start()
+                process.join()
+                if process.exitcode != 0:
+                    print(f"Run with {num_windows} windows (low_memory={low_memory}) failed", file=sys.stderr)
+                    return 1
+        rows = sorted(results, key=lambda row: (row["low_memory"], row["windows"]))
+
+    print(f"{'mode':<12}{'windows':>8}{'split MiB':>12}{'evaluate MiB':>14}{'user rows':>12}")
+    for row in rows:
+        mode = "low-memory" if row["low_memory"] else "in-memory"
+        print(
+            f"{mode:<12}{row['windows']:>8}{row['split'] / 2**20:>12.1f}"
+            f"{row['evaluate'] / 2**20:>14.1f}{row['user_rows']:>12}"
+        )
+
+    in_memory = [row for row in rows if not row["low_memory"]]
+    low_memory = [row for row in rows if row["low_memory"]]
+    for a, b in zip(in_memory, low_memory):
+        if (a["user_rows"], a["macro_rows"]) != (b["user_rows"], b["macro_rows"]):
+            print(f"Result rows differ at {a['windows']} windows", file=sys.stderr)
+            return 1
+    in_memory_slope = _slope(in_memory, "evaluate")
+    low_memory_slope = _slope(low_memory, "evaluate")
+    print(
+        f"\nEvaluation peak growth per window: in-memory {in_memory_slope / 2**10:.1f} KiB, "
+        f"low-memory {low_memory_slope / 2**10:.1f} KiB"
+    )
+    if in_memory_slope > 0 and low_memory_slope > args.max_slope_ratio * in_memory_slope:
+        print(f"Low-memory growth exceeds {args.max_slope_ratio:.0%} of the in-memory growth", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,17 @@
+import logging as logger
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
+from fastapi.responses import PlainTextResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.sessions import SessionMiddleware
 
+from streamsight_studio_backend.api.middleware import PrometheusMiddleware
 from streamsight_studio_backend.config import Settings, get_settings, setup_logging
-from streamsight_studio_backend.db.connection import create_tables
+from streamsight_studio_backend.db.connection import create_tables, get_database_manager
 from streamsight_studio_backend.db.seed import seed_inital_stream_jobs, seed_initial_users
 from streamsight_studio_backend.router import (
     create_algorithm_router,
@@ -17,9 +19,18 @@ from streamsight_studio_backend.router import (
     create_auth_router,
     create_dataset_router,
     create_evaluator_router,
+    create_leaderboard_router,
     create_metric_router,
     create_stream_router,
+    create_sweep_router,
 )
+from streamsight_studio_backend.services.leaderboard import backfill_leaderboard
+from streamsight_studio_backend.services.queue import enqueue_interrupted_jobs
+from streamsight_studio_backend.services.telemetry import render_metrics
+from streamsight_studio_backend.services.worker import start_embedded_workers, stop_embedded_workers
+
+
+logger = logger.getLogger(__name__)
 
 
 def create_app() -> FastAPI:
@@ -37,7 +48,13 @@ def create_app() -> FastAPI:
         # seed initial users (idempotent)
         seed_initial_users()
         seed_inital_stream_jobs()
+        _backfill_leaderboard()
+        if settings.EVALUATION_RESUME_ON_STARTUP:
+            _resume_interrupted_jobs()
+        # Standalone workers (streamsight-studio-worker) may run instead or in addition
+        start_embedded_workers(settings.EVALUATION_EMBEDDED_WORKERS)
         yield
+        stop_embedded_workers(timeout=settings.WORKER_HEARTBEAT_INTERVAL)
 
     app = FastAPI(
         title="Streamsight API",
@@ -59,6 +76,31 @@ def create_app() -> FastAPI:
     return app
 
 
+def _resume_interrupted_jobs() -> None:
+    """Queue running jobs that have no queue entry so a worker resumes them from their last checkpoint.
+
+    Jobs that are in the queue are recovered by the workers themselves once the
+    heartbeat of their previous worker goes stale.
+    """
+    db = get_database_manager().get_session()
+    try:
+        for job_id in enqueue_interrupted_jobs(db):
+            logger.info(f"Recovering interrupted stream job {job_id}")
+    finally:
+        db.close()
+
+
+def _backfill_leaderboard() -> None:
+    """Fill the leaderboard from existing results the first time it is empty."""
+    db = get_database_manager().get_session()
+    try:
+        added = backfill_leaderboard(db)
+        if added:
+            logger.info(f"Backfilled the leaderboard with {added} result fingerprints")
+    finally:
+        db.close()
+
+
 def _add_middleware(app: FastAPI, settings: Settings) -> None:
     """Add middleware to the application."""
     # CORS middleware
@@ -73,6 +115,8 @@ def _add_middleware(app: FastAPI, settings: Settings) -> None:
         SessionMiddleware,
         secret_key=settings.SESSION_SECRET_KEY,
     )
+    # Added last so it wraps the whole stack and times the full request
+    app.add_middleware(PrometheusMiddleware)
 
 
 def _add_routes(app: FastAPI, settings: Settings) -> None:
@@ -99,10 +143,17 @@ def _add_routes(app: FastAPI, settings: Settings) -> None:
             "using_env_file": settings.USING_ENV_FILE,
         }
 
+    @app.get("/metrics", include_in_schema=False)
+    def metrics() -> PlainTextResponse:
+        """Prometheus scrape endpoint."""
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
     app.include_router(create_auth_router(), prefix=API_PREFIX)
     app.include_router(create_auth_google_router(), prefix=API_PREFIX)
     app.include_router(create_dataset_router(), prefix=API_PREFIX)
     app.include_router(create_algorithm_router(), prefix=API_PREFIX)
     app.include_router(create_stream_router(), prefix=API_PREFIX)
+    app.include_router(create_sweep_router(), prefix=API_PREFIX)
     app.include_router(create_evaluator_router(), prefix=API_PREFIX)
-    app.include_router(create_metric_router(), prefix=API_PREFIX)
\ No newline at end of file
+    app.include_router(create_metric_router(), prefix=API_PREFIX)
+    app.include_router(create_leaderboard_router(), prefix=API_PREFIX)
\ No newline at end of file
@@ -0,0 +1,56 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from streamsight_studio_backend.services.telemetry import (
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS,
+    HTTP_REQUESTS_IN_FLIGHT,
+)
+
+
+class PrometheusMiddleware:
+    """Record request count, latency and in-flight requests per route template.
+
+    Latency ends with the last body chunk, before any background tasks run.
+    """
+
+    def __init__(self, app: ASGIApp, exclude_paths: tuple[str, ...] = ("/metrics",)) -> None:
+        self.app = app
+        self.exclude_paths = exclude_paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        start = time.perf_counter()
+        status_code = 500
+        finished = False
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+
+        def finish() -> None:
+            nonlocal finished
+            if finished:
+                return
+            finished = True
+            # Use the matched route template to keep label cardinality bounded
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            HTTP_REQUESTS.inc(method, template, str(status_code))
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, method, template)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finish()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            finish()
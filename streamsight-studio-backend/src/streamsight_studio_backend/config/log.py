@@ -1,28 +1,219 @@
+"""
+Logging of the API and worker processes.
+
+Loggers only put records on a queue; a listener thread formats and writes
+them, so a log call costs the caller little more than building the message.
+Records go to stdout, as JSON lines by default (LOG_FORMAT=text for the plain
+format), and records logged while a stream job is evaluated also go to that
+job's log: a ring buffer of its last JOB_LOG_MAX_RECORDS records, written to
+`datalake/logs/<stream_job_id>.jsonl` so that the API can serve it whichever
+process ran the job.
+"""
+
+import atexit
+import copy
+import json
 import logging
+import os
+import queue
 import sys
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from .setting import get_settings
+
+
+logger = logging.getLogger(__name__)
+
+# Stream job whose evaluation the current thread is running
+_current_job: ContextVar[int | None] = ContextVar("current_job", default=None)
+_listener: QueueListener | None = None
+
+# Attributes every LogRecord has; any other attribute was passed in `extra`
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with the fields passed in `extra` as keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _JobQueueHandler(QueueHandler):
+    """QueueHandler that tags records with the stream job being evaluated."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Unlike QueueHandler.prepare(), keep the traceback out of the message
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        stream_job_id = _current_job.get()
+        if stream_job_id is not None and not hasattr(record, "stream_job_id"):
+            record.stream_job_id = stream_job_id
+        return record
+
+
+def _job_log_path(stream_job_id: int) -> str:
+    base_path = get_settings().get_datalake_config()["base_path"]
+    return os.path.join(base_path, "logs", f"{stream_job_id}.jsonl")
+
+
+class JobLogHandler(logging.Handler):
+    """Keeps the last records of every stream job and writes them to its log file.
+
+    Runs on the listener thread only. Files are rewritten at most every
+    `flush_interval` seconds and when a job's evaluation ends; a job that runs
+    again continues the ring buffer of its previous runs.
+    """
+
+    def __init__(self, max_records: int, flush_interval: float) -> None:
+        super().__init__()
+        self.max_records = max_records
+        self.flush_interval = flush_interval
+        self._buffers: dict[int, deque[str]] = {}
+        self._dirty: set[int] = set()
+        self._last_flush = time.monotonic()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        stream_job_id = getattr(record, "stream_job_id", None)
+        if stream_job_id is None:
+            return
+        try:
+            buffer = self._buffers.get(stream_job_id)
+            if buffer is None:
+                buffer = self._buffers[stream_job_id] = deque(_read_lines(stream_job_id), maxlen=self.max_records)
+            buffer.append(self.format(record))
+            self._dirty.add(stream_job_id)
+            if getattr(record, "job_log_end", False):
+                self._write(stream_job_id)
+                del self._buffers[stream_job_id]
+            elif time.monotonic() - self._last_flush >= self.flush_interval:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        for stream_job_id in list(self._dirty):
+            self._write(stream_job_id)
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        self.flush()
+        super().close()
+
+    def _write(self, stream_job_id: int) -> None:
+        self._dirty.discard(stream_job_id)
+        path = _job_log_path(stream_job_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.writelines(f"{line}\n" for line in self._buffers[stream_job_id])
+        os.replace(tmp_path, path)
+
+
+def _read_lines(stream_job_id: int) -> list[str]:
+    try:
+        with open(_job_log_path(stream_job_id)) as f:
+            return [line.rstrip("\n") for line in f if line.strip()]
+    except OSError:
+        return []
+
+
+def read_job_log(stream_job_id: int, limit: int | None = None) -> list[dict]:
+    """The logged records of a stream job, oldest first, optionally only the last `limit`."""
+    lines = _read_lines(stream_job_id)
+    if limit is not None:
+        lines = lines[-limit:] if limit > 0 else []
+    return [json.loads(line) for line in lines]
+
+
+def clear_job_log(stream_job_id: int) -> None:
+    try:
+        os.remove(_job_log_path(stream_job_id))
+    except OSError:
+        pass
+
+
+@contextmanager
+def job_logging(stream_job_id: int) -> Iterator[None]:
+    """Capture the records logged by the current thread in the log of a stream job."""
+    token = _current_job.set(stream_job_id)
+    try:
+        yield
+    finally:
+        logger.info(f"Log of stream job {stream_job_id} closed", extra={"job_log_end": True})
+        _current_job.reset(token)
+
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
 
 
 def setup_logging() -> None:
     """Set up logging configuration to capture all logs including streamsight library."""
+    global _listener
+    settings = get_settings()
 
     # Create console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(logging.DEBUG)
-    formatter = logging.Formatter('%(levelname)s - %(message)s')
-    console_handler.setFormatter(formatter)
+    if settings.LOG_FORMAT == "json":
+        console_handler.setFormatter(JsonFormatter())
+    else:
+        console_handler.setFormatter(logging.Formatter("%(levelname)s - %(message)s"))
+
+    job_handler = JobLogHandler(settings.JOB_LOG_MAX_RECORDS, settings.JOB_LOG_FLUSH_INTERVAL)
+    job_handler.setFormatter(JsonFormatter())
+
+    # Handlers run on the listener thread, loggers only enqueue
+    _stop_listener()
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, console_handler, job_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.unregister(_stop_listener)
+    atexit.register(_stop_listener)
 
     # Configure root logger
     root_logger = logging.getLogger()
-    root_logger.setLevel(logging.INFO)
+    root_logger.setLevel(settings.LOG_LEVEL)
     # Remove any existing handlers to avoid duplicates
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
-    root_logger.addHandler(console_handler)
+    root_logger.addHandler(_JobQueueHandler(log_queue))
 
     # Make streamsight logger propagate to root so we capture its logs
-    streamsight_logger = logging.getLogger('streamsight')
+    streamsight_logger = logging.getLogger("streamsight")
     streamsight_logger.propagate = True
 
     # Also ensure our backend logger propagates
-    backend_logger = logging.getLogger('streamsight_studio_backend')
+    backend_logger = logging.getLogger("streamsight_studio_backend")
     backend_logger.propagate = True
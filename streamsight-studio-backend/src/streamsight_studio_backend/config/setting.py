@@ -60,6 +60,60 @@ class Settings:
         # Database Configuration
         self.DATABASE_URL = _default_db_path()
 
+        # Read replica serving read-only endpoints (unset reads from the primary). A client keeps
+        # reading from the primary for DATABASE_REPLICA_STICKY_SECONDS after each of its writes
+        self.DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL") or None
+        self.DATABASE_REPLICA_STICKY_SECONDS = float(os.getenv("DATABASE_REPLICA_STICKY_SECONDS", "5"))
+
+        # Evaluation memory budget (admission control)
+        self.EVALUATION_MEMORY_BUDGET_MB = int(os.getenv("EVALUATION_MEMORY_BUDGET_MB", "4096"))
+        self.EVALUATION_MEMORY_HARD_LIMIT_MB = int(
+            os.getenv("EVALUATION_MEMORY_HARD_LIMIT_MB", str(int(self.EVALUATION_MEMORY_BUDGET_MB * 1.5)))
+        )
+        self.EVALUATION_MEMORY_DEFAULT_JOB_MB = int(os.getenv("EVALUATION_MEMORY_DEFAULT_JOB_MB", "1024"))
+        self.EVALUATION_MEMORY_SAFETY_FACTOR = float(os.getenv("EVALUATION_MEMORY_SAFETY_FACTOR", "1.5"))
+
+        # Evaluation checkpoints (windows between checkpoints, 0 disables them)
+        self.EVALUATION_CHECKPOINT_INTERVAL = int(os.getenv("EVALUATION_CHECKPOINT_INTERVAL", "1"))
+        self.EVALUATION_RESUME_ON_STARTUP = os.getenv("EVALUATION_RESUME_ON_STARTUP", "true").lower() == "true"
+
+        # Reuse results of identical algorithm configurations across jobs
+        self.EVALUATION_RESULT_CACHE = os.getenv("EVALUATION_RESULT_CACHE", "true").lower() == "true"
+
+        # Processes evaluating the windows of stateless algorithms in parallel (0 or 1 runs them in order)
+        self.EVALUATION_WINDOW_PROCESSES = int(os.getenv("EVALUATION_WINDOW_PROCESSES", "0"))
+
+        # Evaluation workers. Set EVALUATION_EMBEDDED_WORKERS=0 when running streamsight-studio-worker separately
+        self.EVALUATION_EMBEDDED_WORKERS = int(os.getenv("EVALUATION_EMBEDDED_WORKERS", "1"))
+        self.WORKER_POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "2"))
+        self.WORKER_HEARTBEAT_INTERVAL = float(os.getenv("WORKER_HEARTBEAT_INTERVAL", "10"))
+        self.WORKER_HEARTBEAT_TIMEOUT = float(os.getenv("WORKER_HEARTBEAT_TIMEOUT", "60"))
+        self.WORKER_MAX_ATTEMPTS = int(os.getenv("WORKER_MAX_ATTEMPTS", "3"))
+
+        # Scheduling of queued evaluations (0 disables the per-user cap and starvation timeout)
+        self.SCHEDULER_MAX_JOBS_PER_USER = int(os.getenv("SCHEDULER_MAX_JOBS_PER_USER", "2"))
+        self.SCHEDULER_STARVATION_TIMEOUT = float(os.getenv("SCHEDULER_STARVATION_TIMEOUT", "1800"))
+        self.SCHEDULER_DEFAULT_ALGORITHM_COST = float(os.getenv("SCHEDULER_DEFAULT_ALGORITHM_COST", "60"))
+        self.SCHEDULER_INTERACTIVE_MAX_COST = float(os.getenv("SCHEDULER_INTERACTIVE_MAX_COST", "300"))
+
+        # Preview runs on a sample of users or windows
+        self.PREVIEW_DEFAULT_FRACTION = float(os.getenv("PREVIEW_DEFAULT_FRACTION", "0.05"))
+        self.PREVIEW_BOOTSTRAP_SAMPLES = int(os.getenv("PREVIEW_BOOTSTRAP_SAMPLES", "1000"))
+        self.PREVIEW_CONFIDENCE = float(os.getenv("PREVIEW_CONFIDENCE", "0.95"))
+
+        # Paired significance tests between algorithms of a job
+        self.COMPARE_BOOTSTRAP_SAMPLES = int(os.getenv("COMPARE_BOOTSTRAP_SAMPLES", "1000"))
+        self.COMPARE_MAX_BOOTSTRAP_SAMPLES = int(os.getenv("COMPARE_MAX_BOOTSTRAP_SAMPLES", "10000"))
+
+        # Largest number of configurations (child jobs x algorithm parameter combinations) in one sweep
+        self.SWEEP_MAX_CONFIGURATIONS = int(os.getenv("SWEEP_MAX_CONFIGURATIONS", "200"))
+
+        # Logging (LOG_FORMAT is "json" or "text"), and the records kept per stream job
+        self.LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+        self.LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+        self.JOB_LOG_MAX_RECORDS = int(os.getenv("JOB_LOG_MAX_RECORDS", "1000"))
+        self.JOB_LOG_FLUSH_INTERVAL = float(os.getenv("JOB_LOG_FLUSH_INTERVAL", "2"))
+
         # File Paths
         self.BASE_DIR = Path(__file__).parent.parent.parent
         self.LOGS_DIR = self.BASE_DIR / "logs"
@@ -81,6 +135,15 @@ class Settings:
             "execution_options": {"postgresql_fast_executemanypostgresql_fast_executemany": True},
         }
 
+    def get_replica_database_config(self) -> dict | None:
+        """Get read replica database configuration, None without a replica."""
+        if not self.DATABASE_REPLICA_URL:
+            return None
+        return {
+            "url": self.DATABASE_REPLICA_URL,
+            "execution_options": {"postgresql_readonly": True},
+        }
+
     def get_datalake_config(self) -> dict:
         """Get datalake configuration."""
         base_path = _default_datalake_path()
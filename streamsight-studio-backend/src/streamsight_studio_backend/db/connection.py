@@ -1,9 +1,29 @@
+"""
+Database engines and sessions.
+
+Besides the primary, a read replica can be configured with
+DATABASE_REPLICA_URL. Endpoints that only read take their session from
+get_read_db(), which uses the replica, and all others from get_db(). As the
+replica lags behind the primary, a client that just wrote, e.g. created a
+stream job, might not find it on the replica yet. get_read_db() therefore
+keeps a client on the primary for DATABASE_REPLICA_STICKY_SECONDS after each
+commit made by one of its requests. Clients are told apart by the username
+of their access token, so that all tokens and sessions of a user stick
+together, and recent writers are recorded per API process.
+"""
+
+import threading
+import time
 from collections.abc import Generator
 
-from sqlalchemy import Engine, create_engine
+import jwt
+from fastapi import Request
+from sqlalchemy import Engine, create_engine, event, text
 from sqlalchemy.orm import Session, sessionmaker
 
 from streamsight_studio_backend.config.setting import get_settings
+from streamsight_studio_backend.services.auth import decode_token
+from .migration import SCHEMA_LOCK_KEY, upgrade_schema
 from .schema import Base
 
 
@@ -15,6 +35,8 @@ class DatabaseManager:
         self.settings = get_settings()
         self.engine: Engine
         self.SessionLocal: sessionmaker
+        self.replica_engine: Engine | None = None
+        self.ReplicaSessionLocal: sessionmaker | None = None
         self._initialize_engine()
 
     def _initialize_engine(self) -> None:
@@ -23,14 +45,42 @@ class DatabaseManager:
 
         self.engine: Engine = create_engine(**database_config)
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        event.listen(self.SessionLocal, "after_commit", _mark_committed)
+
+        replica_config = self.settings.get_replica_database_config()
+        if replica_config is not None:
+            self.replica_engine = create_engine(**replica_config)
+            self.ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.replica_engine)
+
+    @property
+    def has_replica(self) -> bool:
+        """Whether a read replica is configured."""
+        return self.ReplicaSessionLocal is not None
 
     def get_engine(self) -> Engine:
         """Get database engine."""
         return self.engine
 
+    def pool_status(self) -> dict[str, int]:
+        """Get connection pool usage (size, checked in/out, overflow)."""
+        pool = self.engine.pool
+        status = {}
+        for key in ("size", "checkedin", "checkedout", "overflow"):
+            getter = getattr(pool, key, None)
+            if callable(getter):
+                status[key] = getter()
+        return status
+
     def create_tables(self) -> None:
-        """Create all tables defined in models."""
-        Base.metadata.create_all(bind=self.engine)
+        """Create all tables defined in models and add the columns existing tables lack.
+
+        Runs in one transaction holding an advisory lock, so that the API and
+        the workers starting together do not change the schema concurrently.
+        """
+        with self.engine.begin() as connection:
+            connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+            Base.metadata.create_all(bind=connection)
+            upgrade_schema(connection)
 
     def drop_tables(self) -> None:
         """Drop all tables."""
@@ -40,6 +90,12 @@ class DatabaseManager:
         """Get a new database session."""
         return self.SessionLocal()
 
+    def get_read_session(self) -> Session:
+        """Get a new session on the read replica, or on the primary without a replica."""
+        if self.ReplicaSessionLocal is None:
+            return self.SessionLocal()
+        return self.ReplicaSessionLocal()
+
     def get_db_session(self) -> Generator[Session, None, None]:
         """Get database session for dependency injection."""
         db = self.SessionLocal()
@@ -49,6 +105,47 @@ class DatabaseManager:
             db.close()
 
 
+def _mark_committed(session: Session) -> None:
+    # Marked at commit rather than when the request ends, which may be after the response was sent
+    client = session.info.get("client")
+    if client is not None:
+        _recent_writers.mark(client, get_settings().DATABASE_REPLICA_STICKY_SECONDS)
+
+
+class _RecentWriters:
+    """Clients that committed a write recently, by username."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._until: dict[str, float] = {}
+
+    def mark(self, client: str, seconds: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._until[client] = now + seconds
+            # Drop expired clients now and then, keeping the record small
+            if len(self._until) > 1024:
+                self._until = {key: until for key, until in self._until.items() if until > now}
+
+    def is_recent(self, client: str) -> bool:
+        with self._lock:
+            return self._until.get(client, 0.0) > time.monotonic()
+
+
+_recent_writers = _RecentWriters()
+
+
+def _client_key(request: Request) -> str | None:
+    """Username of the request's access token, None without a valid one."""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return decode_token(token).get("username") or None
+    except jwt.PyJWTError:
+        return None
+
+
 # Global database manager instance
 _db_manager: DatabaseManager = None
 
@@ -61,10 +158,35 @@ def get_database_manager() -> DatabaseManager:
     return _db_manager
 
 
-def get_db() -> Generator[Session]:
+def get_db(request: Request) -> Generator[Session]:
     """Get database session for FastAPI dependency injection."""
     db_manager = get_database_manager()
-    yield from db_manager.get_db_session()
+    db = db_manager.get_session()
+    if db_manager.has_replica:
+        # Reads of this client go to the primary after it commits, see _mark_committed()
+        db.info["client"] = _client_key(request)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db(request: Request) -> Generator[Session]:
+    """Get a read-only database session for FastAPI dependency injection.
+
+    The session is on the read replica, unless none is configured or the
+    client committed a write within the last DATABASE_REPLICA_STICKY_SECONDS.
+    """
+    db_manager = get_database_manager()
+    client = _client_key(request)
+    if not db_manager.has_replica or (client is not None and _recent_writers.is_recent(client)):
+        yield from db_manager.get_db_session()
+        return
+    db = db_manager.get_read_session()
+    try:
+        yield db
+    finally:
+        db.close()
 
 
 def get_engine() -> Engine:
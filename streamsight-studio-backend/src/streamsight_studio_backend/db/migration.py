@@ -0,0 +1,96 @@
+"""In-place upgrade of databases created before columns were added to db/schema.py."""
+
+import logging as logger
+
+from sqlalchemy import Column, Connection, Table, inspect, text
+from sqlalchemy.sql.elements import TextClause
+
+from .schema import Base
+
+
+logger = logger.getLogger(__name__)
+
+# Key of the advisory lock serialising schema changes of processes starting together
+SCHEMA_LOCK_KEY = 0x5757_0001
+
+# SQL values for the existing rows of added columns, by table and column
+_BACKFILLS = {
+    # Status used to be derived from the run timestamps and the algorithms
+    ("stream_job", "status"): """
+        CASE
+            WHEN completed_at IS NOT NULL AND error_message IS NOT NULL THEN 'failed'
+            WHEN completed_at IS NOT NULL THEN 'completed'
+            WHEN started_at IS NOT NULL THEN 'running'
+            WHEN EXISTS (SELECT 1 FROM stream_algorithm WHERE stream_algorithm.stream_job_id = stream_job.id)
+                THEN 'ready'
+            ELSE 'created'
+        END
+    """,
+}
+
+
+def _default_sql(connection: Connection, column: Column) -> str:
+    arg = column.server_default.arg
+    if isinstance(arg, str):
+        return arg
+    if isinstance(arg, TextClause):
+        return arg.text
+    return str(arg.compile(dialect=connection.dialect))
+
+
+def _add_column(connection: Connection, table: Table, column: Column) -> None:
+    preparer = connection.dialect.identifier_preparer
+    table_name, column_name = preparer.format_table(table), preparer.quote(column.name)
+    column_type = column.type.compile(dialect=connection.dialect)
+    statement = f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"
+    if column.server_default is not None:
+        statement += f" DEFAULT {_default_sql(connection, column)}"
+    connection.execute(text(statement))
+
+    backfill = _BACKFILLS.get((table.name, column.name))
+    if backfill is not None:
+        connection.execute(text(f"UPDATE {table_name} SET {column_name} = {backfill}"))
+    elif column.default is not None and column.default.is_scalar:
+        connection.execute(table.update().values({column.name: column.default.arg}))
+    if not column.nullable:
+        connection.execute(text(f"ALTER TABLE {table_name} ALTER COLUMN {column_name} SET NOT NULL"))
+
+    for foreign_key in column.foreign_keys:
+        target = foreign_key.column
+        connection.execute(
+            text(
+                f"ALTER TABLE {table_name} ADD FOREIGN KEY ({column_name}) "
+                f"REFERENCES {preparer.format_table(target.table)} ({preparer.quote(target.name)})"
+            )
+        )
+    logger.info(f"Added column {table.name}.{column.name}")
+
+
+def upgrade_schema(connection: Connection) -> list[str]:
+    """Add the columns, indexes and server defaults existing tables lack. Returns the added columns.
+
+    Runs in the caller's transaction, after create_all().
+    """
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        columns = {column["name"]: column for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in columns:
+                _add_column(connection, table, column)
+                added.append(f"{table.name}.{column.name}")
+            elif column.server_default is not None and columns[column.name]["default"] is None:
+                preparer = connection.dialect.identifier_preparer
+                connection.execute(
+                    text(
+                        f"ALTER TABLE {preparer.format_table(table)} ALTER COLUMN {preparer.quote(column.name)} "
+                        f"SET DEFAULT {_default_sql(connection, column)}"
+                    )
+                )
+                logger.info(f"Set the server default of {table.name}.{column.name}")
+        for index in table.indexes:
+            index.create(bind=connection, checkfirst=True)
+    return added
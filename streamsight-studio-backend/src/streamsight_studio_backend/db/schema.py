@@ -7,13 +7,31 @@ Workflow:
 3. User runs StreamJob → status = "running" (started_at set, completed_at NULL)
 4. Evaluation completes successfully → status = "completed" (completed_at set, error_message NULL)
 5. Evaluation fails → status = "failed" (completed_at set, error_message non-NULL)
+6. User cancels StreamJob → status = "cancelled" (cancelled_at and completed_at set)
 
-Status is derived from timestamps and error_message field.
+Status is a column changed only through services/job_status.py, which records
+every change in StreamJobStatusTransition. The timestamps and error_message
+describe the latest run.
 """
 
 from datetime import datetime, timezone
 
-from sqlalchemy import ARRAY, Column, DateTime, Float, ForeignKey, Integer, Sequence, String, Text
+from sqlalchemy import (
+    ARRAY,
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    Sequence,
+    String,
+    Text,
+    UniqueConstraint,
+    func,
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -28,6 +46,7 @@ class StreamUser(Base):
     username = Column(String, unique=True, nullable=False)
     email = Column(String, unique=True, nullable=True)
     password = Column(String, nullable=False)
+    share_weight = Column(Float, nullable=False, default=1.0)  # relative share of evaluation workers
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
@@ -42,9 +61,23 @@ class StreamJob(Base):
     description = Column(Text)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    status = Column(String, nullable=False, default="created")  # see services/job_status.py
     started_at = Column(DateTime, nullable=True)  # When execution started
     completed_at = Column(DateTime, nullable=True)  # When execution completed
     error_message = Column(Text, nullable=True)  # NULL = success, non-NULL = failure
+    cancelled_at = Column(DateTime, nullable=True)  # When the evaluation was cancelled
+    estimated_memory = Column(BigInteger, nullable=True)  # Estimated peak memory in bytes, set when the job is queued
+    sweep_id = Column(Integer, ForeignKey("parameter_sweep.id"), nullable=True, index=True)  # Set on sweep children
+    # Preview options of the latest run, both NULL for a full evaluation
+    preview_fraction = Column(Float, nullable=True)  # fraction of users sampled
+    preview_windows = Column(Integer, nullable=True)  # number of windows evaluated
+    store_predictions = Column(Boolean, nullable=False, default=False)  # keep top-K predictions for add_metrics
+    low_memory = Column(Boolean, nullable=False, default=False)  # spill windows and scores to disk while evaluating
+    preprocessing = Column(Text, nullable=True)  # JSON spec of services/preprocessing.py, NULL = the raw dataset
+    # Interactions appended after the dataset for live continuation, see services/live.py
+    appended_interactions = Column(Integer, nullable=False, default=0)
+    appended_version = Column(String, nullable=True)  # digest of the appended interactions, NULL = none
+    live_window = Column(Integer, nullable=True)  # next window a continuation evaluates, NULL = not continuable
 
     # Stream configuration
     dataset = Column(String, nullable=False)
@@ -58,23 +91,46 @@ class StreamJob(Base):
 
     # Relationships
     stream_user = relationship("StreamUser", back_populates="streams")
+    sweep = relationship("ParameterSweep", back_populates="stream_jobs")
     stream_algorithms = relationship("StreamAlgorithm", back_populates="stream_job", cascade="all, delete-orphan")
     macro_evaluations = relationship("MacroEvaluationResult", back_populates="stream_job", cascade="all, delete-orphan")
     micro_evaluations = relationship("MicroEvaluationResult", back_populates="stream_job", cascade="all, delete-orphan")
     window_evaluations = relationship("WindowEvaluationResult", back_populates="stream_job", cascade="all, delete-orphan")
     user_evaluations = relationship("UserEvaluationResult", back_populates="stream_job", cascade="all, delete-orphan")
+    window_profiles = relationship("AlgorithmWindowProfile", back_populates="stream_job", cascade="all, delete-orphan")
+    runs = relationship("StreamJobRun", back_populates="stream_job", cascade="all, delete-orphan")
+    queue_entry = relationship(
+        "EvaluationQueueEntry", back_populates="stream_job", uselist=False, cascade="all, delete-orphan"
+    )
+    status_transitions = relationship(
+        "StreamJobStatusTransition", back_populates="stream_job", cascade="all, delete-orphan"
+    )
+
+    __table_args__ = (
+        # Only the few unfinished jobs are indexed; finished ones pile up and are
+        # looked up by user and id instead
+        Index(
+            "ix_stream_job_active_status",
+            "status",
+            "user_id",
+            postgresql_where=status.in_(["created", "ready", "running"]),
+        ),
+    )
+
+
+class StreamJobStatusTransition(Base):
+    """An applied change of StreamJob.status."""
+
+    __tablename__ = "stream_job_status_transition"
+    id = Column(Integer, Sequence("stream_job_status_transition_id_seq"), primary_key=True, autoincrement=True)
+    stream_job_id = Column(Integer, ForeignKey("stream_job.id"), nullable=False, index=True)
+    from_status = Column(String, nullable=False)
+    to_status = Column(String, nullable=False)
+    reason = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
-    @property
-    def status(self) -> str:
-        """Derive status from timestamps and error_message"""
-        if self.completed_at:
-            return "failed" if self.error_message else "completed"
-        elif self.started_at:
-            return "running"
-        elif self.stream_algorithms:  # Has algorithms added
-            return "ready"
-        else:
-            return "created"
+    # Relationships
+    stream_job = relationship("StreamJob", back_populates="status_transitions")
 
 
 class StreamAlgorithm(Base):
@@ -87,6 +143,8 @@ class StreamAlgorithm(Base):
     # Algorithm-specific configuration
     parameters = Column(Text)  # JSON string of algorithm parameters
     added_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    # Fingerprint of the configuration the stored results were computed with, NULL = no results
+    result_fingerprint = Column(String(64), nullable=True, index=True)
 
     # Relationships
     stream_job = relationship("StreamJob", back_populates="stream_algorithms")
@@ -94,18 +152,22 @@ class StreamAlgorithm(Base):
     micro_evaluations = relationship("MicroEvaluationResult", back_populates="stream_algorithm", cascade="all, delete-orphan")
     window_evaluations = relationship("WindowEvaluationResult", back_populates="stream_algorithm", cascade="all, delete-orphan")
     user_evaluations = relationship("UserEvaluationResult", back_populates="stream_algorithm", cascade="all, delete-orphan")
+    window_profiles = relationship("AlgorithmWindowProfile", back_populates="stream_algorithm", cascade="all, delete-orphan")
 
 
 class MacroEvaluationResult(Base):
     __tablename__ = "macro_evaluation_result"
     id = Column(Integer, Sequence("macro_evaluation_result_id_seq"), primary_key=True, autoincrement=True)
-    stream_job_id = Column(Integer, ForeignKey("stream_job.id"), nullable=False)
+    stream_job_id = Column(Integer, ForeignKey("stream_job.id"), nullable=False, index=True)
     stream_algorithm_id = Column(Integer, ForeignKey("stream_algorithm.id"), nullable=False)
 
     # Macro evaluation details
     metric = Column(String, nullable=False)
     macro_score = Column(Float, nullable=False)
     num_window = Column(Integer, nullable=False)
+    approximate = Column(Boolean, nullable=False, default=False)  # computed by a preview run
+    ci_lower = Column(Float, nullable=True)  # bootstrap confidence interval of a preview score
+    ci_upper = Column(Float, nullable=True)
 
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     # Relationships
@@ -116,13 +178,16 @@ class MacroEvaluationResult(Base):
 class MicroEvaluationResult(Base):
     __tablename__ = "micro_evaluation_result"
     id = Column(Integer, Sequence("micro_evaluation_result_id_seq"), primary_key=True, autoincrement=True)
-    stream_job_id = Column(Integer, ForeignKey("stream_job.id"), nullable=False)
+    stream_job_id = Column(Integer, ForeignKey("stream_job.id"), nullable=False, index=True)
     stream_algorithm_id = Column(Integer, ForeignKey("stream_algorithm.id"), nullable=False)
 
     # Micro evaluation details - add specific fields as needed
     metric = Column(String, nullable=False)
     micro_score = Column(Float, nullable=False)
     num_user = Column(Integer, nullable=False)
+    approximate = Column(Boolean, nullable=False, default=False)  # computed by a preview run
+    ci_lower = Column(Float, nullable=True)  # bootstrap confidence interval of a preview score
+    ci_upper = Column(Float, nullable=True)
 
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
@@ -134,7 +199,7 @@ class MicroEvaluationResult(Base):
 class WindowEvaluationResult(Base):
     __tablename__ = "window_evaluation_result"
     id = Column(Integer, Sequence("window_evaluation_result_id_seq"), primary_key=True, autoincrement=True)
-    stream_job_id = Column(Integer, ForeignKey("stream_job.id"), nullable=False)
+    stream_job_id = Column(Integer, ForeignKey("stream_job.id"), nullable=False, index=True)
     stream_algorithm_id = Column(Integer, ForeignKey("stream_algorithm.id"), nullable=False)
 
     # Window evaluation details - add specific fields as needed
@@ -153,7 +218,7 @@ class WindowEvaluationResult(Base):
 class UserEvaluationResult(Base):
     __tablename__ = "user_evaluation_result"
     id = Column(Integer, Sequence("user_evaluation_result_id_seq"), primary_key=True, autoincrement=True)
-    stream_job_id = Column(Integer, ForeignKey("stream_job.id"), nullable=False)
+    stream_job_id = Column(Integer, ForeignKey("stream_job.id"), nullable=False, index=True)
     stream_algorithm_id = Column(Integer, ForeignKey("stream_algorithm.id"), nullable=False)
 
     # User evaluation details - add specific fields as needed
@@ -167,3 +232,159 @@ class UserEvaluationResult(Base):
     # Relationships
     stream_job = relationship("StreamJob", back_populates="user_evaluations")
     stream_algorithm = relationship("StreamAlgorithm", back_populates="user_evaluations")
+
+
+class AlgorithmWindowProfile(Base):
+    """Fit and predict cost of one algorithm in one window, stored and replaced with its results."""
+
+    __tablename__ = "algorithm_window_profile"
+    id = Column(Integer, Sequence("algorithm_window_profile_id_seq"), primary_key=True, autoincrement=True)
+    stream_job_id = Column(Integer, ForeignKey("stream_job.id"), nullable=False, index=True)
+    stream_algorithm_id = Column(Integer, ForeignKey("stream_algorithm.id"), nullable=False, index=True)
+
+    window = Column(Integer, nullable=False)
+    timestamp = Column(String, nullable=False)  # "t=<timestamp>", as in WindowEvaluationResult
+    fit_time = Column(Float, nullable=True)  # seconds fitting the data before the window, NULL if not measured
+    fit_interactions = Column(Integer, nullable=True)
+    predict_time = Column(Float, nullable=False)  # seconds
+    predict_interactions = Column(Integer, nullable=False)
+    peak_memory_delta = Column(BigInteger, nullable=False)  # bytes of RSS above the start of fit or predict
+
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    # Relationships
+    stream_job = relationship("StreamJob", back_populates="window_profiles")
+    stream_algorithm = relationship("StreamAlgorithm", back_populates="window_profiles")
+
+
+class StreamJobRun(Base):
+    """One execution of a StreamJob (initial run or rerun)."""
+
+    __tablename__ = "stream_job_run"
+    id = Column(Integer, Sequence("stream_job_run_id_seq"), primary_key=True, autoincrement=True)
+    stream_job_id = Column(Integer, ForeignKey("stream_job.id"), nullable=False, index=True)
+    streamsight_version = Column(String, nullable=True)
+    started_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    completed_at = Column(DateTime, nullable=True)
+
+    # Relationships
+    stream_job = relationship("StreamJob", back_populates="runs")
+    stages = relationship("StreamJobRunStage", back_populates="run", cascade="all, delete-orphan")
+
+
+class StreamJobRunStage(Base):
+    """Resource usage of a single stage (load, split, build, evaluate, save) within a run."""
+
+    __tablename__ = "stream_job_run_stage"
+    id = Column(Integer, Sequence("stream_job_run_stage_id_seq"), primary_key=True, autoincrement=True)
+    run_id = Column(Integer, ForeignKey("stream_job_run.id"), nullable=False, index=True)
+
+    stage = Column(String, nullable=False)
+    wall_time = Column(Float, nullable=False)  # seconds
+    cpu_time = Column(Float, nullable=False)  # seconds of CPU used by the evaluation thread
+    peak_rss = Column(BigInteger, nullable=False)  # bytes, sampled while the stage ran
+
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    # Relationships
+    run = relationship("StreamJobRun", back_populates="stages")
+
+
+class ParameterSweep(Base):
+    """A parameter grid expanded into one child StreamJob per distinct window_size and top_k.
+
+    Algorithm parameter combinations become algorithms of the same child, so
+    every child loads and splits the dataset once for all of them.
+    """
+
+    __tablename__ = "parameter_sweep"
+    id = Column(Integer, Sequence("parameter_sweep_id_seq"), primary_key=True, autoincrement=True)
+    name = Column(String, unique=True, nullable=False)
+    description = Column(Text)
+    dataset = Column(String, nullable=False)
+    grid = Column(Text, nullable=False)  # JSON of the sweep request the children were expanded from
+    user_id = Column(Integer, ForeignKey("stream_user.id"), nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    # Relationships
+    stream_jobs = relationship("StreamJob", back_populates="sweep", cascade="all, delete-orphan")
+
+
+class ResultCacheEntry(Base):
+    """Compute time and reuse counts of the results of a result fingerprint."""
+
+    __tablename__ = "result_cache_entry"
+    id = Column(Integer, Sequence("result_cache_entry_id_seq"), primary_key=True, autoincrement=True)
+    fingerprint = Column(String(64), unique=True, nullable=False)
+    algorithm_name = Column(String, nullable=False)
+    dataset = Column(String, nullable=False)
+
+    compute_time = Column(Float, nullable=False)  # seconds spent evaluating the algorithm
+    misses = Column(Integer, nullable=False, default=1)  # times the results had to be computed
+    hits = Column(Integer, nullable=False, default=0)
+    time_saved = Column(Float, nullable=False, default=0.0)  # seconds of evaluation avoided by hits
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    last_hit_at = Column(DateTime, nullable=True)
+
+
+class LeaderboardEntry(Base):
+    """Best known macro score of one result fingerprint on a dataset and metric.
+
+    Maintained by services/leaderboard.py from the macro results of
+    algorithms with a result fingerprint, i.e. of complete, non-preview
+    evaluations. Algorithms sharing a fingerprint share one entry.
+    """
+
+    __tablename__ = "leaderboard_entry"
+    id = Column(Integer, Sequence("leaderboard_entry_id_seq"), primary_key=True, autoincrement=True)
+    dataset = Column(String, nullable=False)
+    metric = Column(String, nullable=False)
+    top_k = Column(Integer, nullable=False)
+    window_size = Column(Integer, nullable=False)
+    fingerprint = Column(String(64), nullable=False)
+
+    algorithm_name = Column(String, nullable=False)
+    parameters = Column(Text, nullable=True)  # JSON string of the algorithm parameters
+    macro_score = Column(Float, nullable=True)
+    num_window = Column(Integer, nullable=True)
+    num_jobs = Column(Integer, nullable=False)  # stream jobs holding these results
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        UniqueConstraint("dataset", "metric", "top_k", "window_size", "fingerprint"),
+        # Serves /leaderboard: one dataset and metric, best score first
+        Index(
+            "ix_leaderboard_entry_ranking",
+            "dataset",
+            "metric",
+            "top_k",
+            "window_size",
+            macro_score.desc().nulls_last(),
+        ),
+        Index("ix_leaderboard_entry_fingerprint", "fingerprint"),
+    )
+
+
+class EvaluationQueueEntry(Base):
+    """A stream job waiting for, or claimed by, an evaluation worker (see services/queue.py)."""
+
+    __tablename__ = "evaluation_queue"
+    id = Column(Integer, Sequence("evaluation_queue_id_seq"), primary_key=True, autoincrement=True)
+    stream_job_id = Column(Integer, ForeignKey("stream_job.id"), unique=True, nullable=False)
+
+    resume = Column(Boolean, nullable=False, default=False)  # continue from the last checkpoint
+    partial = Column(Boolean, nullable=False, default=False)  # only evaluate algorithms without current results
+    live = Column(Boolean, nullable=False, default=False)  # only evaluate the windows of appended interactions
+    add_metrics = Column(ARRAY(String), nullable=True)  # only compute these metrics from stored predictions
+    enqueued_at = Column(DateTime, server_default=func.now(), index=True)
+    priority = Column(String, nullable=False, default="batch")  # "interactive" or "batch"
+    estimated_cost = Column(Float, nullable=False, default=0.0)  # seconds, for shortest job first
+
+    claimed_by = Column(String, nullable=True)  # worker id, NULL = waiting
+    claimed_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    cancel_requested = Column(Boolean, nullable=False, default=False)  # picked up by the worker's heartbeat
+
+    # Relationships
+    stream_job = relationship("StreamJob", back_populates="queue_entry")
@@ -3,8 +3,10 @@ from .auth_google_router import create_auth_google_router
 from .auth_router import create_auth_router
 from .dataset_router import create_dataset_router
 from .evaluator_router import create_evaluator_router
+from .leaderboard_router import create_leaderboard_router
 from .metric_router import create_metric_router
 from .stream_router import create_stream_router
+from .sweep_router import create_sweep_router
 
 
 __all__ = [
@@ -13,6 +15,8 @@ __all__ = [
     "create_auth_google_router",
     "create_dataset_router",
     "create_evaluator_router",
+    "create_leaderboard_router",
     "create_stream_router",
     "create_metric_router",
+    "create_sweep_router",
 ]
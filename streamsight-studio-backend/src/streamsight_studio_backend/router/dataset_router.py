@@ -4,9 +4,27 @@ from fastapi import APIRouter
 from fastapi.concurrency import run_in_threadpool
 from streamsight.registries import DATASET_REGISTRY
 
+from streamsight_studio_backend.services.single_flight import SingleFlight
+
 
 logger = logger.getLogger(__name__)
 
+_timestamp_range_flight = SingleFlight("dataset_timestamp_range")
+
+
+def _load_timestamp_range(dataset_name: str) -> dict[str, str]:
+    dataset_cls = DATASET_REGISTRY.get(dataset_name)
+    if not dataset_cls:
+        raise ValueError(f"Dataset '{dataset_name}' is not registered.")
+
+    dataset_instance = dataset_cls()
+    dataset_instance.load()
+    timestamp_range = dataset_instance.get_timestamp_range_in_datetime()
+    return {
+        "start_timestamp": timestamp_range[0].isoformat(),
+        "end_timestamp": timestamp_range[1].isoformat(),
+    }
+
 
 def create_dataset_router() -> APIRouter:
     router = APIRouter(prefix="/dataset", tags=["dataset"])
@@ -17,16 +35,7 @@ def create_dataset_router() -> APIRouter:
 
     @router.get("/{dataset_name}/get_timestamp_range")
     async def get_timestamp_range(dataset_name: str) -> dict[str, str]:
-        dataset_cls = await run_in_threadpool(DATASET_REGISTRY.get, dataset_name)
-        if not dataset_cls:
-            raise ValueError(f"Dataset '{dataset_name}' is not registered.")
-
-        dataset_instance = await run_in_threadpool(dataset_cls)
-        await run_in_threadpool(dataset_instance.load)
-        timestamp_range = await run_in_threadpool(dataset_instance.get_timestamp_range_in_datetime)
-        return {
-            "start_timestamp": timestamp_range[0].isoformat(),
-            "end_timestamp": timestamp_range[1].isoformat(),
-        }
+        # Pages opened at once load the dataset once, in the threadpool
+        return await _timestamp_range_flight.do_async(dataset_name, lambda: _load_timestamp_range(dataset_name))
 
     return router
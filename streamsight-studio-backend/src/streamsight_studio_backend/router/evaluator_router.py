@@ -1,36 +1,142 @@
 import logging as logger
 from datetime import datetime, timezone
+from logging import getLevelName
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
+from streamsight.registries import METRIC_REGISTRY
 
-from streamsight_studio_backend.db.connection import get_db
+from streamsight_studio_backend.config.log import read_job_log
+from streamsight_studio_backend.config.setting import get_settings
+from streamsight_studio_backend.db.connection import get_db, get_read_db
 from streamsight_studio_backend.db.schema import (
-    MacroEvaluationResult,
-    MicroEvaluationResult,
+    AlgorithmWindowProfile,
+    EvaluationQueueEntry,
     StreamAlgorithm,
     StreamJob,
+    StreamJobRun,
     StreamUser,
-    UserEvaluationResult,
-    WindowEvaluationResult,
 )
+from streamsight_studio_backend.schemas.stream import AddMetricsRequest, CompareResultsRequest
 from streamsight_studio_backend.services.auth import get_current_username
-from ..services.evaluator import run_evaluation
+from streamsight_studio_backend.services.checkpoint import clear_checkpoint, get_checkpoint_window, get_live_meta
+from streamsight_studio_backend.services.compare import get_comparison
+from streamsight_studio_backend.services.job_status import FINISHED_STATUSES, JobStatus, transition_job
+from streamsight_studio_backend.services.live import (
+    complete_windows,
+    live_algorithms,
+    load_appended,
+    next_window_start,
+)
+from streamsight_studio_backend.services.predictions import has_predictions
+from streamsight_studio_backend.services.queue import enqueue_job, get_queue_entry
+from streamsight_studio_backend.services.result_cache import get_result_cache_stats
+from streamsight_studio_backend.services.results import RESULT_LEVELS, compare_job_results, get_job_results
+from streamsight_studio_backend.services.scheduler import JobPriority, SchedulingPolicy, estimate_start_times
+from streamsight_studio_backend.services.single_flight import SingleFlight
+from streamsight_studio_backend.services.spill import clear_scratch
 
 
 logger = logger.getLogger(__name__)
 
+# Largest number of stream jobs compared in one request
+MAX_COMPARED_JOBS = 50
+
+_results_flight = SingleFlight("evaluation_results")
+_compare_flight = SingleFlight("algorithm_comparison")
+
+
+def _check_priority(entry: EvaluationQueueEntry, requested: bool = True) -> None:
+    """Reject interactive priority for jobs too long to count as interactive.
+
+    When interactive was only the default rather than `requested`, the job is
+    queued as batch instead.
+    """
+    max_cost = get_settings().SCHEDULER_INTERACTIVE_MAX_COST
+    if entry.priority == JobPriority.INTERACTIVE and entry.estimated_cost > max_cost:
+        if not requested:
+            entry.priority = JobPriority.BATCH
+            return
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Stream job is estimated to take {entry.estimated_cost:.0f}s, "
+            f"interactive priority is limited to {max_cost:.0f}s; queue it as batch",
+        )
+
+
+def _set_preview(stream_job: StreamJob, preview: bool, sample_fraction: float | None, max_windows: int | None) -> None:
+    """Store the preview options of the next run on the job; a full run clears them."""
+    if not preview:
+        stream_job.preview_fraction = None
+        stream_job.preview_windows = None
+        return
+    if sample_fraction is not None and not 0 < sample_fraction <= 1:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="sample_fraction must be in (0, 1]")
+    if max_windows is not None and max_windows < 1:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="max_windows must be at least 1")
+    if sample_fraction is None and max_windows is None:
+        sample_fraction = get_settings().PREVIEW_DEFAULT_FRACTION
+    stream_job.preview_fraction = sample_fraction
+    stream_job.preview_windows = max_windows
+
 
 def create_evaluator_router() -> APIRouter:
     router = APIRouter(prefix="/evaluator", tags=["evaluator"])
 
+    @router.get("/cache/stats")
+    def get_cache_stats(
+        db: Session = Depends(get_db),
+        current_username: str = Depends(get_current_username),
+    ) -> dict:
+        """Hit rate and compute time saved by reusing results across stream jobs."""
+        return get_result_cache_stats(db)
+
+    @router.get("/queue")
+    def get_queue(
+        db: Session = Depends(get_db),
+        current_username: str = Depends(get_current_username),
+    ) -> dict:
+        """Queued and running jobs of the current user with estimated start times."""
+        # Get user from database
+        user = db.query(StreamUser).filter(StreamUser.username == current_username).first()
+        if not user:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+        scheduled, workers = estimate_start_times(db, SchedulingPolicy.from_settings())
+        own = [job for job in scheduled if job.user_id == user.id]
+        names = dict(
+            db.query(StreamJob.id, StreamJob.name).filter(StreamJob.id.in_([job.stream_job_id for job in own])).all()
+        )
+
+        return {
+            "workers": workers,
+            "waiting": sum(1 for job in scheduled if not job.running),
+            "running": sum(1 for job in scheduled if job.running),
+            "jobs": [
+                {
+                    "stream_job_id": job.stream_job_id,
+                    "name": names.get(job.stream_job_id),
+                    "status": "running" if job.running else "queued",
+                    "priority": job.priority,
+                    "position": job.position,
+                    "estimated_cost": job.estimated_cost,
+                    "estimated_start_at": job.estimated_start_at.isoformat() if job.estimated_start_at else None,
+                }
+                for job in own
+            ],
+        }
+
     @router.post("/{stream_job_id}/run")
     async def run_stream_job(
         stream_job_id: int,
-        background_tasks: BackgroundTasks,
+        priority: JobPriority | None = None,
+        preview: bool = False,
+        sample_fraction: float | None = None,
+        max_windows: int | None = None,
         db: Session = Depends(get_db),
         current_username: str = Depends(get_current_username),
     ) -> dict:
+        """Queue a stream job. A preview evaluates a sample of users or windows and runs as interactive by default."""
         # Get user from database
         user = db.query(StreamUser).filter(StreamUser.username == current_username).first()
         if not user:
@@ -45,23 +151,38 @@ def create_evaluator_router() -> APIRouter:
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Stream job has no algorithms configured",
             )
-        if stream_job.started_at is not None:
+        if stream_job.status != JobStatus.READY:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Stream job has already started",
             )
 
-        stream_job.started_at = datetime.now(timezone.utc)
+        _set_preview(stream_job, preview, sample_fraction, max_windows)
+        # Of concurrent requests to run the job, only one moves it out of ready
+        if not transition_job(
+            db, stream_job, JobStatus.RUNNING, allowed_from=[JobStatus.READY], started_at=datetime.now(timezone.utc)
+        ):
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Stream job has already started",
+            )
+        default_priority = JobPriority.INTERACTIVE if preview else JobPriority.BATCH
+        entry = enqueue_job(db, stream_job.id, priority=priority or default_priority)
+        _check_priority(entry, requested=priority is not None)
         db.commit()
 
-        background_tasks.add_task(run_evaluation, stream_job.id)
-        logger.info(f"Started evaluation for stream job {stream_job_id}")
+        logger.info(f"Queued {'preview ' if preview else ''}evaluation for stream job {stream_job_id}")
         return {"message": "Stream job started", "status": stream_job.status}
 
     @router.post("/{stream_job_id}/rerun")
     async def rerun_stream_job(
         stream_job_id: int,
-        background_tasks: BackgroundTasks,
+        partial: bool = False,
+        priority: JobPriority | None = None,
+        preview: bool = False,
+        sample_fraction: float | None = None,
+        max_windows: int | None = None,
         db: Session = Depends(get_db),
         current_username: str = Depends(get_current_username),
     ) -> dict:
@@ -74,35 +195,209 @@ def create_evaluator_router() -> APIRouter:
         stream_job = db.query(StreamJob).filter(StreamJob.id == stream_job_id, StreamJob.user_id == user.id).first()
         if not stream_job:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stream job not found")
-        if stream_job.completed_at is None:
+        if stream_job.status not in FINISHED_STATUSES:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Stream job has not completed yet and cannot be rerun",
             )
+        if get_queue_entry(db, stream_job_id) is not None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Stream job is still held by an evaluation worker",
+            )
+        if preview and partial:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="A preview evaluates all algorithms and cannot be partial",
+            )
 
         # Reset job state for rerun
-        stream_job.started_at = datetime.now(timezone.utc)
-        stream_job.completed_at = None
-        stream_job.error_message = None
-
-        # delete all previous evaluation results associated with this stream job
-        db.query(MacroEvaluationResult).filter(MacroEvaluationResult.stream_job_id == stream_job_id).delete()
-        db.query(MicroEvaluationResult).filter(MicroEvaluationResult.stream_job_id == stream_job_id).delete()
-        db.query(WindowEvaluationResult).filter(WindowEvaluationResult.stream_job_id == stream_job_id).delete()
-        db.query(UserEvaluationResult).filter(UserEvaluationResult.stream_job_id == stream_job_id).delete()
-        db.commit()
+        _set_preview(stream_job, preview, sample_fraction, max_windows)
+        if not transition_job(
+            db,
+            stream_job,
+            JobStatus.RUNNING,
+            allowed_from=FINISHED_STATUSES,
+            reason="rerun",
+            started_at=datetime.now(timezone.utc),
+            completed_at=None,
+            cancelled_at=None,
+            error_message=None,
+        ):
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Stream job has already been rerun",
+            )
 
-        background_tasks.add_task(run_evaluation, stream_job.id)
+        # The worker replaces the results of each evaluated algorithm when it saves the new ones. A partial
+        # rerun only evaluates algorithms whose results are missing or were computed with a different configuration
+        default_priority = JobPriority.INTERACTIVE if preview else JobPriority.BATCH
+        entry = enqueue_job(db, stream_job.id, partial=partial, priority=priority or default_priority)
+        _check_priority(entry, requested=priority is not None)
+        clear_checkpoint(stream_job_id)
+        db.commit()
 
-        logger.info(f"Started rerunning stream job {stream_job_id}")
+        logger.info(f"Started {'partial ' if partial else ''}rerunning stream job {stream_job_id}")
         return {"message": "Stream job rerun started", "status": stream_job.status}
 
-    @router.get("/{stream_job_id}/results")
-    def get_evaluation_history(
+    @router.post("/{stream_job_id}/resume")
+    async def resume_stream_job(
+        stream_job_id: int,
+        priority: JobPriority = JobPriority.BATCH,
+        db: Session = Depends(get_db),
+        current_username: str = Depends(get_current_username),
+    ) -> dict:
+        # Get user from database
+        user = db.query(StreamUser).filter(StreamUser.username == current_username).first()
+        if not user:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+        # Get stream job
+        stream_job = db.query(StreamJob).filter(StreamJob.id == stream_job_id, StreamJob.user_id == user.id).first()
+        if not stream_job:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stream job not found")
+        if stream_job.status in (JobStatus.CREATED, JobStatus.READY):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Stream job has not started yet, use run instead",
+            )
+        if stream_job.status == JobStatus.CANCELLED:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Stream job was cancelled, use rerun instead",
+            )
+        if stream_job.status == JobStatus.COMPLETED:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Stream job has already completed, use rerun instead",
+            )
+        if get_queue_entry(db, stream_job_id) is not None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Stream job is already queued or running",
+            )
+
+        # An interrupted job is still running; a failed one runs again
+        if stream_job.status == JobStatus.FAILED and not transition_job(
+            db,
+            stream_job,
+            JobStatus.RUNNING,
+            allowed_from=[JobStatus.FAILED],
+            reason="resume",
+            completed_at=None,
+            error_message=None,
+        ):
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Stream job is already queued or running",
+            )
+        _check_priority(enqueue_job(db, stream_job.id, resume=True, priority=priority))
+        db.commit()
+
+        resume_from_window = get_checkpoint_window(stream_job_id)
+
+        logger.info(f"Resuming stream job {stream_job_id} from window {resume_from_window or 0}")
+        return {
+            "message": "Stream job resume started",
+            "status": stream_job.status,
+            "resume_from_window": resume_from_window or 0,
+        }
+
+    @router.post("/{stream_job_id}/continue")
+    def continue_stream_job(
+        stream_job_id: int,
+        priority: JobPriority = JobPriority.BATCH,
+        db: Session = Depends(get_db),
+        current_username: str = Depends(get_current_username),
+    ) -> dict:
+        """Evaluate only the windows completed by interactions appended since the last run (see services/live.py).
+
+        The algorithms continue from their state after the last evaluated
+        window, and the results of the new windows are added to the job's.
+        """
+        # Get user from database
+        user = db.query(StreamUser).filter(StreamUser.username == current_username).first()
+        if not user:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+        # Get stream job
+        stream_job = db.query(StreamJob).filter(StreamJob.id == stream_job_id, StreamJob.user_id == user.id).first()
+        if not stream_job:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stream job not found")
+        if stream_job.status not in FINISHED_STATUSES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Stream job has not completed yet and cannot be continued",
+            )
+        if get_queue_entry(db, stream_job_id) is not None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Stream job is still held by an evaluation worker",
+            )
+        from_window = stream_job.live_window
+        live_meta = get_live_meta(stream_job_id, from_window) if from_window is not None else None
+        if live_meta is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Stream job has no state to continue from, rerun it in full",
+            )
+        if live_meta["algorithms"] != live_algorithms(stream_job):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The algorithms of the stream job changed since its last full run, rerun it",
+            )
+        appended = load_appended(stream_job_id)
+        num_windows = complete_windows(appended, next_window_start(stream_job), stream_job.window_size)
+        if not num_windows:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The appended interactions complete no window yet",
+            )
+
+        if not transition_job(
+            db,
+            stream_job,
+            JobStatus.RUNNING,
+            allowed_from=FINISHED_STATUSES,
+            reason="continue",
+            started_at=datetime.now(timezone.utc),
+            completed_at=None,
+            cancelled_at=None,
+            error_message=None,
+        ):
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Stream job has already been continued",
+            )
+        entry = enqueue_job(db, stream_job.id, priority=priority, live=True)
+        # Only the new windows are evaluated, not the whole job the cost is estimated for
+        entry.estimated_cost *= num_windows / (from_window + num_windows)
+        _check_priority(entry)
+        db.commit()
+
+        logger.info(f"Continuing stream job {stream_job_id} with up to {num_windows} windows from window {from_window}")
+        return {
+            "message": "Stream job continuation started",
+            "status": stream_job.status,
+            "from_window": from_window,
+            "num_windows": num_windows,
+        }
+
+    @router.post("/{stream_job_id}/cancel")
+    async def cancel_stream_job(
         stream_job_id: int,
         db: Session = Depends(get_db),
         current_username: str = Depends(get_current_username),
     ) -> dict:
+        """Cancel a queued or running evaluation.
+
+        A queued job is cancelled immediately. A running job is flagged, and its
+        worker stops it at the next window or stage boundary after its next
+        heartbeat, without saving results of the windows evaluated so far.
+        """
         # Get user from database
         user = db.query(StreamUser).filter(StreamUser.username == current_username).first()
         if not user:
@@ -113,89 +408,380 @@ def create_evaluator_router() -> APIRouter:
         if not stream_job:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stream job not found")
 
-        # Get evaluation results from all tables with algorithm names
-        macro_results = (
-            db.query(MacroEvaluationResult, StreamAlgorithm.algorithm_name)
-            .join(StreamAlgorithm, MacroEvaluationResult.stream_algorithm_id == StreamAlgorithm.id)
-            .filter(MacroEvaluationResult.stream_job_id == stream_job_id)
+        # Lock the entry so that no worker claims or removes it while it is being cancelled.
+        # Without one the job is not queued, or its worker finished it in the meantime.
+        entry = get_queue_entry(db, stream_job_id, lock=True)
+        if entry is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Stream job is not queued or running",
+            )
+
+        now = datetime.now(timezone.utc)
+        if entry.claimed_by is None:
+            db.delete(entry)
+            transition_job(db, stream_job, JobStatus.CANCELLED, cancelled_at=now, completed_at=now)
+            db.commit()
+            clear_checkpoint(stream_job_id)
+            clear_scratch(stream_job_id)
+            logger.info(f"Cancelled queued stream job {stream_job_id}")
+            return {"message": "Stream job cancelled", "status": stream_job.status}
+
+        entry.cancel_requested = True
+        db.commit()
+        logger.info(f"Requested cancellation of stream job {stream_job_id} running on {entry.claimed_by}")
+        return {"message": "Stream job cancellation requested", "status": "cancelling"}
+
+    @router.post("/{stream_job_id}/add_metrics")
+    def add_metrics(
+        stream_job_id: int,
+        request: AddMetricsRequest,
+        priority: JobPriority = JobPriority.BATCH,
+        db: Session = Depends(get_db),
+        current_username: str = Depends(get_current_username),
+    ) -> dict:
+        """Queue extra metrics of a completed job, computed from its stored top-K predictions without rerunning it."""
+        # Get user from database
+        user = db.query(StreamUser).filter(StreamUser.username == current_username).first()
+        if not user:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+        # Get stream job
+        stream_job = db.query(StreamJob).filter(StreamJob.id == stream_job_id, StreamJob.user_id == user.id).first()
+        if not stream_job:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stream job not found")
+        if not stream_job.store_predictions:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Stream job does not store predictions, add the metrics and rerun it instead",
+            )
+        if stream_job.status != JobStatus.COMPLETED or stream_job.preview_fraction or stream_job.preview_windows:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Metrics can only be added to a completed full evaluation",
+            )
+        if get_queue_entry(db, stream_job_id) is not None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Stream job is queued or running",
+            )
+        for metric_name in request.metrics:
+            if metric_name not in METRIC_REGISTRY:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Metric {metric_name} not found in streamsight registry",
+                )
+
+        new_metrics = [m for m in dict.fromkeys(request.metrics) if m not in stream_job.metrics]
+        if not new_metrics:
+            return {"message": "No new metrics to add", "metrics": stream_job.metrics, "missing_algorithms": []}
+        missing = [
+            sa.id
+            for sa in stream_job.stream_algorithms
+            if not has_predictions(stream_job_id, str(sa.algorithm_uuid))
+        ]
+
+        # Of two concurrent requests only one moves the job to running and queues the metrics
+        if not transition_job(
+            db,
+            stream_job,
+            JobStatus.RUNNING,
+            allowed_from=[JobStatus.COMPLETED],
+            reason="add_metrics",
+            started_at=datetime.now(timezone.utc),
+            completed_at=None,
+        ):
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Stream job is already running",
+            )
+        entry = enqueue_job(db, stream_job.id, priority=priority, add_metrics=new_metrics)
+        _check_priority(entry)
+        db.commit()
+
+        logger.info(f"Queued metrics {new_metrics} of stream job {stream_job_id}")
+        return {
+            "message": f"Adding {len(new_metrics)} metrics",
+            "status": stream_job.status,
+            "metrics": [*stream_job.metrics, *new_metrics],
+            # Algorithms without stored predictions need a partial rerun for the new metrics
+            "missing_algorithms": missing,
+        }
+
+    @router.post("/results")
+    def compare_results(
+        request: CompareResultsRequest,
+        db: Session = Depends(get_read_db),
+        current_username: str = Depends(get_current_username),
+    ) -> dict:
+        """Results of several jobs side by side, aligned by algorithm and metric, with one query per level."""
+        # Get user from database
+        user = db.query(StreamUser).filter(StreamUser.username == current_username).first()
+        if not user:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+        stream_job_ids = list(dict.fromkeys(request.stream_job_ids))
+        if not stream_job_ids or len(stream_job_ids) > MAX_COMPARED_JOBS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Compare between 1 and {MAX_COMPARED_JOBS} stream jobs",
+            )
+        for level in request.levels:
+            if level not in RESULT_LEVELS:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Unknown result level {level}, use one of {', '.join(RESULT_LEVELS)}",
+                )
+
+        # Get stream jobs, all of which must belong to the user
+        jobs = (
+            db.query(StreamJob.id, StreamJob.name, StreamJob.top_k, StreamJob.window_size)
+            .filter(StreamJob.id.in_(stream_job_ids), StreamJob.user_id == user.id)
             .all()
         )
-        micro_results = (
-            db.query(MicroEvaluationResult, StreamAlgorithm.algorithm_name)
-            .join(StreamAlgorithm, MicroEvaluationResult.stream_algorithm_id == StreamAlgorithm.id)
-            .filter(MicroEvaluationResult.stream_job_id == stream_job_id)
-            .all()
+        missing = set(stream_job_ids) - {job.id for job in jobs}
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Stream job not found: {', '.join(str(job_id) for job_id in sorted(missing))}",
+            )
+
+        jobs = sorted(jobs, key=lambda job: stream_job_ids.index(job.id))
+        return {
+            "stream_jobs": [
+                {"id": job.id, "name": job.name, "top_k": job.top_k, "window_size": job.window_size} for job in jobs
+            ],
+            **{
+                level: compare_job_results(db, stream_job_ids, level, request.metrics)
+                for level in dict.fromkeys(request.levels)
+            },
+        }
+
+    @router.get("/{stream_job_id}/results")
+    def get_evaluation_history(
+        stream_job_id: int,
+        db: Session = Depends(get_read_db),
+        current_username: str = Depends(get_current_username),
+    ) -> dict:
+        # Get user from database
+        user = db.query(StreamUser).filter(StreamUser.username == current_username).first()
+        if not user:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+        # Get stream job
+        stream_job = db.query(StreamJob).filter(StreamJob.id == stream_job_id, StreamJob.user_id == user.id).first()
+        if not stream_job:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stream job not found")
+
+        # Concurrent refetches, e.g. of every open results page when the job completes, share one query
+        return _results_flight.do((stream_job_id, db.get_bind()), lambda: get_job_results(db, stream_job_id))
+
+    @router.get("/{stream_job_id}/compare")
+    def compare_stream_algorithms(
+        stream_job_id: int,
+        algorithm_a: int,
+        algorithm_b: int,
+        metrics: list[str] | None = Query(None),
+        samples: int | None = None,
+        confidence: float = 0.95,
+        db: Session = Depends(get_read_db),
+        current_username: str = Depends(get_current_username),
+    ) -> dict:
+        """Paired bootstrap, Wilcoxon and t-tests of two algorithms' user scores, per metric and per window."""
+        # Get user from database
+        user = db.query(StreamUser).filter(StreamUser.username == current_username).first()
+        if not user:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+        # Get stream job
+        stream_job = db.query(StreamJob).filter(StreamJob.id == stream_job_id, StreamJob.user_id == user.id).first()
+        if not stream_job:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stream job not found")
+        if stream_job.status != JobStatus.COMPLETED:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Only the algorithms of a completed stream job can be compared",
+            )
+        if algorithm_a == algorithm_b:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Compare two different algorithms",
+            )
+
+        algorithms = {}
+        for algorithm_id in (algorithm_a, algorithm_b):
+            stream_algorithm = db.query(StreamAlgorithm).filter(
+                StreamAlgorithm.id == algorithm_id,
+                StreamAlgorithm.stream_job_id == stream_job_id,
+            ).first()
+            if not stream_algorithm:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Algorithm with id {algorithm_id} not found in stream job {stream_job_id}",
+                )
+            algorithms[algorithm_id] = stream_algorithm
+
+        metrics = list(dict.fromkeys(metrics)) if metrics else list(stream_job.metrics)
+        for metric_name in metrics:
+            if metric_name not in stream_job.metrics:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Metric {metric_name} is not evaluated by stream job {stream_job_id}",
+                )
+        settings = get_settings()
+        samples = samples or settings.COMPARE_BOOTSTRAP_SAMPLES
+        if not 0 < samples <= settings.COMPARE_MAX_BOOTSTRAP_SAMPLES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"samples must be in (0, {settings.COMPARE_MAX_BOOTSTRAP_SAMPLES}]",
+            )
+        if not 0 < confidence < 1:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="confidence must be in (0, 1)")
+
+        # Same key as the cached summary, so concurrent misses compute it once
+        key = (
+            stream_job_id, stream_job.completed_at, algorithm_a, algorithm_b, tuple(sorted(metrics)), samples, confidence
         )
-        window_results = (
-            db.query(WindowEvaluationResult, StreamAlgorithm.algorithm_name)
-            .join(StreamAlgorithm, WindowEvaluationResult.stream_algorithm_id == StreamAlgorithm.id)
-            .filter(WindowEvaluationResult.stream_job_id == stream_job_id)
-            .all()
+        return _compare_flight.do(
+            key,
+            lambda: get_comparison(
+                db, stream_job, algorithms[algorithm_a], algorithms[algorithm_b], metrics, samples, confidence
+            ),
         )
-        user_results = (
-            db.query(UserEvaluationResult, StreamAlgorithm.algorithm_name)
-            .join(StreamAlgorithm, UserEvaluationResult.stream_algorithm_id == StreamAlgorithm.id)
-            .filter(UserEvaluationResult.stream_job_id == stream_job_id)
+
+    @router.get("/{stream_job_id}/logs")
+    def get_stream_job_logs(
+        stream_job_id: int,
+        limit: int | None = Query(None, ge=0),
+        level: str | None = None,
+        db: Session = Depends(get_read_db),
+        current_username: str = Depends(get_current_username),
+    ) -> dict:
+        """The last log records of a stream job's evaluations, oldest first."""
+        # Get user from database
+        user = db.query(StreamUser).filter(StreamUser.username == current_username).first()
+        if not user:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+        # Get stream job
+        stream_job = db.query(StreamJob).filter(StreamJob.id == stream_job_id, StreamJob.user_id == user.id).first()
+        if not stream_job:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stream job not found")
+
+        records = read_job_log(stream_job_id)
+        if level is not None:
+            threshold = getLevelName(level.upper())
+            if not isinstance(threshold, int):
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown log level {level}")
+            records = [record for record in records if getLevelName(record["level"]) >= threshold]
+        if limit is not None:
+            records = records[len(records) - limit :] if limit else []
+        return {"stream_job_id": stream_job_id, "status": stream_job.status, "records": records}
+
+    @router.get("/{stream_job_id}/profile")
+    def get_evaluation_profile(
+        stream_job_id: int,
+        db: Session = Depends(get_read_db),
+        current_username: str = Depends(get_current_username),
+    ) -> dict:
+        """Return per-stage wall time, CPU time and peak RSS for every run of a stream job.
+
+        Under "algorithms", the fit and predict cost of every algorithm with
+        results: totals for the profile table and per window series for charts.
+        """
+        # Get user from database
+        user = db.query(StreamUser).filter(StreamUser.username == current_username).first()
+        if not user:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+        # Get stream job
+        stream_job = db.query(StreamJob).filter(StreamJob.id == stream_job_id, StreamJob.user_id == user.id).first()
+        if not stream_job:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stream job not found")
+
+        runs = (
+            db.query(StreamJobRun)
+            .filter(StreamJobRun.stream_job_id == stream_job_id)
+            .order_by(StreamJobRun.started_at)
             .all()
         )
 
-        result = {
-            "macro": [],
-            "micro": [],
-            "window": [],
-            "user": []
-        }
-
-        # Process macro results
-        for eval_result, algorithm_name in macro_results:
-            result["macro"].append(
+        result = []
+        for run in runs:
+            stages = [
                 {
-                    "id": eval_result.id,
-                    "algorithm": algorithm_name,
-                    "metric": eval_result.metric,
-                    "score": eval_result.macro_score,
-                    "num_window": eval_result.num_window,
+                    "stage": stage.stage,
+                    "wall_time": stage.wall_time,
+                    "cpu_time": stage.cpu_time,
+                    "peak_rss": stage.peak_rss,
                 }
-            )
-
-        # Process micro results
-        for eval_result, algorithm_name in micro_results:
-            result["micro"].append(
+                for stage in sorted(run.stages, key=lambda s: s.id)
+            ]
+            dominant = max(stages, key=lambda s: s["wall_time"]) if stages else None
+            result.append(
                 {
-                    "id": eval_result.id,
-                    "algorithm": algorithm_name,
-                    "metric": eval_result.metric,
-                    "score": eval_result.micro_score,
-                    "num_user": eval_result.num_user,
+                    "id": run.id,
+                    "streamsight_version": run.streamsight_version,
+                    "started_at": run.started_at.isoformat() if run.started_at else None,
+                    "completed_at": run.completed_at.isoformat() if run.completed_at else None,
+                    "total_wall_time": sum(s["wall_time"] for s in stages),
+                    "dominant_stage": dominant["stage"] if dominant else None,
+                    "stages": stages,
                 }
             )
 
-        # Process window results
-        for eval_result, algorithm_name in window_results:
-            result["window"].append(
-                {
-                    "id": eval_result.id,
+        profiles = (
+            db.query(AlgorithmWindowProfile, StreamAlgorithm.algorithm_name, StreamAlgorithm.parameters)
+            .join(StreamAlgorithm, AlgorithmWindowProfile.stream_algorithm_id == StreamAlgorithm.id)
+            .filter(AlgorithmWindowProfile.stream_job_id == stream_job_id)
+            .order_by(AlgorithmWindowProfile.stream_algorithm_id, AlgorithmWindowProfile.window)
+            .all()
+        )
+        series = ("window", "timestamp", "fit_time", "predict_time", "interactions_per_second", "peak_memory_delta")
+        algorithms: dict[int, dict] = {}
+        for profile, algorithm_name, parameters in profiles:
+            entry = algorithms.get(profile.stream_algorithm_id)
+            if entry is None:
+                entry = algorithms[profile.stream_algorithm_id] = {
+                    "id": profile.stream_algorithm_id,
                     "algorithm": algorithm_name,
-                    "metric": eval_result.metric,
-                    "score": eval_result.window_score,
-                    "num_user": eval_result.num_user,
-                    "timestamp": eval_result.timestamp,
+                    "parameters": parameters,
+                    "num_window": 0,
+                    "fit_time": 0.0,
+                    "predict_time": 0.0,
+                    "interactions": 0,
+                    "peak_memory_delta": 0,
+                    "windows": {key: [] for key in series},
                 }
-            )
+            elapsed = (profile.fit_time or 0.0) + profile.predict_time
+            interactions = (profile.fit_interactions or 0) + profile.predict_interactions
+            entry["num_window"] += 1
+            entry["fit_time"] += profile.fit_time or 0.0
+            entry["predict_time"] += profile.predict_time
+            entry["interactions"] += interactions
+            entry["peak_memory_delta"] = max(entry["peak_memory_delta"], profile.peak_memory_delta)
+            windows = entry["windows"]
+            windows["window"].append(profile.window)
+            windows["timestamp"].append(profile.timestamp)
+            windows["fit_time"].append(profile.fit_time)
+            windows["predict_time"].append(profile.predict_time)
+            windows["interactions_per_second"].append(interactions / elapsed if elapsed > 0 else None)
+            windows["peak_memory_delta"].append(profile.peak_memory_delta)
 
-        # Process user results
-        for eval_result, algorithm_name in user_results:
-            result["user"].append(
-                {
-                    "id": eval_result.id,
-                    "algorithm": algorithm_name,
-                    "metric": eval_result.metric,
-                    "score": eval_result.user_score,
-                    "user_id": eval_result.user_id,
-                    "timestamp": eval_result.timestamp,
-                }
-            )
+        # Share of the job's fit and predict time, the largest being the bottleneck
+        total_time = sum(entry["fit_time"] + entry["predict_time"] for entry in algorithms.values())
+        for entry in algorithms.values():
+            elapsed = entry["fit_time"] + entry["predict_time"]
+            entry["interactions_per_second"] = entry.pop("interactions") / elapsed if elapsed > 0 else None
+            entry["time_share"] = elapsed / total_time if total_time > 0 else None
+        bottleneck = max(algorithms.values(), key=lambda entry: entry["time_share"] or 0.0, default=None)
 
-        return result
+        return {
+            "stream_job_id": stream_job_id,
+            "runs": result,
+            "algorithms": list(algorithms.values()),
+            "bottleneck_algorithm_id": bottleneck["id"] if bottleneck else None,
+        }
 
     return router
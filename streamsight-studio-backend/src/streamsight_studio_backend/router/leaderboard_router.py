@@ -0,0 +1,59 @@
+import logging as logger
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from streamsight_studio_backend.db.connection import get_read_db
+from streamsight_studio_backend.services.auth import get_current_username
+from streamsight_studio_backend.services.leaderboard import get_leaderboard
+
+
+logger = logger.getLogger(__name__)
+
+MAX_PAGE_SIZE = 500
+
+
+def create_leaderboard_router() -> APIRouter:
+    router = APIRouter(prefix="/leaderboard", tags=["leaderboard"])
+
+    @router.get("")
+    def list_leaderboard(
+        dataset: str,
+        metric: str,
+        top_k: int | None = None,
+        window_size: int | None = None,
+        limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+        offset: int = Query(0, ge=0),
+        db: Session = Depends(get_read_db),
+        current_username: str = Depends(get_current_username),
+    ) -> dict:
+        """Algorithm configurations evaluated on a dataset, best macro score of a metric first."""
+        total, entries = get_leaderboard(db, dataset, metric, top_k, window_size, limit, offset)
+        if total == 0 and offset == 0:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No results of metric {metric} on dataset {dataset}",
+            )
+        return {
+            "dataset": dataset,
+            "metric": metric,
+            "total": total,
+            "limit": limit,
+            "offset": offset,
+            "entries": [
+                {
+                    "rank": offset + index + 1,
+                    "algorithm": entry.algorithm_name,
+                    "parameters": entry.parameters,
+                    "top_k": entry.top_k,
+                    "window_size": entry.window_size,
+                    "score": entry.macro_score,
+                    "num_window": entry.num_window,
+                    "num_jobs": entry.num_jobs,
+                    "fingerprint": entry.fingerprint,
+                }
+                for index, entry in enumerate(entries)
+            ],
+        }
+
+    return router
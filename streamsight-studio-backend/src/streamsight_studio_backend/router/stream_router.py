@@ -3,20 +3,37 @@ import logging as logger
 from datetime import datetime
 
 import streamsight.utils
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from streamsight.registries import ALGORITHM_REGISTRY
 
+from streamsight_studio_backend.config.log import clear_job_log
 from streamsight_studio_backend.config.setting import get_settings
-from streamsight_studio_backend.db.connection import get_db
+from streamsight_studio_backend.db.connection import get_db, get_read_db
 from streamsight_studio_backend.db.schema import StreamAlgorithm, StreamJob, StreamUser
 from streamsight_studio_backend.schemas.stream import (
     AddAlgorithmsRequest,
     AddAlgorithmsResponse,
+    AppendInteractionsRequest,
     CreateStreamRequest,
     CreateStreamResponse,
+    UpdateAlgorithmRequest,
 )
 from streamsight_studio_backend.services.auth import get_current_username
+from streamsight_studio_backend.services.checkpoint import get_live_meta
+from streamsight_studio_backend.services.compare import clear_comparisons
+from streamsight_studio_backend.services.job_status import JobStatus, transition_job
+from streamsight_studio_backend.services.leaderboard import job_fingerprints, refresh_leaderboard
+from streamsight_studio_backend.services.live import (
+    append_interactions,
+    clear_live,
+    complete_windows,
+    next_window_start,
+)
+from streamsight_studio_backend.services.predictions import clear_predictions
+from streamsight_studio_backend.services.preprocessing import get_preprocessing, spec_from_request
+from streamsight_studio_backend.services.spill import clear_scratch
+from streamsight_studio_backend.services.queue import get_queue_entry
 
 
 logger = logger.getLogger(__name__)
@@ -42,6 +59,10 @@ def create_stream_router() -> APIRouter:
             timestamp_split_start = datetime.fromisoformat(request.timestamp_split_start.replace("Z", "+00:00"))
         except ValueError:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid timestamp format")
+        try:
+            preprocessing = spec_from_request(request.preprocessing)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
         # Create stream job
         stream_job = StreamJob(
@@ -52,6 +73,9 @@ def create_stream_router() -> APIRouter:
             metrics=request.metrics,
             timestamp_split_start=timestamp_split_start,
             window_size=request.window_size,
+            store_predictions=request.store_predictions,
+            low_memory=request.low_memory,
+            preprocessing=preprocessing,
             user_id=user.id,
         )
 
@@ -64,7 +88,7 @@ def create_stream_router() -> APIRouter:
 
     @router.get("/list_available")
     def list_available_streams(
-        db: Session = Depends(get_db), current_username: str = Depends(get_current_username)
+        db: Session = Depends(get_read_db), current_username: str = Depends(get_current_username)
     ) -> list[dict]:
         # Get user from database
         user = db.query(StreamUser).filter(StreamUser.username == current_username).first()
@@ -74,7 +98,7 @@ def create_stream_router() -> APIRouter:
         # Get stream jobs that haven't started yet (available for configuration/running)
         stream_jobs = (
             db.query(StreamJob)
-            .filter(StreamJob.user_id == user.id, StreamJob.started_at.is_(None))
+            .filter(StreamJob.user_id == user.id, StreamJob.status.in_([JobStatus.CREATED, JobStatus.READY]))
             .all()
         )
 
@@ -117,15 +141,21 @@ def create_stream_router() -> APIRouter:
 
     @router.get("/list_all")
     def list_all_streams(
-        db: Session = Depends(get_db), current_username: str = Depends(get_current_username)
+        job_status: JobStatus | None = Query(None, alias="status"),
+        db: Session = Depends(get_read_db),
+        current_username: str = Depends(get_current_username),
     ) -> list[dict]:
+        """List the user's stream jobs, optionally only those in one status."""
         # Get user from database
         user = db.query(StreamUser).filter(StreamUser.username == current_username).first()
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
         # Get all stream jobs for the user
-        stream_jobs = db.query(StreamJob).filter(StreamJob.user_id == user.id).all()
+        query = db.query(StreamJob).filter(StreamJob.user_id == user.id)
+        if job_status is not None:
+            query = query.filter(StreamJob.status == job_status)
+        stream_jobs = query.all()
 
         result = []
         for job in stream_jobs:
@@ -157,6 +187,10 @@ def create_stream_router() -> APIRouter:
                     "top_k": job.top_k,
                     "metrics": job.metrics,
                     "window_size": job.window_size,
+                    "store_predictions": job.store_predictions,
+                    "low_memory": job.low_memory,
+                    "preprocessing": get_preprocessing(job),
+                    "appended_interactions": job.appended_interactions,
                     "created_at": job.created_at.isoformat(),
                     "started_at": job.started_at.isoformat() if job.started_at else None,
                     "completed_at": job.completed_at.isoformat() if job.completed_at else None,
@@ -182,10 +216,10 @@ def create_stream_router() -> APIRouter:
         stream_job = db.query(StreamJob).filter(StreamJob.id == stream_job_id, StreamJob.user_id == user.id).first()
         if not stream_job:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stream job not found")
-        if stream_job.started_at is not None:
+        if stream_job.status == JobStatus.RUNNING:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Stream job has already started and cannot have algorithms added",
+                detail="Stream job is running and cannot have algorithms added",
             )
 
         for algo in request.algorithms:
@@ -204,6 +238,8 @@ def create_stream_router() -> APIRouter:
                 algorithm_uuid=streamsight.utils.generate_algorithm_uuid(algo.name),
             )
             db.add(stream_algorithm)
+        if stream_job.status == JobStatus.CREATED:
+            transition_job(db, stream_job, JobStatus.READY, allowed_from=[JobStatus.CREATED])
 
         db.commit()
 
@@ -214,6 +250,102 @@ def create_stream_router() -> APIRouter:
             status=stream_job.status,
         )
 
+    @router.put("/{stream_job_id}/algorithms/{algorithm_id}")
+    def update_algorithm_params(
+        stream_job_id: int,
+        algorithm_id: int,
+        request: UpdateAlgorithmRequest,
+        db: Session = Depends(get_db),
+        current_username: str = Depends(get_current_username),
+    ) -> dict:
+        # Get user from database
+        user = db.query(StreamUser).filter(StreamUser.username == current_username).first()
+        if not user:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+        # Get stream job
+        stream_job = db.query(StreamJob).filter(StreamJob.id == stream_job_id, StreamJob.user_id == user.id).first()
+        if not stream_job:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stream job not found")
+        if stream_job.status == JobStatus.RUNNING:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Stream job is running and cannot have algorithms changed",
+            )
+
+        stream_algorithm = db.query(StreamAlgorithm).filter(
+            StreamAlgorithm.id == algorithm_id,
+            StreamAlgorithm.stream_job_id == stream_job_id
+        ).first()
+        if not stream_algorithm:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Algorithm with id {algorithm_id} not found in stream job {stream_job_id}",
+            )
+
+        # Stored results stay until the next rerun. They no longer match the
+        # algorithm's configuration, so a partial rerun re-evaluates this
+        # algorithm only and they leave the leaderboard
+        fingerprint = stream_algorithm.result_fingerprint
+        stream_algorithm.parameters = json.dumps(request.params)
+        stream_algorithm.result_fingerprint = None
+        refresh_leaderboard(db, [fingerprint])
+        db.commit()
+
+        logger.info(f"Updated parameters of algorithm {stream_algorithm.algorithm_name} (id: {algorithm_id}) in stream job {stream_job_id}")
+        return {
+            "message": f"Algorithm {stream_algorithm.algorithm_name} updated successfully",
+            "stream_job_id": stream_job_id,
+            "status": stream_job.status,
+        }
+
+    @router.post("/{stream_job_id}/interactions")
+    def append_stream_interactions(
+        stream_job_id: int,
+        request: AppendInteractionsRequest,
+        db: Session = Depends(get_db),
+        current_username: str = Depends(get_current_username),
+    ) -> dict:
+        """Append interactions that arrived after a completed job's data, evaluated by /evaluator/{id}/continue."""
+        # Get user from database
+        user = db.query(StreamUser).filter(StreamUser.username == current_username).first()
+        if not user:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+        # Get stream job
+        stream_job = db.query(StreamJob).filter(StreamJob.id == stream_job_id, StreamJob.user_id == user.id).first()
+        if not stream_job:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stream job not found")
+        # Appends to the same job wait for each other on its row lock
+        db.refresh(stream_job, with_for_update=True)
+        if get_queue_entry(db, stream_job_id) is not None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Stream job is queued or running",
+            )
+        start = next_window_start(stream_job)
+        if start is None or get_live_meta(stream_job_id, stream_job.live_window) is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Interactions can only be appended after a full run of the stream job completed",
+            )
+
+        # Results with the appended interactions are not ranked
+        fingerprints = job_fingerprints(stream_job)
+        try:
+            appended = append_interactions(stream_job, request.interactions, start)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        refresh_leaderboard(db, fingerprints)
+        db.commit()
+
+        return {
+            "message": f"Appended {len(request.interactions)} interactions",
+            "appended_interactions": stream_job.appended_interactions,
+            # Windows a continuation would evaluate now
+            "complete_windows": complete_windows(appended, start, stream_job.window_size),
+        }
+
     @router.delete("/{stream_job_id}")
     def delete_stream_job(
         stream_job_id: int,
@@ -229,10 +361,23 @@ def create_stream_router() -> APIRouter:
         stream_job = db.query(StreamJob).filter(StreamJob.id == stream_job_id, StreamJob.user_id == user.id).first()
         if not stream_job:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stream job not found")
+        entry = get_queue_entry(db, stream_job_id)
+        if entry is not None and entry.claimed_by is not None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Stream job is being evaluated, cancel it first",
+            )
 
         # Delete the stream job (cascade will handle related records)
+        fingerprints = job_fingerprints(stream_job)
         db.delete(stream_job)
+        refresh_leaderboard(db, fingerprints)
         db.commit()
+        clear_predictions(stream_job_id)
+        clear_scratch(stream_job_id)
+        clear_comparisons(stream_job_id)
+        clear_job_log(stream_job_id)
+        clear_live(stream_job_id)
 
         logger.info(f"Deleted stream job {stream_job_id} for user {current_username}")
         return {"message": f"Stream job {stream_job_id} deleted successfully"}
@@ -253,10 +398,10 @@ def create_stream_router() -> APIRouter:
         stream_job = db.query(StreamJob).filter(StreamJob.id == stream_job_id, StreamJob.user_id == user.id).first()
         if not stream_job:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stream job not found")
-        if stream_job.started_at is not None:
+        if stream_job.status == JobStatus.RUNNING:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Stream job has already started and cannot have algorithms removed",
+                detail="Stream job is running and cannot have algorithms removed",
             )
 
         # Get the StreamAlgorithm entry by id and ensure it belongs to the stream job
@@ -272,6 +417,11 @@ def create_stream_router() -> APIRouter:
 
         # Delete the StreamAlgorithm entry
         db.delete(stream_algorithm)
+        refresh_leaderboard(db, [stream_algorithm.result_fingerprint])
+        db.flush()
+        remaining = db.query(StreamAlgorithm).filter(StreamAlgorithm.stream_job_id == stream_job_id).count()
+        if remaining == 0 and stream_job.status == JobStatus.READY:
+            transition_job(db, stream_job, JobStatus.CREATED, allowed_from=[JobStatus.READY])
         db.commit()
 
         logger.info(f"Deleted algorithm {stream_algorithm.algorithm_name} (id: {algorithm_id}) from stream job {stream_job_id}")
@@ -0,0 +1,147 @@
+import logging as logger
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from streamsight.registries import ALGORITHM_REGISTRY
+
+from streamsight_studio_backend.config.setting import get_settings
+from streamsight_studio_backend.db.connection import get_db, get_read_db
+from streamsight_studio_backend.db.schema import ParameterSweep, StreamJob, StreamUser
+from streamsight_studio_backend.schemas.stream import CreateSweepRequest, CreateSweepResponse
+from streamsight_studio_backend.services.auth import get_current_username
+from streamsight_studio_backend.services.job_status import JobStatus, transition_job
+from streamsight_studio_backend.services.queue import enqueue_job
+from streamsight_studio_backend.services.preprocessing import spec_from_request
+from streamsight_studio_backend.services.sweep import (
+    child_job_name,
+    count_configurations,
+    create_sweep_jobs,
+    get_sweep_results,
+)
+
+
+logger = logger.getLogger(__name__)
+
+
+def create_sweep_router() -> APIRouter:
+    router = APIRouter(prefix="/sweep", tags=["sweep"])
+
+    @router.post("/create_sweep", response_model=CreateSweepResponse)
+    def create_sweep(
+        request: CreateSweepRequest,
+        db: Session = Depends(get_db),
+        current_username: str = Depends(get_current_username),
+    ) -> CreateSweepResponse:
+        """Expand a parameter grid into child stream jobs, one per window_size and top_k, and queue them."""
+        logger.info(f"Creating sweep for user {current_username} with request: {request}")
+        # Get user from database
+        user = db.query(StreamUser).filter(StreamUser.username == current_username).first()
+        if not user:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+        # Parse timestamp
+        try:
+            timestamp_split_start = datetime.fromisoformat(request.timestamp_split_start.replace("Z", "+00:00"))
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid timestamp format")
+
+        try:
+            preprocessing = spec_from_request(request.preprocessing)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+        if not request.window_size or not request.top_k or not request.algorithms:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="A sweep needs at least one window_size, top_k and algorithm",
+            )
+        for algo in request.algorithms:
+            if algo.name not in ALGORITHM_REGISTRY:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Algorithm {algo.name} not found in streamsight registry",
+                )
+
+        num_configurations = count_configurations(request)
+        max_configurations = get_settings().SWEEP_MAX_CONFIGURATIONS
+        if num_configurations > max_configurations:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Sweep expands to {num_configurations} configurations, the limit is {max_configurations}",
+            )
+
+        child_names = [child_job_name(request.name, w, k) for w in set(request.window_size) for k in set(request.top_k)]
+        if (
+            db.query(ParameterSweep).filter(ParameterSweep.name == request.name).first()
+            or db.query(StreamJob).filter(StreamJob.name.in_(child_names)).first()
+        ):
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A sweep with this name already exists")
+
+        sweep = create_sweep_jobs(db, request, user.id, timestamp_split_start, preprocessing)
+        stream_job_ids = [job.id for job in sweep.stream_jobs]
+        if request.run:
+            now = datetime.now(timezone.utc)
+            for job in sweep.stream_jobs:
+                transition_job(db, job, JobStatus.RUNNING, allowed_from=[JobStatus.READY], started_at=now)
+                enqueue_job(db, job.id)
+        db.commit()
+
+        logger.info(
+            f"Created sweep {sweep.id} with {len(stream_job_ids)} stream jobs and {num_configurations} configurations"
+        )
+        return CreateSweepResponse(
+            sweep_id=sweep.id, stream_job_ids=stream_job_ids, num_configurations=num_configurations
+        )
+
+    @router.get("/list")
+    def list_sweeps(
+        db: Session = Depends(get_read_db), current_username: str = Depends(get_current_username)
+    ) -> list[dict]:
+        # Get user from database
+        user = db.query(StreamUser).filter(StreamUser.username == current_username).first()
+        if not user:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+        sweeps = db.query(ParameterSweep).filter(ParameterSweep.user_id == user.id).order_by(ParameterSweep.id).all()
+
+        result = []
+        for sweep in sweeps:
+            statuses: dict[str, int] = {}
+            for job in sweep.stream_jobs:
+                statuses[job.status] = statuses.get(job.status, 0) + 1
+            result.append(
+                {
+                    "id": sweep.id,
+                    "name": sweep.name,
+                    "description": sweep.description,
+                    "dataset": sweep.dataset,
+                    "created_at": sweep.created_at.isoformat(),
+                    "stream_job_ids": [job.id for job in sweep.stream_jobs],
+                    "statuses": statuses,
+                }
+            )
+
+        return result
+
+    @router.get("/{sweep_id}/results")
+    def get_results(
+        sweep_id: int,
+        sort_by: str | None = None,
+        db: Session = Depends(get_read_db),
+        current_username: str = Depends(get_current_username),
+    ) -> dict:
+        """Scores of every configuration of a sweep as one table, optionally sorted by a metric."""
+        # Get user from database
+        user = db.query(StreamUser).filter(StreamUser.username == current_username).first()
+        if not user:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+        # Get sweep
+        sweep = db.query(ParameterSweep).filter(ParameterSweep.id == sweep_id, ParameterSweep.user_id == user.id).first()
+        if not sweep:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sweep not found")
+
+        return get_sweep_results(db, sweep, sort_by)
+
+    return router
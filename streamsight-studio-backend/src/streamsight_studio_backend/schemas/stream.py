@@ -1,6 +1,15 @@
 from pydantic import BaseModel
 
 
+class PreprocessingSpec(BaseModel):
+    min_user_interactions: int | None = None  # k-core minimum per user
+    min_item_interactions: int | None = None  # k-core minimum per item
+    start: str | None = None  # ISO timestamps, interactions in [start, end) are kept
+    end: str | None = None
+    user_fraction: float | None = None  # fraction of users sampled
+    seed: int = 0
+
+
 class CreateStreamRequest(BaseModel):
     name: str
     description: str
@@ -9,6 +18,19 @@ class CreateStreamRequest(BaseModel):
     metrics: list[str]
     timestamp_split_start: str
     window_size: int
+    store_predictions: bool = False
+    low_memory: bool = False
+    preprocessing: PreprocessingSpec | None = None
+
+
+class AppendedInteraction(BaseModel):
+    user_id: int  # ids of the job's dataset, new users and items take the next unused ids
+    item_id: int
+    timestamp: int  # epoch seconds
+
+
+class AppendInteractionsRequest(BaseModel):
+    interactions: list[AppendedInteraction]
 
 
 class CreateStreamResponse(BaseModel):
@@ -25,7 +47,45 @@ class AddAlgorithmsRequest(BaseModel):
     algorithms: list[AlgorithmWithParams]
 
 
+class AddMetricsRequest(BaseModel):
+    metrics: list[str]
+
+
+class CompareResultsRequest(BaseModel):
+    stream_job_ids: list[int]
+    levels: list[str] = ["macro", "micro"]  # any of "macro", "micro", "window"
+    metrics: list[str] | None = None  # all metrics when None
+
+
+class UpdateAlgorithmRequest(BaseModel):
+    params: dict = {}
+
+
 class AddAlgorithmsResponse(BaseModel):
     message: str
     stream_job_id: int
     status: str
+
+
+class SweepAlgorithm(BaseModel):
+    name: str
+    params: dict = {}  # parameter name -> list of values to try, or a single fixed value
+
+
+class CreateSweepRequest(BaseModel):
+    name: str
+    description: str = ""
+    dataset: str
+    metrics: list[str]
+    timestamp_split_start: str
+    window_size: list[int]
+    top_k: list[int]
+    algorithms: list[SweepAlgorithm]
+    preprocessing: PreprocessingSpec | None = None
+    run: bool = True
+
+
+class CreateSweepResponse(BaseModel):
+    sweep_id: int
+    stream_job_ids: list[int]
+    num_configurations: int
@@ -0,0 +1,258 @@
+"""
+Memory budgeting and admission control for evaluation jobs.
+
+Every job reserves its estimated peak memory before it starts. Jobs are admitted
+in arrival order while the sum of the reservations stays within the configured
+budget; the others wait. Only evaluation workers wait (see worker_thread());
+on any other thread, such as a request handler in the API threadpool, a job
+that does not fit right away is rejected with AdmissionRejectedError instead
+of holding the thread. A watchdog thread samples the process RSS and, if it
+crosses the hard limit, flags the largest running job so that it fails cleanly
+at its next check instead of the whole server being OOM-killed.
+"""
+
+import logging as logger
+import math
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from streamsight_studio_backend.config.setting import get_settings
+from streamsight_studio_backend.services.cancellation import CancellationToken
+from streamsight_studio_backend.services.dataset_stats import DatasetStats
+from streamsight_studio_backend.services.profiling import current_rss
+from streamsight_studio_backend.services.telemetry import REGISTRY, Gauge
+
+
+logger = logger.getLogger(__name__)
+
+MIB = 2**20
+
+# Rough per-object costs measured on pandas/scipy backed streamsight matrices
+_BYTES_PER_INTERACTION_ROW = 64  # dataframe row of uid/iid/ts/interactionid + index
+_BYTES_PER_SPARSE_ENTRY = 12  # csr data (float64) + index (int32)
+_BYTES_PER_USER_SCORE = 48  # per user metric score kept in the accumulator and result frames
+_DATASET_COPIES = 3  # raw frame, processed frame and interaction matrix
+_SPLIT_COPIES = 3  # unlabeled, ground truth and incremental data per window
+_PER_WINDOW_OVERHEAD = 256 * 1024
+_BASE_OVERHEAD = 64 * MIB
+
+MEMORY_RESERVED = REGISTRY.register(
+    Gauge("evaluation_memory_reserved_bytes", "Estimated memory reserved by admitted evaluation jobs.")
+)
+
+
+class MemoryBudgetExceededError(RuntimeError):
+    """Raised inside a job flagged by the RSS watchdog."""
+
+
+class AdmissionRejectedError(RuntimeError):
+    """Raised when a job does not fit in the budget on a thread that may not wait."""
+
+
+_thread_state = threading.local()
+
+
+@contextmanager
+def worker_thread() -> Iterator[None]:
+    """Mark the current thread as an evaluation worker, which may wait for admission."""
+    _thread_state.worker = True
+    try:
+        yield
+    finally:
+        _thread_state.worker = False
+
+
+def estimate_num_windows(stats: DatasetStats, timestamp_split_start: float, window_size: int) -> int:
+    """Number of sliding windows the split will produce."""
+    if window_size <= 0:
+        return 1
+    span = max(stats.max_timestamp - timestamp_split_start, 0)
+    return int(span // window_size) + 1
+
+
+def estimate_job_memory(
+    stats: DatasetStats | None,
+    timestamp_split_start: float,
+    window_size: int,
+    top_k: int,
+    num_metrics: int,
+    algorithm_params: list[dict],
+    low_memory: bool = False,
+) -> int:
+    """Estimate the peak memory of an evaluation job in bytes.
+
+    Without dataset statistics (dataset never loaded) the configured default
+    estimate is returned. With `low_memory` only one window of split data and
+    scores is held at a time.
+    """
+    settings = get_settings()
+    if stats is None:
+        return settings.EVALUATION_MEMORY_DEFAULT_JOB_MB * MIB
+
+    num_windows = estimate_num_windows(stats, timestamp_split_start, window_size)
+    time_span = max(stats.max_timestamp - stats.min_timestamp, 1)
+    eval_fraction = min(max((stats.max_timestamp - timestamp_split_start) / time_span, 0), 1)
+    eval_interactions = stats.num_interactions * eval_fraction
+
+    dataset_bytes = stats.num_interactions * _BYTES_PER_INTERACTION_ROW * _DATASET_COPIES
+    split_bytes = eval_interactions * _BYTES_PER_INTERACTION_ROW * _SPLIT_COPIES
+    window_bytes = num_windows * _PER_WINDOW_OVERHEAD
+
+    # Item-item similarity: co-occurring items per item, capped by the item count
+    avg_items_per_user = stats.num_interactions / max(stats.num_users, 1)
+    avg_users_per_item = stats.num_interactions / max(stats.num_items, 1)
+    neighbours = min(stats.num_items, math.ceil(avg_items_per_user * avg_users_per_item))
+    algorithm_bytes = 0
+    for params in algorithm_params:
+        model_bytes = stats.num_items * neighbours * _BYTES_PER_SPARSE_ENTRY
+        training_bytes = stats.num_interactions * _BYTES_PER_SPARSE_ENTRY
+        prediction_bytes = stats.num_users * max(int(params.get("K", top_k)), top_k) * _BYTES_PER_SPARSE_ENTRY
+        algorithm_bytes += model_bytes + training_bytes + prediction_bytes
+
+    # Per-user scores for every window, algorithm and metric, kept until results are saved
+    result_bytes = eval_interactions * len(algorithm_params) * num_metrics * _BYTES_PER_USER_SCORE
+
+    if low_memory:
+        split_bytes /= num_windows
+        window_bytes = _PER_WINDOW_OVERHEAD
+        result_bytes /= num_windows
+
+    estimate = _BASE_OVERHEAD + dataset_bytes + split_bytes + window_bytes + algorithm_bytes + result_bytes
+    return int(estimate * settings.EVALUATION_MEMORY_SAFETY_FACTOR)
+
+
+class Reservation:
+    """Memory reserved for one admitted job."""
+
+    def __init__(self, stream_job_id: int, estimate: int) -> None:
+        self.stream_job_id = stream_job_id
+        self.estimate = estimate
+        self.reason: str | None = None
+        self._exceeded = threading.Event()
+
+    def flag(self, reason: str) -> None:
+        self.reason = reason
+        self._exceeded.set()
+
+    @property
+    def exceeded(self) -> bool:
+        return self._exceeded.is_set()
+
+    def check(self) -> None:
+        """Raise if the watchdog flagged this job."""
+        if self._exceeded.is_set():
+            raise MemoryBudgetExceededError(self.reason)
+
+
+class AdmissionController:
+    """FIFO admission of jobs against a memory budget with an RSS watchdog."""
+
+    def __init__(self, budget_bytes: int, hard_limit_bytes: int, watchdog_interval: float = 1.0) -> None:
+        self.budget_bytes = budget_bytes
+        self.hard_limit_bytes = hard_limit_bytes
+        self.watchdog_interval = watchdog_interval
+        self._cond = threading.Condition()
+        self._waiting: deque[int] = deque()
+        self._running: dict[int, Reservation] = {}
+        self._watchdog: threading.Thread | None = None
+
+    @property
+    def reserved_bytes(self) -> int:
+        return sum(r.estimate for r in self._running.values())
+
+    def _can_admit(self, stream_job_id: int, estimate: int) -> bool:
+        if not self._waiting or self._waiting[0] != stream_job_id:
+            return False
+        # A job larger than the whole budget still runs, but only on its own
+        return not self._running or self.reserved_bytes + estimate <= self.budget_bytes
+
+    @contextmanager
+    def reserve(
+        self, stream_job_id: int, estimate: int, token: CancellationToken | None = None
+    ) -> Iterator[Reservation]:
+        """Block until the job fits in the budget, then hold its reservation.
+
+        A job cancelled through `token` while waiting leaves the line and
+        raises JobCancelledError. Outside a worker thread a job that cannot
+        be admitted at once raises AdmissionRejectedError.
+        """
+        reservation = Reservation(stream_job_id, estimate)
+        with self._cond:
+            self._waiting.append(stream_job_id)
+            if not self._can_admit(stream_job_id, estimate):
+                if not getattr(_thread_state, "worker", False):
+                    self._waiting.remove(stream_job_id)
+                    self._cond.notify_all()
+                    raise AdmissionRejectedError(
+                        f"Stream job {stream_job_id} needs {estimate / MIB:.0f} MiB, "
+                        f"{self.reserved_bytes / MIB:.0f}/{self.budget_bytes / MIB:.0f} MiB reserved"
+                    )
+                logger.info(
+                    f"Stream job {stream_job_id} queued: needs {estimate / MIB:.0f} MiB, "
+                    f"{self.reserved_bytes / MIB:.0f}/{self.budget_bytes / MIB:.0f} MiB reserved"
+                )
+            while not self._cond.wait_for(lambda: self._can_admit(stream_job_id, estimate), timeout=1.0):
+                if token is not None and token.cancelled:
+                    self._waiting.remove(stream_job_id)
+                    self._cond.notify_all()
+                    token.check()
+            self._waiting.popleft()
+            self._running[stream_job_id] = reservation
+            MEMORY_RESERVED.set(self.reserved_bytes)
+            self._ensure_watchdog()
+            self._cond.notify_all()
+        logger.info(f"Stream job {stream_job_id} admitted with {estimate / MIB:.0f} MiB reserved")
+        try:
+            yield reservation
+        finally:
+            with self._cond:
+                self._running.pop(stream_job_id, None)
+                MEMORY_RESERVED.set(self.reserved_bytes)
+                self._cond.notify_all()
+
+    def _ensure_watchdog(self) -> None:
+        if self._watchdog is None or not self._watchdog.is_alive():
+            self._watchdog = threading.Thread(target=self._watch, name="rss-watchdog", daemon=True)
+            self._watchdog.start()
+
+    def _watch(self) -> None:
+        while True:
+            with self._cond:
+                if not self._running:
+                    self._watchdog = None
+                    return
+            rss = current_rss()
+            if rss > self.hard_limit_bytes:
+                self._flag_largest(rss)
+            time.sleep(self.watchdog_interval)
+
+    def _flag_largest(self, rss: int) -> None:
+        with self._cond:
+            # Give an already flagged job the chance to unwind before picking another
+            if not self._running or any(r.exceeded for r in self._running.values()):
+                return
+            victim = max(self._running.values(), key=lambda r: r.estimate)
+        reason = (
+            f"Job exceeded the memory budget: process RSS {rss / MIB:.0f} MiB is above the "
+            f"{self.hard_limit_bytes / MIB:.0f} MiB limit (job estimate {victim.estimate / MIB:.0f} MiB)"
+        )
+        logger.warning(f"Stream job {victim.stream_job_id} flagged by RSS watchdog. {reason}")
+        victim.flag(reason)
+
+
+_admission_controller: AdmissionController = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """Get global admission controller instance."""
+    global _admission_controller
+    if _admission_controller is None:
+        settings = get_settings()
+        _admission_controller = AdmissionController(
+            budget_bytes=settings.EVALUATION_MEMORY_BUDGET_MB * MIB,
+            hard_limit_bytes=settings.EVALUATION_MEMORY_HARD_LIMIT_MB * MIB,
+        )
+    return _admission_controller
@@ -0,0 +1,27 @@
+import threading
+
+
+class JobCancelledError(Exception):
+    """Raised inside a job at its next check after cancellation was requested."""
+
+
+class CancellationToken:
+    """Cooperative cancellation flag shared between a job and whoever may cancel it."""
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self.abandoned = False
+
+    def cancel(self, abandon: bool = False) -> None:
+        """Request cancellation. `abandon` stops the job without recording it as cancelled."""
+        self.abandoned = abandon
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self) -> None:
+        """Raise if cancellation was requested."""
+        if self._event.is_set():
+            raise JobCancelledError("Evaluation was cancelled")
@@ -0,0 +1,215 @@
+"""
+Per-window checkpoints of a running evaluation.
+
+A checkpoint holds the evaluator state that cannot be rebuilt from the job
+definition: the window cursor, the known user/item base, the trained
+algorithms and the metric accumulator (every result computed so far). The
+dataset and the split are deterministic and are rebuilt on resume rather than
+pickled with every window.
+
+A completed job also keeps a live state (see services/live.py): the
+algorithms and the user/item base after its last window, with an empty
+accumulator, from which a continuation evaluates the windows of interactions
+appended later.
+"""
+
+import json
+import logging as logger
+import os
+import pickle
+import shutil
+from dataclasses import dataclass, field
+
+from streamsight.evaluators import EvaluatorPipeline
+from streamsight.evaluators.accumulator import MetricAccumulator
+
+from streamsight_studio_backend.config.setting import get_settings
+
+
+logger = logger.getLogger(__name__)
+
+CHECKPOINT_FORMAT = 1
+
+
+@dataclass
+class Checkpoint:
+    """Evaluator state after a completed window."""
+
+    run_step: int
+    algorithm_uuids: list[str]
+    streamsight_version: str | None
+    state: dict = field(repr=False)
+    format: int = CHECKPOINT_FORMAT
+
+
+def _checkpoint_path(stream_job_id: int) -> str:
+    base_path = get_settings().get_datalake_config()["base_path"]
+    return os.path.join(base_path, "checkpoints", str(stream_job_id), "evaluator.pkl")
+
+
+def _meta_path(stream_job_id: int) -> str:
+    return os.path.join(os.path.dirname(_checkpoint_path(stream_job_id)), "meta.json")
+
+
+def _algorithm_uuids(evaluator: EvaluatorPipeline) -> list[str]:
+    return sorted(str(entry.algorithm_uuid) for entry in evaluator.algo_state_mgr.values())
+
+
+def _live_dir(stream_job_id: int) -> str:
+    base_path = get_settings().get_datalake_config()["base_path"]
+    return os.path.join(base_path, "live", str(stream_job_id))
+
+
+def _live_state_path(stream_job_id: int, window: int) -> str:
+    return os.path.join(_live_dir(stream_job_id), f"evaluator-{window}.pkl")
+
+
+def _live_meta_path(stream_job_id: int, window: int) -> str:
+    return os.path.join(_live_dir(stream_job_id), f"meta-{window}.json")
+
+
+def _write(path: str, meta_path: str, checkpoint: Checkpoint, meta: dict) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    with open(f"{path}.meta.tmp", "w") as f:
+        json.dump(meta, f)
+    os.replace(f"{path}.meta.tmp", meta_path)
+
+
+def _read(path: str, stream_job_id: int) -> Checkpoint | None:
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            checkpoint = pickle.load(f)
+    except Exception as e:
+        logger.warning(f"Discarding unreadable checkpoint for stream job {stream_job_id}: {e}")
+        return None
+    if not isinstance(checkpoint, Checkpoint) or checkpoint.format != CHECKPOINT_FORMAT:
+        logger.warning(f"Discarding checkpoint with unknown format for stream job {stream_job_id}")
+        return None
+    return checkpoint
+
+
+def save_checkpoint(stream_job_id: int, evaluator: EvaluatorPipeline, streamsight_version: str | None) -> None:
+    """Write the evaluator state to the datalake, replacing the previous checkpoint atomically."""
+    checkpoint = Checkpoint(
+        run_step=evaluator._run_step,
+        algorithm_uuids=_algorithm_uuids(evaluator),
+        streamsight_version=streamsight_version,
+        state={
+            "current_timestamp": getattr(evaluator, "_current_timestamp", None),
+            "user_item_base": evaluator.user_item_base,
+            "algo_state_mgr": evaluator.algo_state_mgr,
+            "acc": evaluator._acc,
+        },
+    )
+    meta = {"run_step": checkpoint.run_step, "num_split": evaluator.setting.num_split}
+    _write(_checkpoint_path(stream_job_id), _meta_path(stream_job_id), checkpoint, meta)
+    logger.info(f"Checkpoint saved for stream job {stream_job_id} at window {checkpoint.run_step}")
+
+
+def load_checkpoint(stream_job_id: int) -> Checkpoint | None:
+    """Return the last checkpoint of a job, or None if there is none or it is unreadable."""
+    return _read(_checkpoint_path(stream_job_id), stream_job_id)
+
+
+def get_checkpoint_window(stream_job_id: int) -> int | None:
+    """Window cursor of the last checkpoint, read without unpickling the state."""
+    try:
+        with open(_meta_path(stream_job_id)) as f:
+            return int(json.load(f)["run_step"])
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def restore_checkpoint(evaluator: EvaluatorPipeline, checkpoint: Checkpoint, streamsight_version: str | None) -> bool:
+    """Restore a freshly built evaluator to the checkpointed window.
+
+    Returns False, leaving the evaluator untouched, if the checkpoint was taken
+    with a different set of algorithms or another streamsight version.
+    """
+    if checkpoint.algorithm_uuids != _algorithm_uuids(evaluator):
+        logger.warning("Checkpoint algorithms do not match the stream job, starting from the first window")
+        return False
+    if checkpoint.streamsight_version != streamsight_version:
+        logger.warning(
+            f"Checkpoint was written by streamsight {checkpoint.streamsight_version}, "
+            f"running {streamsight_version}; starting from the first window"
+        )
+        return False
+
+    evaluator.algo_state_mgr = checkpoint.state["algo_state_mgr"]
+    evaluator.user_item_base = checkpoint.state["user_item_base"]
+    evaluator._acc = checkpoint.state["acc"]
+    evaluator._current_timestamp = checkpoint.state["current_timestamp"]
+    evaluator._run_step = checkpoint.run_step
+    # Move the setting's split cursor to the same window
+    evaluator.restore()
+    return True
+
+
+def clear_checkpoint(stream_job_id: int) -> None:
+    """Remove every checkpoint of a job."""
+    shutil.rmtree(os.path.dirname(_checkpoint_path(stream_job_id)), ignore_errors=True)
+
+
+def save_live_state(
+    stream_job_id: int,
+    evaluator: EvaluatorPipeline,
+    streamsight_version: str | None,
+    window: int,
+    algorithms: dict[str, str | None],
+) -> None:
+    """Keep an evaluator fitted on every window before `window`, to continue it on appended interactions."""
+    checkpoint = Checkpoint(
+        run_step=0,
+        algorithm_uuids=_algorithm_uuids(evaluator),
+        streamsight_version=streamsight_version,
+        state={
+            "current_timestamp": getattr(evaluator, "_current_timestamp", None),
+            "user_item_base": evaluator.user_item_base,
+            "algo_state_mgr": evaluator.algo_state_mgr,
+            "acc": MetricAccumulator(),
+            "window": window,
+        },
+    )
+    meta = {"window": window, "algorithms": algorithms}
+    _write(_live_state_path(stream_job_id, window), _live_meta_path(stream_job_id, window), checkpoint, meta)
+    logger.info(f"Live state saved for stream job {stream_job_id}, next window is {window}")
+
+
+def load_live_state(stream_job_id: int, window: int) -> Checkpoint | None:
+    """Return the live state of a job before `window`, or None if there is none or it is unreadable."""
+    return _read(_live_state_path(stream_job_id, window), stream_job_id)
+
+
+def get_live_meta(stream_job_id: int, window: int) -> dict | None:
+    """The algorithms of a job's live state before `window`, read without unpickling it.
+
+    None without a live state.
+    """
+    try:
+        with open(_live_meta_path(stream_job_id, window)) as f:
+            meta = json.load(f)
+        return {"window": int(meta["window"]), "algorithms": dict(meta["algorithms"])}
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def clear_live_state(stream_job_id: int, keep_window: int | None = None) -> None:
+    """Remove the live states of a job but the one before `keep_window`, keeping its appended interactions."""
+    keep = {f"evaluator-{keep_window}.pkl", f"meta-{keep_window}.json"} if keep_window is not None else set()
+    try:
+        names = os.listdir(_live_dir(stream_job_id))
+    except OSError:
+        return
+    for name in names:
+        if name.startswith(("evaluator", "meta")) and name not in keep:
+            try:
+                os.remove(os.path.join(_live_dir(stream_job_id), name))
+            except OSError:
+                pass
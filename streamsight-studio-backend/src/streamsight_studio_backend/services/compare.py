@@ -0,0 +1,266 @@
+"""
+Paired significance tests between two algorithms of a stream job.
+
+Both algorithms are scored on the same users in the same windows, so their
+user level results pair up by (metric, window, user). Per metric and per
+window, the score differences of the paired users are tested with
+
+- a paired bootstrap: users are resampled with replacement and the mean
+  difference recomputed, giving a percentile interval and a p-value from
+  the bootstrap distribution shifted to a zero mean;
+- the Wilcoxon signed-rank test, zero differences dropped, with the normal
+  approximation and tie correction;
+- the paired t-test.
+
+Every test runs on all groups at once: the paired scores are sorted into
+contiguous groups and reduced with bincount/reduceat, so the cost does not
+depend on the number of windows. The pooled test of a metric treats every
+(user, window) pair as one observation.
+
+Summaries are cached in the datalake per job, keyed by the job's completion
+time and metrics, so a rerun or added metric invalidates them.
+"""
+
+import hashlib
+import json
+import logging as logger
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+from sqlalchemy.orm import Session
+
+from streamsight_studio_backend.config.setting import get_settings
+from streamsight_studio_backend.db.schema import StreamAlgorithm, StreamJob, UserEvaluationResult
+
+
+logger = logger.getLogger(__name__)
+
+# Resampled values held at once by the bootstrap, bounding its memory
+_BOOTSTRAP_CELLS = 2**22
+
+_SEED = 0
+
+
+def _comparisons_dir(stream_job_id: int) -> str:
+    base_path = get_settings().get_datalake_config()["base_path"]
+    return os.path.join(base_path, "comparisons", str(stream_job_id))
+
+
+def clear_comparisons(stream_job_id: int) -> None:
+    shutil.rmtree(_comparisons_dir(stream_job_id), ignore_errors=True)
+
+
+def _digest(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def _cache_paths(stream_job: StreamJob, request: dict) -> tuple[str, str]:
+    """Cache file of a comparison, and the prefix shared by all comparisons of the job's current results."""
+    version = _digest([stream_job.completed_at, sorted(stream_job.metrics)])
+    return os.path.join(_comparisons_dir(stream_job.id), f"{version}_{_digest(request)}.json"), version
+
+
+def _get_cached(path: str) -> dict | None:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_cached(path: str, version: str, summary: dict) -> None:
+    """Write a summary and drop those computed from earlier results of the job."""
+    directory = os.path.dirname(path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if not name.startswith(version):
+                os.remove(os.path.join(directory, name))
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(summary, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not cache comparison {path}: {e}")
+
+
+def load_paired_scores(
+    db: Session, stream_job_id: int, algorithm_a: int, algorithm_b: int, metrics: list[str]
+) -> pd.DataFrame:
+    """User scores of two algorithms aligned by (metric, timestamp, user_id), as score_a and score_b."""
+    rows = (
+        db.query(
+            UserEvaluationResult.stream_algorithm_id,
+            UserEvaluationResult.metric,
+            UserEvaluationResult.timestamp,
+            UserEvaluationResult.user_id,
+            UserEvaluationResult.user_score,
+        )
+        .filter(
+            UserEvaluationResult.stream_job_id == stream_job_id,
+            UserEvaluationResult.stream_algorithm_id.in_([algorithm_a, algorithm_b]),
+            UserEvaluationResult.metric.in_(metrics),
+        )
+        .all()
+    )
+    df = pd.DataFrame(rows, columns=["stream_algorithm_id", "metric", "timestamp", "user_id", "user_score"])
+    keys = ["metric", "timestamp", "user_id"]
+    a = df.loc[df["stream_algorithm_id"] == algorithm_a, keys + ["user_score"]]
+    b = df.loc[df["stream_algorithm_id"] == algorithm_b, keys + ["user_score"]]
+    paired = a.merge(b, on=keys, suffixes=("_a", "_b")).rename(
+        columns={"user_score_a": "score_a", "user_score_b": "score_b"}
+    )
+    paired = paired.dropna(subset=["score_a", "score_b"])
+    # Windows in time order; timestamps are stored as "t=<timestamp>"
+    paired["window_order"] = pd.to_numeric(paired["timestamp"].str.removeprefix("t="), errors="coerce")
+    return paired.sort_values(["metric", "window_order", "user_id"], ignore_index=True)
+
+
+def _bootstrap_means(
+    d: np.ndarray, codes: np.ndarray, n: np.ndarray, num_samples: int, rng: np.random.Generator
+) -> np.ndarray:
+    """Mean difference of every group in every resample, shape (num_samples, num_groups).
+
+    `codes` must be sorted so that every group is contiguous. Each position of
+    a group draws a random position of the same group, so one resample of all
+    groups is a single gather.
+    """
+    starts = np.concatenate([[0], np.cumsum(n)[:-1]])
+    group_start = starts[codes]
+    group_size = n[codes]
+    chunk = max(1, _BOOTSTRAP_CELLS // len(d))
+    means = []
+    for begin in range(0, num_samples, chunk):
+        size = min(chunk, num_samples - begin)
+        idx = group_start + (rng.random((size, len(d))) * group_size).astype(np.int64)
+        means.append(np.add.reduceat(d[idx], starts, axis=1) / n)
+    return np.concatenate(means)
+
+
+def paired_tests(
+    codes: np.ndarray, a: np.ndarray, b: np.ndarray, num_samples: int, confidence: float, seed: int = _SEED
+) -> dict[str, np.ndarray]:
+    """Paired tests of a - b for every group, one array entry per group.
+
+    `codes` are group numbers 0..G-1, sorted, with every group non-empty.
+    """
+    num_groups = int(codes[-1]) + 1
+    d = a - b
+    n = np.bincount(codes, minlength=num_groups)
+    mean_a = np.bincount(codes, a, num_groups) / n
+    mean_b = np.bincount(codes, b, num_groups) / n
+    mean_d = np.bincount(codes, d, num_groups) / n
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Paired t-test
+        variance = np.bincount(codes, (d - mean_d[codes]) ** 2, num_groups) / (n - 1)
+        t = mean_d / np.sqrt(variance / n)
+        p_ttest = 2 * stats.t.sf(np.abs(t), n - 1)
+        # Identical differences: no evidence if they are all zero, certain otherwise
+        p_ttest = np.where(variance == 0, np.where(mean_d == 0, 1.0, 0.0), p_ttest)
+        p_ttest[n < 2] = np.nan
+
+        # Wilcoxon signed-rank test on the non-zero differences
+        nonzero = d != 0
+        nz_codes = codes[nonzero]
+        abs_d = np.abs(d[nonzero])
+        ranks = pd.Series(abs_d).groupby(nz_codes).rank(method="average").to_numpy()
+        w_plus = np.bincount(nz_codes, ranks * (d[nonzero] > 0), num_groups)
+        m = np.bincount(nz_codes, minlength=num_groups).astype(np.float64)
+        ties = pd.DataFrame({"group": nz_codes, "value": abs_d}).groupby(["group", "value"]).size()
+        tie_size = ties.to_numpy().astype(np.float64)
+        tie_term = np.bincount(ties.index.get_level_values("group"), tie_size**3 - tie_size, num_groups)
+        w_variance = m * (m + 1) * (2 * m + 1) / 24 - tie_term / 48
+        z = (w_plus - m * (m + 1) / 4) / np.sqrt(w_variance)
+        p_wilcoxon = np.where(m == 0, 1.0, 2 * stats.norm.sf(np.abs(z)))
+
+    # Paired bootstrap
+    means = _bootstrap_means(d, codes, n, num_samples, np.random.default_rng(seed))
+    alpha = (1.0 - confidence) / 2
+    extreme = np.abs(means - mean_d) >= np.abs(mean_d)
+    p_bootstrap = (extreme.sum(axis=0) + 1) / (num_samples + 1)
+
+    return {
+        "num_users": n,
+        "mean_a": mean_a,
+        "mean_b": mean_b,
+        "mean_diff": mean_d,
+        "ci_lower": np.quantile(means, alpha, axis=0),
+        "ci_upper": np.quantile(means, 1 - alpha, axis=0),
+        "p_bootstrap": p_bootstrap,
+        "p_wilcoxon": p_wilcoxon,
+        "p_ttest": p_ttest,
+    }
+
+
+def _rows(results: dict[str, np.ndarray], index: int) -> dict:
+    row = {}
+    for key, values in results.items():
+        value = values[index]
+        if key == "num_users":
+            row[key] = int(value)
+        else:
+            row[key] = None if np.isnan(value) else float(value)
+    return row
+
+
+def compare_algorithms(
+    paired: pd.DataFrame, metrics: list[str], num_samples: int, confidence: float
+) -> list[dict]:
+    """Per metric summary of the pooled tests, with the tests of every window under "windows"."""
+    summary = {metric: {"metric": metric, "num_users": 0, "windows": []} for metric in metrics}
+    if paired.empty:
+        return list(summary.values())
+
+    a = paired["score_a"].to_numpy(dtype=np.float64)
+    b = paired["score_b"].to_numpy(dtype=np.float64)
+    # paired is sorted by metric and window, so both groupings are contiguous
+    metric_codes, metric_names = pd.factorize(paired["metric"])
+    pooled = paired_tests(metric_codes, a, b, num_samples, confidence)
+    for index, metric in enumerate(metric_names):
+        summary[metric].update(_rows(pooled, index))
+
+    window_keys = paired[["metric", "timestamp"]]
+    window_codes = (window_keys != window_keys.shift()).any(axis=1).cumsum().to_numpy() - 1
+    windows = paired_tests(window_codes, a, b, num_samples, confidence)
+    firsts = np.flatnonzero(np.diff(window_codes, prepend=-1))
+    for index, first in enumerate(firsts):
+        row = {"timestamp": paired["timestamp"].iat[first], **_rows(windows, index)}
+        summary[paired["metric"].iat[first]]["windows"].append(row)
+    return list(summary.values())
+
+
+def get_comparison(
+    db: Session,
+    stream_job: StreamJob,
+    algorithm_a: StreamAlgorithm,
+    algorithm_b: StreamAlgorithm,
+    metrics: list[str],
+    num_samples: int,
+    confidence: float,
+) -> dict:
+    """Cached summary of the paired tests of two algorithms of a job."""
+    request = [algorithm_a.id, algorithm_b.id, sorted(metrics), num_samples, confidence]
+    path, version = _cache_paths(stream_job, request)
+    cached = _get_cached(path)
+    if cached is not None:
+        return cached
+
+    paired = load_paired_scores(db, stream_job.id, algorithm_a.id, algorithm_b.id, metrics)
+    summary = {
+        "stream_job_id": stream_job.id,
+        "algorithm_a": {"id": algorithm_a.id, "name": algorithm_a.algorithm_name},
+        "algorithm_b": {"id": algorithm_b.id, "name": algorithm_b.algorithm_name},
+        "num_samples": num_samples,
+        "confidence": confidence,
+        "metrics": compare_algorithms(paired, metrics, num_samples, confidence),
+    }
+    _save_cached(path, version, summary)
+    logger.info(
+        f"Compared algorithms {algorithm_a.id} and {algorithm_b.id} of stream job {stream_job.id} "
+        f"on {len(paired)} paired user scores"
+    )
+    return summary
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import logging as logger
+import os
+from dataclasses import asdict, dataclass
+
+import pandas as pd
+from streamsight.matrix import InteractionMatrix
+
+from streamsight_studio_backend.config.setting import get_settings
+
+
+logger = logger.getLogger(__name__)
+
+
+@dataclass
+class DatasetStats:
+    """Size statistics of a loaded dataset used for cost estimation.
+
+    `content_hash` digests the loaded interactions and `source` the size and
+    modification time of the dataset files they were loaded from.
+    """
+
+    num_interactions: int
+    num_users: int
+    num_items: int
+    min_timestamp: float
+    max_timestamp: float
+    content_hash: str | None = None
+    source: str | None = None
+
+
+def _stats_path(dataset_name: str) -> str:
+    base_path = get_settings().get_datalake_config()["base_path"]
+    return os.path.join(base_path, "stats", f"{dataset_name}.json")
+
+
+def dataset_source(dataset_name: str) -> str | None:
+    """Size and modification time of the files a dataset is loaded from, None if there are none yet."""
+    # Imported lazily, the registries import every algorithm and dataset of streamsight, which the
+    # scheduler and the queue importing this module do not need
+    from streamsight.registries import DATASET_REGISTRY
+
+    try:
+        dataset_cls = DATASET_REGISTRY.get(dataset_name)
+    except KeyError:
+        return None
+    base_path = dataset_cls.config.default_base_path
+    filename = dataset_cls.config.default_filename
+    # The raw download and the processed frame streamsight caches next to it
+    parts = []
+    for path in (os.path.join(base_path, filename), os.path.join(base_path, f"{filename}.processed.parquet")):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        parts.append(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}")
+    return ";".join(parts) or None
+
+
+def content_hash(data: InteractionMatrix) -> str:
+    """Digest of the users, items and timestamps of a dataset's interactions."""
+    columns = [InteractionMatrix.USER_IX, InteractionMatrix.ITEM_IX, InteractionMatrix.TIMESTAMP_IX]
+    hashed = pd.util.hash_pandas_object(data._df[columns], index=False).to_numpy()
+    return hashlib.sha256(hashed.tobytes()).hexdigest()[:16]
+
+
+def get_dataset_stats(dataset_name: str) -> DatasetStats | None:
+    """Return cached statistics for a dataset.
+
+    None if the dataset was never loaded, or if its files changed since the
+    statistics were recorded, so that the caller loads it again.
+    """
+    try:
+        with open(_stats_path(dataset_name)) as f:
+            stats = DatasetStats(**json.load(f))
+    except (OSError, ValueError, TypeError):
+        return None
+    if stats.content_hash is None or stats.source != dataset_source(dataset_name):
+        logger.info(f"Cached statistics of dataset {dataset_name} are stale")
+        return None
+    return stats
+
+
+def record_dataset_stats(dataset_name: str, data: InteractionMatrix) -> DatasetStats:
+    """Compute statistics from a loaded dataset and cache them in the datalake."""
+    stats = DatasetStats(
+        num_interactions=data.num_interactions,
+        num_users=len(data.user_ids),
+        num_items=len(data.item_ids),
+        min_timestamp=float(data.min_timestamp),
+        max_timestamp=float(data.max_timestamp),
+        content_hash=content_hash(data),
+        source=dataset_source(dataset_name),
+    )
+    path = _stats_path(dataset_name)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(asdict(stats), f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not cache dataset statistics for {dataset_name}: {e}")
+    return stats
@@ -1,219 +1,524 @@
 import json
 import logging as logger
+import time
 import traceback
+from collections.abc import Callable
 from datetime import datetime, timezone
+from importlib.metadata import PackageNotFoundError, version
 
 import pandas as pd
 import streamsight.evaluators
 import streamsight.registries
 import streamsight.settings
 from sqlalchemy.orm import Session
+from streamsight.evaluators.util import MetricLevelEnum
+from streamsight.matrix import InteractionMatrix
 from streamsight.registries import ALGORITHM_REGISTRY
 
 from streamsight_studio_backend.db.connection import get_database_manager
 from streamsight_studio_backend.db.schema import (
+    AlgorithmWindowProfile,
     MacroEvaluationResult,
     MicroEvaluationResult,
     StreamAlgorithm,
     StreamJob,
+    StreamJobRun,
+    StreamJobRunStage,
     UserEvaluationResult,
     WindowEvaluationResult,
 )
+from streamsight_studio_backend.config.log import job_logging
+from streamsight_studio_backend.config.setting import get_settings
+from streamsight_studio_backend.services.admission import Reservation, estimate_job_memory, get_admission_controller
+from streamsight_studio_backend.services.cancellation import CancellationToken, JobCancelledError
+from streamsight_studio_backend.services.checkpoint import (
+    clear_checkpoint,
+    clear_live_state,
+    get_checkpoint_window,
+    load_checkpoint,
+    load_live_state,
+    restore_checkpoint,
+    save_checkpoint,
+    save_live_state,
+)
+from streamsight_studio_backend.services.dataset_stats import DatasetStats, get_dataset_stats, record_dataset_stats
+from streamsight_studio_backend.services.fingerprint import dataset_version, result_fingerprint
+from streamsight_studio_backend.services.job_status import JobStatus, transition_job
+from streamsight_studio_backend.services.leaderboard import job_fingerprints, refresh_leaderboard
+from streamsight_studio_backend.services.live import (
+    complete_windows,
+    continuation_data,
+    live_algorithms,
+    load_appended,
+    next_window_start,
+    with_appended,
+)
+from streamsight_studio_backend.services.pipeline import iter_windows, release_last_window
+from streamsight_studio_backend.services.preprocessing import (
+    apply_preprocessing,
+    get_preprocessing,
+    load_preprocessed,
+    save_preprocessed,
+)
+from streamsight_studio_backend.services.predictions import (
+    PredictionStore,
+    clear_predictions,
+    compute_stored_metrics,
+    has_predictions,
+)
+from streamsight_studio_backend.services.preview import apply_preview, is_preview, record_preview_intervals
+from streamsight_studio_backend.services.profiling import AlgorithmProfiler, StageProfiler
+from streamsight_studio_backend.services.result_cache import record_computed_results, reuse_cached_results
+from streamsight_studio_backend.services.spill import MetricSpill, clear_scratch, create_spilling_setting
+from streamsight_studio_backend.services.window_parallel import (
+    is_stateless,
+    merge_accumulators,
+    run_windows_parallel,
+)
+from streamsight_studio_backend.services.telemetry import (
+    EVALUATION_JOB_DURATION,
+    EVALUATION_JOBS_RUNNING,
+    EVALUATION_ROWS_PERSISTED,
+)
 
 
 logger = logger.getLogger(__name__)
 
 
+def delete_evaluation_results(db: Session, stream_job_id: int, stream_algorithm_ids: list[int] | None = None) -> None:
+    """Delete stored results and window profiles of a stream job, optionally only those of some algorithms.
+
+    The caller commits.
+    """
+    for model in (
+        MacroEvaluationResult,
+        MicroEvaluationResult,
+        WindowEvaluationResult,
+        UserEvaluationResult,
+        AlgorithmWindowProfile,
+    ):
+        query = db.query(model).filter(model.stream_job_id == stream_job_id)
+        if stream_algorithm_ids is not None:
+            query = query.filter(model.stream_algorithm_id.in_(stream_algorithm_ids))
+        query.delete(synchronize_session=False)
+    query = db.query(StreamAlgorithm).filter(StreamAlgorithm.stream_job_id == stream_job_id)
+    if stream_algorithm_ids is not None:
+        query = query.filter(StreamAlgorithm.id.in_(stream_algorithm_ids))
+    fingerprints = [fingerprint for (fingerprint,) in query.with_entities(StreamAlgorithm.result_fingerprint)]
+    # Synchronized, so that setting the same fingerprint again on a loaded algorithm is flushed
+    query.update({StreamAlgorithm.result_fingerprint: None}, synchronize_session="evaluate")
+    refresh_leaderboard(db, fingerprints)
+
+
 def save_evaluation_results(db: Session, evaluator, stream_job_id: int) -> None:
-    """Save evaluation results to appropriate tables based on result type."""
-    try:
-        # Get results using the proper evaluator API
-        result_types = ["macro", "micro", "window", "user"]
-
-        for result_type in result_types:
-            try:
-                # Get DataFrame for this result type
-                df = evaluator.metric_results(result_type).reset_index()
-                logger.info(f"Processing {result_type} results. DataFrame shape: {df.shape}")
-                logger.info(f"Columns: {list(df.columns)}")
-
-                if result_type == "macro":
-                    save_macro_results_from_df(db, df, stream_job_id)
-                elif result_type == "micro":
-                    save_micro_results_from_df(db, df, stream_job_id)
-                elif result_type == "window":
-                    save_window_results_from_df(db, df, stream_job_id)
-                elif result_type == "user":
-                    save_user_results_from_df(db, df, stream_job_id)
-
-            except Exception as e:
-                logger.warning(f"No {result_type} results available or error accessing them: {e}")
-                continue
+    """Save evaluation results to appropriate tables based on result type. The caller commits."""
+    save_metric_results(db, evaluator.metric_results, stream_job_id)
 
-    except Exception as e:
-        logger.error(f"Error saving evaluation results: {e}")
-        logger.error(f"Full traceback:\n{traceback.format_exc()}")
+
+def save_metric_results(db: Session, metric_results: Callable[[str], pd.DataFrame], stream_job_id: int) -> None:
+    """Save the DataFrames returned by `metric_results(level)` for every result level. The caller commits."""
+    savers = {
+        "macro": save_macro_results_from_df,
+        "micro": save_micro_results_from_df,
+        "window": save_window_results_from_df,
+        "user": save_user_results_from_df,
+    }
+    for result_type, save in savers.items():
+        try:
+            # Get DataFrame for this result type
+            df = metric_results(result_type).reset_index()
+        except Exception as e:
+            logger.warning(f"No {result_type} results available or error accessing them: {e}")
+            continue
+        logger.info(f"Processing {result_type} results. DataFrame shape: {df.shape}")
+        logger.info(f"Columns: {list(df.columns)}")
+        save(db, df, stream_job_id)
 
 
-def save_macro_results_from_df(db: Session, df: pd.DataFrame, stream_job_id: int) -> None:
-    """Save macro-level evaluation results from DataFrame."""
-    logger.info(f"Saving macro results from DataFrame with shape: {df.shape}")
-    try:
+def save_spilled_results(db: Session, spill: MetricSpill, stream_job_id: int) -> None:
+    """Save the results of a low-memory run, the user level results one window at a time.
+
+    Each window's rows are flushed before the next is read, so that only one
+    window is held in memory. The caller commits.
+    """
+    save_macro_results_from_df(db, spill.macro_results(), stream_job_id)
+    save_micro_results_from_df(db, spill.micro_results(), stream_job_id)
+    save_window_results_from_df(db, spill.window_results(), stream_job_id)
+    for user_df in spill.iter_user_results():
+        save_user_results_from_df(db, user_df, stream_job_id)
+        db.flush()
+
+
+def save_continued_results(db: Session, evaluator, stream_job_id: int) -> None:
+    """Add the results of a continuation to those of a job, weighting macro and micro scores by their counts."""
+    algorithm_ids = {
+        str(sa.algorithm_uuid): sa.id
+        for sa in db.query(StreamAlgorithm).filter(StreamAlgorithm.stream_job_id == stream_job_id)
+    }
+
+    def stream_algorithm_id(algorithm: str) -> int:
+        algorithm_uuid = algorithm.split("_")[-1]
+        if algorithm_uuid not in algorithm_ids:
+            raise RuntimeError(f"Continued results of algorithm {algorithm_uuid}, which stream job has none")
+        return algorithm_ids[algorithm_uuid]
+
+    save_window_results_from_df(db, evaluator.metric_results("window").reset_index(), stream_job_id)
+    save_user_results_from_df(db, evaluator.metric_results("user").reset_index(), stream_job_id)
+    levels = (
+        ("macro", MacroEvaluationResult, "macro_score", "num_window"),
+        ("micro", MicroEvaluationResult, "micro_score", "num_user"),
+    )
+    for level, model, score_column, count_column in levels:
+        df = evaluator.metric_results(level).reset_index()
         for row in df.itertuples():
-            algo_uuid = row.algorithm.split("_")[-1]
-            # query to get algorithm name from StreamAlgorithm table
-            stream_algorithm = (
-                db.query(StreamAlgorithm)
-                .filter(StreamAlgorithm.algorithm_uuid == algo_uuid)
+            algorithm_id = stream_algorithm_id(row.algorithm)
+            score, count = getattr(row, score_column), int(getattr(row, count_column))
+            stored = (
+                db.query(model)
+                .filter(
+                    model.stream_job_id == stream_job_id,
+                    model.stream_algorithm_id == algorithm_id,
+                    model.metric == row.metric,
+                )
+                .with_for_update()
                 .first()
             )
-            logger.debug(f"{row.metric} with {row.macro_score} and {row.num_window}")
-            macro_result = MacroEvaluationResult(
-                stream_job_id=stream_job_id,
-                stream_algorithm_id=stream_algorithm.id,
-                metric=row.metric,
-                macro_score=row.macro_score,
-                num_window=row.num_window,
-            )
-            db.add(macro_result)
-        db.commit()
-        logger.info(f"Macro results saved: {len(df)} records")
-    except Exception as e:
-        logger.error(f"Error saving macro results: {e}")
-        db.rollback()
+            if stored is None:
+                db.add(
+                    model(
+                        stream_job_id=stream_job_id,
+                        stream_algorithm_id=algorithm_id,
+                        metric=row.metric,
+                        **{score_column: score, count_column: count},
+                    )
+                )
+                continue
+            stored_score, stored_count = getattr(stored, score_column), getattr(stored, count_column) or 0
+            if not count or pd.isna(score):
+                continue
+            if stored_score is None or not stored_count:
+                merged = score
+            else:
+                merged = (stored_score * stored_count + score * count) / (stored_count + count)
+            setattr(stored, score_column, float(merged))
+            setattr(stored, count_column, stored_count + count)
+        EVALUATION_ROWS_PERSISTED.inc(level, amount=len(df))
+        logger.info(f"{level.capitalize()} results updated from {len(df)} records")
+
+
+def save_macro_results_from_df(db: Session, df: pd.DataFrame, stream_job_id: int) -> None:
+    """Save macro-level evaluation results from DataFrame. The caller commits."""
+    logger.info(f"Saving macro results from DataFrame with shape: {df.shape}")
+    for row in df.itertuples():
+        algo_uuid = row.algorithm.split("_")[-1]
+        # query to get algorithm name from StreamAlgorithm table
+        stream_algorithm = (
+            db.query(StreamAlgorithm)
+            .filter(StreamAlgorithm.algorithm_uuid == algo_uuid)
+            .first()
+        )
+        # Per row, so formatted only if debug logging is enabled
+        logger.debug("%s with %s and %s", row.metric, row.macro_score, row.num_window)
+        macro_result = MacroEvaluationResult(
+            stream_job_id=stream_job_id,
+            stream_algorithm_id=stream_algorithm.id,
+            metric=row.metric,
+            macro_score=row.macro_score,
+            num_window=row.num_window,
+        )
+        db.add(macro_result)
+    EVALUATION_ROWS_PERSISTED.inc("macro", amount=len(df))
+    logger.info(f"Macro results saved: {len(df)} records")
 
 
 def save_micro_results_from_df(db: Session, df: pd.DataFrame, stream_job_id: int) -> None:
-    """Save micro-level evaluation results from DataFrame."""
-    try:
-        for row in df.itertuples():
-            algo_uuid = row.algorithm.split("_")[-1]
-            # query to get algorithm name from StreamAlgorithm table
-            stream_algorithm = (
-                db.query(StreamAlgorithm)
-                .filter(StreamAlgorithm.algorithm_uuid == algo_uuid)
-                .first()
-            )
-            micro_result = MicroEvaluationResult(
-                stream_job_id=stream_job_id,
-                stream_algorithm_id=stream_algorithm.id,
-                metric=row.metric,
-                micro_score=row.micro_score,
-                num_user=row.num_user,
-            )
-            db.add(micro_result)
-        db.commit()
-        logger.info(f"Micro results saved: {len(df)} records")
-    except Exception as e:
-        logger.error(f"Error saving micro results: {e}")
-        db.rollback()
+    """Save micro-level evaluation results from DataFrame. The caller commits."""
+    for row in df.itertuples():
+        algo_uuid = row.algorithm.split("_")[-1]
+        # query to get algorithm name from StreamAlgorithm table
+        stream_algorithm = (
+            db.query(StreamAlgorithm)
+            .filter(StreamAlgorithm.algorithm_uuid == algo_uuid)
+            .first()
+        )
+        micro_result = MicroEvaluationResult(
+            stream_job_id=stream_job_id,
+            stream_algorithm_id=stream_algorithm.id,
+            metric=row.metric,
+            micro_score=row.micro_score,
+            num_user=row.num_user,
+        )
+        db.add(micro_result)
+    EVALUATION_ROWS_PERSISTED.inc("micro", amount=len(df))
+    logger.info(f"Micro results saved: {len(df)} records")
 
 
 def save_window_results_from_df(db: Session, df: pd.DataFrame, stream_job_id: int) -> None:
-    """Save window-based evaluation results from DataFrame."""
-    try:
-        for row in df.itertuples():
-            algo_uuid = getattr(row, "algorithm", "").split("_")[-1] if hasattr(row, "algorithm") else ""
-            # query to get algorithm name from StreamAlgorithm table
-            stream_algorithm = (
-                db.query(StreamAlgorithm)
-                .filter(StreamAlgorithm.algorithm_uuid == algo_uuid)
-                .first()
-            )
-            window_result = WindowEvaluationResult(
-                stream_job_id=stream_job_id,
-                stream_algorithm_id=stream_algorithm.id if stream_algorithm else None,
-                metric=row.metric,
-                window_score=float(getattr(row, "window_score", 0)),
-                num_user=int(getattr(row, "num_user", 0)),
-                timestamp=getattr(row, "timestamp", 0),
-            )
-            db.add(window_result)
-        db.commit()
-        logger.info(f"Window results saved: {len(df)} records")
-    except Exception as e:
-        logger.error(f"Error saving window results: {e}")
-        db.rollback()
+    """Save window-based evaluation results from DataFrame. The caller commits."""
+    for row in df.itertuples():
+        algo_uuid = getattr(row, "algorithm", "").split("_")[-1] if hasattr(row, "algorithm") else ""
+        # query to get algorithm name from StreamAlgorithm table
+        stream_algorithm = (
+            db.query(StreamAlgorithm)
+            .filter(StreamAlgorithm.algorithm_uuid == algo_uuid)
+            .first()
+        )
+        window_result = WindowEvaluationResult(
+            stream_job_id=stream_job_id,
+            stream_algorithm_id=stream_algorithm.id if stream_algorithm else None,
+            metric=row.metric,
+            window_score=float(getattr(row, "window_score", 0)),
+            num_user=int(getattr(row, "num_user", 0)),
+            timestamp=getattr(row, "timestamp", 0),
+        )
+        db.add(window_result)
+    EVALUATION_ROWS_PERSISTED.inc("window", amount=len(df))
+    logger.info(f"Window results saved: {len(df)} records")
 
 
 def save_user_results_from_df(db: Session, df: pd.DataFrame, stream_job_id: int) -> None:
-    """Save user-specific evaluation results from DataFrame."""
+    """Save user-specific evaluation results from DataFrame. The caller commits."""
+    for row in df.itertuples():
+        algo_uuid = getattr(row, "algorithm", "").split("_")[-1] if hasattr(row, "algorithm") else ""
+        # query to get algorithm name from StreamAlgorithm table
+        stream_algorithm = (
+            db.query(StreamAlgorithm)
+            .filter(StreamAlgorithm.algorithm_uuid == algo_uuid)
+            .first()
+        )
+        user_result = UserEvaluationResult(
+            stream_job_id=stream_job_id,
+            stream_algorithm_id=stream_algorithm.id if stream_algorithm else None,
+            metric=row.metric,
+            user_score=float(getattr(row, "user_score", 0)),
+            user_id=int(getattr(row, "user_id", 0)),
+            timestamp=getattr(row, "timestamp", 0),
+        )
+        db.add(user_result)
+    EVALUATION_ROWS_PERSISTED.inc("user", amount=len(df))
+    logger.info(f"User results saved: {len(df)} records")
+
+
+def _streamsight_version() -> str | None:
     try:
-        for row in df.itertuples():
-            algo_uuid = getattr(row, "algorithm", "").split("_")[-1] if hasattr(row, "algorithm") else ""
-            # query to get algorithm name from StreamAlgorithm table
-            stream_algorithm = (
-                db.query(StreamAlgorithm)
-                .filter(StreamAlgorithm.algorithm_uuid == algo_uuid)
-                .first()
-            )
-            user_result = UserEvaluationResult(
-                stream_job_id=stream_job_id,
-                stream_algorithm_id=stream_algorithm.id if stream_algorithm else None,
-                metric=row.metric,
-                user_score=float(getattr(row, "user_score", 0)),
-                user_id=int(getattr(row, "user_id", 0)),
-                timestamp=getattr(row, "timestamp", 0),
+        return version("streamsight")
+    except PackageNotFoundError:
+        return None
+
+
+def _save_run_profile(db: Session, run: StreamJobRun, profiler: StageProfiler) -> None:
+    """Persist the stage timings collected for a run."""
+    try:
+        run.completed_at = datetime.now(timezone.utc)
+        for timing in profiler.stages:
+            db.add(
+                StreamJobRunStage(
+                    run_id=run.id,
+                    stage=timing.stage,
+                    wall_time=timing.wall_time,
+                    cpu_time=timing.cpu_time,
+                    peak_rss=timing.peak_rss,
+                )
             )
-            db.add(user_result)
         db.commit()
-        logger.info(f"User results saved: {len(df)} records")
     except Exception as e:
-        logger.error(f"Error saving user results: {e}")
+        logger.error(f"Error saving run profile for run {run.id}: {e}")
         db.rollback()
 
 
-def run_evaluation(stream_job_id: int) -> None:
-    db = get_database_manager().get_session()
-    try:
-        stream_job = db.query(StreamJob).filter(StreamJob.id == stream_job_id).first()
-        if not stream_job:
-            logger.error(f"Stream job {stream_job_id} not found")
-            return
+def _save_window_profiles(
+    db: Session,
+    profiler: AlgorithmProfiler,
+    stream_job_id: int,
+    stream_algorithms: list[StreamAlgorithm],
+    window_offset: int = 0,
+) -> None:
+    """Add the fit and predict measurements of every window of the evaluated algorithms. The caller commits.
 
-        logger.info(f"Starting evaluation for stream job {stream_job_id}")
-        logger.info(
-            f"Dataset: {stream_job.dataset}, timestamp_split_start: {stream_job.timestamp_split_start}, window_size: {stream_job.window_size}, top_k: {stream_job.top_k}"
+    `window_offset` is the number of windows evaluated before the profiled run.
+    """
+    algorithm_ids = {str(sa.algorithm_uuid): sa.id for sa in stream_algorithms}
+    profiles = [
+        AlgorithmWindowProfile(
+            stream_job_id=stream_job_id,
+            stream_algorithm_id=algorithm_ids[timing.algorithm_uuid],
+            window=timing.window + window_offset,
+            timestamp=timing.timestamp,
+            fit_time=timing.fit_time,
+            fit_interactions=timing.fit_interactions,
+            predict_time=timing.predict_time,
+            predict_interactions=timing.predict_interactions,
+            peak_memory_delta=timing.peak_memory_delta,
         )
+        for timing in profiler.windows
+        if timing.algorithm_uuid in algorithm_ids
+    ]
+    db.add_all(profiles)
+    logger.info(f"Saving {len(profiles)} algorithm window profiles")
 
-        try:
+
+def _reuse_cached_results(db: Session, stream_job_id: int, stream_algorithm: StreamAlgorithm, fingerprint: str) -> bool:
+    """Replace the results of an algorithm with those of another job with the same fingerprint, committed on a hit."""
+    savepoint = db.begin_nested()
+    delete_evaluation_results(db, stream_job_id, [stream_algorithm.id])
+    if not reuse_cached_results(db, stream_algorithm, fingerprint):
+        savepoint.rollback()
+        return False
+    savepoint.commit()
+    db.commit()
+    # Predictions stored by an earlier run of this job do not match the copied results
+    clear_predictions(stream_job_id, [str(stream_algorithm.algorithm_uuid)])
+    return True
+
+
+def _estimate_job_memory(stream_job: StreamJob) -> int:
+    """Estimate the peak memory of a stream job from cached dataset statistics."""
+    return estimate_job_memory(
+        stats=get_dataset_stats(stream_job.dataset),
+        timestamp_split_start=stream_job.timestamp_split_start.timestamp(),
+        window_size=stream_job.window_size,
+        top_k=stream_job.top_k,
+        num_metrics=len(stream_job.metrics),
+        low_memory=stream_job.low_memory and not is_preview(stream_job),
+        algorithm_params=[json.loads(sa.parameters) if sa.parameters else {} for sa in stream_job.stream_algorithms],
+    )
+
+
+def _load_dataset(stream_job: StreamJob, profiler: StageProfiler) -> tuple[InteractionMatrix, DatasetStats]:
+    try:
+        with profiler.stage("load_dataset"):
             dataset_cls = streamsight.registries.DATASET_REGISTRY.get(stream_job.dataset)
             logger.info(f"Dataset class: {dataset_cls}")
             dataset = dataset_cls()
             logger.info("Loading dataset...")
             data = dataset.load()
-            logger.info(f"Dataset loaded successfully. Data type: {type(data)}")
-        except Exception as e:
-            logger.error(f"Error loading dataset: {e}")
-            raise
+        stats = record_dataset_stats(stream_job.dataset, data)
+        logger.info(f"Dataset loaded successfully. Data type: {type(data)}")
+    except Exception as e:
+        logger.error(f"Error loading dataset: {e}")
+        raise
+    return data, stats
 
-        try:
-            logger.info("Setting up sliding window...")
+
+def _load_job_data(
+    stream_job: StreamJob, profiler: StageProfiler, version: str, data: InteractionMatrix | None = None
+) -> InteractionMatrix:
+    """The dataset of a job after its preprocessing, if any, followed by the interactions appended to it.
+
+    `data` is the raw dataset when already loaded. Preprocessed data is read
+    from the datalake cache when present, without loading the dataset, and
+    cached otherwise.
+    """
+    spec = get_preprocessing(stream_job)
+    if spec is None:
+        data = data if data is not None else _load_dataset(stream_job, profiler)[0]
+    else:
+        with profiler.stage("load_preprocessed"):
+            preprocessed = load_preprocessed(stream_job.dataset, spec, version)
+        if preprocessed is not None:
+            data = preprocessed
+        else:
+            if data is None:
+                data, _ = _load_dataset(stream_job, profiler)
+            with profiler.stage("preprocess"):
+                data = apply_preprocessing(data, spec)
+                save_preprocessed(stream_job.dataset, spec, version, data)
+    return with_appended(data, stream_job)
+
+
+def _execute_evaluation(
+    db: Session,
+    stream_job: StreamJob,
+    profiler: StageProfiler,
+    reservation: Reservation,
+    token: CancellationToken,
+    resume: bool,
+    partial: bool,
+) -> None:
+    """Load, split, build, run and save a stream job, checking cancellation and the memory budget between stages.
+
+    `resume` continues from the last usable checkpoint. `partial` only evaluates algorithms whose results are stale.
+    """
+
+    def check() -> None:
+        token.check()
+        reservation.check()
+
+    stream_job_id = stream_job.id
+    settings = get_settings()
+    streamsight_version = _streamsight_version()
+    preview = is_preview(stream_job)
+    low_memory = stream_job.low_memory and not preview
+    checkpoint_interval = 0 if preview else max(settings.EVALUATION_CHECKPOINT_INTERVAL, 0)
+    logger.info(f"Starting {'preview ' if preview else ''}evaluation for stream job {stream_job_id}")
+    logger.info(
+        f"Dataset: {stream_job.dataset}, timestamp_split_start: {stream_job.timestamp_split_start}, window_size: {stream_job.window_size}, top_k: {stream_job.top_k}"
+    )
+
+    # Fingerprints only need the dataset statistics, so a job served entirely
+    # from existing results never loads the dataset
+    data = None
+    stats = get_dataset_stats(stream_job.dataset)
+    if stats is None:
+        data, stats = _load_dataset(stream_job, profiler)
+        check()
+
+    version = dataset_version(stats)
+    fingerprints = {
+        sa.id: result_fingerprint(stream_job, sa, version, streamsight_version) for sa in stream_job.stream_algorithms
+    }
+    pending = [
+        sa
+        for sa in stream_job.stream_algorithms
+        if preview or not partial or sa.result_fingerprint != fingerprints[sa.id]
+    ]
+    if pending and settings.EVALUATION_RESULT_CACHE and not preview:
+        with profiler.stage("result_cache"):
+            pending = [sa for sa in pending if not _reuse_cached_results(db, stream_job_id, sa, fingerprints[sa.id])]
+    if not pending:
+        logger.info(f"All algorithms of stream job {stream_job_id} have up-to-date results, nothing to evaluate")
+        return
+    logger.info(f"Evaluating {len(pending)} of {len(stream_job.stream_algorithms)} algorithms")
+
+    data = _load_job_data(stream_job, profiler, version, data)
+    check()
+
+    try:
+        logger.info("Setting up sliding window...")
+        with profiler.stage("split"):
             # Convert datetime to epoch timestamp
             background_t_epoch = stream_job.timestamp_split_start.timestamp()
-            setting_window = streamsight.settings.SlidingWindowSetting(
-                background_t=background_t_epoch,
-                window_size=stream_job.window_size,
-                top_K=stream_job.top_k,
-            )
+            if preview:
+                data = apply_preview(data, stream_job)
+            if low_memory:
+                setting_window = create_spilling_setting(
+                    stream_job_id, background_t_epoch, stream_job.window_size, stream_job.top_k
+                )
+            else:
+                setting_window = streamsight.settings.SlidingWindowSetting(
+                    background_t=background_t_epoch,
+                    window_size=stream_job.window_size,
+                    top_K=stream_job.top_k,
+                )
             logger.info("Splitting data...")
             setting_window.split(data)
-            logger.info("Window setup completed")
-        except Exception as e:
-            logger.error(f"Error setting up window: {e}")
-            raise
-
-        try:
-            logger.info("Building evaluator pipeline...")
-            builder = streamsight.evaluators.EvaluatorPipelineBuilder()
-            builder.add_setting(setting_window)
-            builder.set_metric_K(stream_job.top_k)
+            # The split holds everything the evaluator needs from here on
+            data = None
+        logger.info("Window setup completed")
+    except Exception as e:
+        logger.error(f"Error setting up window: {e}")
+        raise
+    check()
 
-            for metric_name in stream_job.metrics:
-                logger.info(f"Adding metric: {metric_name}")
-                builder.add_metric(metric_name)
+    # Window-parallel evaluation writes no checkpoints, predictions or spill files
+    window_processes = settings.EVALUATION_WINDOW_PROCESSES
+    parallel_windows = window_processes > 1 and not stream_job.store_predictions and not low_memory
 
-            for sa in stream_job.stream_algorithms:
+    try:
+        logger.info("Building evaluator pipeline...")
+        with profiler.stage("build_pipeline"):
+            sequential_algorithms, stateless_algorithms = [], []
+            for sa in pending:
                 logger.info(f"Adding algorithm: {sa.algorithm_name}")
                 algorithm_cls = ALGORITHM_REGISTRY.get(sa.algorithm_name)
                 if not algorithm_cls:
@@ -221,36 +526,352 @@ def run_evaluation(stream_job_id: int) -> None:
                     continue
                 params = json.loads(sa.parameters) if sa.parameters else {}
                 logger.info(f"Algorithm params: {params}")
-                builder.add_algorithm(algorithm=algorithm_cls, params=params, algo_uuid=sa.algorithm_uuid)
-            evaluator = builder.build()
-            logger.info("Evaluator built successfully")
-        except Exception as e:
-            logger.error(f"Error building evaluator: {e}")
-            raise
+                if is_stateless(sa.algorithm_name, params) and parallel_windows:
+                    stateless_algorithms.append((sa, algorithm_cls, params))
+                else:
+                    sequential_algorithms.append((sa, algorithm_cls, params))
+            evaluator = _build_evaluator(setting_window, stream_job, sequential_algorithms)
+            window_evaluator = _build_evaluator(setting_window, stream_job, stateless_algorithms)
+            if evaluator is None and window_evaluator is None:
+                raise RuntimeError("No algorithms specified, can't construct Evaluator")
+        logger.info(
+            f"Evaluator built successfully, {len(stateless_algorithms)} algorithms evaluated window-parallel"
+        )
+    except Exception as e:
+        logger.error(f"Error building evaluator: {e}")
+        raise
+    check()
 
-        try:
-            logger.info("Running evaluator...")
-            evaluator.run()
-            logger.info("Evaluator run completed successfully")
-
-            # Save evaluation results
-            logger.info("Saving evaluation results...")
-            save_evaluation_results(db, evaluator, stream_job_id)
-            logger.info("Evaluation results saved successfully")
-        except Exception as e:
-            logger.error(f"Error during evaluator.run(): {e}")
-            logger.error(f"Full traceback:\n{traceback.format_exc()}")
-            raise
+    restored = False
+    if resume and evaluator is not None:
+        checkpoint = load_checkpoint(stream_job_id)
+        if checkpoint is not None:
+            restored = restore_checkpoint(evaluator, checkpoint, streamsight_version)
+        if restored:
+            logger.info(f"Resuming stream job {stream_job_id} from window {checkpoint.run_step}")
+        else:
+            logger.info(f"No usable checkpoint for stream job {stream_job_id}, starting from the first window")
 
-        stream_job.completed_at = datetime.now(timezone.utc)
+    # Only a run of every algorithm in order holds the state of all of them after the last window
+    continuable = not preview and window_evaluator is None and len(sequential_algorithms) == len(
+        stream_job.stream_algorithms
+    )
+    algorithm_profiler = AlgorithmProfiler()
+    try:
+        logger.info("Running evaluator...")
+        evaluate_start = time.perf_counter()
+        with profiler.stage("evaluate"):
+            num_split = setting_window.num_split
+            store = None
+            if stream_job.store_predictions and not preview:
+                store = PredictionStore(stream_job_id, stream_job.top_k)
+                if not restored:
+                    clear_predictions(stream_job_id, [str(sa.algorithm_uuid) for sa in pending])
+            elif preview:
+                # Predictions of an earlier full run no longer match the stored results
+                clear_predictions(stream_job_id)
+            spill = None
+            if low_memory:
+                spill = MetricSpill(stream_job_id)
+                # Scores spilled after the checkpoint are computed again
+                spill.truncate(evaluator._run_step if restored else 0)
+            if evaluator is not None:
+                for step in iter_windows(evaluator, resume=restored, store=store, profiler=algorithm_profiler):
+                    if spill is not None:
+                        spill.spill(evaluator, step - 1)
+                    check()
+                    if checkpoint_interval and step < num_split and step % checkpoint_interval == 0:
+                        save_checkpoint(stream_job_id, evaluator, streamsight_version)
+            if window_evaluator is not None:
+                run_windows_parallel(window_evaluator, window_processes, check, algorithm_profiler)
+                if evaluator is None:
+                    evaluator = window_evaluator
+                else:
+                    merge_accumulators(evaluator, window_evaluator)
+        # Evaluation time is attributed evenly to the algorithms run together
+        compute_time = (time.perf_counter() - evaluate_start) / len(pending)
+        logger.info("Evaluator run completed successfully")
+
+        # Save evaluation results
+        logger.info("Saving evaluation results...")
+        with profiler.stage("save_results"):
+            # Replace the results of the re-evaluated algorithms only, in one transaction
+            # with the new results so that a failed save keeps the previous ones
+            delete_evaluation_results(db, stream_job_id, [sa.id for sa in pending])
+            if spill is not None:
+                save_spilled_results(db, spill, stream_job_id)
+            else:
+                save_evaluation_results(db, evaluator, stream_job_id)
+            _save_window_profiles(db, algorithm_profiler, stream_job_id, pending)
+            if preview:
+                # Approximate results must not be taken for the full results of their configuration
+                record_preview_intervals(db, evaluator, stream_job_id)
+            else:
+                for sa in pending:
+                    sa.result_fingerprint = fingerprints[sa.id]
+                    record_computed_results(db, sa, fingerprints[sa.id], stream_job.dataset, compute_time)
+            # The live state of an earlier run does not match the results replacing its own
+            stream_job.live_window = None
+            if continuable:
+                release_last_window(evaluator)
+                save_live_state(stream_job_id, evaluator, streamsight_version, num_split, live_algorithms(stream_job))
+                stream_job.live_window = num_split
+            db.commit()
+            clear_live_state(stream_job_id, keep_window=stream_job.live_window)
+        logger.info("Evaluation results saved successfully")
+    except Exception as e:
+        logger.error(f"Error during evaluator.run(): {e}")
+        logger.error(f"Full traceback:\n{traceback.format_exc()}")
+        raise
+
+
+def _execute_continuation(
+    db: Session, stream_job: StreamJob, profiler: StageProfiler, reservation: Reservation, token: CancellationToken
+) -> None:
+    """Evaluate the windows completed by the interactions appended to a job, from its live state."""
+
+    def check() -> None:
+        token.check()
+        reservation.check()
+
+    stream_job_id = stream_job.id
+    streamsight_version = _streamsight_version()
+    window = stream_job.live_window
+    with profiler.stage("load_live_state"):
+        live_state = load_live_state(stream_job_id, window) if window is not None else None
+        appended = load_appended(stream_job_id)
+    if live_state is None:
+        raise RuntimeError("Stream job has no live state to continue from, rerun it")
+    start = next_window_start(stream_job)
+    num_windows = complete_windows(appended, start, stream_job.window_size)
+    data = continuation_data(
+        appended, start, start + num_windows * stream_job.window_size, live_state.state["user_item_base"].global_shape
+    )
+    if not data.num_interactions:
+        logger.info(f"No complete window of appended interactions from {start} on, nothing to evaluate")
+        return
+    check()
+
+    with profiler.stage("split"):
+        # The split starts at the next window; trailing windows without interactions wait for the next continuation
+        setting_window = streamsight.settings.SlidingWindowSetting(
+            background_t=start,
+            window_size=stream_job.window_size,
+            top_K=stream_job.top_k,
+        )
+        setting_window.split(data)
+        data = None
+    check()
+
+    with profiler.stage("build_pipeline"):
+        algorithms = []
+        for sa in stream_job.stream_algorithms:
+            algorithm_cls = ALGORITHM_REGISTRY.get(sa.algorithm_name)
+            if not algorithm_cls:
+                raise RuntimeError(f"Algorithm {sa.algorithm_name} not found in streamsight registry")
+            params = json.loads(sa.parameters) if sa.parameters else {}
+            # Removes the window-parallel flag; every algorithm continues from its state
+            is_stateless(sa.algorithm_name, params)
+            algorithms.append((sa, algorithm_cls, params))
+        evaluator = _build_evaluator(setting_window, stream_job, algorithms)
+    if evaluator is None or not restore_checkpoint(evaluator, live_state, streamsight_version):
+        raise RuntimeError("The live state does not match the algorithms or streamsight version of the job, rerun it")
+    check()
+
+    logger.info(f"Continuing stream job {stream_job_id} with {setting_window.num_split} windows from window {window}")
+    algorithm_profiler = AlgorithmProfiler()
+    with profiler.stage("evaluate"):
+        store = None
+        if stream_job.store_predictions:
+            store = PredictionStore(stream_job_id, stream_job.top_k, window_offset=window)
+        for _ in iter_windows(evaluator, resume=True, store=store, profiler=algorithm_profiler):
+            check()
+
+    with profiler.stage("save_results"):
+        save_continued_results(db, evaluator, stream_job_id)
+        _save_window_profiles(db, algorithm_profiler, stream_job_id, stream_job.stream_algorithms, window)
+        fingerprints = job_fingerprints(stream_job)
+        for sa in stream_job.stream_algorithms:
+            sa.result_fingerprint = None
+        refresh_leaderboard(db, fingerprints)
+        # The state after the new windows only becomes current with their results
+        release_last_window(evaluator)
+        next_window = window + setting_window.num_split
+        save_live_state(stream_job_id, evaluator, streamsight_version, next_window, live_algorithms(stream_job))
+        stream_job.live_window = next_window
+        db.commit()
+        clear_live_state(stream_job_id, keep_window=next_window)
+    logger.info(f"Continued results of stream job {stream_job_id} saved")
+
+
+def _build_evaluator(
+    setting: streamsight.settings.SlidingWindowSetting, stream_job: StreamJob, algorithms: list[tuple]
+) -> streamsight.evaluators.EvaluatorPipeline | None:
+    """Evaluator of the job's metrics for (StreamAlgorithm, algorithm class, params) entries, None without any."""
+    if not algorithms:
+        return None
+    builder = streamsight.evaluators.EvaluatorPipelineBuilder()
+    builder.add_setting(setting)
+    builder.set_metric_K(stream_job.top_k)
+
+    for metric_name in stream_job.metrics:
+        logger.info(f"Adding metric: {metric_name}")
+        builder.add_metric(metric_name)
+
+    for sa, algorithm_cls, params in algorithms:
+        builder.add_algorithm(algorithm=algorithm_cls, params=params, algo_uuid=sa.algorithm_uuid)
+    return builder.build()
+
+
+def add_metrics_from_predictions(db: Session, stream_job: StreamJob, metrics: list[str]) -> list[StreamAlgorithm]:
+    """Compute additional metrics for a completed job from its stored predictions and save them.
+
+    Runs on an evaluation worker (see /add_metrics). Metrics the job already
+    has are skipped, so a retried run adds no duplicate rows; the results and
+    the job's metrics are committed together. Returns the algorithms that had
+    no stored predictions (e.g. results reused from another job) and therefore
+    lack the new metrics until they are evaluated again.
+    """
+    metrics = [metric for metric in metrics if metric not in stream_job.metrics]
+    if not metrics:
+        logger.info(f"Stream job {stream_job.id} already has the metrics to add")
+        return []
+    stored = [sa for sa in stream_job.stream_algorithms if has_predictions(stream_job.id, str(sa.algorithm_uuid))]
+    missing = [sa for sa in stream_job.stream_algorithms if sa not in stored]
+
+    stats = get_dataset_stats(stream_job.dataset)
+    streamsight_version = _streamsight_version()
+    # Only algorithms whose results are current before the change stay current after it
+    current = {
+        sa.id
+        for sa in stored
+        if stats is not None
+        and sa.result_fingerprint == result_fingerprint(stream_job, sa, dataset_version(stats), streamsight_version)
+    }
+
+    acc = compute_stored_metrics(stream_job.id, stored, metrics, stream_job.top_k)
+    save_metric_results(db, lambda level: acc.df_metric(level=MetricLevelEnum(level)), stream_job.id)
+
+    previous_fingerprints = job_fingerprints(stream_job)
+    stream_job.metrics = [*stream_job.metrics, *metrics]
+    for sa in stream_job.stream_algorithms:
+        if sa.id in current:
+            sa.result_fingerprint = result_fingerprint(stream_job, sa, dataset_version(stats), streamsight_version)
+        else:
+            sa.result_fingerprint = None
+    refresh_leaderboard(db, previous_fingerprints | job_fingerprints(stream_job))
+    db.commit()
+    logger.info(f"Added metrics {metrics} to stream job {stream_job.id} from {len(stored)} stored predictions")
+    return missing
+
+
+def run_evaluation(
+    stream_job_id: int,
+    resume: bool = False,
+    partial: bool = False,
+    live: bool = False,
+    add_metrics: list[str] | None = None,
+    token: CancellationToken | None = None,
+) -> None:
+    """Evaluate a stream job.
+
+    With `live` only the windows of its appended interactions are evaluated,
+    with `add_metrics` only these metrics are computed from stored predictions.
+    """
+    # Records logged during the evaluation also go to the job's own log
+    with job_logging(stream_job_id):
+        _run_evaluation(stream_job_id, resume, partial, live, add_metrics, token)
+
+
+def _run_evaluation(
+    stream_job_id: int,
+    resume: bool,
+    partial: bool,
+    live: bool,
+    add_metrics: list[str] | None,
+    token: CancellationToken | None,
+) -> None:
+    token = token or CancellationToken()
+    db = get_database_manager().get_session()
+    profiler = StageProfiler()
+    run = None
+    admitted = False
+    job_start = time.perf_counter()
+    dataset_name = "unknown"
+    outcome = "failed"
+    try:
+        stream_job = db.query(StreamJob).filter(StreamJob.id == stream_job_id).first()
+        if not stream_job:
+            logger.error(f"Stream job {stream_job_id} not found")
+            return
+        dataset_name = stream_job.dataset
+
+        estimate = _estimate_job_memory(stream_job)
+        stream_job.estimated_memory = estimate
         db.commit()
+
+        # Blocks until the job fits in the memory budget
+        with get_admission_controller().reserve(stream_job_id, estimate, token) as reservation:
+            admitted = True
+            EVALUATION_JOBS_RUNNING.inc()
+            job_start = time.perf_counter()
+
+            run = StreamJobRun(stream_job_id=stream_job_id, streamsight_version=_streamsight_version())
+            db.add(run)
+            db.commit()
+
+            if add_metrics:
+                with profiler.stage("add_metrics"):
+                    add_metrics_from_predictions(db, stream_job, add_metrics)
+            elif live:
+                _execute_continuation(db, stream_job, profiler, reservation, token)
+            else:
+                # Algorithms finished before an interruption keep their results on resume
+                _execute_evaluation(db, stream_job, profiler, reservation, token, resume, partial or resume)
+
+        transition_job(db, stream_job, JobStatus.COMPLETED, completed_at=datetime.now(timezone.utc))
+        refresh_leaderboard(db, job_fingerprints(stream_job))
+        db.commit()
+        outcome = "completed"
+        clear_checkpoint(stream_job_id)
         logger.info(f"Evaluation completed for stream job {stream_job_id}")
+    except JobCancelledError:
+        db.rollback()
+        if token.abandoned:
+            # Another worker owns the job now and resumes it from the checkpoint
+            logger.warning(f"Abandoned evaluation of stream job {stream_job_id}")
+            outcome = "abandoned"
+            return
+        # Results are only written in the save stage, which has no cancellation
+        # checks, so no algorithm is left with the results of some windows only
+        logger.info(f"Evaluation cancelled for stream job {stream_job_id}")
+        outcome = "cancelled"
+        now = datetime.now(timezone.utc)
+        transition_job(
+            db, stream_job, JobStatus.CANCELLED, cancelled_at=stream_job.cancelled_at or now, completed_at=now
+        )
+        db.commit()
+        clear_checkpoint(stream_job_id)
     except Exception as e:
         logger.error(f"Error running evaluation for stream job {stream_job_id}: {e}")
         logger.error(f"Full traceback:\n{traceback.format_exc()}")
-        stream_job.completed_at = datetime.now(timezone.utc)
-        stream_job.error_message = str(e)
+        db.rollback()
+        transition_job(
+            db,
+            stream_job,
+            JobStatus.FAILED,
+            reason=type(e).__name__,
+            completed_at=datetime.now(timezone.utc),
+            error_message=str(e),
+        )
         db.commit()
     finally:
+        if outcome != "abandoned":
+            # Spilled scores of a failed run stay while its checkpoint can resume from them
+            clear_scratch(stream_job_id, keep_metrics=get_checkpoint_window(stream_job_id) is not None)
+        if run is not None:
+            _save_run_profile(db, run, profiler)
         db.close()
-
+        if admitted:
+            EVALUATION_JOBS_RUNNING.dec()
+            EVALUATION_JOB_DURATION.observe(time.perf_counter() - job_start, dataset_name, outcome)
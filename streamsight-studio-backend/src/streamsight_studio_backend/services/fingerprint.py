@@ -0,0 +1,43 @@
+import hashlib
+import json
+
+from streamsight_studio_backend.db.schema import StreamAlgorithm, StreamJob
+from streamsight_studio_backend.services.dataset_stats import DatasetStats
+
+
+def dataset_version(stats: DatasetStats) -> str:
+    """Content version of a loaded dataset, the digest of its interactions."""
+    return stats.content_hash
+
+
+def result_fingerprint(
+    stream_job: StreamJob,
+    stream_algorithm: StreamAlgorithm,
+    dataset_version: str,
+    streamsight_version: str | None,
+) -> str:
+    """Fingerprint of everything that determines the results of one algorithm in a stream job.
+
+    Two algorithms with the same fingerprint produce the same results, so an
+    algorithm whose stored fingerprint matches does not need to be evaluated
+    again.
+    """
+    payload = {
+        "algorithm": stream_algorithm.algorithm_name,
+        "parameters": json.loads(stream_algorithm.parameters) if stream_algorithm.parameters else {},
+        "dataset": stream_job.dataset,
+        "dataset_version": dataset_version,
+        "split": {
+            "timestamp_split_start": stream_job.timestamp_split_start.timestamp(),
+            "window_size": stream_job.window_size,
+            "top_k": stream_job.top_k,
+        },
+        "metrics": sorted(stream_job.metrics),
+        "streamsight_version": streamsight_version,
+    }
+    # Only present when set, so fingerprints of jobs on the raw dataset are unchanged
+    if stream_job.preprocessing:
+        payload["preprocessing"] = json.loads(stream_job.preprocessing)
+    if stream_job.appended_version:
+        payload["appended"] = stream_job.appended_version
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
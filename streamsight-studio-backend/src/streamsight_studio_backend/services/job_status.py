@@ -0,0 +1,93 @@
+"""Stream job status state machine, changed only through transition_job()."""
+
+import logging as logger
+from collections.abc import Iterable
+from enum import StrEnum
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from streamsight_studio_backend.db.schema import StreamJob, StreamJobStatusTransition
+
+
+logger = logger.getLogger(__name__)
+
+
+class JobStatus(StrEnum):
+    """Status of a stream job."""
+
+    CREATED = "created"
+    READY = "ready"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+# Statuses a job may move to from each status
+TRANSITIONS: dict[JobStatus, frozenset[JobStatus]] = {
+    JobStatus.CREATED: frozenset({JobStatus.READY}),
+    JobStatus.READY: frozenset({JobStatus.CREATED, JobStatus.RUNNING}),
+    JobStatus.RUNNING: frozenset({JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED}),
+    JobStatus.COMPLETED: frozenset({JobStatus.RUNNING}),
+    JobStatus.FAILED: frozenset({JobStatus.RUNNING}),
+    JobStatus.CANCELLED: frozenset({JobStatus.RUNNING}),
+}
+
+# Statuses covered by the partial index on stream_job, see db/schema.py
+ACTIVE_STATUSES = frozenset({JobStatus.CREATED, JobStatus.READY, JobStatus.RUNNING})
+
+# Statuses of a job whose evaluation ended
+FINISHED_STATUSES = frozenset({JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED})
+
+
+def transition_job(
+    db: Session,
+    stream_job: StreamJob,
+    to: JobStatus,
+    allowed_from: Iterable[JobStatus] | None = None,
+    reason: str | None = None,
+    **values,
+) -> bool:
+    """Move a job to `to`, and set `values`, if its status in the database is in `allowed_from`.
+
+    `allowed_from` defaults to every status TRANSITIONS allows. Returns whether it was applied; the caller commits.
+    """
+    sources = {source for source, targets in TRANSITIONS.items() if to in targets}
+    if allowed_from is not None:
+        invalid = set(allowed_from) - sources
+        if invalid:
+            raise ValueError(f"Invalid stream job transition from {sorted(invalid)} to {to}")
+        sources = set(allowed_from)
+
+    # Lock the row and read the status it had before the update, which
+    # RETURNING alone cannot report
+    old = (
+        select(StreamJob.id, StreamJob.status.label("old_status"))
+        .where(StreamJob.id == stream_job.id)
+        .with_for_update()
+        .subquery("old")
+    )
+    statement = (
+        update(StreamJob)
+        .where(StreamJob.id == old.c.id, old.c.old_status.in_([str(source) for source in sources]))
+        .values(status=str(to), **values)
+        .returning(old.c.old_status)
+        .execution_options(synchronize_session=False)
+    )
+    from_status = db.execute(statement).scalar_one_or_none()
+    if from_status is None:
+        logger.info(f"Stream job {stream_job.id} was not moved to {to}, it is not in {sorted(sources)}")
+        return False
+
+    set_committed_value(stream_job, "status", str(to))
+    for key, value in values.items():
+        set_committed_value(stream_job, key, value)
+    db.add(
+        StreamJobStatusTransition(
+            stream_job_id=stream_job.id, from_status=from_status, to_status=str(to), reason=reason
+        )
+    )
+    logger.info(f"Stream job {stream_job.id} moved from {from_status} to {to}")
+    return True
@@ -0,0 +1,146 @@
+"""
+Leaderboard of algorithm configurations per dataset, metric and split.
+
+An algorithm's result fingerprint identifies everything its results depend
+on, and is only set once complete, non-preview results are saved. The
+leaderboard holds one row per (dataset, metric, top_k, window_size,
+fingerprint) with the macro score of those results. Jobs on a preprocessed
+dataset or with appended interactions are not ranked, their scores are not
+comparable to the others.
+
+Rows are not recomputed from the whole result table. Whenever results of
+some fingerprints are saved or removed, refresh_leaderboard() rebuilds the
+rows of just those fingerprints from the algorithms still carrying them.
+"""
+
+import logging as logger
+from collections.abc import Iterable
+from datetime import datetime, timezone
+
+from sqlalchemy import func, literal, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from streamsight_studio_backend.db.schema import LeaderboardEntry, MacroEvaluationResult, StreamAlgorithm, StreamJob
+
+
+logger = logger.getLogger(__name__)
+
+
+def job_fingerprints(stream_job: StreamJob, stream_algorithm_ids: list[int] | None = None) -> set[str]:
+    """Result fingerprints of a job's algorithms, optionally only of some of them."""
+    return {
+        sa.result_fingerprint
+        for sa in stream_job.stream_algorithms
+        if sa.result_fingerprint and (stream_algorithm_ids is None or sa.id in stream_algorithm_ids)
+    }
+
+
+def refresh_leaderboard(db: Session, fingerprints: Iterable[str | None]) -> None:
+    """Rebuild the leaderboard rows of the given fingerprints. The caller commits.
+
+    Call it after the results or fingerprints of algorithms changed, with
+    their fingerprints from before and after the change.
+    """
+    fingerprints = sorted({fingerprint for fingerprint in fingerprints if fingerprint})
+    if not fingerprints:
+        return
+    # Pending changes, e.g. cleared fingerprints, must be visible to the rebuild
+    db.flush()
+    db.query(LeaderboardEntry).filter(LeaderboardEntry.fingerprint.in_(fingerprints)).delete(
+        synchronize_session=False
+    )
+    # Algorithms sharing a fingerprint have the same results, any of them gives the score
+    query = (
+        select(
+            StreamJob.dataset,
+            MacroEvaluationResult.metric,
+            StreamJob.top_k,
+            StreamJob.window_size,
+            StreamAlgorithm.result_fingerprint,
+            func.min(StreamAlgorithm.algorithm_name),
+            func.min(StreamAlgorithm.parameters),
+            func.max(MacroEvaluationResult.macro_score),
+            func.max(MacroEvaluationResult.num_window),
+            func.count(func.distinct(StreamJob.id)),
+            literal(datetime.now(timezone.utc)),
+        )
+        .join(StreamAlgorithm, MacroEvaluationResult.stream_algorithm_id == StreamAlgorithm.id)
+        .join(StreamJob, StreamAlgorithm.stream_job_id == StreamJob.id)
+        .where(
+            StreamAlgorithm.result_fingerprint.in_(fingerprints),
+            StreamJob.preprocessing.is_(None),
+            StreamJob.appended_version.is_(None),
+        )
+        .group_by(
+            StreamJob.dataset,
+            MacroEvaluationResult.metric,
+            StreamJob.top_k,
+            StreamJob.window_size,
+            StreamAlgorithm.result_fingerprint,
+        )
+    )
+    columns = [
+        "dataset",
+        "metric",
+        "top_k",
+        "window_size",
+        "fingerprint",
+        "algorithm_name",
+        "parameters",
+        "macro_score",
+        "num_window",
+        "num_jobs",
+        "updated_at",
+    ]
+    statement = insert(LeaderboardEntry).from_select(columns, query)
+    # A concurrent refresh of the same fingerprint may have inserted the row first
+    statement = statement.on_conflict_do_update(
+        index_elements=columns[:5],
+        set_={column: statement.excluded[column] for column in columns[5:]},
+    )
+    result = db.execute(statement)
+    logger.info(f"Refreshed {result.rowcount} leaderboard entries of {len(fingerprints)} fingerprints")
+
+
+def backfill_leaderboard(db: Session) -> int:
+    """Build an empty leaderboard from all fingerprinted results, e.g. of a database older than it.
+
+    Returns the number of fingerprints added.
+    """
+    if db.query(LeaderboardEntry.id).first() is not None:
+        return 0
+    fingerprints = [
+        fingerprint
+        for (fingerprint,) in db.query(StreamAlgorithm.result_fingerprint)
+        .filter(StreamAlgorithm.result_fingerprint.isnot(None))
+        .distinct()
+    ]
+    refresh_leaderboard(db, fingerprints)
+    db.commit()
+    return len(fingerprints)
+
+
+def get_leaderboard(
+    db: Session,
+    dataset: str,
+    metric: str,
+    top_k: int | None = None,
+    window_size: int | None = None,
+    limit: int = 50,
+    offset: int = 0,
+) -> tuple[int, list[LeaderboardEntry]]:
+    """Total number of entries and one page of them, best macro score first."""
+    query = db.query(LeaderboardEntry).filter(LeaderboardEntry.dataset == dataset, LeaderboardEntry.metric == metric)
+    if top_k is not None:
+        query = query.filter(LeaderboardEntry.top_k == top_k)
+    if window_size is not None:
+        query = query.filter(LeaderboardEntry.window_size == window_size)
+    total = query.count()
+    entries = (
+        query.order_by(LeaderboardEntry.macro_score.desc().nulls_last(), LeaderboardEntry.id)
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+    return total, entries
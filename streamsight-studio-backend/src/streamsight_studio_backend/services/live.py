@@ -0,0 +1,140 @@
+"""Interactions appended to a completed stream job and their continuation from its live state."""
+
+import hashlib
+import logging as logger
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+from streamsight.matrix import InteractionMatrix
+
+from streamsight_studio_backend.config.setting import get_settings
+from streamsight_studio_backend.db.schema import StreamJob
+from streamsight_studio_backend.schemas.stream import AppendedInteraction
+
+
+logger = logger.getLogger(__name__)
+
+COLUMNS = [InteractionMatrix.USER_IX, InteractionMatrix.ITEM_IX, InteractionMatrix.TIMESTAMP_IX]
+
+
+def _live_dir(stream_job_id: int) -> str:
+    base_path = get_settings().get_datalake_config()["base_path"]
+    return os.path.join(base_path, "live", str(stream_job_id))
+
+
+def _interactions_path(stream_job_id: int) -> str:
+    return os.path.join(_live_dir(stream_job_id), "interactions.parquet")
+
+
+def clear_live(stream_job_id: int) -> None:
+    """Remove the appended interactions and the live state of a job."""
+    shutil.rmtree(_live_dir(stream_job_id), ignore_errors=True)
+
+
+def load_appended(stream_job_id: int) -> pd.DataFrame:
+    """The interactions appended to a job, in the order they were appended."""
+    try:
+        return pd.read_parquet(_interactions_path(stream_job_id))
+    except (OSError, ValueError):
+        return pd.DataFrame({column: pd.Series(dtype=np.int64) for column in COLUMNS})
+
+
+def append_interactions(
+    stream_job: StreamJob, interactions: list[AppendedInteraction], next_window_start: float
+) -> pd.DataFrame:
+    """Add interactions to those appended to a job. Raises ValueError on invalid ones; the caller commits."""
+    if not interactions:
+        raise ValueError("No interactions to append")
+    batch = pd.DataFrame(
+        [(i.user_id, i.item_id, i.timestamp) for i in interactions], columns=COLUMNS, dtype=np.int64
+    )
+    if (batch[[InteractionMatrix.USER_IX, InteractionMatrix.ITEM_IX]] < 0).any(axis=None):
+        raise ValueError("User and item ids must not be negative")
+    if batch[InteractionMatrix.TIMESTAMP_IX].min() < next_window_start:
+        raise ValueError(
+            f"Interactions must not be older than the next window, which starts at {next_window_start:.0f}"
+        )
+
+    df = pd.concat([load_appended(stream_job.id), batch], ignore_index=True)
+    path = _interactions_path(stream_job.id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+    # The version chains the digests of the appended batches
+    digest = hashlib.sha256((stream_job.appended_version or "").encode())
+    digest.update(pd.util.hash_pandas_object(batch, index=False).to_numpy().tobytes())
+    stream_job.appended_interactions = len(df)
+    stream_job.appended_version = digest.hexdigest()[:16]
+    logger.info(f"Appended {len(batch)} interactions to stream job {stream_job.id}, {len(df)} in total")
+    return df
+
+
+def live_algorithms(stream_job: StreamJob) -> dict[str, str | None]:
+    """Parameters of a job's algorithms by uuid, as kept with its live state."""
+    return {str(sa.algorithm_uuid): sa.parameters for sa in stream_job.stream_algorithms}
+
+
+def next_window_start(stream_job: StreamJob) -> float | None:
+    """Start of the next window a continuation evaluates, None when the job has no live state."""
+    if stream_job.live_window is None:
+        return None
+    return stream_job.timestamp_split_start.timestamp() + stream_job.live_window * stream_job.window_size
+
+
+def complete_windows(appended: pd.DataFrame, next_window_start: float, window_size: int) -> int:
+    """Number of windows from `next_window_start` on that an appended interaction has closed."""
+    if appended.empty:
+        return 0
+    last = appended[InteractionMatrix.TIMESTAMP_IX].max()
+    return max(int((last - next_window_start) // window_size), 0)
+
+
+def _matrix(df: pd.DataFrame, first_interaction_id: int, shape: tuple[int, int]) -> InteractionMatrix:
+    df = df.sort_values(InteractionMatrix.TIMESTAMP_IX, kind="stable").reset_index(drop=True)
+    df.insert(0, InteractionMatrix.INTERACTION_IX, np.arange(first_interaction_id, first_interaction_id + len(df)))
+    if len(df):
+        shape = (
+            max(shape[0], int(df[InteractionMatrix.USER_IX].max()) + 1),
+            max(shape[1], int(df[InteractionMatrix.ITEM_IX].max()) + 1),
+        )
+    return InteractionMatrix(
+        df,
+        item_ix=InteractionMatrix.ITEM_IX,
+        user_ix=InteractionMatrix.USER_IX,
+        timestamp_ix=InteractionMatrix.TIMESTAMP_IX,
+        shape=shape,
+        skip_df_processing=True,
+    )
+
+
+def continuation_data(
+    appended: pd.DataFrame, start: float, end: float, shape: tuple[int, int]
+) -> InteractionMatrix:
+    """The appended interactions in [start, end), in a matrix of at least `shape`."""
+    timestamps = appended[InteractionMatrix.TIMESTAMP_IX]
+    return _matrix(appended[(timestamps >= start) & (timestamps < end)], 0, shape)
+
+
+def with_appended(data: InteractionMatrix, stream_job: StreamJob) -> InteractionMatrix:
+    """The job's data followed by its appended interactions, for a full run."""
+    if not stream_job.appended_interactions:
+        return data
+    appended = load_appended(stream_job.id)
+    if appended.empty:
+        return data
+    first_interaction_id = int(data._df[InteractionMatrix.INTERACTION_IX].max()) + 1 if len(data._df) else 0
+    shape = getattr(data, "user_item_shape", (0, 0))
+    appended = _matrix(appended, first_interaction_id, shape)
+    logger.info(f"Adding {len(appended._df)} appended interactions to the data of stream job {stream_job.id}")
+    return InteractionMatrix(
+        pd.concat([data._df, appended._df], ignore_index=True),
+        item_ix=InteractionMatrix.ITEM_IX,
+        user_ix=InteractionMatrix.USER_IX,
+        timestamp_ix=InteractionMatrix.TIMESTAMP_IX,
+        shape=appended.user_item_shape,
+        skip_df_processing=True,
+    )
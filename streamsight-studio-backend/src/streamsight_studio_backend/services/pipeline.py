@@ -0,0 +1,81 @@
+from collections.abc import Iterator
+from contextlib import nullcontext
+
+from streamsight.evaluators import EvaluatorPipeline
+from streamsight.matrix import PredictionMatrix
+from streamsight.registries import METRIC_REGISTRY
+
+from streamsight_studio_backend.services.predictions import PredictionStore
+from streamsight_studio_backend.services.profiling import AlgorithmProfiler
+
+
+def iter_windows(
+    evaluator: EvaluatorPipeline,
+    resume: bool = False,
+    store: PredictionStore | None = None,
+    profiler: AlgorithmProfiler | None = None,
+) -> Iterator[int]:
+    """Run the evaluator one window at a time, yielding the window cursor after each.
+
+    Mirrors EvaluatorPipeline.run(): evaluate a window, then release its
+    incremental data to the algorithms unless it was the last one. When the
+    generator yields, the evaluator is at a consistent point from which the
+    next window can be evaluated. With `resume` the evaluator is assumed to be
+    restored to such a point and is not trained on the background data again.
+    With a `store`, the ground truth and top-K predictions of every window are
+    written to it as well. With a `profiler`, every fit and predict of the
+    algorithms is measured; its hooks are off whenever the generator yields.
+    """
+
+    def hooks():
+        return profiler.hooks(evaluator) if profiler is not None else nullcontext()
+
+    if not resume:
+        with hooks():
+            evaluator._ready_evaluator()
+    num_split = evaluator.setting.num_split
+    while evaluator._run_step < num_split:
+        with hooks():
+            if store is None:
+                evaluator._evaluate_step()
+            else:
+                _evaluate_and_store_step(evaluator, store)
+            if evaluator._run_step < num_split:
+                evaluator._data_release_step()
+        yield evaluator._run_step
+
+
+def release_last_window(evaluator: EvaluatorPipeline) -> None:
+    """Fit the algorithms on the data of the last evaluated window, which EvaluatorPipeline.run() skips."""
+    num_split = evaluator.setting.num_split
+    if evaluator._run_step != num_split:
+        raise ValueError(f"Evaluator is at window {evaluator._run_step}, not past its last window {num_split - 1}")
+    # Window i is released at cursor i + 1, which get_split_at() does not allow past the last window
+    incremental_data = evaluator.setting.incremental_data[num_split - 1]
+    evaluator.user_item_base.reset_unknown_user_item_base()
+    evaluator.user_item_base.update_known_user_item_base(incremental_data)
+    incremental_data = PredictionMatrix.from_interaction_matrix(incremental_data)
+    incremental_data.mask_user_item_shape(evaluator.user_item_base.known_shape)
+    for algo_state in evaluator.algo_state_mgr.values():
+        algo_state.algo_ptr.fit(incremental_data)
+
+
+def _evaluate_and_store_step(evaluator: EvaluatorPipeline, store: PredictionStore) -> None:
+    """EvaluatorPipeline._evaluate_step() that also hands the matrices it scores to `store`."""
+    window = evaluator._run_step
+    unlabeled_data, ground_truth_data, current_timestamp = evaluator._get_evaluation_data()
+
+    X_true = ground_truth_data.item_interaction_sequence_matrix
+    store.save_ground_truth(window, current_timestamp, X_true)
+    for algo_state in evaluator.algo_state_mgr.values():
+        X_pred = algo_state.algo_ptr.predict(unlabeled_data)
+        X_pred = evaluator._prediction_shape_handler(X_true, X_pred)
+        store.save_predictions(window, current_timestamp, str(algo_state.algorithm_uuid), X_pred)
+
+        for metric_entry in evaluator.metric_entries:
+            metric = METRIC_REGISTRY.get(metric_entry.name)(K=metric_entry.K, timestamp_limit=current_timestamp)
+            metric.calculate(X_true, X_pred)
+            evaluator._acc.add(
+                metric=metric,
+                algorithm_name=evaluator.algo_state_mgr.get_algorithm_identifier(algo_state.algorithm_uuid),
+            )
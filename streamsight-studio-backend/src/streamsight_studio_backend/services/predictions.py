@@ -0,0 +1,126 @@
+"""
+Stored top-K predictions of evaluated windows.
+
+For stream jobs created with `store_predictions`, every evaluated window
+writes the ground truth matrix and, per algorithm, the scores of its top-K
+items as compressed sparse arrays:
+
+    datalake/predictions/<stream_job_id>/truth/window_00000.npz
+    datalake/predictions/<stream_job_id>/<algorithm_uuid>/window_00000.npz
+
+Metrics added to a job later are computed from these files with the same
+streamsight metric classes, without retraining or predicting again.
+"""
+
+import logging as logger
+import os
+import shutil
+from collections.abc import Iterator
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from streamsight.algorithms.utils import get_top_K_ranks
+from streamsight.evaluators.accumulator import MetricAccumulator
+from streamsight.registries import METRIC_REGISTRY
+
+from streamsight_studio_backend.config.setting import get_settings
+from streamsight_studio_backend.db.schema import StreamAlgorithm
+
+
+logger = logger.getLogger(__name__)
+
+_TRUTH = "truth"
+
+
+def _predictions_dir(stream_job_id: int) -> str:
+    base_path = get_settings().get_datalake_config()["base_path"]
+    return os.path.join(base_path, "predictions", str(stream_job_id))
+
+
+def _window_path(stream_job_id: int, key: str, window: int) -> str:
+    return os.path.join(_predictions_dir(stream_job_id), key, f"window_{window:05d}.npz")
+
+
+def _save_matrix(path: str, matrix: csr_matrix, timestamp: int) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(
+            f,
+            data=matrix.data,
+            indices=matrix.indices,
+            indptr=matrix.indptr,
+            shape=np.array(matrix.shape),
+            timestamp=np.array(timestamp),
+        )
+    os.replace(tmp_path, path)
+
+
+def _load_matrix(path: str) -> tuple[csr_matrix, int]:
+    with np.load(path) as f:
+        matrix = csr_matrix((f["data"], f["indices"], f["indptr"]), shape=tuple(f["shape"]))
+        return matrix, int(f["timestamp"])
+
+
+class PredictionStore:
+    """Writes the ground truth and predictions of one evaluation run window by window.
+
+    `window_offset` is added to the window numbers of a run that starts after
+    earlier windows, such as a continuation.
+    """
+
+    def __init__(self, stream_job_id: int, top_k: int, window_offset: int = 0) -> None:
+        self.stream_job_id = stream_job_id
+        self.top_k = top_k
+        self.window_offset = window_offset
+
+    def save_ground_truth(self, window: int, timestamp: int, y_true: csr_matrix) -> None:
+        path = _window_path(self.stream_job_id, _TRUTH, window + self.window_offset)
+        _save_matrix(path, csr_matrix(y_true), timestamp)
+
+    def save_predictions(self, window: int, timestamp: int, algorithm_uuid: str, y_pred: csr_matrix) -> None:
+        """Store the top-K scores of an algorithm for a window."""
+        scores = csr_matrix(y_pred)
+        # Keep the original scores of the top-K items so that their order survives
+        top_k = scores.multiply(get_top_K_ranks(scores, self.top_k) > 0).tocsr()
+        _save_matrix(_window_path(self.stream_job_id, algorithm_uuid, window + self.window_offset), top_k, timestamp)
+
+
+def has_predictions(stream_job_id: int, algorithm_uuid: str) -> bool:
+    return os.path.isdir(os.path.join(_predictions_dir(stream_job_id), algorithm_uuid))
+
+
+def iter_stored_windows(stream_job_id: int, algorithm_uuid: str) -> Iterator[tuple[int, csr_matrix, csr_matrix]]:
+    """Yield (timestamp, ground truth, top-K scores) of every stored window of an algorithm."""
+    algorithm_dir = os.path.join(_predictions_dir(stream_job_id), algorithm_uuid)
+    for name in sorted(os.listdir(algorithm_dir)):
+        if not name.endswith(".npz"):
+            continue
+        y_pred, timestamp = _load_matrix(os.path.join(algorithm_dir, name))
+        y_true, _ = _load_matrix(os.path.join(_predictions_dir(stream_job_id), _TRUTH, name))
+        yield timestamp, y_true, y_pred
+
+
+def compute_stored_metrics(
+    stream_job_id: int, algorithms: list[StreamAlgorithm], metrics: list[str], top_k: int
+) -> MetricAccumulator:
+    """Compute metrics from stored predictions, accumulated the way the evaluator pipeline does."""
+    acc = MetricAccumulator()
+    for sa in algorithms:
+        # Same identifier as the evaluator pipeline, the uuid after the last underscore maps results back
+        algorithm_name = f"{sa.algorithm_name}_{sa.algorithm_uuid}"
+        for timestamp, y_true, y_pred in iter_stored_windows(stream_job_id, str(sa.algorithm_uuid)):
+            for metric_name in metrics:
+                metric = METRIC_REGISTRY.get(metric_name)(K=top_k, timestamp_limit=timestamp)
+                metric.calculate(y_true, y_pred)
+                acc.add(metric=metric, algorithm_name=algorithm_name)
+    return acc
+
+
+def clear_predictions(stream_job_id: int, algorithm_uuids: list[str] | None = None) -> None:
+    """Remove the stored predictions of a job, or only those of some algorithms."""
+    if algorithm_uuids is None:
+        shutil.rmtree(_predictions_dir(stream_job_id), ignore_errors=True)
+        return
+    for algorithm_uuid in algorithm_uuids:
+        shutil.rmtree(os.path.join(_predictions_dir(stream_job_id), algorithm_uuid), ignore_errors=True)
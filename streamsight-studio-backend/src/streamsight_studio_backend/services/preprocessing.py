@@ -0,0 +1,169 @@
+"""
+Preprocessing of a stream job's dataset before it is split.
+
+A job may carry a preprocessing spec (StreamJob.preprocessing, JSON) with any of
+
+- start / end: keep the interactions in [start, end), in epoch seconds;
+- user_fraction and seed: keep the users whose id, salted with the seed,
+  hashes into the first `user_fraction` of the hash range;
+- min_user_interactions / min_item_interactions: the iterated k-core, users
+  and items with fewer interactions are dropped until none is left.
+
+The steps run in that order on the interaction frame, as boolean masks and
+bincounts over factorized ids. The output is cached in the datalake under
+`preprocessed/<dataset>/<digest>.parquet`, keyed by the dataset version and
+the spec, so jobs with the same spec load the smaller frame instead of the
+dataset.
+"""
+
+import hashlib
+import json
+import logging as logger
+import os
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from streamsight.matrix import InteractionMatrix
+
+from streamsight_studio_backend.config.setting import get_settings
+from streamsight_studio_backend.db.schema import StreamJob
+from streamsight_studio_backend.schemas.stream import PreprocessingSpec
+
+
+logger = logger.getLogger(__name__)
+
+_HASH_RANGE = 2**32
+# Mixed into the user ids before hashing, so that the sample differs from the one of a preview
+_SEED_SALT = 0x5DEECE66D
+
+
+def spec_from_request(request: PreprocessingSpec | None) -> str | None:
+    """Validated JSON spec of a request, None when it asks for no preprocessing.
+
+    Raises ValueError with a message for the client on invalid values.
+    """
+    if request is None:
+        return None
+    spec = {}
+    for key in ("min_user_interactions", "min_item_interactions"):
+        value = getattr(request, key)
+        if value is not None:
+            if value < 1:
+                raise ValueError(f"{key} must be at least 1")
+            spec[key] = value
+    for key in ("start", "end"):
+        value = getattr(request, key)
+        if value is not None:
+            try:
+                spec[key] = datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+            except ValueError:
+                raise ValueError(f"Invalid {key} timestamp format")
+    if "start" in spec and "end" in spec and spec["start"] >= spec["end"]:
+        raise ValueError("start must be before end")
+    if request.user_fraction is not None:
+        if not 0 < request.user_fraction <= 1:
+            raise ValueError("user_fraction must be in (0, 1]")
+        if request.user_fraction < 1:
+            spec["user_fraction"] = request.user_fraction
+            spec["seed"] = request.seed
+    return json.dumps(spec, sort_keys=True) if spec else None
+
+
+def get_preprocessing(stream_job: StreamJob) -> dict | None:
+    return json.loads(stream_job.preprocessing) if stream_job.preprocessing else None
+
+
+def _keep_sampled_users(user_ids: np.ndarray, fraction: float, seed: int) -> np.ndarray:
+    """Mask of the interactions of the sampled users; the same seed samples the same users."""
+    unique_ids, inverse = np.unique(user_ids, return_inverse=True)
+    salted = unique_ids.astype(np.int64) ^ np.int64(_SEED_SALT + seed)
+    hashes = pd.util.hash_array(salted) % _HASH_RANGE
+    return (hashes < fraction * _HASH_RANGE)[inverse]
+
+
+def _k_core(user_ids: np.ndarray, item_ids: np.ndarray, min_user: int, min_item: int) -> np.ndarray:
+    """Mask of the interactions in the k-core: every user and item keeps at least its minimum."""
+    user_codes, user_uniques = pd.factorize(user_ids)
+    item_codes, item_uniques = pd.factorize(item_ids)
+    keep = np.ones(len(user_codes), dtype=bool)
+    while True:
+        user_counts = np.bincount(user_codes[keep], minlength=len(user_uniques))
+        item_counts = np.bincount(item_codes[keep], minlength=len(item_uniques))
+        kept = keep & (user_counts[user_codes] >= min_user) & (item_counts[item_codes] >= min_item)
+        if kept.sum() == keep.sum():
+            return keep
+        keep = kept
+
+
+def apply_preprocessing(data: InteractionMatrix, spec: dict) -> InteractionMatrix:
+    """The interactions of `data` kept by the spec, with the same user and item ids."""
+    df = data._df
+    keep = np.ones(len(df), dtype=bool)
+    timestamps = df[InteractionMatrix.TIMESTAMP_IX].to_numpy()
+    if "start" in spec:
+        keep &= timestamps >= spec["start"]
+    if "end" in spec:
+        keep &= timestamps < spec["end"]
+    if "user_fraction" in spec:
+        keep &= _keep_sampled_users(df[InteractionMatrix.USER_IX].to_numpy(), spec["user_fraction"], spec["seed"])
+
+    min_user = spec.get("min_user_interactions", 1)
+    min_item = spec.get("min_item_interactions", 1)
+    if min_user > 1 or min_item > 1:
+        rows = np.flatnonzero(keep)
+        user_ids = df[InteractionMatrix.USER_IX].to_numpy()[rows]
+        item_ids = df[InteractionMatrix.ITEM_IX].to_numpy()[rows]
+        core = _k_core(user_ids, item_ids, min_user, min_item)
+        keep = np.zeros(len(df), dtype=bool)
+        keep[rows[core]] = True
+
+    logger.info(f"Preprocessing keeps {int(keep.sum())} of {len(df)} interactions")
+    return _matrix(df[keep], data)
+
+
+def _matrix(df: pd.DataFrame, like: InteractionMatrix | None = None) -> InteractionMatrix:
+    shape = getattr(like, "user_item_shape", None)
+    return InteractionMatrix(
+        df,
+        item_ix=InteractionMatrix.ITEM_IX,
+        user_ix=InteractionMatrix.USER_IX,
+        timestamp_ix=InteractionMatrix.TIMESTAMP_IX,
+        shape=shape,
+        skip_df_processing=True,
+    )
+
+
+def _cache_path(dataset: str, spec: dict, dataset_version: str) -> str:
+    base_path = get_settings().get_datalake_config()["base_path"]
+    key = json.dumps({"dataset_version": dataset_version, "spec": spec}, sort_keys=True)
+    digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+    return os.path.join(base_path, "preprocessed", dataset, f"{digest}.parquet")
+
+
+def load_preprocessed(dataset: str, spec: dict, dataset_version: str) -> InteractionMatrix | None:
+    """The cached output of the spec on this version of the dataset, None when not cached."""
+    path = _cache_path(dataset, spec, dataset_version)
+    try:
+        df = pd.read_parquet(path)
+    except (OSError, ValueError):
+        return None
+    logger.info(f"Loaded preprocessed {dataset} from {path}")
+    return _matrix(df)
+
+
+def save_preprocessed(dataset: str, spec: dict, dataset_version: str, data: InteractionMatrix) -> None:
+    path = _cache_path(dataset, spec, dataset_version)
+    tmp_path = None
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # A file of its own, as jobs with the same spec may save concurrently
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        os.close(fd)
+        data._df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not cache preprocessed {dataset}: {e}")
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
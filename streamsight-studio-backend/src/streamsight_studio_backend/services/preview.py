@@ -0,0 +1,152 @@
+"""
+Approximate preview runs.
+
+A preview evaluates a deterministic sample of users and/or only the first
+windows of a stream job. Both reductions are applied to the interaction data
+before the split, so split, training and evaluation time scale with the
+sample. The macro and micro scores of a preview are stored flagged as
+approximate, with bootstrap confidence intervals obtained by resampling the
+sampled users.
+"""
+
+import logging as logger
+import math
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+from streamsight.matrix import InteractionMatrix
+
+from streamsight_studio_backend.config.setting import get_settings
+from streamsight_studio_backend.db.schema import (
+    MacroEvaluationResult,
+    MicroEvaluationResult,
+    StreamAlgorithm,
+    StreamJob,
+)
+from streamsight_studio_backend.services.dataset_stats import get_dataset_stats
+
+
+logger = logger.getLogger(__name__)
+
+_HASH_RANGE = 2**32
+_BOOTSTRAP_CHUNK = 100
+
+
+def is_preview(stream_job: StreamJob) -> bool:
+    return stream_job.preview_fraction is not None or stream_job.preview_windows is not None
+
+
+def sample_users(data: InteractionMatrix, fraction: float) -> InteractionMatrix:
+    """Keep the users whose id hashes into the first `fraction` of the hash range.
+
+    The same users are selected on every run, and a larger fraction selects a
+    superset of the users of a smaller one.
+    """
+    user_ids = np.fromiter(data.user_ids, dtype=np.int64)
+    hashes = pd.util.hash_array(user_ids) % _HASH_RANGE
+    kept = user_ids[hashes < fraction * _HASH_RANGE]
+    logger.info(f"Preview keeps {len(kept)} of {len(user_ids)} users")
+    return data.users_in(set(kept.tolist()))
+
+
+def limit_windows(data: InteractionMatrix, background_t: float, window_size: int, max_windows: int) -> InteractionMatrix:
+    """Drop interactions after the first `max_windows` windows following the background data."""
+    return data.timestamps_lt(background_t + max_windows * window_size)
+
+
+def apply_preview(data: InteractionMatrix, stream_job: StreamJob) -> InteractionMatrix:
+    """Reduce the data of a preview run before it is split."""
+    if stream_job.preview_fraction is not None:
+        data = sample_users(data, stream_job.preview_fraction)
+    if stream_job.preview_windows is not None:
+        data = limit_windows(
+            data, stream_job.timestamp_split_start.timestamp(), stream_job.window_size, stream_job.preview_windows
+        )
+    return data
+
+
+def preview_cost_factor(stream_job: StreamJob) -> float:
+    """Fraction of the full evaluation cost a preview is expected to take."""
+    factor = 1.0
+    if stream_job.preview_fraction is not None:
+        factor *= stream_job.preview_fraction
+    if stream_job.preview_windows is not None:
+        stats = get_dataset_stats(stream_job.dataset)
+        if stats is not None:
+            span = stats.max_timestamp - stream_job.timestamp_split_start.timestamp()
+            num_windows = max(math.ceil(span / stream_job.window_size), 1)
+            factor *= min(stream_job.preview_windows / num_windows, 1.0)
+    return factor
+
+
+def bootstrap_intervals(
+    user_df: pd.DataFrame, confidence: float, num_samples: int, seed: int = 0
+) -> dict[tuple[str, str], dict[str, tuple[float, float]]]:
+    """Percentile bootstrap intervals of the macro and micro score per (algorithm, metric).
+
+    Users are resampled with replacement, keeping all windows of a drawn user
+    together, and both scores are recomputed the way streamsight computes them:
+    micro as the mean over all user scores, macro as the mean over windows of
+    the per-window mean.
+    """
+    rng = np.random.default_rng(seed)
+    alpha = (1.0 - confidence) / 2
+    intervals = {}
+    for (algorithm, metric), group in user_df.groupby(["algorithm", "metric"]):
+        table = pd.DataFrame(
+            {
+                "user_id": group["user_id"].to_numpy(),
+                "timestamp": group["timestamp"].to_numpy(),
+                "score": pd.to_numeric(group["user_score"], errors="coerce").to_numpy(),
+            }
+        ).dropna()
+        if table.empty:
+            continue
+        sums = table.pivot_table(index="user_id", columns="timestamp", values="score", aggfunc="sum", fill_value=0.0)
+        counts = table.pivot_table(index="user_id", columns="timestamp", values="score", aggfunc="count", fill_value=0)
+        sums = sums.to_numpy(dtype=np.float64)
+        counts = counts.to_numpy(dtype=np.float64)
+        num_users = sums.shape[0]
+
+        micro, macro = [], []
+        for start in range(0, num_samples, _BOOTSTRAP_CHUNK):
+            size = min(_BOOTSTRAP_CHUNK, num_samples - start)
+            # Number of times each user is drawn in each resample
+            weights = rng.multinomial(num_users, np.full(num_users, 1.0 / num_users), size=size).astype(np.float64)
+            window_sums = weights @ sums
+            window_counts = weights @ counts
+            micro.append(window_sums.sum(axis=1) / window_counts.sum(axis=1))
+            with np.errstate(invalid="ignore", divide="ignore"):
+                macro.append(np.nanmean(np.where(window_counts > 0, window_sums / window_counts, np.nan), axis=1))
+        micro = np.concatenate(micro)
+        macro = np.concatenate(macro)
+        intervals[(algorithm, metric)] = {
+            "micro": (float(np.nanquantile(micro, alpha)), float(np.nanquantile(micro, 1 - alpha))),
+            "macro": (float(np.nanquantile(macro, alpha)), float(np.nanquantile(macro, 1 - alpha))),
+        }
+    return intervals
+
+
+def record_preview_intervals(db: Session, evaluator, stream_job_id: int) -> None:
+    """Flag the saved macro and micro results of a preview as approximate and attach their intervals."""
+    settings = get_settings()
+    try:
+        user_df = evaluator.metric_results("user").reset_index()
+        intervals = bootstrap_intervals(user_df, settings.PREVIEW_CONFIDENCE, settings.PREVIEW_BOOTSTRAP_SAMPLES)
+    except Exception as e:
+        logger.warning(f"Could not compute preview confidence intervals for stream job {stream_job_id}: {e}")
+        intervals = {}
+
+    algorithms = db.query(StreamAlgorithm).filter(StreamAlgorithm.stream_job_id == stream_job_id).all()
+    uuids = {str(sa.algorithm_uuid): sa.id for sa in algorithms}
+    by_algorithm_id = {
+        (uuids.get(algorithm.split("_")[-1]), metric): bounds for (algorithm, metric), bounds in intervals.items()
+    }
+    for model, level in ((MacroEvaluationResult, "macro"), (MicroEvaluationResult, "micro")):
+        for row in db.query(model).filter(model.stream_job_id == stream_job_id):
+            row.approximate = True
+            bounds = by_algorithm_id.get((row.stream_algorithm_id, row.metric))
+            if bounds:
+                row.ci_lower, row.ci_upper = bounds[level]
+    db.commit()
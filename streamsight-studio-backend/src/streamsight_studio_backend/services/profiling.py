@@ -0,0 +1,210 @@
+import logging as logger
+import os
+import resource
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any
+
+
+logger = logger.getLogger(__name__)
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_RSS_SAMPLE_INTERVAL = 0.05
+
+
+def _max_rss() -> int:
+    """Peak RSS of the process in bytes (lifetime high-water mark)."""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def current_rss() -> int:
+    """Current resident set size of the process in bytes."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return _max_rss()
+
+
+class _RssSampler(threading.Thread):
+    """Background thread that records the peak RSS seen while it runs."""
+
+    def __init__(self) -> None:
+        super().__init__(daemon=True)
+        self.peak = current_rss()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(_RSS_SAMPLE_INTERVAL):
+            self.peak = max(self.peak, current_rss())
+
+    def stop(self) -> int:
+        self._stop_event.set()
+        self.join()
+        self.peak = max(self.peak, current_rss())
+        return self.peak
+
+
+@dataclass
+class StageTiming:
+    stage: str
+    wall_time: float
+    cpu_time: float
+    peak_rss: int
+
+
+class StageProfiler:
+    """Measure wall time, CPU time and peak RSS of named stages.
+
+    CPU time is taken from the calling thread, so concurrent requests served by
+    the same process are not attributed to the evaluation. Peak RSS is sampled
+    for the whole process while the stage runs.
+    """
+
+    def __init__(self) -> None:
+        self.stages: list[StageTiming] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        sampler = _RssSampler()
+        sampler.start()
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            timing = StageTiming(
+                stage=name,
+                wall_time=time.perf_counter() - wall_start,
+                cpu_time=time.thread_time() - cpu_start,
+                peak_rss=sampler.stop(),
+            )
+            self.stages.append(timing)
+            logger.info(
+                f"Stage {name} took {timing.wall_time:.3f}s wall, {timing.cpu_time:.3f}s cpu, "
+                f"peak rss {timing.peak_rss / 2**20:.1f} MiB"
+            )
+
+
+def measure(fn: Callable[..., Any], *args: Any) -> tuple[Any, float, int]:
+    """Call fn(*args) and return its result, wall time and peak RSS above the RSS at the call."""
+    baseline = current_rss()
+    sampler = _RssSampler()
+    sampler.start()
+    start = time.perf_counter()
+    try:
+        result = fn(*args)
+    finally:
+        elapsed = time.perf_counter() - start
+        peak = sampler.stop()
+    return result, elapsed, max(peak - baseline, 0)
+
+
+def _num_interactions(data: Any) -> int:
+    return int(getattr(data, "num_interactions", 0))
+
+
+@dataclass
+class AlgorithmWindowTiming:
+    algorithm_uuid: str
+    window: int
+    timestamp: str
+    fit_time: float | None
+    fit_interactions: int | None
+    predict_time: float
+    predict_interactions: int
+    peak_memory_delta: int
+
+
+class AlgorithmProfiler:
+    """Measure fit and predict of every algorithm of an evaluator in every window.
+
+    A fit is attributed to the window predicted next: the background data to
+    the first window, the data released after window i to window i + 1. A
+    window whose fit ran in an earlier process, e.g. before a resume, has no
+    fit time.
+    """
+
+    def __init__(self) -> None:
+        self.windows: list[AlgorithmWindowTiming] = []
+        # Fits per algorithm uuid not yet followed by a predict: time, interactions, peak memory delta
+        self._fits: dict[str, tuple[float, int, int]] = {}
+
+    def record(self, timing: AlgorithmWindowTiming) -> None:
+        self.windows.append(timing)
+
+    def _record_fit(self, algorithm_uuid: str, fit_time: float, interactions: int, memory_delta: int) -> None:
+        previous_time, previous_interactions, previous_delta = self._fits.get(algorithm_uuid, (0.0, 0, 0))
+        self._fits[algorithm_uuid] = (
+            previous_time + fit_time,
+            previous_interactions + interactions,
+            max(previous_delta, memory_delta),
+        )
+
+    def _record_predict(
+        self,
+        algorithm_uuid: str,
+        window: int,
+        timestamp: str,
+        predict_time: float,
+        interactions: int,
+        memory_delta: int,
+    ) -> None:
+        fit = self._fits.pop(algorithm_uuid, None)
+        self.record(
+            AlgorithmWindowTiming(
+                algorithm_uuid=algorithm_uuid,
+                window=window,
+                timestamp=timestamp,
+                fit_time=fit[0] if fit else None,
+                fit_interactions=fit[1] if fit else None,
+                predict_time=predict_time,
+                predict_interactions=interactions,
+                peak_memory_delta=max(memory_delta, fit[2] if fit else 0),
+            )
+        )
+
+    @contextmanager
+    def hooks(self, evaluator: Any) -> Iterator[None]:
+        """Measure fit and predict of the evaluator's algorithms inside the block.
+
+        The measuring wrappers are set on the algorithm instances and removed
+        on exit, so that the algorithms can be pickled into a checkpoint
+        between windows.
+        """
+        algorithms = [(str(state.algorithm_uuid), state.algo_ptr) for state in evaluator.algo_state_mgr.values()]
+
+        def timed_fit(algorithm_uuid: str, fit: Callable) -> Callable:
+            def wrapper(data: Any) -> Any:
+                result, elapsed, memory_delta = measure(fit, data)
+                self._record_fit(algorithm_uuid, elapsed, _num_interactions(data), memory_delta)
+                return result
+
+            return wrapper
+
+        def timed_predict(algorithm_uuid: str, predict: Callable) -> Callable:
+            def wrapper(data: Any) -> Any:
+                result, elapsed, memory_delta = measure(predict, data)
+                # The evaluator moved to the next window when it fetched this one's data
+                window = evaluator._run_step - 1
+                timestamp = f"t={evaluator._current_timestamp}"
+                self._record_predict(algorithm_uuid, window, timestamp, elapsed, _num_interactions(data), memory_delta)
+                return result
+
+            return wrapper
+
+        for algorithm_uuid, algorithm in algorithms:
+            algorithm.fit = timed_fit(algorithm_uuid, algorithm.fit)
+            algorithm.predict = timed_predict(algorithm_uuid, algorithm.predict)
+        try:
+            yield
+        finally:
+            for _, algorithm in algorithms:
+                del algorithm.fit
+                del algorithm.predict
@@ -0,0 +1,267 @@
+"""Postgres-backed evaluation queue, claimed by workers with SELECT ... FOR UPDATE SKIP LOCKED."""
+
+import logging as logger
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from enum import StrEnum
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from streamsight_studio_backend.db.schema import EvaluationQueueEntry, StreamJob, StreamUser
+from streamsight_studio_backend.services.job_status import JobStatus, transition_job
+from streamsight_studio_backend.services.scheduler import (
+    JobPriority,
+    SchedulingPolicy,
+    claim_order,
+    estimate_job_cost,
+    running_jobs_of_owner,
+)
+
+
+logger = logger.getLogger(__name__)
+
+# Key of the advisory locks, one per user, serialising the claims of a user's jobs against the per-user cap
+USER_CLAIM_LOCK_KEY = 0x5757_0002
+
+
+@dataclass
+class ClaimedJob:
+    """A queue entry claimed by a worker, detached from the session that claimed it."""
+
+    entry_id: int
+    stream_job_id: int
+    resume: bool
+    partial: bool
+    live: bool
+    add_metrics: list[str] | None
+    priority: str
+    attempts: int
+
+
+class ClaimState(StrEnum):
+    """State of a claim as seen by the worker holding it."""
+
+    HELD = "held"
+    CANCEL_REQUESTED = "cancel_requested"
+    LOST = "lost"
+
+
+def enqueue_job(
+    db: Session,
+    stream_job_id: int,
+    resume: bool = False,
+    partial: bool = False,
+    priority: JobPriority = JobPriority.BATCH,
+    live: bool = False,
+    add_metrics: list[str] | None = None,
+) -> EvaluationQueueEntry:
+    """Add a stream job to the evaluation queue with its estimated cost. The caller commits."""
+    stream_job = db.query(StreamJob).filter(StreamJob.id == stream_job_id).first()
+    entry = EvaluationQueueEntry(
+        stream_job_id=stream_job_id,
+        resume=resume,
+        partial=partial,
+        live=live,
+        add_metrics=add_metrics,
+        priority=priority,
+        estimated_cost=estimate_job_cost(db, stream_job) if stream_job else 0.0,
+    )
+    db.add(entry)
+    return entry
+
+
+def get_queue_entry(db: Session, stream_job_id: int, lock: bool = False) -> EvaluationQueueEntry | None:
+    """Queue entry of a job, or None if the job is neither queued nor running on a worker.
+
+    With `lock` the row is selected FOR UPDATE, so that no worker claims or
+    removes it until the caller commits.
+    """
+    query = db.query(EvaluationQueueEntry).filter(EvaluationQueueEntry.stream_job_id == stream_job_id)
+    if lock:
+        query = query.with_for_update()
+    return query.first()
+
+
+def _running_jobs(db: Session, user_id: int) -> int:
+    """Number of claimed jobs of a user, counted under the user's claim lock."""
+    db.execute(select(func.pg_advisory_xact_lock(USER_CLAIM_LOCK_KEY, user_id)))
+    return (
+        db.query(func.count(EvaluationQueueEntry.id))
+        .join(StreamJob, StreamJob.id == EvaluationQueueEntry.stream_job_id)
+        .filter(EvaluationQueueEntry.claimed_by.isnot(None), StreamJob.user_id == user_id)
+        .scalar()
+    )
+
+
+def claim_next_job(db: Session, worker_id: str, policy: SchedulingPolicy | None = None) -> ClaimedJob | None:
+    """Claim the next waiting job in scheduling order, skipping rows other workers are claiming.
+
+    Without a policy there is no per-user cap and no starvation timeout.
+    """
+    policy = policy or SchedulingPolicy()
+    running = running_jobs_of_owner()
+    capped_users: set[int] = set()
+    while True:
+        query = (
+            db.query(EvaluationQueueEntry, StreamJob.user_id)
+            .join(StreamJob, StreamJob.id == EvaluationQueueEntry.stream_job_id)
+            .join(StreamUser, StreamUser.id == StreamJob.user_id)
+            .filter(EvaluationQueueEntry.claimed_by.is_(None))
+        )
+        if policy.max_jobs_per_user:
+            query = query.filter(running < policy.max_jobs_per_user)
+        if capped_users:
+            query = query.filter(StreamJob.user_id.notin_(capped_users))
+        row = (
+            query.order_by(*claim_order(policy, running))
+            .with_for_update(skip_locked=True, of=EvaluationQueueEntry)
+            .first()
+        )
+        if row is None:
+            db.rollback()
+            return None
+        entry, user_id = row
+        # The count in the query may miss a claim of the same user committed meanwhile
+        if not policy.max_jobs_per_user or _running_jobs(db, user_id) < policy.max_jobs_per_user:
+            break
+        db.rollback()
+        capped_users.add(user_id)
+
+    entry.claimed_by = worker_id
+    entry.claimed_at = func.now()
+    entry.heartbeat_at = func.now()
+    entry.attempts += 1
+    claimed = ClaimedJob(
+        entry_id=entry.id,
+        stream_job_id=entry.stream_job_id,
+        resume=entry.resume,
+        partial=entry.partial,
+        live=entry.live,
+        add_metrics=list(entry.add_metrics) if entry.add_metrics else None,
+        priority=entry.priority,
+        attempts=entry.attempts,
+    )
+    db.commit()
+    logger.info(
+        f"Worker {worker_id} claimed {claimed.priority} stream job {claimed.stream_job_id} (attempt {claimed.attempts})"
+    )
+    return claimed
+
+
+def heartbeat(db: Session, entry_id: int, worker_id: str) -> ClaimState:
+    """Refresh a claim and report whether it is still held and whether the job should stop."""
+    cancel_requested = (
+        db.query(EvaluationQueueEntry.cancel_requested)
+        .filter(EvaluationQueueEntry.id == entry_id, EvaluationQueueEntry.claimed_by == worker_id)
+        .with_for_update()
+        .scalar()
+    )
+    if cancel_requested is None:
+        db.rollback()
+        return ClaimState.LOST
+    db.query(EvaluationQueueEntry).filter(EvaluationQueueEntry.id == entry_id).update(
+        {EvaluationQueueEntry.heartbeat_at: func.now()}, synchronize_session=False
+    )
+    db.commit()
+    return ClaimState.CANCEL_REQUESTED if cancel_requested else ClaimState.HELD
+
+
+def finish_job(db: Session, entry_id: int, worker_id: str) -> None:
+    """Remove a finished job from the queue."""
+    db.query(EvaluationQueueEntry).filter(
+        EvaluationQueueEntry.id == entry_id, EvaluationQueueEntry.claimed_by == worker_id
+    ).delete(synchronize_session=False)
+    db.commit()
+
+
+def requeue_stale_jobs(db: Session, heartbeat_timeout: float, max_attempts: int) -> int:
+    """Release jobs whose worker stopped sending heartbeats, failing those released `max_attempts` times."""
+    stale = (
+        db.query(EvaluationQueueEntry)
+        .filter(
+            EvaluationQueueEntry.claimed_by.isnot(None),
+            EvaluationQueueEntry.heartbeat_at < func.now() - timedelta(seconds=heartbeat_timeout),
+        )
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    for entry in stale:
+        if entry.cancel_requested:
+            logger.warning(f"Worker {entry.claimed_by} died while cancelling stream job {entry.stream_job_id}")
+            stream_job = db.query(StreamJob).filter(StreamJob.id == entry.stream_job_id).first()
+            if stream_job:
+                now = datetime.now(timezone.utc)
+                transition_job(
+                    db,
+                    stream_job,
+                    JobStatus.CANCELLED,
+                    reason="worker stopped responding",
+                    cancelled_at=stream_job.cancelled_at or now,
+                    completed_at=now,
+                )
+            db.delete(entry)
+        elif entry.attempts >= max_attempts:
+            logger.error(
+                f"Stream job {entry.stream_job_id} lost its worker {entry.attempts} times, marking it as failed"
+            )
+            stream_job = db.query(StreamJob).filter(StreamJob.id == entry.stream_job_id).first()
+            if stream_job:
+                transition_job(
+                    db,
+                    stream_job,
+                    JobStatus.FAILED,
+                    reason="worker stopped responding",
+                    completed_at=datetime.now(timezone.utc),
+                    error_message=f"Evaluation worker stopped responding {entry.attempts} times",
+                )
+            db.delete(entry)
+        else:
+            logger.warning(
+                f"Worker {entry.claimed_by} stopped sending heartbeats, re-queueing stream job {entry.stream_job_id}"
+            )
+            entry.claimed_by = None
+            entry.claimed_at = None
+            entry.heartbeat_at = None
+            entry.resume = True
+    db.commit()
+    return len(stale)
+
+
+def enqueue_interrupted_jobs(db: Session) -> list[int]:
+    """Queue jobs left running without a queue entry, e.g. by a version that ran jobs in the API process."""
+    jobs = (
+        db.query(StreamJob.id)
+        .outerjoin(EvaluationQueueEntry, EvaluationQueueEntry.stream_job_id == StreamJob.id)
+        .filter(
+            StreamJob.status == JobStatus.RUNNING,
+            EvaluationQueueEntry.id.is_(None),
+        )
+        .order_by(StreamJob.started_at)
+        .all()
+    )
+    enqueued = []
+    for (job_id,) in jobs:
+        enqueue_job(db, job_id, resume=True)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another replica queued it first
+            db.rollback()
+            continue
+        enqueued.append(job_id)
+    return enqueued
+
+
+def queue_depth(db: Session) -> dict[str, int]:
+    """Number of waiting and claimed queue entries."""
+    rows = (
+        db.query(EvaluationQueueEntry.claimed_by.is_(None), func.count())
+        .group_by(EvaluationQueueEntry.claimed_by.is_(None))
+        .all()
+    )
+    depth = {"waiting": 0, "claimed": 0}
+    for waiting, count in rows:
+        depth["waiting" if waiting else "claimed"] += count
+    return depth
@@ -0,0 +1,141 @@
+"""Cross-job reuse of algorithm results with the same result fingerprint."""
+
+import logging as logger
+from datetime import datetime, timezone
+
+from sqlalchemy import func, literal, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from streamsight_studio_backend.db.schema import (
+    MacroEvaluationResult,
+    MicroEvaluationResult,
+    ResultCacheEntry,
+    StreamAlgorithm,
+    UserEvaluationResult,
+    WindowEvaluationResult,
+)
+from streamsight_studio_backend.services.telemetry import REGISTRY, Counter
+
+
+logger = logger.getLogger(__name__)
+
+RESULT_CACHE_LOOKUPS = REGISTRY.register(
+    Counter("evaluation_result_cache_lookups_total", "Result cache lookups by outcome.", ("outcome",))
+)
+RESULT_CACHE_TIME_SAVED = REGISTRY.register(
+    Counter("evaluation_result_cache_time_saved_seconds_total", "Evaluation time avoided by result cache hits.")
+)
+
+# Columns copied verbatim per result table, besides the job and algorithm ids
+_RESULT_COLUMNS = {
+    MacroEvaluationResult: ("metric", "macro_score", "num_window"),
+    MicroEvaluationResult: ("metric", "micro_score", "num_user"),
+    WindowEvaluationResult: ("metric", "window_score", "num_user", "timestamp"),
+    UserEvaluationResult: ("metric", "user_score", "user_id", "timestamp"),
+}
+
+
+def _find_source(db: Session, fingerprint: str, target: StreamAlgorithm) -> StreamAlgorithm | None:
+    return (
+        db.query(StreamAlgorithm)
+        .filter(StreamAlgorithm.result_fingerprint == fingerprint, StreamAlgorithm.id != target.id)
+        .order_by(StreamAlgorithm.id)
+        .first()
+    )
+
+
+def _copy_results(db: Session, source: StreamAlgorithm, target: StreamAlgorithm) -> int:
+    """Copy every result row of `source` to `target` inside the database. Returns the number of rows."""
+    copied = 0
+    created_at = datetime.now(timezone.utc)
+    for model, columns in _RESULT_COLUMNS.items():
+        query = select(
+            literal(target.stream_job_id),
+            literal(target.id),
+            literal(created_at),
+            *(getattr(model, column) for column in columns),
+        ).where(model.stream_algorithm_id == source.id)
+        result = db.execute(
+            insert(model).from_select(["stream_job_id", "stream_algorithm_id", "created_at", *columns], query)
+        )
+        copied += result.rowcount or 0
+    return copied
+
+
+def reuse_cached_results(db: Session, stream_algorithm: StreamAlgorithm, fingerprint: str) -> bool:
+    """Copy the results of another job's algorithm with the same fingerprint. Returns True on a hit.
+
+    The caller commits on a hit and rolls back what was written on a miss.
+    """
+    source = _find_source(db, fingerprint, stream_algorithm)
+    if source is None:
+        RESULT_CACHE_LOOKUPS.inc("miss")
+        return False
+
+    try:
+        copied = _copy_results(db, source, stream_algorithm)
+        stream_algorithm.result_fingerprint = fingerprint
+        entry = db.query(ResultCacheEntry).filter(ResultCacheEntry.fingerprint == fingerprint).first()
+        saved = entry.compute_time if entry else 0.0
+        if entry:
+            entry.hits += 1
+            entry.time_saved += saved
+            entry.last_hit_at = datetime.now(timezone.utc)
+        db.flush()
+    except Exception as e:
+        logger.error(f"Error copying cached results for algorithm {stream_algorithm.id}: {e}")
+        RESULT_CACHE_LOOKUPS.inc("miss")
+        return False
+
+    RESULT_CACHE_LOOKUPS.inc("hit")
+    RESULT_CACHE_TIME_SAVED.inc(amount=saved)
+    logger.info(
+        f"Result cache hit for {stream_algorithm.algorithm_name} (id: {stream_algorithm.id}): "
+        f"copied {copied} rows from algorithm {source.id}, saved ~{saved:.1f}s"
+    )
+    return True
+
+
+def record_computed_results(
+    db: Session, stream_algorithm: StreamAlgorithm, fingerprint: str, dataset: str, compute_time: float
+) -> None:
+    """Register freshly computed results so that later jobs can reuse them. The caller commits."""
+    statement = insert(ResultCacheEntry).values(
+        fingerprint=fingerprint,
+        algorithm_name=stream_algorithm.algorithm_name,
+        dataset=dataset,
+        compute_time=compute_time,
+        misses=1,
+        hits=0,
+        time_saved=0.0,
+        created_at=datetime.now(timezone.utc),
+    )
+    # Another job with the same fingerprint may have registered it first
+    statement = statement.on_conflict_do_update(
+        index_elements=[ResultCacheEntry.fingerprint],
+        set_={"misses": ResultCacheEntry.misses + 1, "compute_time": statement.excluded.compute_time},
+    )
+    db.execute(statement)
+
+
+def get_result_cache_stats(db: Session) -> dict:
+    """Hit rate and compute time saved by the result cache since it was created."""
+    entries, hits, misses, compute_time, time_saved = db.execute(
+        select(
+            func.count(ResultCacheEntry.id),
+            func.coalesce(func.sum(ResultCacheEntry.hits), 0),
+            func.coalesce(func.sum(ResultCacheEntry.misses), 0),
+            func.coalesce(func.sum(ResultCacheEntry.compute_time * ResultCacheEntry.misses), 0.0),
+            func.coalesce(func.sum(ResultCacheEntry.time_saved), 0.0),
+        )
+    ).one()
+    lookups = hits + misses
+    return {
+        "entries": entries,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / lookups if lookups else 0.0,
+        "compute_time": float(compute_time),
+        "time_saved": float(time_saved),
+    }
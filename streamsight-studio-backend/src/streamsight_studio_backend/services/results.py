@@ -0,0 +1,170 @@
+"""
+Results of stream jobs, of one job or side by side for several.
+
+For the comparison, every result level is read with one query over all
+requested jobs, joined with the algorithms for their names and parameters.
+Rows are then aligned by algorithm configuration and metric (and window for
+the window level), with the scores of every job next to each other.
+"""
+
+from sqlalchemy.orm import Session
+
+from streamsight_studio_backend.db.schema import (
+    MacroEvaluationResult,
+    MicroEvaluationResult,
+    StreamAlgorithm,
+    UserEvaluationResult,
+    WindowEvaluationResult,
+)
+
+
+# Result model and the columns reported per job, by level
+RESULT_LEVELS = {
+    "macro": (MacroEvaluationResult, ("macro_score", "num_window", "approximate", "ci_lower", "ci_upper")),
+    "micro": (MicroEvaluationResult, ("micro_score", "num_user", "approximate", "ci_lower", "ci_upper")),
+    "window": (WindowEvaluationResult, ("window_score", "num_user")),
+}
+
+
+def get_job_results(db: Session, stream_job_id: int) -> dict:
+    """All results of a stream job by level, as served by /evaluator/{id}/results."""
+    # Get evaluation results from all tables with algorithm names
+    macro_results = (
+        db.query(MacroEvaluationResult, StreamAlgorithm.algorithm_name)
+        .join(StreamAlgorithm, MacroEvaluationResult.stream_algorithm_id == StreamAlgorithm.id)
+        .filter(MacroEvaluationResult.stream_job_id == stream_job_id)
+        .all()
+    )
+    micro_results = (
+        db.query(MicroEvaluationResult, StreamAlgorithm.algorithm_name)
+        .join(StreamAlgorithm, MicroEvaluationResult.stream_algorithm_id == StreamAlgorithm.id)
+        .filter(MicroEvaluationResult.stream_job_id == stream_job_id)
+        .all()
+    )
+    window_results = (
+        db.query(WindowEvaluationResult, StreamAlgorithm.algorithm_name)
+        .join(StreamAlgorithm, WindowEvaluationResult.stream_algorithm_id == StreamAlgorithm.id)
+        .filter(WindowEvaluationResult.stream_job_id == stream_job_id)
+        .all()
+    )
+    user_results = (
+        db.query(UserEvaluationResult, StreamAlgorithm.algorithm_name)
+        .join(StreamAlgorithm, UserEvaluationResult.stream_algorithm_id == StreamAlgorithm.id)
+        .filter(UserEvaluationResult.stream_job_id == stream_job_id)
+        .all()
+    )
+
+    result = {
+        "macro": [],
+        "micro": [],
+        "window": [],
+        "user": []
+    }
+
+    # Process macro results
+    for eval_result, algorithm_name in macro_results:
+        result["macro"].append(
+            {
+                "id": eval_result.id,
+                "algorithm": algorithm_name,
+                "metric": eval_result.metric,
+                "score": eval_result.macro_score,
+                "num_window": eval_result.num_window,
+                "approximate": eval_result.approximate,
+                "ci_lower": eval_result.ci_lower,
+                "ci_upper": eval_result.ci_upper,
+            }
+        )
+
+    # Process micro results
+    for eval_result, algorithm_name in micro_results:
+        result["micro"].append(
+            {
+                "id": eval_result.id,
+                "algorithm": algorithm_name,
+                "metric": eval_result.metric,
+                "score": eval_result.micro_score,
+                "num_user": eval_result.num_user,
+                "approximate": eval_result.approximate,
+                "ci_lower": eval_result.ci_lower,
+                "ci_upper": eval_result.ci_upper,
+            }
+        )
+
+    # Process window results
+    for eval_result, algorithm_name in window_results:
+        result["window"].append(
+            {
+                "id": eval_result.id,
+                "algorithm": algorithm_name,
+                "metric": eval_result.metric,
+                "score": eval_result.window_score,
+                "num_user": eval_result.num_user,
+                "timestamp": eval_result.timestamp,
+            }
+        )
+
+    # Process user results
+    for eval_result, algorithm_name in user_results:
+        result["user"].append(
+            {
+                "id": eval_result.id,
+                "algorithm": algorithm_name,
+                "metric": eval_result.metric,
+                "score": eval_result.user_score,
+                "user_id": eval_result.user_id,
+                "timestamp": eval_result.timestamp,
+            }
+        )
+
+    return result
+
+
+def compare_job_results(
+    db: Session, stream_job_ids: list[int], level: str, metrics: list[str] | None = None
+) -> list[dict]:
+    """Results of one level of several jobs, one row per algorithm configuration and metric.
+
+    Each row maps the job ids holding that result to their values. The score
+    column is reported as "score", as in /evaluator/{id}/results.
+    """
+    model, columns = RESULT_LEVELS[level]
+    query = (
+        db.query(
+            model.stream_job_id,
+            StreamAlgorithm.algorithm_name,
+            StreamAlgorithm.parameters,
+            model.metric,
+            *(getattr(model, column) for column in columns),
+            *((model.timestamp,) if level == "window" else ()),
+        )
+        .join(StreamAlgorithm, model.stream_algorithm_id == StreamAlgorithm.id)
+        .filter(model.stream_job_id.in_(stream_job_ids))
+    )
+    if metrics:
+        query = query.filter(model.metric.in_(metrics))
+
+    rows: dict[tuple, dict] = {}
+    for stream_job_id, algorithm_name, parameters, metric, *values in query:
+        timestamp = values.pop() if level == "window" else None
+        key = (algorithm_name, parameters, metric, timestamp)
+        row = rows.get(key)
+        if row is None:
+            row = {"algorithm": algorithm_name, "parameters": parameters, "metric": metric}
+            if level == "window":
+                row["timestamp"] = timestamp
+            row["jobs"] = {}
+            rows[key] = row
+        result = dict(zip(("score", *columns[1:]), values))
+        row["jobs"][stream_job_id] = result
+
+    return sorted(rows.values(), key=_row_order)
+
+
+def _row_order(row: dict) -> tuple:
+    """Metric, then algorithm, then window in time order; windows are stored as "t=<timestamp>"."""
+    try:
+        window = float(row.get("timestamp").removeprefix("t="))
+    except (AttributeError, ValueError):
+        window = float("-inf")
+    return row["metric"], row["algorithm"], row["parameters"] or "", window
@@ -0,0 +1,219 @@
+"""
+Scheduling policy of the evaluation queue.
+
+Workers pick the next waiting job by priority class, then weighted fair share
+((running jobs + 1) / share_weight), then estimated cost, with jobs waiting
+past the starvation timeout counted as free. Users already running
+`max_jobs_per_user` jobs are skipped. `claim_next_job` and
+`estimate_start_times` apply the same order; change both together.
+"""
+
+import heapq
+import itertools
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from enum import StrEnum
+
+from sqlalchemy import ColumnElement, Float, case, cast, func, select
+from sqlalchemy.orm import Session, aliased
+
+from streamsight_studio_backend.config.setting import get_settings
+from streamsight_studio_backend.db.schema import EvaluationQueueEntry, ResultCacheEntry, StreamJob, StreamUser
+from streamsight_studio_backend.services.preview import preview_cost_factor
+
+
+class JobPriority(StrEnum):
+    """Priority class of a queued job."""
+
+    INTERACTIVE = "interactive"
+    BATCH = "batch"
+
+
+_PRIORITY_RANK = {JobPriority.INTERACTIVE: 0, JobPriority.BATCH: 1}
+
+
+@dataclass
+class SchedulingPolicy:
+    """Limits applied when claiming jobs. Zero disables a limit."""
+
+    max_jobs_per_user: int = 0
+    starvation_timeout: float = 0.0
+
+    @classmethod
+    def from_settings(cls) -> "SchedulingPolicy":
+        settings = get_settings()
+        return cls(
+            max_jobs_per_user=settings.SCHEDULER_MAX_JOBS_PER_USER,
+            starvation_timeout=settings.SCHEDULER_STARVATION_TIMEOUT,
+        )
+
+
+def estimate_job_cost(db: Session, stream_job: StreamJob) -> float:
+    """Estimate the evaluation time of a stream job in seconds.
+
+    Uses the compute time recorded for each algorithm on the same dataset,
+    falling back to the algorithm on any dataset and then to a fixed default.
+    Preview runs are scaled down by the share of users and windows they cover.
+    """
+    default_cost = get_settings().SCHEDULER_DEFAULT_ALGORITHM_COST
+    names = {sa.algorithm_name for sa in stream_job.stream_algorithms}
+    if not names:
+        return 0.0
+
+    same_dataset = dict(
+        db.query(ResultCacheEntry.algorithm_name, func.avg(ResultCacheEntry.compute_time))
+        .filter(ResultCacheEntry.algorithm_name.in_(names), ResultCacheEntry.dataset == stream_job.dataset)
+        .group_by(ResultCacheEntry.algorithm_name)
+        .all()
+    )
+    any_dataset = dict(
+        db.query(ResultCacheEntry.algorithm_name, func.avg(ResultCacheEntry.compute_time))
+        .filter(ResultCacheEntry.algorithm_name.in_(names))
+        .group_by(ResultCacheEntry.algorithm_name)
+        .all()
+    )
+    cost = sum(
+        float(same_dataset.get(sa.algorithm_name) or any_dataset.get(sa.algorithm_name) or default_cost)
+        for sa in stream_job.stream_algorithms
+    )
+    return cost * preview_cost_factor(stream_job)
+
+
+def running_jobs_of_owner() -> ColumnElement:
+    """Correlated count of the claimed jobs of the user owning the StreamJob row in the outer query."""
+    claimed = aliased(EvaluationQueueEntry)
+    claimed_job = aliased(StreamJob)
+    return (
+        select(func.count(claimed.id))
+        .join(claimed_job, claimed_job.id == claimed.stream_job_id)
+        .where(claimed.claimed_by.isnot(None), claimed_job.user_id == StreamJob.user_id)
+        .correlate(StreamJob)
+        .scalar_subquery()
+    )
+
+
+def claim_order(policy: SchedulingPolicy, running: ColumnElement) -> list[ColumnElement]:
+    """ORDER BY clauses for waiting entries joined with their StreamJob and StreamUser."""
+    priority_rank = case(
+        *((EvaluationQueueEntry.priority == priority.value, rank) for priority, rank in _PRIORITY_RANK.items()),
+        else_=len(_PRIORITY_RANK),
+    )
+    share = cast(running + 1, Float) / StreamUser.share_weight
+    cost = EvaluationQueueEntry.estimated_cost
+    if policy.starvation_timeout:
+        starved = EvaluationQueueEntry.enqueued_at < func.now() - timedelta(seconds=policy.starvation_timeout)
+        cost = case((starved, 0.0), else_=EvaluationQueueEntry.estimated_cost)
+    return [priority_rank, share, cost, EvaluationQueueEntry.enqueued_at, EvaluationQueueEntry.id]
+
+
+@dataclass
+class ScheduledJob:
+    """Estimated start of a queued or running job."""
+
+    stream_job_id: int
+    user_id: int
+    priority: str
+    estimated_cost: float
+    running: bool
+    position: int | None  # 0-based position among waiting jobs, None when running
+    estimated_start_at: datetime | None  # None when the job cannot start with the current workers
+
+
+def estimate_start_times(db: Session, policy: SchedulingPolicy) -> tuple[list[ScheduledJob], int]:
+    """Simulate the queue with the current workers to estimate when each waiting job starts.
+
+    The number of workers is taken to be the number of jobs currently running
+    (at least one), since idle workers would already have claimed a waiting job.
+    Returns the scheduled jobs and the number of workers assumed.
+
+    Waiting and running times are measured on the database clock, which set
+    the queue timestamps; the estimated starts are returned in UTC.
+    """
+    rows = (
+        db.query(EvaluationQueueEntry, StreamJob.user_id, StreamUser.share_weight)
+        .join(StreamJob, StreamJob.id == EvaluationQueueEntry.stream_job_id)
+        .join(StreamUser, StreamUser.id == StreamJob.user_id)
+        .all()
+    )
+    # Queue timestamps are naive times in the database session's time zone, as is LOCALTIMESTAMP
+    now = db.scalar(select(func.localtimestamp()))
+    utc_now = datetime.now(timezone.utc).replace(tzinfo=None)
+    weights = {user_id: weight or 1.0 for _, user_id, weight in rows}
+    running_count: dict[int, int] = {}
+    scheduled: list[ScheduledJob] = []
+    # (seconds from now until the worker is free, tie breaker, user whose job frees it)
+    workers: list[tuple[float, int, int | None]] = []
+    sequence = itertools.count()
+    waiting = []
+
+    for entry, user_id, _ in rows:
+        cost = entry.estimated_cost or 0.0
+        if entry.claimed_by is None:
+            waiting.append((entry, user_id))
+            continue
+        elapsed = (now - entry.claimed_at).total_seconds() if entry.claimed_at else 0.0
+        heapq.heappush(workers, (max(cost - elapsed, 0.0), next(sequence), user_id))
+        running_count[user_id] = running_count.get(user_id, 0) + 1
+        scheduled.append(
+            ScheduledJob(
+                entry.stream_job_id, user_id, entry.priority, cost, True, None, utc_now - timedelta(seconds=elapsed)
+            )
+        )
+    if not workers:
+        workers.append((0.0, next(sequence), None))
+    num_workers = len(workers)
+
+    def sort_key(item: tuple[EvaluationQueueEntry, int], at: float) -> tuple:
+        entry, user_id = item
+        waited = (now - entry.enqueued_at).total_seconds() + at if entry.enqueued_at else at
+        starved = policy.starvation_timeout and waited > policy.starvation_timeout
+        return (
+            _PRIORITY_RANK.get(entry.priority, len(_PRIORITY_RANK)),
+            (running_count.get(user_id, 0) + 1) / weights[user_id],
+            0.0 if starved else (entry.estimated_cost or 0.0),
+            entry.enqueued_at or now,
+            entry.id,
+        )
+
+    position = 0
+    while waiting and workers:
+        free_at, _, finished_user = heapq.heappop(workers)
+        if finished_user is not None:
+            running_count[finished_user] -= 1
+        eligible = [
+            item
+            for item in waiting
+            if not policy.max_jobs_per_user or running_count.get(item[1], 0) < policy.max_jobs_per_user
+        ]
+        if not eligible:
+            # Idle until a busy worker frees a slot of a capped user
+            busy = [worker[0] for worker in workers if worker[2] is not None]
+            if busy:
+                heapq.heappush(workers, (min(busy), next(sequence), None))
+            continue
+        item = min(eligible, key=lambda candidate: sort_key(candidate, free_at))
+        waiting.remove(item)
+        entry, user_id = item
+        running_count[user_id] = running_count.get(user_id, 0) + 1
+        scheduled.append(
+            ScheduledJob(
+                entry.stream_job_id,
+                user_id,
+                entry.priority,
+                entry.estimated_cost or 0.0,
+                False,
+                position,
+                utc_now + timedelta(seconds=free_at),
+            )
+        )
+        position += 1
+        heapq.heappush(workers, (free_at + (entry.estimated_cost or 0.0), next(sequence), user_id))
+
+    for entry, user_id in waiting:
+        scheduled.append(
+            ScheduledJob(
+                entry.stream_job_id, user_id, entry.priority, entry.estimated_cost or 0.0, False, position, None
+            )
+        )
+        position += 1
+    return scheduled, num_workers
@@ -0,0 +1,77 @@
+"""
+Single-flight execution of identical concurrent computations.
+
+A SingleFlight runs a computation once per key at a time. A call for a key
+that is already being computed does not start a second computation but waits
+for the one in flight and gets its result, or its exception. Nothing is kept
+once the computation ends: a later call computes again, so this only merges
+bursts, such as every open results page refetching when a job completes.
+
+Sync endpoints call do() from their threadpool thread. Async endpoints call
+do_async(), which runs the computation in the threadpool and waits for it
+without holding a thread.
+"""
+
+import asyncio
+import threading
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future
+from typing import TypeVar
+
+from fastapi.concurrency import run_in_threadpool
+
+from streamsight_studio_backend.services.telemetry import REGISTRY, Counter
+
+
+T = TypeVar("T")
+
+SINGLE_FLIGHT_CALLS = REGISTRY.register(
+    Counter(
+        "single_flight_calls_total",
+        "Calls of single-flight computations, executed or coalesced into one in flight.",
+        ("flight", "outcome"),
+    )
+)
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, Future] = {}
+
+    def _join(self, key: Hashable) -> tuple[Future, bool]:
+        """The future of the call in flight for `key`, and whether the caller has to run it."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                SINGLE_FLIGHT_CALLS.inc(self.name, "coalesced")
+                return future, False
+            future = self._calls[key] = Future()
+        SINGLE_FLIGHT_CALLS.inc(self.name, "executed")
+        return future, True
+
+    def _run(self, key: Hashable, future: Future, fn: Callable[[], T]) -> None:
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """Result of fn(), shared with every concurrent call for the same key."""
+        future, leader = self._join(key)
+        if leader:
+            self._run(key, future, fn)
+        return future.result()
+
+    async def do_async(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """As do(), with fn() run in the threadpool."""
+        future, leader = self._join(key)
+        if leader:
+            await run_in_threadpool(self._run, key, future, fn)
+        return await asyncio.wrap_future(future)
@@ -0,0 +1,275 @@
+"""
+Bounded-memory evaluation.
+
+Stream jobs created with `low_memory` keep only the window being evaluated in
+memory:
+
+- the split writes the unlabeled, ground truth and incremental data of every
+  window to scratch files as it produces them, and a window is loaded again
+  only when the evaluator reaches it;
+- after every window the metric accumulator is drained into memory-mapped
+  score arrays, so per-user scores do not pile up until the results are saved;
+- results are saved from the scratch files, the user level results one
+  window at a time.
+
+Scratch files live under `datalake/scratch/<stream_job_id>/` next to the
+checkpoints, so a resumed run continues with the scores spilled before the
+interruption. However a run ends, its split windows are removed; the spilled
+scores are kept only while a checkpoint can resume from them.
+"""
+
+import json
+import logging as logger
+import os
+import pickle
+import shutil
+from collections.abc import Iterator
+
+import numpy as np
+import pandas as pd
+from streamsight.evaluators import EvaluatorPipeline
+from streamsight.matrix import InteractionMatrix
+from streamsight.settings import SlidingWindowSetting
+
+from streamsight_studio_backend.config.setting import get_settings
+
+
+logger = logger.getLogger(__name__)
+
+
+def _scratch_dir(stream_job_id: int) -> str:
+    base_path = get_settings().get_datalake_config()["base_path"]
+    return os.path.join(base_path, "scratch", str(stream_job_id))
+
+
+def clear_scratch(stream_job_id: int, keep_metrics: bool = False) -> None:
+    """Remove the scratch files of a job; with `keep_metrics` the spilled scores stay for a resume."""
+    if keep_metrics:
+        shutil.rmtree(os.path.join(_scratch_dir(stream_job_id), "split"), ignore_errors=True)
+        return
+    shutil.rmtree(_scratch_dir(stream_job_id), ignore_errors=True)
+
+
+class SpilledWindows(list):
+    """List of per-window matrices kept on disk, loaded one at a time when indexed.
+
+    The list itself only holds file paths. It subclasses list because
+    streamsight settings check for one.
+    """
+
+    def __init__(self, directory: str) -> None:
+        super().__init__()
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def append(self, matrix: InteractionMatrix) -> None:
+        path = os.path.join(self.directory, f"window_{len(self):05d}.pkl")
+        with open(path, "wb") as f:
+            pickle.dump(matrix, f, protocol=pickle.HIGHEST_PROTOCOL)
+        super().append(path)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._load(path) for path in super().__getitem__(index)]
+        return self._load(super().__getitem__(index))
+
+    def __iter__(self) -> Iterator[InteractionMatrix]:
+        for i in range(len(self)):
+            yield self[i]
+
+    @staticmethod
+    def _load(path: str) -> InteractionMatrix:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+
+def _spilled_windows(name: str) -> property:
+    """Window list attribute that turns the empty list a split starts with into a SpilledWindows."""
+    attribute = f"_spilled_{name}"
+
+    def get(self):
+        return getattr(self, attribute, None)
+
+    def set(self, value) -> None:
+        if type(value) is list and not value:
+            value = SpilledWindows(os.path.join(self.scratch_dir, name))
+        setattr(self, attribute, value)
+
+    return property(get, set)
+
+
+class SpillingSlidingWindowSetting(SlidingWindowSetting):
+    """SlidingWindowSetting that writes every window to disk as soon as it is split.
+
+    The split itself is streamsight's: it starts the window lists empty and
+    appends to them, which here writes each window to the scratch directory.
+    split() checks that the windows ended up on disk, so that a streamsight
+    version splitting differently fails instead of holding every window in
+    memory.
+    """
+
+    IS_BASE: bool = False
+
+    _unlabeled_data = _spilled_windows("unlabeled")
+    _ground_truth_data = _spilled_windows("ground_truth")
+    _incremental_data = _spilled_windows("incremental")
+
+    def __init__(self, scratch_dir: str, *args, **kwargs) -> None:
+        self.scratch_dir = scratch_dir
+        super().__init__(*args, **kwargs)
+
+    def split(self, data: InteractionMatrix) -> None:
+        super().split(data)
+        windows = (self._unlabeled_data, self._ground_truth_data, self._incremental_data)
+        if not all(isinstance(window_list, SpilledWindows) for window_list in windows):
+            raise RuntimeError(
+                "The installed streamsight does not split into empty window lists, low-memory mode needs updating"
+            )
+        logger.info(f"Split {self.num_split} windows to {self.scratch_dir}")
+
+
+def create_spilling_setting(
+    stream_job_id: int, background_t: float, window_size: int, top_k: int
+) -> SpillingSlidingWindowSetting:
+    """Sliding window setting of a low-memory run, replacing the windows of an earlier split."""
+    split_dir = os.path.join(_scratch_dir(stream_job_id), "split")
+    shutil.rmtree(split_dir, ignore_errors=True)
+    return SpillingSlidingWindowSetting(split_dir, background_t=background_t, window_size=window_size, top_K=top_k)
+
+
+class MetricSpill:
+    """Drains the metric accumulator of an evaluator into per-window scratch files.
+
+    Per window, the user ids and scores of every (algorithm, metric) are
+    concatenated into two .npy arrays that are read back memory-mapped, and a
+    JSON index records the window score, user count and array offsets of each.
+    """
+
+    def __init__(self, stream_job_id: int) -> None:
+        self.directory = os.path.join(_scratch_dir(stream_job_id), "metrics")
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, window: int, suffix: str) -> str:
+        return os.path.join(self.directory, f"window_{window:05d}{suffix}")
+
+    def windows(self) -> list[int]:
+        return sorted(int(name[7:12]) for name in os.listdir(self.directory) if name.endswith(".json"))
+
+    def truncate(self, run_step: int) -> None:
+        """Drop the windows evaluated after a checkpoint taken at `run_step`."""
+        for window in self.windows():
+            if window >= run_step:
+                for suffix in (".json", "_user_id.npy", "_score.npy"):
+                    if os.path.exists(self._path(window, suffix)):
+                        os.remove(self._path(window, suffix))
+
+    def spill(self, evaluator: EvaluatorPipeline, window: int) -> None:
+        """Write the metrics accumulated since the last spill and remove them from the evaluator."""
+        entries, user_ids, scores = [], [], []
+        offset = 0
+        for algorithm, metrics in evaluator._acc.acc.items():
+            for metric in metrics.values():
+                micro = metric.micro_result
+                users = np.asarray(micro["user_id"], dtype=np.int64)
+                user_scores = np.asarray(micro["score"], dtype=np.float64)
+                score = metric.macro_result
+                entries.append(
+                    {
+                        "algorithm": algorithm,
+                        "metric": metric.name,
+                        "timestamp": f"t={metric.timestamp_limit}",
+                        "score": None if score is None else float(score),
+                        "num_user": int(metric.num_users),
+                        "start": offset,
+                        "end": offset + len(users),
+                    }
+                )
+                offset += len(users)
+                user_ids.append(users)
+                scores.append(user_scores)
+        if not entries:
+            return
+
+        # Arrays first, so that an index file always has its arrays
+        np.save(self._path(window, "_user_id.npy"), np.concatenate(user_ids))
+        np.save(self._path(window, "_score.npy"), np.concatenate(scores))
+        tmp_path = self._path(window, ".json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self._path(window, ".json"))
+        evaluator._acc.acc.clear()
+
+    def _entries(self, window: int) -> list[dict]:
+        with open(self._path(window, ".json")) as f:
+            return json.load(f)
+
+    def _arrays(self, window: int) -> tuple[np.ndarray, np.ndarray]:
+        return (
+            np.load(self._path(window, "_user_id.npy"), mmap_mode="r"),
+            np.load(self._path(window, "_score.npy"), mmap_mode="r"),
+        )
+
+    def window_results(self) -> pd.DataFrame:
+        """Window level results, in the layout of EvaluatorPipeline.metric_results("window")."""
+        rows = [
+            {
+                "algorithm": entry["algorithm"],
+                "timestamp": entry["timestamp"],
+                "metric": entry["metric"],
+                "window_score": np.nan if entry["score"] is None else entry["score"],
+                "num_user": entry["num_user"],
+            }
+            for window in self.windows()
+            for entry in self._entries(window)
+        ]
+        return pd.DataFrame(rows, columns=["algorithm", "timestamp", "metric", "window_score", "num_user"])
+
+    def macro_results(self) -> pd.DataFrame:
+        """Mean of the window scores per algorithm and metric, skipping windows without a score."""
+        window_df = self.window_results().dropna(subset=["window_score"])
+        grouped = window_df.groupby(["algorithm", "metric"])["window_score"]
+        result = grouped.mean().to_frame("macro_score")
+        result["num_window"] = grouped.count()
+        return result.reset_index()
+
+    def micro_results(self) -> pd.DataFrame:
+        """Mean of all user scores per algorithm and metric, accumulated window by window."""
+        totals: dict[tuple[str, str], list[float]] = {}
+        for window in self.windows():
+            _, scores = self._arrays(window)
+            for entry in self._entries(window):
+                user_scores = scores[entry["start"] : entry["end"]]
+                user_scores = user_scores[~np.isnan(user_scores)]
+                total = totals.setdefault((entry["algorithm"], entry["metric"]), [0.0, 0])
+                total[0] += float(user_scores.sum())
+                total[1] += len(user_scores)
+        rows = [
+            {
+                "algorithm": algorithm,
+                "metric": metric,
+                "micro_score": score_sum / count if count else np.nan,
+                "num_user": count,
+            }
+            for (algorithm, metric), (score_sum, count) in totals.items()
+        ]
+        return pd.DataFrame(rows, columns=["algorithm", "metric", "micro_score", "num_user"])
+
+    def iter_user_results(self) -> Iterator[pd.DataFrame]:
+        """User level results, one DataFrame per window."""
+        for window in self.windows():
+            user_ids, scores = self._arrays(window)
+            frames = [
+                pd.DataFrame(
+                    {
+                        "algorithm": entry["algorithm"],
+                        "timestamp": entry["timestamp"],
+                        "metric": entry["metric"],
+                        "user_id": user_ids[entry["start"] : entry["end"]],
+                        "user_score": scores[entry["start"] : entry["end"]],
+                    }
+                )
+                for entry in self._entries(window)
+            ]
+            if frames:
+                yield pd.concat(frames, ignore_index=True)
+
@@ -0,0 +1,170 @@
+"""
+Parameter sweeps.
+
+A sweep grid is expanded into one child StreamJob per (window_size, top_k)
+pair, since those determine the data split. Every combination of algorithm
+parameters becomes a StreamAlgorithm of each child, so a child loads and
+splits its dataset once for all of them. Children are queued separately and
+run in parallel on the evaluation workers.
+"""
+
+import itertools
+import json
+from datetime import datetime
+
+import streamsight.utils
+from sqlalchemy.orm import Session
+
+from streamsight_studio_backend.db.schema import (
+    MacroEvaluationResult,
+    MicroEvaluationResult,
+    ParameterSweep,
+    StreamAlgorithm,
+    StreamJob,
+)
+from streamsight_studio_backend.schemas.stream import CreateSweepRequest, SweepAlgorithm
+from streamsight_studio_backend.services.job_status import JobStatus
+
+
+def expand_params(params: dict) -> list[dict]:
+    """Cartesian product of a parameter grid. Non-list values are kept fixed."""
+    names = sorted(params)
+    values = [params[name] if isinstance(params[name], list) else [params[name]] for name in names]
+    return [dict(zip(names, combination)) for combination in itertools.product(*values)]
+
+
+def expand_algorithms(algorithms: list[SweepAlgorithm]) -> list[tuple[str, dict]]:
+    """Every (algorithm name, parameters) combination of the grid, without duplicates."""
+    expanded = []
+    seen = set()
+    for algorithm in algorithms:
+        for params in expand_params(algorithm.params):
+            key = (algorithm.name, json.dumps(params, sort_keys=True))
+            if key not in seen:
+                seen.add(key)
+                expanded.append((algorithm.name, params))
+    return expanded
+
+
+def count_configurations(request: CreateSweepRequest) -> int:
+    """Number of evaluated configurations, i.e. child jobs times algorithm combinations."""
+    settings = len(set(request.window_size)) * len(set(request.top_k))
+    return settings * len(expand_algorithms(request.algorithms))
+
+
+def child_job_name(sweep_name: str, window_size: int, top_k: int) -> str:
+    return f"{sweep_name} [window_size={window_size}, top_k={top_k}]"
+
+
+def create_sweep_jobs(
+    db: Session,
+    request: CreateSweepRequest,
+    user_id: int,
+    timestamp_split_start: datetime,
+    preprocessing: str | None = None,
+) -> ParameterSweep:
+    """Create a sweep and its child jobs with their algorithms. The caller commits and queues the children.
+
+    `preprocessing` is the JSON preprocessing spec shared by the children.
+    """
+    sweep = ParameterSweep(
+        name=request.name,
+        description=request.description,
+        dataset=request.dataset,
+        grid=request.model_dump_json(),
+        user_id=user_id,
+    )
+    db.add(sweep)
+    db.flush()
+
+    algorithms = expand_algorithms(request.algorithms)
+    for window_size, top_k in itertools.product(sorted(set(request.window_size)), sorted(set(request.top_k))):
+        stream_job = StreamJob(
+            name=child_job_name(request.name, window_size, top_k),
+            description=request.description,
+            dataset=request.dataset,
+            top_k=top_k,
+            metrics=request.metrics,
+            timestamp_split_start=timestamp_split_start,
+            window_size=window_size,
+            preprocessing=preprocessing,
+            user_id=user_id,
+            sweep_id=sweep.id,
+            status=JobStatus.READY,  # created with its algorithms
+        )
+        for name, params in algorithms:
+            stream_job.stream_algorithms.append(
+                StreamAlgorithm(
+                    algorithm_name=name,
+                    parameters=json.dumps(params),
+                    algorithm_uuid=streamsight.utils.generate_algorithm_uuid(name),
+                )
+            )
+        db.add(stream_job)
+    db.flush()
+    return sweep
+
+
+def get_sweep_results(db: Session, sweep: ParameterSweep, sort_by: str | None = None) -> dict:
+    """One row per evaluated configuration with its macro and micro scores.
+
+    With `sort_by` set to a metric name, rows are ordered by that metric's
+    macro score, best first, with configurations lacking it last.
+    """
+    jobs = {job.id: job for job in sweep.stream_jobs}
+    algorithms = (
+        db.query(StreamAlgorithm)
+        .filter(StreamAlgorithm.stream_job_id.in_(jobs))
+        .order_by(StreamAlgorithm.stream_job_id, StreamAlgorithm.id)
+        .all()
+    )
+    macro = (
+        db.query(MacroEvaluationResult.stream_algorithm_id, MacroEvaluationResult.metric, MacroEvaluationResult.macro_score)
+        .filter(MacroEvaluationResult.stream_job_id.in_(jobs))
+        .all()
+    )
+    micro = (
+        db.query(MicroEvaluationResult.stream_algorithm_id, MicroEvaluationResult.metric, MicroEvaluationResult.micro_score)
+        .filter(MicroEvaluationResult.stream_job_id.in_(jobs))
+        .all()
+    )
+    macro_scores: dict[int, dict[str, float]] = {}
+    for algorithm_id, metric, score in macro:
+        macro_scores.setdefault(algorithm_id, {})[metric] = score
+    micro_scores: dict[int, dict[str, float]] = {}
+    for algorithm_id, metric, score in micro:
+        micro_scores.setdefault(algorithm_id, {})[metric] = score
+
+    rows = []
+    parameters = set()
+    metrics = set()
+    for sa in algorithms:
+        job = jobs[sa.stream_job_id]
+        params = json.loads(sa.parameters) if sa.parameters else {}
+        parameters.update(params)
+        metrics.update(macro_scores.get(sa.id, {}))
+        rows.append(
+            {
+                "stream_job_id": job.id,
+                "stream_algorithm_id": sa.id,
+                "status": job.status,
+                "window_size": job.window_size,
+                "top_k": job.top_k,
+                "algorithm": sa.algorithm_name,
+                "params": params,
+                "macro": macro_scores.get(sa.id, {}),
+                "micro": micro_scores.get(sa.id, {}),
+            }
+        )
+
+    if sort_by:
+        rows.sort(key=lambda row: (sort_by not in row["macro"], -row["macro"].get(sort_by, 0.0)))
+
+    return {
+        "sweep_id": sweep.id,
+        "name": sweep.name,
+        "dataset": sweep.dataset,
+        "parameters": sorted(parameters),
+        "metrics": sorted(metrics),
+        "rows": rows,
+    }
@@ -0,0 +1,216 @@
+"""In-process metrics rendered in the Prometheus text format on `/metrics`."""
+
+import threading
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+JOB_DURATION_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0, 7200.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: tuple[str, ...]) -> tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labels}")
+        return labels
+
+    def samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        callback: Callable[[], dict[tuple[str, ...], float]] | None = None,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._callback = callback
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self) -> list[str]:
+        if self._callback is not None:
+            try:
+                values = self._callback()
+            except Exception:
+                values = {}
+            with self._lock:
+                self._values = dict(values)
+        return super().samples()
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., +Inf count], sum
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = ([0] * (len(self.buckets) + 1), [0.0])
+                self._values[key] = entry
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = [(k, (list(counts), total[0])) for k, (counts, total) in self._values.items()]
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+def _db_pool_status() -> dict[tuple[str, ...], float]:
+    # Imported lazily so that importing telemetry never creates the engine
+    from streamsight_studio_backend.db.connection import get_database_manager
+
+    return {(key,): value for key, value in get_database_manager().pool_status().items()}
+
+
+def _evaluation_queue_depth() -> dict[tuple[str, ...], float]:
+    from streamsight_studio_backend.db.connection import get_database_manager
+    from streamsight_studio_backend.services.queue import queue_depth
+
+    db = get_database_manager().get_session()
+    try:
+        return {(): queue_depth(db)["waiting"]}
+    finally:
+        db.close()
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(
+    Counter("http_requests_total", "Total HTTP requests handled.", ("method", "route", "status"))
+)
+HTTP_REQUEST_DURATION = REGISTRY.register(
+    Histogram("http_request_duration_seconds", "HTTP request latency until the response is sent.", ("method", "route"))
+)
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.register(
+    Gauge("http_requests_in_flight", "HTTP requests currently being served.")
+)
+DB_POOL = REGISTRY.register(
+    Gauge("db_pool_connections", "Database connection pool usage by state.", ("state",), callback=_db_pool_status)
+)
+EVALUATION_JOBS_QUEUED = REGISTRY.register(
+    Gauge(
+        "evaluation_jobs_queued",
+        "Evaluation jobs waiting in the queue for a worker.",
+        callback=_evaluation_queue_depth,
+    )
+)
+EVALUATION_JOBS_RUNNING = REGISTRY.register(
+    Gauge("evaluation_jobs_running", "Evaluation jobs currently executing in this process.")
+)
+EVALUATION_JOB_DURATION = REGISTRY.register(
+    Histogram(
+        "evaluation_job_duration_seconds",
+        "Wall time of evaluation jobs by dataset and outcome.",
+        ("dataset", "outcome"),
+        buckets=JOB_DURATION_BUCKETS,
+    )
+)
+EVALUATION_ROWS_PERSISTED = REGISTRY.register(
+    Counter("evaluation_result_rows_persisted_total", "Evaluation result rows written by level.", ("level",))
+)
+
+
+def render_metrics() -> str:
+    """Render every registered metric in the Prometheus text exposition format."""
+    return REGISTRY.render()
@@ -0,0 +1,208 @@
+"""
+Window-parallel evaluation of algorithms without state across windows.
+
+An incremental algorithm has to see the windows in order, since its model
+after a window depends on every earlier fit. An algorithm whose `fit`
+replaces the model with one built from the given data only (e.g. ItemKNN,
+ItemKNNRolling, RecentPopularity) has the same model at window i whether or
+not it saw windows 0..i-1: the one fit on the data released just before
+window i. Each window of such an algorithm is an independent task of
+fit, predict and score, and the tasks are run on a process pool.
+
+The evaluator still walks the windows in order to track the known user/item
+base that masks the data, which is cheap compared to fitting and predicting.
+Scores are merged into the evaluator's metric accumulator in window order, so
+the results are the same as those of a sequential run.
+"""
+
+import logging as logger
+import multiprocessing as mp
+from collections.abc import Callable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from types import SimpleNamespace
+
+from scipy.sparse import csr_matrix
+from streamsight.evaluators import EvaluatorPipeline
+from streamsight.evaluators.accumulator import MetricAccumulator
+from streamsight.evaluators.base import EvaluatorBase
+from streamsight.matrix import PredictionMatrix
+from streamsight.metrics import Metric
+from streamsight.registries import METRIC_REGISTRY
+
+from streamsight_studio_backend.services.profiling import AlgorithmProfiler, AlgorithmWindowTiming, measure
+
+
+logger = logger.getLogger(__name__)
+
+# Algorithms whose fit builds the model from the given data alone
+STATELESS_ALGORITHMS = frozenset({"ItemKNN", "ItemKNNRolling", "RecentPopularity"})
+
+# Algorithm parameter that marks an algorithm as stateless (true) or not (false)
+STATELESS_PARAM = "stateless"
+
+# Tasks submitted per pool process, bounding the window data waiting in memory
+_TASKS_PER_PROCESS = 2
+
+
+def is_stateless(algorithm_name: str, params: dict) -> bool:
+    """Whether the windows of an algorithm can be evaluated independently.
+
+    Removes the stateless flag from `params`, so that they can be passed to
+    the algorithm. An explicit flag wins over the known algorithms.
+    """
+    flag = params.pop(STATELESS_PARAM, None)
+    if flag is not None:
+        return bool(flag)
+    return algorithm_name in STATELESS_ALGORITHMS
+
+
+def _iter_window_inputs(
+    evaluator: EvaluatorPipeline,
+) -> Iterator[tuple[int, int, PredictionMatrix, PredictionMatrix, csr_matrix]]:
+    """Yield (window, timestamp, training data, unlabeled data, ground truth) of every window.
+
+    Mirrors EvaluatorPipeline.run() without fitting or predicting: the known
+    user/item base is updated exactly as in a sequential run, so every window
+    is masked the same way. The training data of a window is the background
+    data for the first window and the data released before it otherwise.
+    """
+    background_data = evaluator.setting.background_data
+    evaluator.user_item_base.update_known_user_item_base(background_data)
+    training_data = PredictionMatrix.from_interaction_matrix(background_data)
+    training_data.mask_user_item_shape(evaluator.user_item_base.known_shape)
+    evaluator.setting.restore()
+
+    num_split = evaluator.setting.num_split
+    while evaluator._run_step < num_split:
+        window = evaluator._run_step
+        unlabeled_data, ground_truth_data, current_timestamp = evaluator._get_evaluation_data()
+        yield window, current_timestamp, training_data, unlabeled_data, ground_truth_data.item_interaction_sequence_matrix
+
+        if evaluator._run_step < num_split:
+            incremental_data = evaluator.setting.get_split_at(evaluator._run_step).incremental
+            evaluator.user_item_base.reset_unknown_user_item_base()
+            evaluator.user_item_base.update_known_user_item_base(incremental_data)
+            training_data = PredictionMatrix.from_interaction_matrix(incremental_data)
+            training_data.mask_user_item_shape(evaluator.user_item_base.known_shape)
+
+
+def _evaluate_window(
+    algorithm_cls: type,
+    params: dict,
+    training_data: PredictionMatrix,
+    unlabeled_data: PredictionMatrix,
+    X_true: csr_matrix,
+    timestamp: int,
+    metric_entries: list[tuple[str, int]],
+    ignore_unknown: tuple[bool, bool],
+) -> tuple[list[Metric], tuple[float, float, int]]:
+    """Fit, predict and score one window of one algorithm. Runs in a pool process.
+
+    Returns the scores, and the fit time, predict time and peak memory delta.
+    """
+    algorithm = algorithm_cls(**params)
+    _, fit_time, fit_memory = measure(algorithm.fit, training_data)
+    X_pred, predict_time, predict_memory = measure(algorithm.predict, unlabeled_data)
+    # The shape handler only reads the evaluator's ignore_unknown_* flags
+    flags = SimpleNamespace(ignore_unknown_user=ignore_unknown[0], ignore_unknown_item=ignore_unknown[1])
+    X_pred = EvaluatorBase._prediction_shape_handler(flags, X_true, X_pred)
+
+    metrics = []
+    for name, K in metric_entries:
+        metric = METRIC_REGISTRY.get(name)(K=K, timestamp_limit=timestamp)
+        metric.calculate(X_true, X_pred)
+        metrics.append(metric)
+    return metrics, (fit_time, predict_time, max(fit_memory, predict_memory))
+
+
+def run_windows_parallel(
+    evaluator: EvaluatorPipeline,
+    processes: int,
+    check: Callable[[], None],
+    profiler: AlgorithmProfiler | None = None,
+) -> None:
+    """Evaluate every window of the evaluator's algorithms on a process pool.
+
+    `check` is called whenever a task completes; if it raises, pending tasks
+    are cancelled. The scores end up in the evaluator's accumulator as after
+    EvaluatorPipeline.run(), and the fit and predict measurements of every
+    window in `profiler`.
+    """
+    evaluator._acc = MetricAccumulator()
+    algorithms = [
+        (
+            evaluator.algo_state_mgr.get_algorithm_identifier(algo_state.algorithm_uuid),
+            type(algo_state.algo_ptr),
+            algo_state.params or {},
+            str(algo_state.algorithm_uuid),
+        )
+        for algo_state in evaluator.algo_state_mgr.values()
+    ]
+    metric_entries = [(entry.name, entry.K) for entry in evaluator.metric_entries]
+    ignore_unknown = (evaluator.ignore_unknown_user, evaluator.ignore_unknown_item)
+
+    # Keyed by (window, index of the algorithm)
+    results: dict[tuple[int, int], tuple[list[Metric], tuple[float, float, int]]] = {}
+    # Per window: timestamp, training and unlabeled interactions
+    window_inputs: dict[int, tuple[int, int, int]] = {}
+    pending: dict[Future, tuple[int, int]] = {}
+    max_pending = processes * _TASKS_PER_PROCESS
+
+    def collect() -> None:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            results[pending.pop(future)] = future.result()
+        check()
+
+    # Spawned processes, forking a process with running threads is unsafe
+    with ProcessPoolExecutor(max_workers=processes, mp_context=mp.get_context("spawn")) as pool:
+        try:
+            for window, timestamp, training_data, unlabeled_data, X_true in _iter_window_inputs(evaluator):
+                window_inputs[window] = (timestamp, training_data.num_interactions, unlabeled_data.num_interactions)
+                for index, (_, algorithm_cls, params, _) in enumerate(algorithms):
+                    while len(pending) >= max_pending:
+                        collect()
+                    future = pool.submit(
+                        _evaluate_window,
+                        algorithm_cls,
+                        params,
+                        training_data,
+                        unlabeled_data,
+                        X_true,
+                        timestamp,
+                        metric_entries,
+                        ignore_unknown,
+                    )
+                    pending[future] = (window, index)
+            while pending:
+                collect()
+        except BaseException:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    for window, index in sorted(results):
+        metrics, (fit_time, predict_time, memory_delta) = results[(window, index)]
+        for metric in metrics:
+            evaluator._acc.add(metric=metric, algorithm_name=algorithms[index][0])
+        if profiler is not None:
+            timestamp, fit_interactions, predict_interactions = window_inputs[window]
+            profiler.record(
+                AlgorithmWindowTiming(
+                    algorithm_uuid=algorithms[index][3],
+                    window=window,
+                    timestamp=f"t={timestamp}",
+                    fit_time=fit_time,
+                    fit_interactions=fit_interactions,
+                    predict_time=predict_time,
+                    predict_interactions=predict_interactions,
+                    peak_memory_delta=memory_delta,
+                )
+            )
+    logger.info(f"Evaluated {len(results)} windows of {len(algorithms)} algorithms on {processes} processes")
+
+
+def merge_accumulators(evaluator: EvaluatorPipeline, other: EvaluatorPipeline) -> None:
+    """Add the scores of another evaluator over the same windows to an evaluator."""
+    for algorithm_name, metrics in other._acc.acc.items():
+        for metric in metrics.values():
+            evaluator._acc.add(metric=metric, algorithm_name=algorithm_name)
@@ -0,0 +1,164 @@
+import logging as logger
+import os
+import socket
+import threading
+import uuid
+
+from streamsight_studio_backend.config.setting import get_settings
+from streamsight_studio_backend.db.connection import get_database_manager
+from streamsight_studio_backend.services.admission import worker_thread
+from streamsight_studio_backend.services.cancellation import CancellationToken
+from streamsight_studio_backend.services.evaluator import run_evaluation
+from streamsight_studio_backend.services.queue import (
+    ClaimedJob,
+    ClaimState,
+    claim_next_job,
+    finish_job,
+    heartbeat,
+    requeue_stale_jobs,
+)
+from streamsight_studio_backend.services.scheduler import SchedulingPolicy
+
+
+logger = logger.getLogger(__name__)
+
+
+def default_worker_id() -> str:
+    """Identifier unique to this process: host, pid and a random suffix."""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class EvaluationWorker:
+    """Claims queued stream jobs and evaluates them one at a time."""
+
+    def __init__(self, worker_id: str | None = None) -> None:
+        settings = get_settings()
+        self.worker_id = worker_id or default_worker_id()
+        self.poll_interval = settings.WORKER_POLL_INTERVAL
+        self.heartbeat_interval = settings.WORKER_HEARTBEAT_INTERVAL
+        self.heartbeat_timeout = settings.WORKER_HEARTBEAT_TIMEOUT
+        self.max_attempts = settings.WORKER_MAX_ATTEMPTS
+        self.policy = SchedulingPolicy.from_settings()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """Run the worker loop in a daemon thread."""
+        self._thread = threading.Thread(target=self.run, name=f"worker-{self.worker_id}", daemon=True)
+        self._thread.start()
+
+    def request_stop(self) -> None:
+        """Stop claiming new jobs without waiting for the job in progress."""
+        self._stop.set()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop claiming new jobs; the job in progress is allowed to finish within `timeout`."""
+        self._stop.set()
+        self.join(timeout)
+
+    def join(self, timeout: float | None = None) -> bool:
+        """Wait for the worker loop to exit. Returns True once it has."""
+        if self._thread is None:
+            return True
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def run(self) -> None:
+        logger.info(f"Evaluation worker {self.worker_id} started")
+        while not self._stop.is_set():
+            try:
+                self._reap()
+                job = self._claim()
+            except Exception as e:
+                logger.error(f"Worker {self.worker_id} could not poll the queue: {e}")
+                job = None
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            self._process(job)
+        logger.info(f"Evaluation worker {self.worker_id} stopped")
+
+    def _claim(self) -> ClaimedJob | None:
+        db = get_database_manager().get_session()
+        try:
+            return claim_next_job(db, self.worker_id, self.policy)
+        finally:
+            db.close()
+
+    def _reap(self) -> None:
+        db = get_database_manager().get_session()
+        try:
+            requeue_stale_jobs(db, self.heartbeat_timeout, self.max_attempts)
+        finally:
+            db.close()
+
+    def _process(self, job: ClaimedJob) -> None:
+        done = threading.Event()
+        token = CancellationToken()
+        beat = threading.Thread(
+            target=self._heartbeat, args=(job, done, token), name=f"heartbeat-{job.entry_id}", daemon=True
+        )
+        beat.start()
+        try:
+            # Waiting for memory admission holds this worker, never a request thread
+            with worker_thread():
+                run_evaluation(
+                    job.stream_job_id,
+                    resume=job.resume,
+                    partial=job.partial,
+                    live=job.live,
+                    add_metrics=job.add_metrics,
+                    token=token,
+                )
+        except Exception as e:
+            logger.error(f"Worker {self.worker_id} failed on stream job {job.stream_job_id}: {e}")
+        finally:
+            done.set()
+            beat.join()
+            db = get_database_manager().get_session()
+            try:
+                finish_job(db, job.entry_id, self.worker_id)
+            except Exception as e:
+                logger.error(f"Worker {self.worker_id} could not remove stream job {job.stream_job_id} from the queue: {e}")
+            finally:
+                db.close()
+
+    def _heartbeat(self, job: ClaimedJob, done: threading.Event, token: CancellationToken) -> None:
+        while not done.wait(self.heartbeat_interval):
+            db = get_database_manager().get_session()
+            try:
+                state = heartbeat(db, job.entry_id, self.worker_id)
+                if state == ClaimState.CANCEL_REQUESTED and not token.cancelled:
+                    logger.info(f"Cancellation requested for stream job {job.stream_job_id}")
+                    token.cancel()
+                elif state == ClaimState.LOST:
+                    # Re-queued elsewhere or deleted; stop rather than race another worker
+                    logger.warning(
+                        f"Worker {self.worker_id} lost its claim on stream job {job.stream_job_id}, stopping it"
+                    )
+                    token.cancel(abandon=True)
+                    return
+            except Exception as e:
+                logger.error(f"Worker {self.worker_id} heartbeat failed: {e}")
+            finally:
+                db.close()
+
+
+_embedded_workers: list[EvaluationWorker] = []
+
+
+def start_embedded_workers(count: int) -> None:
+    """Start evaluation workers inside the API process."""
+    for _ in range(count):
+        worker = EvaluationWorker()
+        worker.start()
+        _embedded_workers.append(worker)
+
+
+def stop_embedded_workers(timeout: float | None = None) -> None:
+    """Signal embedded workers to stop and wait for them up to `timeout` seconds each."""
+    for worker in _embedded_workers:
+        worker.request_stop()
+    for worker in _embedded_workers:
+        worker.stop(timeout)
+    _embedded_workers.clear()
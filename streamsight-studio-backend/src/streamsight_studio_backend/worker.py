@@ -0,0 +1,50 @@
+import argparse
+import logging as logger
+import signal
+import threading
+
+from streamsight_studio_backend.config import setup_logging
+from streamsight_studio_backend.db.connection import create_tables
+from streamsight_studio_backend.services.worker import EvaluationWorker, default_worker_id
+
+
+logger = logger.getLogger(__name__)
+
+
+def main() -> None:
+    """Start evaluation workers that pull stream jobs from the database queue."""
+    parser = argparse.ArgumentParser(description="Streamsight evaluation worker")
+    parser.add_argument("--concurrency", type=int, default=1, help="jobs evaluated in parallel by this process")
+    parser.add_argument("--worker-id", default=None, help="identifier recorded on claimed jobs")
+    args = parser.parse_args()
+
+    setup_logging()
+    create_tables()
+
+    base_id = args.worker_id or default_worker_id()
+    workers = [EvaluationWorker(f"{base_id}-{i}" if args.concurrency > 1 else base_id) for i in range(args.concurrency)]
+
+    stopping = threading.Event()
+
+    def shutdown(signum: int, frame: object) -> None:
+        # First signal: finish the jobs in progress; second signal: exit now
+        if stopping.is_set():
+            raise SystemExit(1)
+        logger.info("Shutting down after the jobs in progress, signal again to exit immediately")
+        stopping.set()
+        for worker in workers:
+            worker.request_stop()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        # Join in short slices so the main thread keeps handling signals
+        while not worker.join(1.0):
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import itertools
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+from streamsight_studio_backend.db.connection import get_database_manager
+from streamsight_studio_backend.db.schema import Base, StreamJob, StreamUser
+
+
+# Tests using the db fixture run against this database, whose tables they drop and recreate
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    # The services open their sessions through the global database manager
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+
+@pytest.fixture(scope="session")
+def db_manager():
+    """Database manager on TEST_DATABASE_URL with freshly created tables."""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    manager = get_database_manager()
+    Base.metadata.drop_all(bind=manager.engine)
+    manager.create_tables()
+    return manager
+
+
+@pytest.fixture
+def db(db_manager):
+    """Session on the test database, whose tables are emptied after the test."""
+    session = db_manager.get_session()
+    yield session
+    session.close()
+    tables = ", ".join(table.name for table in Base.metadata.sorted_tables)
+    with db_manager.engine.begin() as connection:
+        connection.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+
+
+@pytest.fixture
+def make_user(db):
+    def make_user(username: str = "alice", share_weight: float = 1.0) -> StreamUser:
+        stream_user = StreamUser(username=username, password="secret", share_weight=share_weight)
+        db.add(stream_user)
+        db.commit()
+        return stream_user
+
+    return make_user
+
+
+@pytest.fixture
+def make_job(db):
+    names = itertools.count()
+
+    def make_job(stream_user: StreamUser, **values) -> StreamJob:
+        defaults = {
+            "name": f"job-{next(names)}",
+            "dataset": "movielens",
+            "top_k": 10,
+            "metrics": ["RecallK"],
+            "timestamp_split_start": datetime(2020, 1, 1),
+            "window_size": 86400,
+        }
+        stream_job = StreamJob(**defaults | values, user_id=stream_user.id)
+        db.add(stream_job)
+        db.commit()
+        return stream_job
+
+    return make_job
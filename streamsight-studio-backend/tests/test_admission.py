@@ -0,0 +1,124 @@
+import threading
+
+import pytest
+
+from streamsight_studio_backend.config.setting import get_settings
+from streamsight_studio_backend.services.admission import (
+    MIB,
+    AdmissionController,
+    AdmissionRejectedError,
+    MemoryBudgetExceededError,
+    estimate_job_memory,
+    estimate_num_windows,
+    worker_thread,
+)
+from streamsight_studio_backend.services.cancellation import CancellationToken, JobCancelledError
+from streamsight_studio_backend.services.dataset_stats import DatasetStats
+
+
+STATS = DatasetStats(num_interactions=100_000, num_users=1_000, num_items=500, min_timestamp=0, max_timestamp=1_000)
+
+
+@pytest.fixture
+def controller():
+    return AdmissionController(budget_bytes=100 * MIB, hard_limit_bytes=2**62, watchdog_interval=0.01)
+
+
+def _reserve_in_worker(controller, stream_job_id: int, estimate: int, admitted: list, **kwargs) -> threading.Thread:
+    """Reserve on a worker thread, which waits for admission, and record the admission."""
+
+    def run():
+        with worker_thread():
+            try:
+                with controller.reserve(stream_job_id, estimate, **kwargs):
+                    admitted.append(stream_job_id)
+            except JobCancelledError:
+                admitted.append(f"{stream_job_id} cancelled")
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def _wait_until_waiting(controller, count: int) -> None:
+    for _ in range(500):
+        with controller._cond:
+            if len(controller._waiting) == count:
+                return
+        threading.Event().wait(0.01)
+    raise AssertionError(f"{count} jobs did not start waiting")
+
+
+def test_estimate_grows_with_the_windows_unless_low_memory():
+    full = estimate_job_memory(STATS, 500, 100, 10, 2, [{"K": 10}])
+    more_windows = estimate_job_memory(STATS, 500, 10, 10, 2, [{"K": 10}])
+    low_memory = estimate_job_memory(STATS, 500, 10, 10, 2, [{"K": 10}], low_memory=True)
+
+    assert estimate_num_windows(STATS, 500, 100) == 6
+    assert more_windows > full
+    assert low_memory < more_windows
+    assert estimate_job_memory(None, 500, 100, 10, 2, []) == get_settings().EVALUATION_MEMORY_DEFAULT_JOB_MB * MIB
+
+
+def test_jobs_within_the_budget_run_together(controller):
+    with controller.reserve(1, 60 * MIB), controller.reserve(2, 40 * MIB):
+        assert controller.reserved_bytes == 100 * MIB
+
+    assert controller.reserved_bytes == 0
+
+
+def test_a_job_larger_than_the_budget_runs_alone(controller):
+    with controller.reserve(1, 500 * MIB):
+        with pytest.raises(AdmissionRejectedError):
+            with controller.reserve(2, 1 * MIB):
+                pass
+
+
+def test_requests_are_rejected_rather_than_waiting(controller):
+    with controller.reserve(1, 60 * MIB):
+        with pytest.raises(AdmissionRejectedError, match="needs 50 MiB, 60/100 MiB reserved"):
+            with controller.reserve(2, 50 * MIB):
+                pass
+        # The rejected job left the line
+        assert not controller._waiting
+
+
+def test_workers_wait_and_are_admitted_in_arrival_order(controller):
+    admitted = []
+    with controller.reserve(1, 60 * MIB):
+        large = _reserve_in_worker(controller, 2, 50 * MIB, admitted)
+        _wait_until_waiting(controller, 1)
+        # Fits next to job 1, but waits behind job 2
+        small = _reserve_in_worker(controller, 3, 10 * MIB, admitted)
+        _wait_until_waiting(controller, 2)
+        assert admitted == []
+
+    large.join(5)
+    small.join(5)
+    assert admitted == [2, 3]
+
+
+def test_a_job_cancelled_while_waiting_leaves_the_line(controller):
+    admitted, token = [], CancellationToken()
+    with controller.reserve(1, 90 * MIB):
+        thread = _reserve_in_worker(controller, 2, 50 * MIB, admitted, token=token)
+        _wait_until_waiting(controller, 1)
+        token.cancel()
+        thread.join(5)
+
+        assert admitted == ["2 cancelled"]
+        assert not controller._waiting
+
+
+def test_the_watchdog_flags_the_largest_job_above_the_hard_limit(controller):
+    controller.hard_limit_bytes = 0
+
+    with controller.reserve(1, 30 * MIB) as small, controller.reserve(2, 60 * MIB) as large:
+        for _ in range(500):
+            if large.exceeded:
+                break
+            threading.Event().wait(0.01)
+
+        with pytest.raises(MemoryBudgetExceededError, match="above the 0 MiB limit"):
+            large.check()
+        small.check()
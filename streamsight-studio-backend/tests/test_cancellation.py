@@ -0,0 +1,135 @@
+import importlib
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from streamsight_studio_backend.db.schema import MacroEvaluationResult, StreamAlgorithm, StreamJob
+from streamsight_studio_backend.services.auth import get_current_username
+from streamsight_studio_backend.services.cancellation import CancellationToken, JobCancelledError
+from streamsight_studio_backend.services.job_status import JobStatus
+from streamsight_studio_backend.services.queue import claim_next_job, enqueue_job, finish_job, get_queue_entry
+
+
+def _import(module: str):
+    """Import a module depending on streamsight's registries, which fail to import on some Python versions."""
+    try:
+        return importlib.import_module(module)
+    except Exception as e:
+        pytest.skip(f"{module} cannot be imported: {e}")
+
+
+@pytest.fixture
+def queued_job(db, make_user, make_job) -> int:
+    stream_job = make_job(make_user("alice"), status=JobStatus.RUNNING)
+    enqueue_job(db, stream_job.id)
+    db.commit()
+    return stream_job.id
+
+
+@pytest.fixture
+def client(db):
+    evaluator_router = _import("streamsight_studio_backend.router.evaluator_router")
+    app = FastAPI()
+    app.include_router(evaluator_router.create_evaluator_router())
+    app.dependency_overrides[get_current_username] = lambda: "alice"
+    return TestClient(app)
+
+
+def _status(db, stream_job_id: int) -> str:
+    db.expire_all()
+    return db.get(StreamJob, stream_job_id).status
+
+
+def test_token_check_raises_once_cancelled():
+    token = CancellationToken()
+    token.check()
+
+    token.cancel()
+
+    assert token.cancelled and not token.abandoned
+    with pytest.raises(JobCancelledError):
+        token.check()
+
+
+def test_abandoned_token_is_cancelled():
+    token = CancellationToken()
+
+    token.cancel(abandon=True)
+
+    assert token.cancelled and token.abandoned
+
+
+def test_cancel_removes_a_queued_job(db, client, queued_job):
+    response = client.post(f"/evaluator/{queued_job}/cancel")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == JobStatus.CANCELLED
+    assert get_queue_entry(db, queued_job) is None
+    assert _status(db, queued_job) == JobStatus.CANCELLED
+
+
+def test_cancel_flags_a_running_job_for_its_worker(db, client, queued_job):
+    claim_next_job(db, "worker")
+
+    response = client.post(f"/evaluator/{queued_job}/cancel")
+
+    assert response.json()["status"] == "cancelling"
+    db.expire_all()
+    assert get_queue_entry(db, queued_job).cancel_requested
+    # The worker records the cancellation when the job stops
+    assert _status(db, queued_job) == JobStatus.RUNNING
+
+
+def test_cancel_rejects_jobs_not_in_the_queue(db, client, queued_job):
+    claimed = claim_next_job(db, "worker")
+    finish_job(db, claimed.entry_id, "worker")
+
+    assert client.post(f"/evaluator/{queued_job}/cancel").status_code == 400
+    assert client.post(f"/evaluator/{queued_job + 1}/cancel").status_code == 404
+
+
+def test_a_cancelled_rerun_keeps_the_previous_results(db, client, make_user, make_job):
+    stream_job = make_job(make_user("alice"), status=JobStatus.COMPLETED)
+    stream_algorithm = StreamAlgorithm(stream_job_id=stream_job.id, algorithm_name="ItemKNN")
+    db.add(stream_algorithm)
+    db.flush()
+    db.add(
+        MacroEvaluationResult(
+            stream_job_id=stream_job.id,
+            stream_algorithm_id=stream_algorithm.id,
+            metric="RecallK",
+            macro_score=0.25,
+            num_window=2,
+        )
+    )
+    db.commit()
+
+    assert client.post(f"/evaluator/{stream_job.id}/rerun").status_code == 200
+    assert client.post(f"/evaluator/{stream_job.id}/cancel").json()["status"] == JobStatus.CANCELLED
+
+    assert db.query(MacroEvaluationResult).filter(MacroEvaluationResult.stream_job_id == stream_job.id).count() == 1
+
+
+@pytest.mark.parametrize("cancel_requested", [True, False])
+def test_worker_heartbeat_cancels_the_token(db, queued_job, cancel_requested):
+    worker = _import("streamsight_studio_backend.services.worker").EvaluationWorker("worker")
+    worker.heartbeat_interval = 0.05
+    claimed = claim_next_job(db, "worker")
+    done, token = threading.Event(), CancellationToken()
+    beat = threading.Thread(target=worker._heartbeat, args=(claimed, done, token))
+    beat.start()
+
+    if cancel_requested:
+        get_queue_entry(db, queued_job).cancel_requested = True
+        db.commit()
+    else:
+        # The claim was lost, e.g. re-queued to another worker
+        finish_job(db, claimed.entry_id, "worker")
+    token._event.wait(5)
+    done.set()
+    beat.join()
+
+    assert token.cancelled
+    assert token.abandoned is not cancel_requested
@@ -0,0 +1,83 @@
+import importlib
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from streamsight_studio_backend.config.setting import get_settings
+
+
+def _import(module: str):
+    """Import a module depending on streamsight's registries, which fail to import on some Python versions."""
+    try:
+        return importlib.import_module(module)
+    except Exception as e:
+        pytest.skip(f"{module} cannot be imported: {e}")
+
+
+class _Evaluator:
+    """The evaluator attributes a checkpoint saves and restores."""
+
+    def __init__(self, algorithm_uuids: list[str], run_step: int = 0) -> None:
+        self.algo_state_mgr = {uuid: SimpleNamespace(algorithm_uuid=uuid) for uuid in algorithm_uuids}
+        self.user_item_base = {"users": run_step}
+        self._acc = {"scores": [0.1] * run_step}
+        self._current_timestamp = 100 * run_step
+        self._run_step = run_step
+        self.setting = SimpleNamespace(num_split=5)
+        self.restored = False
+
+    def restore(self) -> None:
+        self.restored = True
+
+
+@pytest.fixture
+def checkpoint(tmp_path, monkeypatch):
+    monkeypatch.setattr(get_settings(), "get_datalake_config", lambda: {"base_path": str(tmp_path)})
+    return _import("streamsight_studio_backend.services.checkpoint")
+
+
+def test_a_checkpoint_restores_the_evaluator_at_its_window(checkpoint):
+    checkpoint.save_checkpoint(1, _Evaluator(["b", "a"], run_step=3), "0.1.0")
+
+    assert checkpoint.get_checkpoint_window(1) == 3
+    evaluator = _Evaluator(["a", "b"])
+    assert checkpoint.restore_checkpoint(evaluator, checkpoint.load_checkpoint(1), "0.1.0")
+    assert (evaluator._run_step, evaluator._current_timestamp, evaluator.user_item_base) == (3, 300, {"users": 3})
+    assert evaluator._acc == {"scores": [0.1] * 3}
+    assert evaluator.restored
+
+
+@pytest.mark.parametrize("algorithm_uuids, version", [(["a"], "0.1.0"), (["a", "b"], "0.2.0")])
+def test_a_checkpoint_of_other_algorithms_or_versions_is_not_restored(checkpoint, algorithm_uuids, version):
+    checkpoint.save_checkpoint(1, _Evaluator(["a", "b"], run_step=3), "0.1.0")
+    evaluator = _Evaluator(algorithm_uuids)
+
+    assert not checkpoint.restore_checkpoint(evaluator, checkpoint.load_checkpoint(1), version)
+    assert (evaluator._run_step, evaluator.restored) == (0, False)
+
+
+def test_unreadable_and_cleared_checkpoints_are_not_loaded(checkpoint):
+    assert checkpoint.load_checkpoint(1) is None
+    checkpoint.save_checkpoint(1, _Evaluator(["a"], run_step=2), "0.1.0")
+    with open(checkpoint._checkpoint_path(1), "wb") as f:
+        f.write(b"truncated")
+
+    assert checkpoint.load_checkpoint(1) is None
+    checkpoint.clear_checkpoint(1)
+    assert checkpoint.get_checkpoint_window(1) is None
+
+
+def test_clearing_live_states_keeps_the_latest_and_the_appended_interactions(checkpoint):
+    for window in (3, 5):
+        checkpoint.save_live_state(1, _Evaluator(["a"], run_step=window), "0.1.0", window, {"a": "f" * 64})
+    appended = os.path.join(checkpoint._live_dir(1), "appended.csv")
+    open(appended, "w").close()
+
+    checkpoint.clear_live_state(1, keep_window=5)
+
+    assert checkpoint.get_live_meta(1, 3) is None
+    assert checkpoint.get_live_meta(1, 5) == {"window": 5, "algorithms": {"a": "f" * 64}}
+    live_state = checkpoint.load_live_state(1, 5)
+    assert (live_state.run_step, live_state.state["window"]) == (0, 5)
+    assert os.path.exists(appended)
@@ -0,0 +1,103 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from streamsight_studio_backend.config.setting import get_settings
+from streamsight_studio_backend.db.schema import StreamAlgorithm, UserEvaluationResult
+from streamsight_studio_backend.services.compare import compare_algorithms, get_comparison, paired_tests
+
+
+def test_paired_tests_match_scipy_per_group():
+    rng = np.random.default_rng(0)
+    a = rng.random(70)
+    b = np.concatenate([a[:40] - 0.1 + rng.normal(0, 0.1, 40), a[40:] + rng.normal(0, 0.1, 30)])
+    codes = np.repeat([0, 1], [40, 30])
+
+    results = paired_tests(codes, a, b, num_samples=2000, confidence=0.95)
+
+    for group, (start, end) in enumerate([(0, 40), (40, 70)]):
+        a_group, b_group = a[start:end], b[start:end]
+        assert results["p_ttest"][group] == pytest.approx(stats.ttest_rel(a_group, b_group).pvalue)
+        wilcoxon = stats.wilcoxon(a_group, b_group, zero_method="wilcox", correction=False, method="approx")
+        assert results["p_wilcoxon"][group] == pytest.approx(wilcoxon.pvalue)
+        assert results["ci_lower"][group] < results["mean_diff"][group] < results["ci_upper"][group]
+    assert results["num_users"].tolist() == [40, 30]
+    # Only the first group has a real difference
+    assert results["p_bootstrap"][0] < 0.01 < results["p_bootstrap"][1]
+
+
+def test_identical_scores_show_no_difference():
+    a = np.array([0.1, 0.5, 0.5])
+
+    results = paired_tests(np.zeros(3, dtype=np.int64), a, a.copy(), num_samples=100, confidence=0.95)
+
+    assert (results["p_ttest"][0], results["p_wilcoxon"][0], results["p_bootstrap"][0]) == (1.0, 1.0, 1.0)
+    assert (results["ci_lower"][0], results["ci_upper"][0]) == (0.0, 0.0)
+
+
+def test_summaries_pool_every_window_of_a_metric():
+    paired = pd.DataFrame(
+        {
+            "metric": ["RecallK"] * 4,
+            "timestamp": ["t=20", "t=20", "t=100", "t=100"],
+            "user_id": [1, 2, 1, 2],
+            "score_a": [1.0, 0.5, 1.0, 0.0],
+            "score_b": [0.5, 0.5, 0.0, 0.0],
+        }
+    )
+
+    recall, precision = compare_algorithms(paired, ["RecallK", "PrecisionK"], num_samples=50, confidence=0.9)
+
+    assert (recall["num_users"], recall["mean_diff"]) == (4, 0.375)
+    assert [(window["timestamp"], window["mean_diff"]) for window in recall["windows"]] == [
+        ("t=20", 0.25),
+        ("t=100", 0.5),
+    ]
+    assert precision == {"metric": "PrecisionK", "num_users": 0, "windows": []}
+
+
+@pytest.fixture
+def algorithms(db, make_user, make_job, tmp_path, monkeypatch):
+    """Two algorithms of a completed job with user scores in two windows, one user scored by only one."""
+    monkeypatch.setattr(get_settings(), "get_datalake_config", lambda: {"base_path": str(tmp_path)})
+    stream_job = make_job(make_user(), completed_at=datetime(2020, 1, 1))
+    algorithm_a = StreamAlgorithm(stream_job_id=stream_job.id, algorithm_name="ItemKNN")
+    algorithm_b = StreamAlgorithm(stream_job_id=stream_job.id, algorithm_name="MostPopular")
+    db.add_all([algorithm_a, algorithm_b])
+    db.flush()
+    scores = {
+        algorithm_a: [("t=100", 1, 1.0), ("t=20", 1, 1.0), ("t=20", 2, 0.5), ("t=20", 3, 1.0)],
+        algorithm_b: [("t=100", 1, 0.0), ("t=20", 1, 0.5), ("t=20", 2, 0.5)],
+    }
+    db.add_all(
+        UserEvaluationResult(
+            stream_job_id=stream_job.id,
+            stream_algorithm_id=stream_algorithm.id,
+            metric="RecallK",
+            timestamp=timestamp,
+            user_id=user_id,
+            user_score=score,
+        )
+        for stream_algorithm, rows in scores.items()
+        for timestamp, user_id, score in rows
+    )
+    db.commit()
+    return stream_job, algorithm_a, algorithm_b
+
+
+def test_comparisons_pair_users_in_window_order_and_are_cached(db, algorithms):
+    stream_job, algorithm_a, algorithm_b = algorithms
+
+    summary = get_comparison(db, stream_job, algorithm_a, algorithm_b, ["RecallK"], 50, 0.9)
+
+    (recall,) = summary["metrics"]
+    assert [(window["timestamp"], window["num_users"]) for window in recall["windows"]] == [("t=20", 2), ("t=100", 1)]
+    db.query(UserEvaluationResult).delete()
+    db.commit()
+    assert get_comparison(db, stream_job, algorithm_a, algorithm_b, ["RecallK"], 50, 0.9) == summary
+    # Results of a rerun are compared again
+    stream_job.completed_at = datetime(2020, 1, 2)
+    assert get_comparison(db, stream_job, algorithm_a, algorithm_b, ["RecallK"], 50, 0.9)["metrics"][0]["windows"] == []
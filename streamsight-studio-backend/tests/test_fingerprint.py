@@ -0,0 +1,85 @@
+import json
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+from streamsight.matrix import InteractionMatrix
+
+from streamsight_studio_backend.db.schema import StreamAlgorithm, StreamJob
+from streamsight_studio_backend.services import dataset_stats
+from streamsight_studio_backend.services.dataset_stats import content_hash, get_dataset_stats, record_dataset_stats
+from streamsight_studio_backend.services.fingerprint import result_fingerprint
+
+
+def _stream_job(**values) -> StreamJob:
+    return StreamJob(
+        dataset="movielens",
+        timestamp_split_start=datetime(2020, 1, 1),
+        window_size=86400,
+        top_k=10,
+        metrics=["RecallK", "PrecisionK"],
+        **values,
+    )
+
+
+def _fingerprint(stream_job: StreamJob | None = None, parameters: dict | None = None, version: str = "v1") -> str:
+    stream_algorithm = StreamAlgorithm(algorithm_name="ItemKNN", parameters=json.dumps(parameters or {"K": 10}))
+    return result_fingerprint(stream_job or _stream_job(), stream_algorithm, version, "0.1.0")
+
+
+def _matrix(timestamps: list[int]) -> InteractionMatrix:
+    df = pd.DataFrame(
+        {
+            InteractionMatrix.INTERACTION_IX: np.arange(len(timestamps)),
+            InteractionMatrix.USER_IX: np.arange(len(timestamps)) % 3,
+            InteractionMatrix.ITEM_IX: np.arange(len(timestamps)) % 2,
+            InteractionMatrix.TIMESTAMP_IX: timestamps,
+        }
+    )
+    return InteractionMatrix(
+        df,
+        item_ix=InteractionMatrix.ITEM_IX,
+        user_ix=InteractionMatrix.USER_IX,
+        timestamp_ix=InteractionMatrix.TIMESTAMP_IX,
+        skip_df_processing=True,
+    )
+
+
+def test_fingerprint_ignores_the_order_of_parameters_and_metrics():
+    reordered = _stream_job()
+    reordered.metrics = ["PrecisionK", "RecallK"]
+
+    assert _fingerprint(parameters={"K": 10, "normalize": True}) == _fingerprint(
+        reordered, parameters={"normalize": True, "K": 10}
+    )
+
+
+@pytest.mark.parametrize(
+    "changed",
+    [
+        {"parameters": {"K": 20}},
+        {"version": "v2"},
+        {"stream_job": _stream_job(preprocessing='{"seed": 1}')},
+        {"stream_job": _stream_job(appended_version="abc")},
+    ],
+)
+def test_fingerprint_changes_with_what_the_results_depend_on(changed):
+    assert _fingerprint(**changed) != _fingerprint()
+
+
+def test_content_hash_follows_the_interactions():
+    assert content_hash(_matrix([1, 2, 3])) == content_hash(_matrix([1, 2, 3]))
+    assert content_hash(_matrix([1, 2, 3])) != content_hash(_matrix([1, 2, 4]))
+
+
+def test_stats_are_stale_once_the_dataset_files_change(tmp_path, monkeypatch):
+    source = "ratings.csv:100:1"
+    monkeypatch.setattr(dataset_stats, "_stats_path", lambda dataset_name: str(tmp_path / f"{dataset_name}.json"))
+    monkeypatch.setattr(dataset_stats, "dataset_source", lambda dataset_name: source)
+
+    recorded = record_dataset_stats("movielens", _matrix([1, 2, 3]))
+    assert get_dataset_stats("movielens") == recorded
+
+    source = "ratings.csv:120:2"
+    assert get_dataset_stats("movielens") is None
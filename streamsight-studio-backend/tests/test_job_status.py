@@ -0,0 +1,81 @@
+import threading
+import time
+
+import pytest
+from sqlalchemy import select
+
+from streamsight_studio_backend.db.schema import StreamJob, StreamJobStatusTransition
+from streamsight_studio_backend.services.job_status import TRANSITIONS, JobStatus, transition_job
+
+
+def _history(db) -> list[tuple[str, str, str | None]]:
+    transitions = db.scalars(select(StreamJobStatusTransition).order_by(StreamJobStatusTransition.id))
+    return [(transition.from_status, transition.to_status, transition.reason) for transition in transitions]
+
+
+def test_every_status_can_be_left_and_reached():
+    targets = set().union(*TRANSITIONS.values())
+    assert set(TRANSITIONS) == set(JobStatus)
+    assert targets == set(JobStatus)
+    assert all(status not in TRANSITIONS[status] for status in JobStatus)
+
+
+def test_applied_transition_updates_the_job_and_records_it(db, make_user, make_job):
+    stream_job = make_job(make_user(), status=JobStatus.READY)
+
+    assert transition_job(db, stream_job, JobStatus.RUNNING, reason="run", error_message="stale")
+    db.commit()
+
+    db.expire_all()
+    assert (stream_job.status, stream_job.error_message) == ("running", "stale")
+    assert _history(db) == [("ready", "running", "run")]
+
+
+def test_transition_not_applied_when_the_status_changed_meanwhile(db_manager, db, make_user, make_job):
+    stream_job = make_job(make_user(), status=JobStatus.READY)
+    with db_manager.get_session() as other:
+        assert transition_job(other, other.get(StreamJob, stream_job.id), JobStatus.RUNNING)
+        other.commit()
+
+    # The instance still reads ready, the database does not
+    assert not transition_job(db, stream_job, JobStatus.RUNNING)
+
+    assert stream_job.status == "ready"
+    db.commit()
+    assert _history(db) == [("ready", "running", None)]
+
+
+def test_of_two_racing_transitions_only_one_is_applied(db_manager, db, make_user, make_job):
+    stream_job = make_job(make_user(), status=JobStatus.READY)
+    results = []
+
+    def run_other():
+        with db_manager.get_session() as other:
+            results.append(transition_job(other, other.get(StreamJob, stream_job.id), JobStatus.RUNNING))
+            other.commit()
+
+    # The first transition holds the row lock until it commits, the second waits for it
+    assert transition_job(db, stream_job, JobStatus.RUNNING)
+    thread = threading.Thread(target=run_other)
+    thread.start()
+    time.sleep(0.2)
+    db.commit()
+    thread.join()
+
+    assert results == [False]
+    assert len(_history(db)) == 1
+
+
+def test_allowed_from_narrows_the_sources(db, make_user, make_job):
+    stream_job = make_job(make_user(), status=JobStatus.COMPLETED)
+
+    assert not transition_job(db, stream_job, JobStatus.RUNNING, allowed_from=[JobStatus.FAILED])
+    assert transition_job(db, stream_job, JobStatus.RUNNING, allowed_from=[JobStatus.COMPLETED])
+
+
+def test_allowed_from_outside_the_state_machine_is_rejected(db, make_user, make_job):
+    stream_job = make_job(make_user(), status=JobStatus.CREATED)
+
+    with pytest.raises(ValueError):
+        transition_job(db, stream_job, JobStatus.COMPLETED, allowed_from=[JobStatus.CREATED])
+    assert _history(db) == []
@@ -0,0 +1,88 @@
+import pytest
+
+from streamsight_studio_backend.db.schema import LeaderboardEntry, MacroEvaluationResult, StreamAlgorithm
+from streamsight_studio_backend.services.leaderboard import (
+    backfill_leaderboard,
+    get_leaderboard,
+    job_fingerprints,
+    refresh_leaderboard,
+)
+
+
+@pytest.fixture
+def add_algorithm(db):
+    def add_algorithm(stream_job, name: str, fingerprint: str | None, score: float) -> StreamAlgorithm:
+        stream_algorithm = StreamAlgorithm(
+            stream_job_id=stream_job.id, algorithm_name=name, result_fingerprint=fingerprint
+        )
+        db.add(stream_algorithm)
+        db.flush()
+        db.add(
+            MacroEvaluationResult(
+                stream_job_id=stream_job.id,
+                stream_algorithm_id=stream_algorithm.id,
+                metric="RecallK",
+                macro_score=score,
+                num_window=3,
+            )
+        )
+        db.commit()
+        return stream_algorithm
+
+    return add_algorithm
+
+
+def _ranking(db, **filters) -> list[tuple[str, float, int]]:
+    _, entries = get_leaderboard(db, "movielens", "RecallK", **filters)
+    return [(entry.algorithm_name, entry.macro_score, entry.num_jobs) for entry in entries]
+
+
+def test_configurations_are_ranked_once_per_fingerprint(db, make_user, make_job, add_algorithm):
+    alice = make_user()
+    first, second = make_job(alice), make_job(alice)
+    add_algorithm(first, "ItemKNN", "a" * 64, 0.3)
+    add_algorithm(second, "ItemKNN", "a" * 64, 0.3)
+    add_algorithm(first, "MostPopular", "b" * 64, 0.1)
+    add_algorithm(make_job(alice, preprocessing='{"min_user_interactions": 5}'), "EASE", "c" * 64, 0.9)
+    add_algorithm(make_job(alice, top_k=20), "EASE", "d" * 64, 0.5)
+    add_algorithm(second, "Random", None, 0.05)
+
+    refresh_leaderboard(db, ["a" * 64, "b" * 64, "c" * 64, "d" * 64, None])
+    db.commit()
+
+    # The preprocessed job is not ranked, the unfingerprinted algorithm has no entry
+    assert _ranking(db) == [("EASE", 0.5, 1), ("ItemKNN", 0.3, 2), ("MostPopular", 0.1, 1)]
+    assert _ranking(db, top_k=10) == [("ItemKNN", 0.3, 2), ("MostPopular", 0.1, 1)]
+    assert _ranking(db, top_k=10, limit=1, offset=1) == [("MostPopular", 0.1, 1)]
+    assert get_leaderboard(db, "movielens", "RecallK", top_k=10, limit=1)[0] == 2
+
+
+def test_entries_follow_cleared_fingerprints(db, make_user, make_job, add_algorithm):
+    alice = make_user()
+    first, second = make_job(alice), make_job(alice)
+    kept = add_algorithm(first, "ItemKNN", "a" * 64, 0.3)
+    add_algorithm(second, "ItemKNN", "a" * 64, 0.3)
+    refresh_leaderboard(db, job_fingerprints(first))
+    db.commit()
+
+    # A rerun of the first job clears its fingerprint until new results are saved
+    previous = job_fingerprints(first)
+    kept.result_fingerprint = None
+    refresh_leaderboard(db, previous | job_fingerprints(first))
+    db.commit()
+    assert _ranking(db) == [("ItemKNN", 0.3, 1)]
+
+    db.query(StreamAlgorithm).update({StreamAlgorithm.result_fingerprint: None})
+    refresh_leaderboard(db, previous)
+    db.commit()
+    assert _ranking(db) == []
+
+
+def test_backfill_only_fills_an_empty_leaderboard(db, make_user, make_job, add_algorithm):
+    stream_job = make_job(make_user())
+    add_algorithm(stream_job, "ItemKNN", "a" * 64, 0.3)
+
+    assert backfill_leaderboard(db) == 1
+    add_algorithm(stream_job, "MostPopular", "b" * 64, 0.1)
+    assert backfill_leaderboard(db) == 0
+    assert db.query(LeaderboardEntry).count() == 1
@@ -0,0 +1,139 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+from streamsight.matrix import InteractionMatrix
+from streamsight.settings import SlidingWindowSetting
+
+from streamsight_studio_backend.db.schema import StreamJob
+from streamsight_studio_backend.schemas.stream import AppendedInteraction
+from streamsight_studio_backend.services import live
+from streamsight_studio_backend.services.live import (
+    append_interactions,
+    complete_windows,
+    continuation_data,
+    next_window_start,
+    with_appended,
+)
+
+
+WINDOW_SIZE = 20
+SPLIT_START = 40
+
+
+@pytest.fixture
+def live_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(live, "_live_dir", lambda stream_job_id: str(tmp_path / str(stream_job_id)))
+    return tmp_path
+
+
+def _stream_job(live_window: int | None = 3) -> StreamJob:
+    return StreamJob(
+        id=1,
+        timestamp_split_start=datetime.fromtimestamp(SPLIT_START, timezone.utc),
+        window_size=WINDOW_SIZE,
+        live_window=live_window,
+        appended_interactions=0,
+    )
+
+
+def _dataset() -> InteractionMatrix:
+    timestamps = np.arange(0, 100, 5)
+    df = pd.DataFrame(
+        {
+            InteractionMatrix.INTERACTION_IX: np.arange(len(timestamps)),
+            InteractionMatrix.USER_IX: timestamps % 4,
+            InteractionMatrix.ITEM_IX: timestamps % 7,
+            InteractionMatrix.TIMESTAMP_IX: timestamps,
+        }
+    )
+    return InteractionMatrix(
+        df,
+        item_ix=InteractionMatrix.ITEM_IX,
+        user_ix=InteractionMatrix.USER_IX,
+        timestamp_ix=InteractionMatrix.TIMESTAMP_IX,
+        skip_df_processing=True,
+    )
+
+
+def _interactions(rows: list[tuple[int, int, int]]) -> list[AppendedInteraction]:
+    return [AppendedInteraction(user_id=user, item_id=item, timestamp=timestamp) for user, item, timestamp in rows]
+
+
+def _rows(data: InteractionMatrix) -> list[tuple[int, int, int]]:
+    columns = [InteractionMatrix.USER_IX, InteractionMatrix.ITEM_IX, InteractionMatrix.TIMESTAMP_IX]
+    return sorted(map(tuple, data._df[columns].to_numpy().tolist()))
+
+
+def test_next_window_start_follows_the_live_window():
+    assert next_window_start(_stream_job(live_window=3)) == SPLIT_START + 3 * WINDOW_SIZE
+    assert next_window_start(_stream_job(live_window=None)) is None
+
+
+def test_a_window_completes_once_an_interaction_reaches_its_end():
+    appended = pd.DataFrame({InteractionMatrix.TIMESTAMP_IX: [100, 119]})
+    assert complete_windows(appended, 100, WINDOW_SIZE) == 0
+
+    appended = pd.DataFrame({InteractionMatrix.TIMESTAMP_IX: [100, 120, 165]})
+    assert complete_windows(appended, 100, WINDOW_SIZE) == 3
+
+
+def test_append_rejects_interactions_before_the_next_window(live_dir):
+    stream_job = _stream_job()
+
+    with pytest.raises(ValueError):
+        append_interactions(stream_job, _interactions([(0, 0, 99)]), next_window_start(stream_job))
+    assert stream_job.appended_interactions == 0
+
+
+def test_appends_accumulate_and_change_the_version(live_dir):
+    stream_job = _stream_job()
+    start = next_window_start(stream_job)
+
+    append_interactions(stream_job, _interactions([(0, 0, 100)]), start)
+    first_version = stream_job.appended_version
+    appended = append_interactions(stream_job, _interactions([(5, 9, 130)]), start)
+
+    assert len(appended) == stream_job.appended_interactions == 2
+    assert stream_job.appended_version != first_version
+
+
+def test_with_appended_continues_interaction_ids_and_grows_the_shape(live_dir):
+    stream_job = _stream_job()
+    data = _dataset()
+    append_interactions(stream_job, _interactions([(9, 2, 110), (1, 12, 100)]), next_window_start(stream_job))
+
+    combined = with_appended(data, stream_job)
+
+    tail = combined._df.iloc[len(data._df) :]
+    assert tail[InteractionMatrix.INTERACTION_IX].tolist() == [20, 21]
+    # Appended interactions are ordered by time
+    assert tail[InteractionMatrix.TIMESTAMP_IX].tolist() == [100, 110]
+    assert combined.user_item_shape == (10, 13)
+
+
+def test_continuation_windows_match_a_full_run_over_the_appended_data(live_dir):
+    stream_job = _stream_job()
+    data = _dataset()
+    start = next_window_start(stream_job)
+    appended = append_interactions(
+        stream_job,
+        _interactions([(0, 1, 100), (1, 2, 105), (4, 1, 125), (2, 8, 150), (3, 3, 165)]),
+        start,
+    )
+    num_windows = complete_windows(appended, start, WINDOW_SIZE)
+
+    full = SlidingWindowSetting(background_t=SPLIT_START, window_size=WINDOW_SIZE)
+    full.split(with_appended(data, stream_job))
+    continuation = SlidingWindowSetting(background_t=start, window_size=WINDOW_SIZE)
+    continuation.split(continuation_data(appended, start, start + num_windows * WINDOW_SIZE, (4, 7)))
+
+    # The full run evaluated windows 0-2 before the live state; the open window waits
+    assert num_windows == continuation.num_split == 3
+    for window in range(continuation.num_split):
+        full_window = stream_job.live_window + window
+        assert _rows(continuation.ground_truth_data[window]) == _rows(full.ground_truth_data[full_window])
+        assert _rows(continuation.incremental_data[window]) == _rows(full.incremental_data[full_window])
+    # The last window of the full run, which the live state is fitted on, holds no appended interaction
+    assert all(timestamp < start for _, _, timestamp in _rows(full.incremental_data[stream_job.live_window - 1]))
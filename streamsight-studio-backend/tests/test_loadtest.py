@@ -0,0 +1,56 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+
+_spec = importlib.util.spec_from_file_location("loadtest", Path(__file__).parents[1] / "scripts" / "loadtest.py")
+loadtest = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(loadtest)
+
+
+def test_percentile_interpolates_between_samples():
+    values = [1.0, 2.0, 3.0, 4.0, 5.0]
+
+    assert loadtest.percentile(values, 0.5) == 3.0
+    assert loadtest.percentile(values, 0.95) == pytest.approx(4.8)
+    assert loadtest.percentile(values, 1.0) == 5.0
+    assert loadtest.percentile([], 0.95) == 0.0
+
+
+def test_summary_counts_errors_but_not_their_latency():
+    stats = {"GET /stream/list_all": loadtest.EndpointStats(latencies=[0.01, 0.02, 0.03], errors=1)}
+
+    summary = loadtest.summarize(stats, duration=2.0)["GET /stream/list_all"]
+
+    assert (summary["count"], summary["errors"], summary["throughput_rps"]) == (4, 1, 2.0)
+    assert summary["mean_ms"] == pytest.approx(20.0)
+    assert summary["p50_ms"] == pytest.approx(20.0)
+
+
+def _summary(p95_ms: float, throughput_rps: float = 10.0) -> dict[str, dict[str, float]]:
+    return {
+        "GET /stream/list_all": {
+            "p50_ms": 10.0,
+            "p95_ms": p95_ms,
+            "p99_ms": p95_ms,
+            "throughput_rps": throughput_rps,
+        }
+    }
+
+
+def test_slo_breaches_are_reported():
+    assert loadtest.find_violations(_summary(p95_ms=150.0), None, 0.2, slo_p95_ms=200.0) == []
+    assert loadtest.find_violations(_summary(p95_ms=250.0), None, 0.2, slo_p95_ms=200.0) == [
+        "GET /stream/list_all: p95 250.0ms exceeds SLO 200.0ms"
+    ]
+
+
+def test_regressions_beyond_the_tolerance_are_reported():
+    baseline = _summary(p95_ms=100.0)
+
+    assert loadtest.find_violations(_summary(p95_ms=115.0, throughput_rps=9.0), baseline, 0.2, None) == []
+    violations = loadtest.find_violations(_summary(p95_ms=130.0, throughput_rps=7.0), baseline, 0.2, None)
+    assert [violation.split(":")[1].split()[0] for violation in violations] == ["p95_ms", "p99_ms", "throughput"]
+    # Endpoints missing from the baseline are not compared
+    assert loadtest.find_violations({"GET /other": _summary(500.0)["GET /stream/list_all"]}, baseline, 0.2, None) == []
@@ -0,0 +1,135 @@
+import json
+import logging
+import queue
+import sys
+import threading
+from logging.handlers import QueueListener
+
+import pytest
+
+from streamsight_studio_backend.config.log import (
+    JobLogHandler,
+    JsonFormatter,
+    _JobQueueHandler,
+    job_logging,
+    read_job_log,
+)
+from streamsight_studio_backend.config.setting import get_settings
+
+
+logger = logging.getLogger("streamsight_studio_backend.tests")
+
+
+@pytest.fixture
+def job_logs(tmp_path, monkeypatch):
+    """Root logger writing through the queue to job logs of at most 3 records; stop() drains the queue."""
+    monkeypatch.setattr(get_settings(), "get_datalake_config", lambda: {"base_path": str(tmp_path)})
+    root = logging.getLogger()
+    level = root.level
+    listeners = []
+
+    def start() -> QueueListener:
+        job_handler = JobLogHandler(max_records=3, flush_interval=3600)
+        job_handler.setFormatter(JsonFormatter())
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, job_handler)
+        listener.queue_handler = _JobQueueHandler(log_queue)
+        root.addHandler(listener.queue_handler)
+        listener.start()
+        listeners.append(listener)
+        return listener
+
+    def stop(listener: QueueListener) -> None:
+        root.removeHandler(listener.queue_handler)
+        listener.stop()
+        listeners.remove(listener)
+
+    root.setLevel(logging.INFO)
+    yield start, stop
+    for listener in list(listeners):
+        stop(listener)
+    root.setLevel(level)
+
+
+def test_json_records_carry_extra_fields_and_exceptions():
+    try:
+        raise ValueError("bad window")
+    except ValueError:
+        record = logging.makeLogRecord(
+            {"name": "evaluator", "levelname": "ERROR", "msg": "Window %d failed", "args": (3,), "window": 3}
+        )
+        record.exc_info = sys.exc_info()
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert (entry["level"], entry["logger"], entry["message"], entry["window"]) == (
+        "ERROR",
+        "evaluator",
+        "Window 3 failed",
+        3,
+    )
+    assert "ValueError: bad window" in entry["exception"]
+
+
+def test_records_of_a_job_go_to_its_log(job_logs):
+    start, stop = job_logs
+    listener = start()
+
+    logger.info("before the job")
+    with job_logging(1):
+        logger.info("loading %s", "movielens")
+        logger.warning("slow window", extra={"window": 2})
+    logger.info("after the job")
+    stop(listener)
+
+    records = read_job_log(1)
+    assert [record["message"] for record in records] == [
+        "loading movielens",
+        "slow window",
+        "Log of stream job 1 closed",
+    ]
+    assert {record["stream_job_id"] for record in records} == {1}
+    assert records[1]["window"] == 2
+    assert read_job_log(1, limit=1)[0]["message"] == "Log of stream job 1 closed"
+
+
+def test_threads_log_to_their_own_jobs(job_logs):
+    start, stop = job_logs
+    listener = start()
+
+    def evaluate(stream_job_id: int) -> None:
+        with job_logging(stream_job_id):
+            logger.info(f"evaluating {stream_job_id}")
+
+    threads = [threading.Thread(target=evaluate, args=(stream_job_id,)) for stream_job_id in (1, 2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stop(listener)
+
+    for stream_job_id in (1, 2):
+        assert [record["message"] for record in read_job_log(stream_job_id)] == [
+            f"evaluating {stream_job_id}",
+            f"Log of stream job {stream_job_id} closed",
+        ]
+
+
+def test_a_rerun_continues_the_ring_buffer_of_the_job(job_logs):
+    start, stop = job_logs
+    listener = start()
+    with job_logging(1):
+        logger.info("first run")
+    stop(listener)
+
+    # Another process, e.g. a worker, runs the job again
+    listener = start()
+    with job_logging(1):
+        logger.info("second run")
+    stop(listener)
+
+    assert [record["message"] for record in read_job_log(1)] == [
+        "Log of stream job 1 closed",
+        "second run",
+        "Log of stream job 1 closed",
+    ]
@@ -0,0 +1,87 @@
+from sqlalchemy import inspect, text
+
+from streamsight_studio_backend.db.migration import upgrade_schema
+from streamsight_studio_backend.db.schema import StreamJob
+
+
+# Columns of stream_job before the status and run options were added
+_OLD_JOB_COLUMNS = {
+    "id",
+    "name",
+    "description",
+    "created_at",
+    "updated_at",
+    "started_at",
+    "completed_at",
+    "error_message",
+    "dataset",
+    "top_k",
+    "metrics",
+    "timestamp_split_start",
+    "window_size",
+    "user_id",
+}
+
+
+def _insert_job(connection, name: str, **values) -> int:
+    columns = {
+        "name": name,
+        "dataset": "movielens",
+        "top_k": 10,
+        "metrics": ["RecallK"],
+        "timestamp_split_start": "2020-01-01",
+        "window_size": 86400,
+        "user_id": 1,
+        **values,
+    }
+    statement = text(
+        f"INSERT INTO stream_job (id, {', '.join(columns)}) "
+        f"VALUES (nextval('stream_job_id_seq'), {', '.join(f':{key}' for key in columns)}) RETURNING id"
+    )
+    return connection.execute(statement, columns).scalar_one()
+
+
+def test_upgrade_adds_and_fills_the_columns_of_an_old_table(db_manager):
+    # DDL is transactional in Postgres, the old shape is rolled back with the test
+    with db_manager.engine.connect() as connection, connection.begin() as transaction:
+        new_columns = sorted(set(StreamJob.__table__.columns.keys()) - _OLD_JOB_COLUMNS)
+        connection.execute(text(f"ALTER TABLE stream_job {', '.join(f'DROP COLUMN {name}' for name in new_columns)}"))
+        connection.execute(
+            text("INSERT INTO stream_user (id, username, password, share_weight) VALUES (1, 'alice', 'secret', 1)")
+        )
+        created = _insert_job(connection, "created")
+        ready = _insert_job(connection, "ready")
+        connection.execute(
+            text("INSERT INTO stream_algorithm (id, stream_job_id, algorithm_name) VALUES (1, :id, 'ItemKNN')"),
+            {"id": ready},
+        )
+        running = _insert_job(connection, "running", started_at="2020-01-02")
+        completed = _insert_job(connection, "completed", started_at="2020-01-02", completed_at="2020-01-03")
+        failed = _insert_job(
+            connection, "failed", started_at="2020-01-02", completed_at="2020-01-03", error_message="boom"
+        )
+
+        added = upgrade_schema(connection)
+
+        assert sorted(added) == [f"stream_job.{name}" for name in new_columns]
+        rows = connection.execute(text("SELECT id, status, store_predictions FROM stream_job")).all()
+        assert dict((id, status) for id, status, _ in rows) == {
+            created: "created",
+            ready: "ready",
+            running: "running",
+            completed: "completed",
+            failed: "failed",
+        }
+        assert all(store_predictions is False for _, _, store_predictions in rows)
+        inspector = inspect(connection)
+        columns = {column["name"]: column for column in inspector.get_columns("stream_job")}
+        assert not columns["status"]["nullable"]
+        # The partial index went with the dropped column and is created again
+        assert "ix_stream_job_active_status" in {index["name"] for index in inspector.get_indexes("stream_job")}
+        transaction.rollback()
+
+
+def test_upgrade_of_an_up_to_date_database_does_nothing(db_manager):
+    with db_manager.engine.connect() as connection, connection.begin() as transaction:
+        assert upgrade_schema(connection) == []
+        transaction.rollback()
@@ -0,0 +1,87 @@
+import importlib
+import os
+import uuid
+
+import pytest
+from scipy.sparse import csr_matrix
+
+from streamsight_studio_backend.config.setting import get_settings
+from streamsight_studio_backend.db.schema import StreamAlgorithm
+
+
+ALGORITHM_UUID = uuid.UUID(int=1)
+Y_TRUE = csr_matrix([[1, 0, 0, 0], [0, 0, 0, 1]])
+# The first user's relevant item is in their top 2, the second user's is not
+Y_PRED = csr_matrix([[0.9, 0.1, 0.5, 0.3], [0.9, 0.8, 0.1, 0.2]])
+
+
+def _import(module: str):
+    """Import a module depending on streamsight's registries, which fail to import on some Python versions."""
+    try:
+        return importlib.import_module(module)
+    except Exception as e:
+        pytest.skip(f"{module} cannot be imported: {e}")
+
+
+@pytest.fixture
+def predictions(tmp_path, monkeypatch):
+    monkeypatch.setattr(get_settings(), "get_datalake_config", lambda: {"base_path": str(tmp_path)})
+    return _import("streamsight_studio_backend.services.predictions")
+
+
+def _store_windows(predictions, windows: list[int], window_offset: int = 0) -> None:
+    store = predictions.PredictionStore(1, top_k=2, window_offset=window_offset)
+    for window in windows:
+        store.save_ground_truth(window, 100 * (window + window_offset), Y_TRUE)
+        store.save_predictions(window, 100 * (window + window_offset), str(ALGORITHM_UUID), Y_PRED)
+
+
+def test_only_the_top_k_scores_are_stored(predictions):
+    _store_windows(predictions, [0])
+    _store_windows(predictions, [0], window_offset=1)
+
+    windows = list(predictions.iter_stored_windows(1, str(ALGORITHM_UUID)))
+
+    assert [timestamp for timestamp, _, _ in windows] == [0, 100]
+    _, y_true, y_pred = windows[0]
+    assert (y_true != Y_TRUE).nnz == 0
+    assert y_pred.toarray().tolist() == [[0.9, 0, 0.5, 0], [0.9, 0.8, 0, 0]]
+
+
+class _Hits:
+    """Stand-in metric counting the relevant items among the stored predictions."""
+
+    def __init__(self, K: int, timestamp_limit: int) -> None:
+        self.K = K
+        self.timestamp_limit = timestamp_limit
+        self.identifier = f"Hits_{K}_t={timestamp_limit}"
+
+    def calculate(self, y_true: csr_matrix, y_pred: csr_matrix) -> None:
+        self.hits = int(y_true.multiply(y_pred > 0).sum())
+
+
+def test_metrics_are_computed_from_every_stored_window(predictions, monkeypatch):
+    monkeypatch.setattr(predictions, "METRIC_REGISTRY", {"Hits": _Hits})
+    _store_windows(predictions, [0, 1])
+    stream_algorithm = StreamAlgorithm(algorithm_name="ItemKNN", algorithm_uuid=ALGORITHM_UUID)
+
+    acc = predictions.compute_stored_metrics(1, [stream_algorithm], ["Hits"], top_k=2)
+
+    metrics = acc[f"ItemKNN_{ALGORITHM_UUID}"]
+    assert {identifier: (metric.K, metric.hits) for identifier, metric in metrics.items()} == {
+        "Hits_2_t=0": (2, 1),
+        "Hits_2_t=100": (2, 1),
+    }
+
+
+def test_predictions_are_cleared_per_algorithm_or_for_the_job(predictions):
+    _store_windows(predictions, [0])
+    other_uuid = str(uuid.UUID(int=2))
+    predictions.PredictionStore(1, top_k=2).save_predictions(0, 0, other_uuid, Y_PRED)
+
+    predictions.clear_predictions(1, [str(ALGORITHM_UUID)])
+
+    assert not predictions.has_predictions(1, str(ALGORITHM_UUID))
+    assert predictions.has_predictions(1, other_uuid)
+    predictions.clear_predictions(1)
+    assert not os.path.exists(predictions._predictions_dir(1))
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+from streamsight.matrix import InteractionMatrix
+
+from streamsight_studio_backend.services.preprocessing import _k_core, apply_preprocessing
+
+
+def _matrix(rows: list[tuple[int, int, int]], shape: tuple[int, int] | None = None) -> InteractionMatrix:
+    df = pd.DataFrame(rows, columns=[InteractionMatrix.USER_IX, InteractionMatrix.ITEM_IX, InteractionMatrix.TIMESTAMP_IX])
+    df.insert(0, InteractionMatrix.INTERACTION_IX, np.arange(len(df)))
+    return InteractionMatrix(
+        df,
+        item_ix=InteractionMatrix.ITEM_IX,
+        user_ix=InteractionMatrix.USER_IX,
+        timestamp_ix=InteractionMatrix.TIMESTAMP_IX,
+        shape=shape,
+        skip_df_processing=True,
+    )
+
+
+def test_k_core_removes_until_every_user_and_item_keeps_its_minimum():
+    # Dropping item 3 (one interaction) leaves user 2 with one interaction, which drops item 2 below two
+    users = np.array([0, 0, 1, 1, 2, 2])
+    items = np.array([0, 1, 0, 1, 2, 3])
+
+    keep = _k_core(users, items, min_user=2, min_item=2)
+
+    assert keep.tolist() == [True, True, True, True, False, False]
+
+
+def test_k_core_without_minimums_keeps_everything():
+    users = np.array([5, 7, 9])
+    items = np.array([1, 1, 2])
+
+    assert _k_core(users, items, min_user=1, min_item=1).all()
+
+
+def test_apply_preprocessing_filters_time_range_and_keeps_ids_and_shape():
+    data = _matrix([(0, 0, 10), (1, 1, 20), (2, 2, 30), (3, 3, 40)], shape=(5, 5))
+
+    result = apply_preprocessing(data, {"start": 20, "end": 40})
+
+    df = result._df
+    assert df[InteractionMatrix.TIMESTAMP_IX].tolist() == [20, 30]
+    assert df[InteractionMatrix.USER_IX].tolist() == [1, 2]
+    assert df[InteractionMatrix.INTERACTION_IX].tolist() == [1, 2]
+    assert result.user_item_shape == (5, 5)
+
+
+def test_apply_preprocessing_takes_the_k_core_of_the_time_range():
+    # From t=5, users 0 and 2 have one interaction each; without them, item 1 has only one
+    data = _matrix([(0, 0, 1), (1, 0, 5), (0, 0, 6), (1, 1, 7), (2, 0, 8), (1, 0, 9)])
+
+    result = apply_preprocessing(data, {"start": 5, "min_user_interactions": 2, "min_item_interactions": 2})
+
+    assert result._df[InteractionMatrix.INTERACTION_IX].tolist() == [1, 5]
+
+
+def test_user_sample_is_stable_for_a_seed():
+    data = _matrix([(user, user % 3, user) for user in range(200)])
+    spec = {"user_fraction": 0.5, "seed": 7}
+
+    first = apply_preprocessing(data, spec)._df[InteractionMatrix.USER_IX].tolist()
+    second = apply_preprocessing(data, spec)._df[InteractionMatrix.USER_IX].tolist()
+    other_seed = apply_preprocessing(data, {**spec, "seed": 8})._df[InteractionMatrix.USER_IX].tolist()
+
+    assert first == second
+    assert first != other_seed
+    assert 50 < len(first) < 150
@@ -0,0 +1,95 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+from streamsight.matrix import InteractionMatrix
+
+from streamsight_studio_backend.db.schema import StreamJob
+from streamsight_studio_backend.services.preview import (
+    bootstrap_intervals,
+    limit_windows,
+    preview_cost_factor,
+    sample_users,
+)
+
+
+def _matrix(num_users: int, timestamps: list[int]) -> InteractionMatrix:
+    """Every user interacting at every timestamp."""
+    users, times = np.meshgrid(np.arange(num_users), timestamps, indexing="ij")
+    df = pd.DataFrame(
+        {
+            InteractionMatrix.INTERACTION_IX: np.arange(users.size),
+            InteractionMatrix.USER_IX: users.ravel(),
+            InteractionMatrix.ITEM_IX: users.ravel() % 7,
+            InteractionMatrix.TIMESTAMP_IX: times.ravel(),
+        }
+    )
+    return InteractionMatrix(
+        df,
+        item_ix=InteractionMatrix.ITEM_IX,
+        user_ix=InteractionMatrix.USER_IX,
+        timestamp_ix=InteractionMatrix.TIMESTAMP_IX,
+        skip_df_processing=True,
+    )
+
+
+def test_user_samples_are_stable_and_nested():
+    data = _matrix(1000, [1])
+
+    small = set(sample_users(data, 0.2).user_ids)
+    large = set(sample_users(data, 0.5).user_ids)
+
+    assert small == set(sample_users(data, 0.2).user_ids)
+    assert small < large
+    assert 150 < len(small) < 250
+
+
+def test_windows_after_the_preview_are_dropped():
+    data = _matrix(3, [5, 15, 25, 35, 45])
+
+    limited = limit_windows(data, background_t=10, window_size=10, max_windows=2)
+
+    assert sorted(set(limited.timestamps)) == [5, 15, 25]
+
+
+def test_cost_factor_follows_the_user_fraction():
+    stream_job = StreamJob(
+        dataset="movielens",
+        timestamp_split_start=datetime(2020, 1, 1, tzinfo=timezone.utc),
+        window_size=86400,
+        preview_fraction=0.25,
+    )
+
+    assert preview_cost_factor(stream_job) == 0.25
+
+
+def _user_scores(scores: dict[str, list[float]]) -> pd.DataFrame:
+    """User level results of one algorithm and metric, the users' scores listed per window."""
+    return pd.DataFrame(
+        [
+            {"algorithm": "ItemKNN_1", "metric": "RecallK", "timestamp": window, "user_id": user, "user_score": score}
+            for window, window_scores in scores.items()
+            for user, score in enumerate(window_scores)
+        ]
+    )
+
+
+def test_bootstrap_intervals_contain_the_scores():
+    rng = np.random.default_rng(1)
+    user_df = _user_scores({"t=0": rng.random(200).tolist(), "t=1": rng.random(100).tolist()})
+    micro = user_df["user_score"].mean()
+    macro = user_df.groupby("timestamp")["user_score"].mean().mean()
+
+    intervals = bootstrap_intervals(user_df, confidence=0.95, num_samples=300)
+    bounds = intervals[("ItemKNN_1", "RecallK")]
+
+    assert bounds["micro"][0] < micro < bounds["micro"][1]
+    assert bounds["macro"][0] < macro < bounds["macro"][1]
+    assert bounds["micro"][1] - bounds["micro"][0] < 0.15
+    assert bootstrap_intervals(user_df, confidence=0.95, num_samples=300) == intervals
+
+
+def test_bootstrap_intervals_of_equal_scores_are_points():
+    bounds = bootstrap_intervals(_user_scores({"t=0": [0.5] * 20}), confidence=0.9, num_samples=50)
+
+    assert bounds[("ItemKNN_1", "RecallK")] == {"micro": (0.5, 0.5), "macro": (0.5, 0.5)}
@@ -0,0 +1,114 @@
+import pickle
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from streamsight_studio_backend.services.profiling import AlgorithmProfiler, StageProfiler, measure
+
+
+def test_stages_are_recorded_in_order_with_their_times():
+    profiler = StageProfiler()
+
+    with profiler.stage("load"):
+        time.sleep(0.05)
+    with profiler.stage("evaluate"):
+        deadline = time.thread_time() + 0.05
+        while time.thread_time() < deadline:
+            pass
+
+    load, evaluate = profiler.stages
+    assert [load.stage, evaluate.stage] == ["load", "evaluate"]
+    # Sleeping takes wall time only, the busy loop takes CPU time of this thread
+    assert load.wall_time >= 0.05 and load.cpu_time < 0.04
+    assert evaluate.cpu_time >= 0.05
+    assert load.peak_rss > 0
+
+
+def test_a_failing_stage_is_recorded():
+    profiler = StageProfiler()
+
+    with pytest.raises(RuntimeError), profiler.stage("save"):
+        raise RuntimeError("database is down")
+
+    assert [timing.stage for timing in profiler.stages] == ["save"]
+
+
+def test_measure_returns_the_result_and_the_memory_allocated():
+    result, elapsed, memory_delta = measure(lambda size: b"x" * size, 64 * 2**20)
+
+    assert len(result) == 64 * 2**20
+    assert elapsed > 0
+    assert memory_delta >= 32 * 2**20
+
+
+class _Algorithm:
+    def fit(self, data) -> None:
+        time.sleep(0.01)
+
+    def predict(self, data) -> str:
+        return f"predictions of {data.num_interactions}"
+
+
+def _evaluator(*algorithm_uuids: str) -> SimpleNamespace:
+    algo_state_mgr = {
+        uuid: SimpleNamespace(algorithm_uuid=uuid, algo_ptr=_Algorithm()) for uuid in algorithm_uuids
+    }
+    return SimpleNamespace(algo_state_mgr=algo_state_mgr, _run_step=0, _current_timestamp=None)
+
+
+def _window(evaluator: SimpleNamespace, timestamp: int) -> None:
+    """Move the evaluator to the next window, as fetching its data does."""
+    evaluator._run_step += 1
+    evaluator._current_timestamp = timestamp
+
+
+def test_fits_are_attributed_to_the_window_predicted_next():
+    evaluator = _evaluator("a")
+    algorithm = evaluator.algo_state_mgr["a"].algo_ptr
+    profiler = AlgorithmProfiler()
+
+    with profiler.hooks(evaluator):
+        algorithm.fit(SimpleNamespace(num_interactions=100))
+        _window(evaluator, 50)
+        assert algorithm.predict(SimpleNamespace(num_interactions=10)) == "predictions of 10"
+        # Two data releases before the next window
+        algorithm.fit(SimpleNamespace(num_interactions=20))
+        algorithm.fit(SimpleNamespace(num_interactions=30))
+        _window(evaluator, 90)
+        algorithm.predict(SimpleNamespace(num_interactions=15))
+
+    first, second = profiler.windows
+    assert (first.window, first.timestamp, first.fit_interactions, first.predict_interactions) == (0, "t=50", 100, 10)
+    assert (second.window, second.timestamp, second.fit_interactions, second.predict_interactions) == (
+        1,
+        "t=90",
+        50,
+        15,
+    )
+    assert first.fit_time >= 0.01 and second.fit_time >= 0.02
+
+
+def test_a_window_fitted_before_a_resume_has_no_fit_time():
+    evaluator = _evaluator("a")
+    evaluator._run_step = 3
+    profiler = AlgorithmProfiler()
+
+    with profiler.hooks(evaluator):
+        _window(evaluator, 170)
+        evaluator.algo_state_mgr["a"].algo_ptr.predict(SimpleNamespace(num_interactions=10))
+
+    (timing,) = profiler.windows
+    assert (timing.window, timing.fit_time, timing.fit_interactions) == (3, None, None)
+
+
+def test_algorithms_can_be_pickled_once_the_hooks_are_removed():
+    evaluator = _evaluator("a", "b")
+    profiler = AlgorithmProfiler()
+
+    with profiler.hooks(evaluator):
+        assert "fit" in vars(evaluator.algo_state_mgr["a"].algo_ptr)
+
+    for state in evaluator.algo_state_mgr.values():
+        assert vars(state.algo_ptr) == {}
+        pickle.dumps(state.algo_ptr)
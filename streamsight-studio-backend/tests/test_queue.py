@@ -0,0 +1,111 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import func
+
+from streamsight_studio_backend.db.schema import EvaluationQueueEntry, StreamJob
+from streamsight_studio_backend.services.job_status import JobStatus
+from streamsight_studio_backend.services.queue import (
+    ClaimState,
+    claim_next_job,
+    enqueue_job,
+    finish_job,
+    get_queue_entry,
+    heartbeat,
+    requeue_stale_jobs,
+)
+
+
+@pytest.fixture
+def queued(db, make_user, make_job):
+    """Two running jobs of one user in the queue, returned by id."""
+    stream_user = make_user()
+    stream_job_ids = []
+    for _ in range(2):
+        stream_job = make_job(stream_user, status=JobStatus.RUNNING)
+        enqueue_job(db, stream_job.id)
+        db.commit()
+        stream_job_ids.append(stream_job.id)
+    return stream_job_ids
+
+
+def _entry(db, stream_job_id: int) -> EvaluationQueueEntry | None:
+    db.expire_all()
+    return get_queue_entry(db, stream_job_id)
+
+
+def _stop_heartbeats(db, stream_job_id: int, attempts: int = 1, cancel_requested: bool = False) -> None:
+    entry = _entry(db, stream_job_id)
+    entry.claimed_by = "dead-worker"
+    entry.claimed_at = entry.heartbeat_at = func.now() - timedelta(hours=1)
+    entry.attempts = attempts
+    entry.cancel_requested = cancel_requested
+    db.commit()
+
+
+def test_jobs_are_claimed_once_in_queue_order(db, queued):
+    first = claim_next_job(db, "worker-1")
+    second = claim_next_job(db, "worker-2")
+
+    assert [first.stream_job_id, second.stream_job_id] == queued
+    assert claim_next_job(db, "worker-3") is None
+    entry = _entry(db, first.stream_job_id)
+    assert (entry.claimed_by, first.attempts) == ("worker-1", 1)
+    assert entry.heartbeat_at is not None
+
+
+def test_claim_skips_an_entry_locked_by_another_session(db_manager, db, queued):
+    with db_manager.get_session() as other:
+        get_queue_entry(other, queued[0], lock=True)
+
+        assert claim_next_job(db, "worker").stream_job_id == queued[1]
+
+
+def test_heartbeat_reports_the_state_of_the_claim(db, queued):
+    claimed = claim_next_job(db, "worker")
+
+    assert heartbeat(db, claimed.entry_id, "worker") == ClaimState.HELD
+    assert heartbeat(db, claimed.entry_id, "other-worker") == ClaimState.LOST
+    _entry(db, claimed.stream_job_id).cancel_requested = True
+    db.commit()
+    assert heartbeat(db, claimed.entry_id, "worker") == ClaimState.CANCEL_REQUESTED
+
+
+def test_stale_claims_are_requeued_to_resume(db, queued):
+    claim_next_job(db, "worker")
+    _stop_heartbeats(db, queued[1])
+
+    assert requeue_stale_jobs(db, heartbeat_timeout=60, max_attempts=3) == 1
+
+    entry = _entry(db, queued[1])
+    assert (entry.claimed_by, entry.heartbeat_at, entry.resume) == (None, None, True)
+    # The claim with a fresh heartbeat is kept
+    assert _entry(db, queued[0]).claimed_by == "worker"
+    assert claim_next_job(db, "worker-2").stream_job_id == queued[1]
+
+
+def test_stale_claims_past_the_attempts_fail_the_job(db, queued):
+    _stop_heartbeats(db, queued[0], attempts=3)
+
+    requeue_stale_jobs(db, heartbeat_timeout=60, max_attempts=3)
+
+    assert _entry(db, queued[0]) is None
+    assert db.get(StreamJob, queued[0]).status == JobStatus.FAILED
+
+
+def test_stale_claims_being_cancelled_cancel_the_job(db, queued):
+    _stop_heartbeats(db, queued[0], cancel_requested=True)
+
+    requeue_stale_jobs(db, heartbeat_timeout=60, max_attempts=3)
+
+    assert _entry(db, queued[0]) is None
+    assert db.get(StreamJob, queued[0]).status == JobStatus.CANCELLED
+
+
+def test_only_the_claiming_worker_finishes_a_job(db, queued):
+    claimed = claim_next_job(db, "worker")
+
+    finish_job(db, claimed.entry_id, "other-worker")
+    assert _entry(db, claimed.stream_job_id) is not None
+    finish_job(db, claimed.entry_id, "worker")
+    assert _entry(db, claimed.stream_job_id) is None
@@ -0,0 +1,66 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from streamsight_studio_backend.config.setting import get_settings
+from streamsight_studio_backend.db import connection
+from streamsight_studio_backend.db.connection import DatabaseManager, get_db, get_read_db
+from streamsight_studio_backend.services.auth import create_access_token
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """App reading from a replica, which is the primary's URL as no connection is made."""
+    settings = get_settings()
+    monkeypatch.setattr(settings, "DATABASE_REPLICA_URL", settings.DATABASE_URL)
+    monkeypatch.setattr(settings, "DATABASE_REPLICA_STICKY_SECONDS", 60.0)
+    db_manager = DatabaseManager()
+    monkeypatch.setattr(connection, "_db_manager", db_manager)
+    monkeypatch.setattr(connection, "_recent_writers", connection._RecentWriters())
+
+    app = FastAPI()
+
+    @app.post("/write")
+    def write(db: Session = Depends(get_db)) -> None:
+        db.commit()
+
+    @app.get("/read")
+    def read(db: Session = Depends(get_read_db)) -> str:
+        return "replica" if db.get_bind() is db_manager.replica_engine else "primary"
+
+    return TestClient(app)
+
+
+def _auth(user_id: int, username: str) -> dict[str, str]:
+    return {"Authorization": f"Bearer {create_access_token(user_id, username)}"}
+
+
+def test_reads_go_to_the_replica(client):
+    assert client.get("/read", headers=_auth(1, "alice")).json() == "replica"
+    assert client.get("/read").json() == "replica"
+
+
+def test_a_writer_reads_from_the_primary_with_any_of_its_tokens(client):
+    client.post("/write", headers=_auth(1, "alice"))
+
+    assert client.get("/read", headers=_auth(1, "alice")).json() == "primary"
+    # Another token of the same user, e.g. from a second login
+    assert client.get("/read", headers=_auth(2, "alice")).json() == "primary"
+    assert client.get("/read", headers=_auth(3, "bob")).json() == "replica"
+
+
+def test_writers_stick_to_the_primary_only_for_a_while(client, monkeypatch):
+    monkeypatch.setattr(get_settings(), "DATABASE_REPLICA_STICKY_SECONDS", 0.0)
+
+    client.post("/write", headers=_auth(1, "alice"))
+
+    assert client.get("/read", headers=_auth(1, "alice")).json() == "replica"
+
+
+def test_writes_without_a_valid_token_do_not_stick(client):
+    client.post("/write", headers={"Authorization": "Bearer not-a-token"})
+    client.post("/write")
+
+    assert client.get("/read", headers={"Authorization": "Bearer not-a-token"}).json() == "replica"
+    assert client.get("/read").json() == "replica"
@@ -0,0 +1,112 @@
+import pytest
+from sqlalchemy import select
+
+from streamsight_studio_backend.db.schema import MacroEvaluationResult, StreamAlgorithm, WindowEvaluationResult
+from streamsight_studio_backend.services.result_cache import (
+    get_result_cache_stats,
+    record_computed_results,
+    reuse_cached_results,
+)
+
+
+FINGERPRINT = "f" * 64
+
+
+@pytest.fixture
+def algorithms(db, make_user, make_job):
+    """An algorithm with computed results and an algorithm of another job without any."""
+    stream_user = make_user()
+    computed = StreamAlgorithm(stream_job_id=make_job(stream_user).id, algorithm_name="ItemKNN")
+    pending = StreamAlgorithm(stream_job_id=make_job(stream_user).id, algorithm_name="ItemKNN")
+    db.add_all([computed, pending])
+    db.flush()
+    computed.result_fingerprint = FINGERPRINT
+    db.add_all(
+        [
+            MacroEvaluationResult(
+                stream_job_id=computed.stream_job_id,
+                stream_algorithm_id=computed.id,
+                metric="RecallK",
+                macro_score=0.25,
+                num_window=2,
+            ),
+            *(
+                WindowEvaluationResult(
+                    stream_job_id=computed.stream_job_id,
+                    stream_algorithm_id=computed.id,
+                    metric="RecallK",
+                    window_score=score,
+                    num_user=10,
+                    timestamp=str(window),
+                )
+                for window, score in enumerate([0.2, 0.3])
+            ),
+        ]
+    )
+    record_computed_results(db, computed, FINGERPRINT, "movielens", 12.0)
+    db.commit()
+    return computed, pending
+
+
+def _results(db, stream_algorithm: StreamAlgorithm) -> list[tuple]:
+    macro = db.execute(
+        select(MacroEvaluationResult.stream_job_id, MacroEvaluationResult.metric, MacroEvaluationResult.macro_score)
+        .where(MacroEvaluationResult.stream_algorithm_id == stream_algorithm.id)
+    ).all()
+    window = db.execute(
+        select(WindowEvaluationResult.timestamp, WindowEvaluationResult.window_score)
+        .where(WindowEvaluationResult.stream_algorithm_id == stream_algorithm.id)
+        .order_by(WindowEvaluationResult.timestamp)
+    ).all()
+    return [tuple(row) for row in macro + window]
+
+
+def test_hit_copies_the_results_and_counts_the_time_saved(db, algorithms):
+    computed, pending = algorithms
+
+    assert reuse_cached_results(db, pending, FINGERPRINT)
+    db.commit()
+
+    assert _results(db, pending) == [
+        (pending.stream_job_id, "RecallK", 0.25),
+        ("0", 0.2),
+        ("1", 0.3),
+    ]
+    assert pending.result_fingerprint == FINGERPRINT
+    stats = get_result_cache_stats(db)
+    assert (stats["entries"], stats["hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+    assert (stats["compute_time"], stats["time_saved"]) == (12.0, 12.0)
+
+
+def test_miss_copies_nothing(db, algorithms):
+    _, pending = algorithms
+
+    assert not reuse_cached_results(db, pending, "0" * 64)
+    db.commit()
+
+    assert _results(db, pending) == []
+    stats = get_result_cache_stats(db)
+    assert (stats["hits"], stats["misses"], stats["hit_rate"], stats["time_saved"]) == (0, 1, 0.0, 0.0)
+
+
+def test_hit_is_left_to_the_caller_to_commit(db, algorithms):
+    _, pending = algorithms
+
+    assert reuse_cached_results(db, pending, FINGERPRINT)
+    db.rollback()
+
+    assert _results(db, pending) == []
+    assert get_result_cache_stats(db)["hits"] == 0
+
+
+def test_recomputing_a_known_fingerprint_counts_another_miss(db, algorithms):
+    computed, _ = algorithms
+
+    record_computed_results(db, computed, FINGERPRINT, "movielens", 8.0)
+    db.commit()
+
+    stats = get_result_cache_stats(db)
+    assert (stats["entries"], stats["misses"]) == (1, 2)
+    # The latest compute time stands for every miss
+    assert stats["compute_time"] == 16.0
@@ -0,0 +1,71 @@
+import pytest
+
+from streamsight_studio_backend.db.schema import MacroEvaluationResult, StreamAlgorithm, WindowEvaluationResult
+from streamsight_studio_backend.services.results import compare_job_results
+
+
+@pytest.fixture
+def jobs(db, make_user, make_job):
+    """Two jobs evaluating ItemKNN with K=10, the second also with K=50, in two windows."""
+    alice = make_user()
+    stream_jobs = [make_job(alice), make_job(alice)]
+    configurations = [
+        (stream_jobs[0], '{"K": 10}', 0.2),
+        (stream_jobs[1], '{"K": 10}', 0.3),
+        (stream_jobs[1], '{"K": 50}', 0.4),
+    ]
+    for stream_job, parameters, score in configurations:
+        stream_algorithm = StreamAlgorithm(stream_job_id=stream_job.id, algorithm_name="ItemKNN", parameters=parameters)
+        db.add(stream_algorithm)
+        db.flush()
+        for metric in ("RecallK", "NDCGK"):
+            db.add(
+                MacroEvaluationResult(
+                    stream_job_id=stream_job.id,
+                    stream_algorithm_id=stream_algorithm.id,
+                    metric=metric,
+                    macro_score=score,
+                    num_window=2,
+                )
+            )
+        for timestamp in ("t=100", "t=20"):
+            db.add(
+                WindowEvaluationResult(
+                    stream_job_id=stream_job.id,
+                    stream_algorithm_id=stream_algorithm.id,
+                    metric="RecallK",
+                    window_score=score,
+                    num_user=5,
+                    timestamp=timestamp,
+                )
+            )
+    db.commit()
+    return [stream_job.id for stream_job in stream_jobs]
+
+
+def test_results_of_a_configuration_are_aligned_across_jobs(db, jobs):
+    first, second = jobs
+
+    rows = compare_job_results(db, jobs, "macro", ["RecallK"])
+
+    assert [(row["parameters"], row["metric"]) for row in rows] == [('{"K": 10}', "RecallK"), ('{"K": 50}', "RecallK")]
+    assert rows[0]["jobs"] == {
+        first: {"score": 0.2, "num_window": 2, "approximate": False, "ci_lower": None, "ci_upper": None},
+        second: {"score": 0.3, "num_window": 2, "approximate": False, "ci_lower": None, "ci_upper": None},
+    }
+    assert list(rows[1]["jobs"]) == [second]
+
+
+def test_window_results_are_in_time_order(db, jobs):
+    rows = compare_job_results(db, jobs[:1], "window")
+
+    assert [(row["timestamp"], row["jobs"][jobs[0]]) for row in rows] == [
+        ("t=20", {"score": 0.2, "num_user": 5}),
+        ("t=100", {"score": 0.2, "num_user": 5}),
+    ]
+
+
+def test_every_metric_is_compared_without_a_filter(db, jobs):
+    rows = compare_job_results(db, jobs, "macro")
+
+    assert [row["metric"] for row in rows] == ["NDCGK", "NDCGK", "RecallK", "RecallK"]
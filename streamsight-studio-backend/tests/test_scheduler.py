@@ -0,0 +1,132 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select
+
+from streamsight_studio_backend.db.schema import EvaluationQueueEntry
+from streamsight_studio_backend.services.queue import USER_CLAIM_LOCK_KEY, claim_next_job
+from streamsight_studio_backend.services.scheduler import JobPriority, SchedulingPolicy, estimate_start_times
+
+
+@pytest.fixture
+def enqueue(db, make_job):
+    def enqueue(
+        stream_user,
+        cost: float,
+        priority: JobPriority = JobPriority.BATCH,
+        waited: float = 0.0,
+        running: bool = False,
+    ) -> int:
+        stream_job = make_job(stream_user)
+        entry = EvaluationQueueEntry(
+            stream_job_id=stream_job.id,
+            priority=priority,
+            estimated_cost=cost,
+            enqueued_at=func.localtimestamp() - timedelta(seconds=waited),
+        )
+        if running:
+            entry.claimed_by = "worker"
+            entry.claimed_at = entry.heartbeat_at = func.localtimestamp()
+        db.add(entry)
+        db.commit()
+        return stream_job.id
+
+    return enqueue
+
+
+def _schedule(db, policy: SchedulingPolicy | None = None) -> dict[int, float | None]:
+    """Estimated start of each waiting job in seconds from now, in queue order."""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    scheduled, _ = estimate_start_times(db, policy or SchedulingPolicy())
+    waiting = sorted((job for job in scheduled if not job.running), key=lambda job: job.position)
+    return {
+        job.stream_job_id: round((job.estimated_start_at - now).total_seconds()) if job.estimated_start_at else None
+        for job in waiting
+    }
+
+
+def test_interactive_jobs_go_before_batch_jobs(db, make_user, enqueue):
+    alice = make_user()
+    batch = enqueue(alice, cost=1, waited=60)
+    interactive = enqueue(alice, cost=100, priority=JobPriority.INTERACTIVE)
+
+    assert list(_schedule(db)) == [interactive, batch]
+
+
+def test_shortest_job_goes_first_and_the_next_starts_when_it_ends(db, make_user, enqueue):
+    alice = make_user()
+    long = enqueue(alice, cost=50, waited=60)
+    short = enqueue(alice, cost=10)
+
+    assert _schedule(db) == {short: 0, long: 10}
+
+
+def test_users_with_a_smaller_share_of_running_jobs_go_first(db, make_user, enqueue):
+    alice, bob, carol = make_user("alice"), make_user("bob"), make_user("carol", share_weight=3.0)
+    enqueue(alice, cost=100, running=True)
+    enqueue(bob, cost=5, running=True)
+    enqueue(carol, cost=200, running=True)
+    alice_waiting = enqueue(alice, cost=1)
+    bob_waiting = enqueue(bob, cost=50)
+    carol_waiting = enqueue(carol, cost=20)
+
+    # When bob's job ends, the shares of the next job are carol (1 + 1) / 3, bob 1 / 1 and alice (1 + 1) / 1
+    assert _schedule(db) == {carol_waiting: 5, bob_waiting: 25, alice_waiting: 75}
+    assert list(_schedule(db)) == [carol_waiting, bob_waiting, alice_waiting]
+
+
+def test_jobs_waiting_past_the_starvation_timeout_count_as_free(db, make_user, enqueue):
+    alice = make_user()
+    starved = enqueue(alice, cost=500, waited=7200)
+    short = enqueue(alice, cost=10)
+
+    assert list(_schedule(db)) == [short, starved]
+    assert list(_schedule(db, SchedulingPolicy(starvation_timeout=3600))) == [starved, short]
+
+
+def test_capped_users_wait_for_their_own_running_jobs(db, make_user, enqueue):
+    alice, bob = make_user("alice"), make_user("bob")
+    enqueue(alice, cost=100, running=True)
+    enqueue(bob, cost=10, running=True)
+    alice_waiting = enqueue(alice, cost=1)
+
+    assert _schedule(db) == {alice_waiting: 10}
+    assert _schedule(db, SchedulingPolicy(max_jobs_per_user=1)) == {alice_waiting: 100}
+
+
+def test_claim_skips_users_at_the_cap(db, make_user, enqueue):
+    alice, bob = make_user("alice"), make_user("bob")
+    enqueue(alice, cost=1, running=True)
+    enqueue(alice, cost=1)
+    bob_waiting = enqueue(bob, cost=50)
+    policy = SchedulingPolicy(max_jobs_per_user=1)
+
+    assert claim_next_job(db, "worker", policy).stream_job_id == bob_waiting
+    assert claim_next_job(db, "worker", policy) is None
+
+
+def test_claim_counts_a_claim_of_the_same_user_committed_meanwhile(db_manager, db, make_user, enqueue):
+    alice = make_user()
+    first = enqueue(alice, cost=1)
+    enqueue(alice, cost=2)
+    policy = SchedulingPolicy(max_jobs_per_user=1)
+    claims = []
+
+    def claim():
+        with db_manager.get_session() as other:
+            claims.append(claim_next_job(other, "worker-2", policy))
+
+    # A worker in the middle of claiming alice's first job holds her claim lock
+    db.execute(select(func.pg_advisory_xact_lock(USER_CLAIM_LOCK_KEY, alice.id)))
+    entry = db.query(EvaluationQueueEntry).filter(EvaluationQueueEntry.stream_job_id == first).one()
+    entry.claimed_by = "worker-1"
+    db.flush()
+    thread = threading.Thread(target=claim)
+    thread.start()
+    time.sleep(0.2)
+    db.commit()
+    thread.join()
+
+    assert claims == [None]
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from streamsight_studio_backend.services.single_flight import SINGLE_FLIGHT_CALLS, SingleFlight
+
+
+class _Computation:
+    """Counts its runs and blocks each until released."""
+
+    def __init__(self) -> None:
+        self.runs = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self) -> int:
+        self.runs += 1
+        self.started.set()
+        assert self.release.wait(5)
+        return self.runs
+
+
+def _wait_for_callers(flight: SingleFlight, callers: int) -> None:
+    """Wait until all but the first caller joined the call in flight."""
+    for _ in range(500):
+        if SINGLE_FLIGHT_CALLS.value(flight.name, "coalesced") >= callers - 1:
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError("the callers did not join the call in flight")
+
+
+def test_concurrent_calls_share_one_execution(request):
+    flight, computation = SingleFlight(request.node.name), _Computation()
+
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(flight.do, "key", computation) for _ in range(4)]
+        _wait_for_callers(flight, 4)
+        computation.release.set()
+        results = [future.result() for future in futures]
+
+    assert results == [1, 1, 1, 1]
+    assert computation.runs == 1
+    assert SINGLE_FLIGHT_CALLS.value(flight.name, "executed") == 1
+
+
+def test_calls_with_other_keys_run_separately(request):
+    flight = SingleFlight(request.node.name)
+
+    assert flight.do("a", lambda: "a") == "a"
+    assert flight.do("b", lambda: "b") == "b"
+    assert SINGLE_FLIGHT_CALLS.value(flight.name, "executed") == 2
+
+
+def test_a_later_call_computes_again(request):
+    flight, computation = SingleFlight(request.node.name), _Computation()
+    computation.release.set()
+
+    assert flight.do("key", computation) == 1
+    assert flight.do("key", computation) == 2
+
+
+def test_waiting_calls_get_the_exception(request):
+    flight = SingleFlight(request.node.name)
+    release = threading.Event()
+
+    def fail():
+        assert release.wait(5)
+        raise ValueError("dataset is missing")
+
+    with ThreadPoolExecutor(2) as pool:
+        futures = [pool.submit(flight.do, "key", fail) for _ in range(2)]
+        _wait_for_callers(flight, 2)
+        release.set()
+        for future in futures:
+            with pytest.raises(ValueError, match="dataset is missing"):
+                future.result()
+
+    # The failed call is not kept
+    assert flight.do("key", lambda: "recovered") == "recovered"
+
+
+def test_async_calls_share_one_execution(request):
+    flight, computation = SingleFlight(request.node.name), _Computation()
+
+    async def main() -> list[int]:
+        calls = [asyncio.ensure_future(flight.do_async("key", computation)) for _ in range(3)]
+        await asyncio.to_thread(computation.started.wait, 5)
+        _wait_for_callers(flight, 3)
+        computation.release.set()
+        return await asyncio.gather(*calls)
+
+    assert asyncio.run(main()) == [1, 1, 1]
+    assert computation.runs == 1
@@ -0,0 +1,126 @@
+import importlib
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from streamsight.matrix import InteractionMatrix
+from streamsight.settings import SlidingWindowSetting
+
+from streamsight_studio_backend.config.setting import get_settings
+
+
+def _import(module: str):
+    """Import a module depending on streamsight's registries, which fail to import on some Python versions."""
+    try:
+        return importlib.import_module(module)
+    except Exception as e:
+        pytest.skip(f"{module} cannot be imported: {e}")
+
+
+@pytest.fixture
+def spill(tmp_path, monkeypatch):
+    monkeypatch.setattr(get_settings(), "get_datalake_config", lambda: {"base_path": str(tmp_path)})
+    return _import("streamsight_studio_backend.services.spill")
+
+
+def _matrix(num_users: int, timestamps: list[int]) -> InteractionMatrix:
+    """Every user interacting with an item of their own at every timestamp."""
+    users, times = np.meshgrid(np.arange(num_users), timestamps, indexing="ij")
+    df = pd.DataFrame(
+        {
+            InteractionMatrix.INTERACTION_IX: np.arange(users.size),
+            InteractionMatrix.USER_IX: users.ravel(),
+            InteractionMatrix.ITEM_IX: users.ravel(),
+            InteractionMatrix.TIMESTAMP_IX: times.ravel(),
+        }
+    )
+    return InteractionMatrix(
+        df,
+        item_ix=InteractionMatrix.ITEM_IX,
+        user_ix=InteractionMatrix.USER_IX,
+        timestamp_ix=InteractionMatrix.TIMESTAMP_IX,
+        skip_df_processing=True,
+    )
+
+
+def _metric(timestamp: int, user_scores: dict[int, float], name: str = "RecallK_10") -> SimpleNamespace:
+    scores = [score for score in user_scores.values() if not np.isnan(score)]
+    return SimpleNamespace(
+        name=name,
+        timestamp_limit=timestamp,
+        micro_result={"user_id": list(user_scores), "score": list(user_scores.values())},
+        macro_result=float(np.mean(scores)) if scores else None,
+        num_users=len(user_scores),
+    )
+
+
+def _evaluator(metrics: list[SimpleNamespace]) -> SimpleNamespace:
+    acc = {"ItemKNN_1": {f"{metric.name}_{metric.timestamp_limit}": metric for metric in metrics}}
+    return SimpleNamespace(_acc=SimpleNamespace(acc=acc))
+
+
+def test_spilled_windows_keep_paths_and_load_matrices_when_indexed(spill, tmp_path):
+    windows = spill.SpilledWindows(str(tmp_path / "windows"))
+    for timestamp in (1, 2, 3):
+        windows.append(_matrix(2, [timestamp]))
+
+    assert all(isinstance(path, str) for path in list.__iter__(windows))
+    assert [window.max_timestamp for window in windows] == [1, 2, 3]
+    assert [window.max_timestamp for window in windows[1:]] == [2, 3]
+    assert sorted(os.listdir(tmp_path / "windows")) == [f"window_0000{i}.pkl" for i in range(3)]
+
+
+def test_the_split_writes_every_window_to_disk(spill):
+    data = _matrix(3, [5, 15, 25, 35])
+    setting = spill.create_spilling_setting(1, background_t=10, window_size=10, top_k=5)
+    expected = SlidingWindowSetting(background_t=10, window_size=10, top_K=5)
+
+    setting.split(data)
+    expected.split(data)
+
+    assert isinstance(setting._ground_truth_data, spill.SpilledWindows)
+    assert setting.num_split == expected.num_split == 3
+    assert [window.timestamps.tolist() for window in setting._ground_truth_data] == [
+        window.timestamps.tolist() for window in expected._ground_truth_data
+    ]
+
+
+def test_spilled_scores_give_the_results_of_all_windows(spill):
+    metric_spill = spill.MetricSpill(1)
+    first = _evaluator([_metric(10, {0: 1.0, 1: 0.0})])
+    metric_spill.spill(first, 0)
+    metric_spill.spill(_evaluator([_metric(20, {0: 0.5, 1: np.nan, 2: 1.0})]), 1)
+    metric_spill.spill(_evaluator([]), 2)
+
+    assert first._acc.acc == {}
+    assert metric_spill.windows() == [0, 1]
+    assert metric_spill.window_results()[["timestamp", "window_score", "num_user"]].values.tolist() == [
+        ["t=10", 0.5, 2],
+        ["t=20", 0.75, 3],
+    ]
+    assert metric_spill.macro_results()[["macro_score", "num_window"]].values.tolist() == [[0.625, 2]]
+    # Users without a score are not counted
+    assert metric_spill.micro_results()[["micro_score", "num_user"]].values.tolist() == [[0.625, 4]]
+    assert [frame["user_id"].tolist() for frame in metric_spill.iter_user_results()] == [[0, 1], [0, 1, 2]]
+
+
+def test_truncating_drops_the_windows_after_a_checkpoint(spill):
+    metric_spill = spill.MetricSpill(1)
+    for window in range(3):
+        metric_spill.spill(_evaluator([_metric(10 * window, {0: 1.0})]), window)
+
+    metric_spill.truncate(1)
+
+    assert metric_spill.windows() == [0]
+
+
+def test_clearing_keeps_the_spilled_scores_for_a_resume(spill):
+    spill.MetricSpill(1).spill(_evaluator([_metric(10, {0: 1.0})]), 0)
+    spill.create_spilling_setting(1, background_t=10, window_size=10, top_k=5).split(_matrix(2, [5, 15]))
+
+    spill.clear_scratch(1, keep_metrics=True)
+    assert os.listdir(spill._scratch_dir(1)) == ["metrics"]
+    spill.clear_scratch(1)
+    assert not os.path.exists(spill._scratch_dir(1))
@@ -0,0 +1,97 @@
+from datetime import datetime
+
+import pytest
+
+from streamsight_studio_backend.db.schema import MacroEvaluationResult
+from streamsight_studio_backend.schemas.stream import CreateSweepRequest, SweepAlgorithm
+from streamsight_studio_backend.services.job_status import JobStatus
+from streamsight_studio_backend.services.sweep import (
+    count_configurations,
+    create_sweep_jobs,
+    expand_algorithms,
+    expand_params,
+    get_sweep_results,
+)
+
+
+def _request(**values) -> CreateSweepRequest:
+    return CreateSweepRequest(
+        name="knn",
+        dataset="movielens",
+        metrics=["RecallK"],
+        timestamp_split_start="2020-01-01",
+        window_size=values.pop("window_size", [86400, 3600]),
+        top_k=values.pop("top_k", [10]),
+        algorithms=values.pop(
+            "algorithms",
+            [
+                SweepAlgorithm(name="ItemKNN", params={"K": [10, 50], "normalize": True}),
+                SweepAlgorithm(name="MostPopular"),
+            ],
+        ),
+        **values,
+    )
+
+
+def test_grids_expand_to_every_combination_without_duplicates():
+    assert expand_params({"K": [10, 50], "normalize": True}) == [
+        {"K": 10, "normalize": True},
+        {"K": 50, "normalize": True},
+    ]
+    algorithms = [
+        SweepAlgorithm(name="ItemKNN", params={"K": [10, 50]}),
+        SweepAlgorithm(name="ItemKNN", params={"K": [50, 100]}),
+    ]
+    assert expand_algorithms(algorithms) == [("ItemKNN", {"K": 10}), ("ItemKNN", {"K": 50}), ("ItemKNN", {"K": 100})]
+
+
+def test_configurations_count_each_setting_once():
+    assert count_configurations(_request(window_size=[3600, 3600, 86400], top_k=[10, 20])) == 2 * 2 * 3
+
+
+@pytest.fixture
+def sweep(db, make_user):
+    """A sweep of two settings with two ItemKNN configurations and MostPopular each."""
+    sweep = create_sweep_jobs(db, _request(), make_user().id, datetime(2020, 1, 1))
+    db.commit()
+    return sweep
+
+
+def test_every_setting_gets_a_ready_child_with_every_algorithm(sweep):
+    children = sorted(sweep.stream_jobs, key=lambda job: job.window_size)
+
+    assert [(job.name, job.status) for job in children] == [
+        ("knn [window_size=3600, top_k=10]", JobStatus.READY),
+        ("knn [window_size=86400, top_k=10]", JobStatus.READY),
+    ]
+    for job in children:
+        stream_algorithms = sorted(job.stream_algorithms, key=lambda sa: sa.id)
+        assert [(sa.algorithm_name, sa.parameters) for sa in stream_algorithms] == [
+            ("ItemKNN", '{"K": 10, "normalize": true}'),
+            ("ItemKNN", '{"K": 50, "normalize": true}'),
+            ("MostPopular", "{}"),
+        ]
+    assert len({sa.algorithm_uuid for job in children for sa in job.stream_algorithms}) == 6
+
+
+def test_results_are_sorted_by_a_metric_with_unscored_configurations_last(db, sweep):
+    child = min(sweep.stream_jobs, key=lambda job: job.window_size)
+    knn_10, knn_50, _ = sorted(child.stream_algorithms, key=lambda sa: sa.id)
+    for stream_algorithm, score in [(knn_10, 0.2), (knn_50, 0.3)]:
+        db.add(
+            MacroEvaluationResult(
+                stream_job_id=child.id,
+                stream_algorithm_id=stream_algorithm.id,
+                metric="RecallK",
+                macro_score=score,
+                num_window=2,
+            )
+        )
+    db.commit()
+
+    results = get_sweep_results(db, sweep, sort_by="RecallK")
+
+    assert (results["parameters"], results["metrics"]) == (["K", "normalize"], ["RecallK"])
+    assert len(results["rows"]) == 6
+    assert [row["stream_algorithm_id"] for row in results["rows"][:2]] == [knn_50.id, knn_10.id]
+    assert all(row["macro"] == {} for row in results["rows"][2:])
@@ -0,0 +1,96 @@
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from streamsight_studio_backend.api.middleware import PrometheusMiddleware
+from streamsight_studio_backend.services.telemetry import (
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS,
+    HTTP_REQUESTS_IN_FLIGHT,
+    Counter,
+    Gauge,
+    Histogram,
+    Registry,
+)
+
+
+def test_counter_renders_escaped_labels():
+    counter = Counter("rows_total", "Rows written.", ("level",))
+    counter.inc("macro")
+    counter.inc("macro", amount=2)
+    counter.inc('say "hi"\n')
+
+    assert counter.render().splitlines() == [
+        "# HELP rows_total Rows written.",
+        "# TYPE rows_total counter",
+        'rows_total{level="macro"} 3',
+        'rows_total{level="say \\"hi\\"\\n"} 1',
+    ]
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("duration_seconds", "Duration.", buckets=(1.0, 0.1))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value)
+
+    assert histogram.samples() == [
+        'duration_seconds_bucket{le="0.1"} 1',
+        'duration_seconds_bucket{le="1"} 3',
+        'duration_seconds_bucket{le="+Inf"} 4',
+        "duration_seconds_sum 4.05",
+        "duration_seconds_count 4",
+    ]
+
+
+def test_gauge_callback_is_read_at_render_and_failures_render_nothing():
+    values = {("checkedout",): 2}
+
+    def pool_status():
+        if values is None:
+            raise RuntimeError("database is down")
+        return values
+
+    gauge = Gauge("pool_connections", "Pool usage.", ("state",), callback=pool_status)
+    registry = Registry()
+    registry.register(gauge)
+
+    assert 'pool_connections{state="checkedout"} 2' in registry.render()
+    values = None
+    assert gauge.samples() == []
+
+
+def test_wrong_labels_are_rejected():
+    counter = Counter("requests_total", "Requests.", ("method", "route"))
+
+    with pytest.raises(ValueError):
+        counter.inc("GET")
+
+
+def test_middleware_records_requests_by_route_template():
+    app = FastAPI()
+    app.add_middleware(PrometheusMiddleware)
+
+    @app.get("/jobs/{job_id}")
+    def get_job(job_id: int) -> dict:
+        if job_id == 0:
+            raise HTTPException(status_code=404)
+        return {"id": job_id}
+
+    @app.get("/metrics")
+    def metrics() -> str:
+        return ""
+
+    client = TestClient(app)
+    ok, not_found = ("GET", "/jobs/{job_id}", "200"), ("GET", "/jobs/{job_id}", "404")
+    before = HTTP_REQUESTS.value(*ok), HTTP_REQUESTS.value(*not_found), HTTP_REQUESTS.value("GET", "/metrics", "200")
+
+    client.get("/jobs/1")
+    client.get("/jobs/2")
+    client.get("/jobs/0")
+    client.get("/metrics")
+
+    after = HTTP_REQUESTS.value(*ok), HTTP_REQUESTS.value(*not_found), HTTP_REQUESTS.value("GET", "/metrics", "200")
+    assert [a - b for a, b in zip(after, before)] == [2, 1, 0]
+    assert HTTP_REQUESTS_IN_FLIGHT.value() == 0
+    count = 'http_request_duration_seconds_count{method="GET",route="/jobs/{job_id}"}'
+    assert any(line.startswith(count) for line in HTTP_REQUEST_DURATION.samples())
@@ -0,0 +1,108 @@
+import importlib
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.sparse import csr_matrix
+from streamsight.matrix import InteractionMatrix
+from streamsight.settings import SlidingWindowSetting
+
+
+def _import(module: str):
+    """Import a module depending on streamsight's registries, which fail to import on some Python versions."""
+    try:
+        return importlib.import_module(module)
+    except Exception as e:
+        pytest.skip(f"{module} cannot be imported: {e}")
+
+
+@pytest.fixture
+def window_parallel():
+    return _import("streamsight_studio_backend.services.window_parallel")
+
+
+class _Recorder:
+    """Algorithm recording the data it is fitted on and predicts for."""
+
+    def __init__(self) -> None:
+        self.calls = []
+
+    def fit(self, data) -> None:
+        self.calls.append(("fit", data.num_interactions, data.user_item_shape))
+
+    def predict(self, data) -> csr_matrix:
+        self.calls.append(("predict", data.num_interactions, data.user_item_shape))
+        return csr_matrix(data.user_item_shape)
+
+
+def _matrix() -> InteractionMatrix:
+    """Users joining over time, each interacting with a few items."""
+    rng = np.random.default_rng(0)
+    num = 200
+    df = pd.DataFrame(
+        {
+            InteractionMatrix.INTERACTION_IX: np.arange(num),
+            InteractionMatrix.USER_IX: np.sort(rng.integers(0, 40, num)),
+            InteractionMatrix.ITEM_IX: rng.integers(0, 25, num),
+            InteractionMatrix.TIMESTAMP_IX: np.arange(num),
+        }
+    )
+    return InteractionMatrix(
+        df,
+        item_ix=InteractionMatrix.ITEM_IX,
+        user_ix=InteractionMatrix.USER_IX,
+        timestamp_ix=InteractionMatrix.TIMESTAMP_IX,
+        skip_df_processing=True,
+    )
+
+
+def _evaluator(recorder: _Recorder | None = None):
+    from streamsight.evaluators import EvaluatorPipeline
+
+    setting = SlidingWindowSetting(background_t=50, window_size=40, top_K=5)
+    setting.split(_matrix())
+    algo_state_mgr = {"algorithm": SimpleNamespace(algo_ptr=recorder or _Recorder(), algorithm_uuid="algorithm")}
+    return EvaluatorPipeline(algo_state_mgr=algo_state_mgr, metric_entries=[], setting=setting, metric_k=5)
+
+
+def test_known_algorithms_are_stateless_unless_flagged_otherwise(window_parallel):
+    params = {"K": 10, "stateless": False}
+
+    assert not window_parallel.is_stateless("ItemKNN", params)
+    assert params == {"K": 10}
+    assert window_parallel.is_stateless("ItemKNN", {"K": 10})
+    assert not window_parallel.is_stateless("EASE", {})
+    assert window_parallel.is_stateless("EASE", {"stateless": True})
+
+
+def test_windows_are_masked_as_in_a_sequential_run(window_parallel):
+    sequential = _Recorder()
+    _evaluator(sequential).run()
+
+    windows = [
+        (window, timestamp, ("fit", training.num_interactions, training.user_item_shape), unlabeled.user_item_shape)
+        for window, timestamp, training, unlabeled, _ in window_parallel._iter_window_inputs(_evaluator())
+    ]
+
+    fits = [call for call in sequential.calls if call[0] == "fit"]
+    predicts = [call[2] for call in sequential.calls if call[0] == "predict"]
+    assert [window for window, *_ in windows] == list(range(len(predicts)))
+    assert [timestamp for _, timestamp, _, _ in windows] == [50, 90, 130, 170]
+    assert [fit for _, _, fit, _ in windows] == fits[: len(windows)]
+    assert [shape for *_, shape in windows] == predicts
+
+
+def test_merged_scores_are_added_to_the_accumulator(window_parallel):
+    from streamsight.evaluators.accumulator import MetricAccumulator
+
+    evaluator, other = SimpleNamespace(_acc=MetricAccumulator()), SimpleNamespace(_acc=MetricAccumulator())
+    evaluator._acc.add(SimpleNamespace(identifier="RecallK_t=90"), "ItemKNN_1")
+    other._acc.add(SimpleNamespace(identifier="RecallK_t=90"), "EASE_2")
+
+    window_parallel.merge_accumulators(evaluator, other)
+
+    assert {name: list(metrics) for name, metrics in evaluator._acc.acc.items()} == {
+        "ItemKNN_1": ["RecallK_t=90"],
+        "EASE_2": ["RecallK_t=90"],
+    }